@@ -21,6 +21,7 @@ from dataclasses import dataclass
 import numpy as np
 import pandas as pd
 
+from src.data.path_kernels import first_hits
 from src.utils.io import DATA_RAW
 
 
@@ -133,10 +134,10 @@ def label_eurusd_trade(
         df["atr"] = atr
 
     dates = df.index.to_numpy()
-    o = df["Open"].to_numpy()
-    h = df["High"].to_numpy()
-    l = df["Low"].to_numpy()
-    c = df["Close"].to_numpy()
+    o = df["Open"].to_numpy(dtype="float64")
+    h = df["High"].to_numpy(dtype="float64")
+    l = df["Low"].to_numpy(dtype="float64")
+    c = df["Close"].to_numpy(dtype="float64")
 
     n = int(df.shape[0])
     labels = np.array(["neutral"] * n, dtype=object)
@@ -147,104 +148,78 @@ def label_eurusd_trade(
     exit_reason = np.array([""] * n, dtype=object)
     hit_offset = np.full(n, -1, dtype=int)
 
-    def _resolve_same_day_hit(tp_hit: bool, sl_hit: bool) -> str | None:
-        if tp_hit and sl_hit:
-            return "tp" if params.intraday_tie_breaker == "tp" else "sl"
-        if tp_hit:
-            return "tp"
-        if sl_hit:
-            return "sl"
-        return None
-
-    for i in range(n):
-        entry_idx = i if params.entry == "close" else i + 1
-        end_idx = i + params.horizon_days
-        if entry_idx >= n or end_idx >= n:
-            continue
-
-        if params.entry == "close":
-            ent = c[entry_idx]
-            ent_dt = dates[entry_idx]
-            start_idx = i + 1  # wir nutzen t+1..t+h als Hit-Fenster
-        else:
-            ent = o[entry_idx]
-            ent_dt = dates[entry_idx]
-            start_idx = entry_idx  # t+1..t+h
-
-        if not np.isfinite(ent) or ent <= 0:
-            continue
-
+    # Kandidaten: Entry und Horizont-Ende liegen innerhalb der Daten.
+    rows = np.arange(n)
+    entry_idx = rows if params.entry == "close" else rows + 1
+    end_idx = rows + params.horizon_days
+    rows = rows[(entry_idx < n) & (end_idx < n)]
+    entry_idx = entry_idx[rows]
+    end_idx = end_idx[rows]
+
+    ent = c[entry_idx] if params.entry == "close" else o[entry_idx]
+    valid = np.isfinite(ent) & (ent > 0)
+
+    if params.sl_mode == "fixed_pct":
+        sl_pct = np.full(rows.size, float(params.sl_pct))
+    elif params.sl_mode == "atr":
+        atr_at_entry = df["atr"].to_numpy(dtype="float64")[entry_idx]
+        valid &= np.isfinite(atr_at_entry)
+        sl_pct = float(params.atr_mult) * atr_at_entry / ent
+    else:
         sl_pct = None
-        if params.sl_mode == "fixed_pct":
-            sl_pct = float(params.sl_pct)
-        elif params.sl_mode == "atr":
-            if atr is None or not np.isfinite(float(df["atr"].iloc[entry_idx])):
-                continue
-            sl_pct = float(params.atr_mult) * float(df["atr"].iloc[entry_idx]) / ent
-        else:
-            sl_pct = None
-
-        tp_long = ent * (1.0 + float(params.tp_pct))
-        sl_long = ent * (1.0 - sl_pct) if sl_pct is not None else -np.inf
-        tp_short = ent * (1.0 - float(params.tp_pct))
-        sl_short = ent * (1.0 + sl_pct) if sl_pct is not None else np.inf
-
-        # Track first outcome for long/short
-        long_hit: tuple[int, str] | None = None  # (idx, 'tp'|'sl')
-        short_hit: tuple[int, str] | None = None
-
-        for j in range(start_idx, end_idx + 1):
-            # Long: TP if High >= tp_long, SL if Low <= sl_long
-            long_out = _resolve_same_day_hit(h[j] >= tp_long, l[j] <= sl_long)
-            if long_hit is None and long_out is not None:
-                long_hit = (j, long_out)
-
-            # Short: TP if Low <= tp_short, SL if High >= sl_short
-            short_out = _resolve_same_day_hit(l[j] <= tp_short, h[j] >= sl_short)
-            if short_hit is None and short_out is not None:
-                short_hit = (j, short_out)
-
-            if long_hit is not None and short_hit is not None:
-                # wir kennen beide ersten Hits – weitere Tage sind irrelevant
-                break
-
-        cand: list[tuple[str, int, str]] = []
-        if long_hit is not None and long_hit[1] == "tp":
-            cand.append(("up", long_hit[0], "tp"))
-        if short_hit is not None and short_hit[1] == "tp":
-            cand.append(("down", short_hit[0], "tp"))
-
-        chosen: tuple[str, int, str] | None = None
-        if len(cand) == 1:
-            chosen = cand[0]
-        elif len(cand) == 2:
-            # Konflikt: sowohl Long-TP als auch Short-TP innerhalb des Horizonts möglich.
-            # Entscheide nach dem früheren Treffer, oder fallback nach Policy.
-            cand.sort(key=lambda x: x[1])
-            if cand[0][1] < cand[1][1]:
-                chosen = cand[0]
-            else:
-                if params.conflict_policy == "neutral":
-                    chosen = None
-                elif params.conflict_policy == "prefer_down":
-                    chosen = next((x for x in cand if x[0] == "down"), None)
-                else:
-                    # first (bei Gleichstand prefer_down wie im v1 Bias)
-                    chosen = next((x for x in cand if x[0] == "down"), cand[0])
-
-        # Wenn kein TP erreicht wurde, bleibt neutral.
-        if chosen is None:
-            entry_price[i] = ent
-            entry_date[i] = ent_dt
-            continue
-
-        lab, hit_j, reason = chosen
-        labels[i] = lab
-        entry_price[i] = ent
-        entry_date[i] = ent_dt
-        exit_date[i] = dates[hit_j]
-        exit_reason[i] = reason
-        hit_offset[i] = int(hit_j - i)
+
+    rows = rows[valid]
+    entry_idx = entry_idx[valid]
+    end_idx = end_idx[valid]
+    ent = ent[valid]
+    if sl_pct is not None:
+        sl_pct = sl_pct[valid]
+
+    tp_long = ent * (1.0 + float(params.tp_pct))
+    sl_long = ent * (1.0 - sl_pct) if sl_pct is not None else np.full(rows.size, -np.inf)
+    tp_short = ent * (1.0 - float(params.tp_pct))
+    sl_short = ent * (1.0 + sl_pct) if sl_pct is not None else np.full(rows.size, np.inf)
+
+    # Hit-Fenster ist t+1..t+h (bei entry='close' ab t+1, bei 'next_open' ab Entry-Tag t+1).
+    start_idx = rows + 1
+    stop_idx = end_idx + 1
+    # Long: TP if High >= tp_long, SL if Low <= sl_long
+    long_tp, long_sl = first_hits(h, l, start_idx, stop_idx, tp_long, sl_long)
+    # Short: TP if Low <= tp_short, SL if High >= sl_short
+    short_sl, short_tp = first_hits(h, l, start_idx, stop_idx, sl_short, tp_short)
+
+    def _tp_is_first_outcome(tp_idx: np.ndarray, sl_idx: np.ndarray) -> np.ndarray:
+        tp_hit = tp_idx >= 0
+        sl_hit = sl_idx >= 0
+        same_day = tp_hit & sl_hit & (tp_idx == sl_idx)
+        tp_first = tp_hit & (~sl_hit | (tp_idx < sl_idx))
+        if params.intraday_tie_breaker == "tp":
+            tp_first = tp_first | same_day
+        return tp_first
+
+    up_cand = _tp_is_first_outcome(long_tp, long_sl)
+    down_cand = _tp_is_first_outcome(short_tp, short_sl)
+
+    # Konflikt: sowohl Long-TP als auch Short-TP innerhalb des Horizonts möglich.
+    # Entscheide nach dem früheren Treffer, oder fallback nach Policy
+    # ('first' bei Gleichstand prefer_down wie im v1 Bias).
+    both = up_cand & down_cand
+    choose_up = up_cand & (~down_cand | (long_tp < short_tp))
+    choose_down = down_cand & (~up_cand | (short_tp < long_tp))
+    if params.conflict_policy != "neutral":
+        choose_down = choose_down | (both & (long_tp == short_tp))
+
+    entry_price[rows] = ent
+    entry_date[rows] = dates[entry_idx]
+
+    # Wenn kein TP erreicht wurde, bleibt neutral.
+    for chosen, lab, hit_j in ((choose_up, "up", long_tp), (choose_down, "down", short_tp)):
+        sig = rows[chosen]
+        hit_j = hit_j[chosen]
+        labels[sig] = lab
+        exit_date[sig] = dates[hit_j]
+        exit_reason[sig] = "tp"
+        hit_offset[sig] = hit_j - sig
 
     out = df.copy()
     out["label"] = labels
@@ -46,6 +46,11 @@ from src.models.train_xgboost_two_stage import (
     train_xgb_binary,
     get_feature_cols,
 )
+from src.utils.io import read_table, resolve_table_path, table_columns
+
+
+# Spalten des Trainingsdatensatzes, die der Report nutzt (Features werden nicht gelesen).
+REPORT_DATASET_COLUMNS = ["date", "label", "signal", "direction", "lookahead_return", "Close", "High", "Low"]
 
 
 # Beschreibungen der wichtigsten Features für die Feature-Seite
@@ -152,13 +157,16 @@ def load_training_dataset(project_root: Path, results: Dict[str, Any]) -> pd.Dat
     if not ds_path_str:
         raise KeyError("dataset_path fehlt im results['config']-Block.")
     ds_path = Path(ds_path_str)
-    if not ds_path.is_file():
+    if resolve_table_path(ds_path) is None:
         # Falls der Pfad relativ gespeichert wurde, relativ zur Projektwurzel interpretieren
         ds_path = (project_root / ds_path).resolve()
-    if not ds_path.is_file():
+    if resolve_table_path(ds_path) is None:
         raise FileNotFoundError(f"Trainingsdatensatz nicht gefunden: {ds_path}")
 
-    df = pd.read_csv(ds_path, parse_dates=["date"])
+    # Der Report braucht nur Datum, Targets und ggf. Kurse – Feature-Spalten nicht.
+    available = table_columns(ds_path)
+    columns = [col for col in REPORT_DATASET_COLUMNS if col in available]
+    df = read_table(ds_path, columns=columns, parse_dates=["date"])
     return df.sort_values("date").reset_index(drop=True)
 
 
@@ -203,8 +211,8 @@ def load_fx_labels_for_exp(project_root: Path, exp_id: str) -> pd.DataFrame | No
         base_dir / "eurusd_labels.csv",
     ]
     for path in candidates:
-        if path.is_file():
-            df = pd.read_csv(path, parse_dates=["Date"])
+        if resolve_table_path(path) is not None:
+            df = read_table(path, parse_dates=["Date"])
             df = df.sort_values("Date").set_index("Date")
             return df
 
@@ -3576,11 +3584,11 @@ def add_price_with_labels_page(
         safe_id = str(exp_config.get("exp_id")).replace(" ", "_")
         fx_dir = project_root / "data" / "processed" / "fx"
         labels_path = fx_dir / f"eurusd_labels__{safe_id}.csv"
-        if not labels_path.is_file():
+        if resolve_table_path(labels_path) is None:
             # Fallback: aktuelle Standarddatei
             labels_path = fx_dir / "eurusd_labels.csv"
-        if labels_path.is_file():
-            fx = pd.read_csv(labels_path, parse_dates=["Date"])
+        if resolve_table_path(labels_path) is not None:
+            fx = read_table(labels_path, columns=["Date", "Close"], parse_dates=["Date"])
             fx = fx.rename(columns={"Date": "date"})
             df_plot = df_plot.merge(fx[["date", "Close"]], on="date", how="left")
         else:
@@ -3718,13 +3726,14 @@ def _ensure_close_with_labels(
     safe_id = str(exp_config.get("exp_id")).replace(" ", "_")
     fx_dir = project_root / "data" / "processed" / "fx"
     labels_path = fx_dir / f"eurusd_labels__{safe_id}.csv"
-    if not labels_path.is_file():
+    if resolve_table_path(labels_path) is None:
         labels_path = fx_dir / "eurusd_labels.csv"
-    if labels_path.is_file():
-        fx = pd.read_csv(labels_path, parse_dates=["Date"])
+    if resolve_table_path(labels_path) is not None:
+        available = set(table_columns(labels_path))
+        cols = ["Date"] + [c for c in needed if c in available]
+        fx = read_table(labels_path, columns=cols, parse_dates=["Date"])
         fx = fx.rename(columns={"Date": "date"})
-        cols = ["date"] + [c for c in needed if c in fx.columns]
-        df_plot = df_plot.merge(fx[cols], on="date", how="left")
+        df_plot = df_plot.merge(fx, on="date", how="left")
     else:
         print("[warn] Keine Close-Kurse gefunden – Segmentplots übersprungen.")
     return df_plot
@@ -3,28 +3,78 @@
 from __future__ import annotations
 
 import argparse
+import json
 from pathlib import Path
 
 import pandas as pd
 
-from src.features.eurusd_features import (
-    add_eurusd_features,
-    add_price_features,
-    add_news_features,
-    add_calendar_features,
-    add_holiday_features,
+from src.features import eurusd_features, holidays, registry, rolling
+from src.features import store as feature_store
+from src.features.eurusd_features import NEWS_LOOKBACK_ROWS, PRICE_LOOKBACK_ROWS
+from src.features.registry import compute_features, feature_names
+from src.features.store import STORE_GROUPS, join_price_features, load_price_feature_store
+from src.utils.cache import cached_frame, code_fingerprint, file_fingerprint
+from src.utils.io import (
+    DATA_PROCESSED,
+    TABLE_FORMATS,
+    append_table,
+    last_table_date,
+    read_table,
+    read_table_params,
+    resolve_table_path,
+    table_files,
+    table_params_match,
+    write_table,
+    write_table_params,
 )
-from src.utils.io import DATA_PROCESSED
+
+
+# Spalten mit festem Speicher-Dtype (siehe training_column_dtypes).
+TRAINING_INT8_COLS = ("signal", "month", "week", "quarter")
+TRAINING_FLOAT64_COLS = ("lookahead_return", "Open", "High", "Low", "Close", "Volume")
+
+
+NEWS_FEATURES_PATH = DATA_PROCESSED / "news" / "eodhd_daily_features.csv"
+
+# Feature-Gruppen (siehe src.features.eurusd_features): Preis-/Kalender-Features aus dem
+# Feature-Store der Preisquelle (volle Historie), News-abhängige erst nach dem News-Merge.
+LABEL_FEATURE_GROUPS = STORE_GROUPS
+MERGED_FEATURE_GROUPS = ("sentiment", "news")
+
+
+def _group_features(*groups: str) -> list[str]:
+    return [name for group in groups for name in feature_names(group)]
+
+
+# Spalten des Trainingsdatensatzes: Targets, Features (aus dem Register) und Rohwerte.
+TRAINING_COLUMNS = [
+    "date",
+    "label",
+    "signal",
+    "direction",
+    *_group_features("season", "candle", "sentiment", "price", "news", "cal", "hol"),
+    "lookahead_return",
+    *feature_names("news_daily"),
+]
 
 
 def load_news_features(path: Path | None = None) -> pd.DataFrame:
     """Lädt die zuvor erzeugten Tagesfeatures aus data/processed/news."""
     if path is None:
-        path = DATA_PROCESSED / "news" / "eodhd_daily_features.csv"
-    df = pd.read_csv(path, parse_dates=["date"])
+        path = NEWS_FEATURES_PATH
+    df = read_table(path, parse_dates=["date"])
     return df
 
 
+def labels_path(exp_id: str | None = None) -> Path:
+    """Pfad der Label-Datei (``eurusd_labels[__<exp_id>].csv``) in data/processed/fx."""
+    base_dir = DATA_PROCESSED / "fx"
+    if exp_id:
+        safe_suffix = exp_id.replace(" ", "_")
+        return base_dir / f"eurusd_labels__{safe_suffix}.csv"
+    return base_dir / "eurusd_labels.csv"
+
+
 def load_labels(path: Path | None = None, exp_id: str | None = None) -> pd.DataFrame:
     """Lädt die EURUSD-Labels und benennt die Datums-Spalte für den Merge um.
 
@@ -33,18 +83,100 @@ def load_labels(path: Path | None = None, exp_id: str | None = None) -> pd.DataF
     Standarddatei ``eurusd_labels.csv`` verwendet.
     """
     if path is None:
-        base_dir = DATA_PROCESSED / "fx"
-        if exp_id:
-            safe_suffix = exp_id.replace(" ", "_")
-            path = base_dir / f"eurusd_labels__{safe_suffix}.csv"
-        else:
-            path = base_dir / "eurusd_labels.csv"
-    df = pd.read_csv(path, parse_dates=["Date"])
+        path = labels_path(exp_id)
+    df = read_table(path, parse_dates=["Date"])
     df = df.rename(columns={"Date": "date"})
     return df
 
 
-def build_training_dataframe(exp_id: str | None = None) -> pd.DataFrame:
+def _training_cache_parts(feature_mode: str, input_paths: list[Path]) -> dict:
+    """Cache-Key-Bestandteile: Inhalt der Eingabedateien + Feature-Modus + Code-Version.
+
+    Die Experiment-ID fliesst bewusst nicht ein: identische Labels unter
+    verschiedenen IDs ergeben denselben Datensatz.
+    """
+    resolved = []
+    for path in input_paths:
+        found = resolve_table_path(path)
+        if found is None:
+            raise FileNotFoundError(path)
+        resolved.append(found)
+    return {
+        "inputs": [file_fingerprint(p) for found in resolved for p in table_files(found)],
+        "feature_mode": feature_mode,
+        "code": code_fingerprint(
+            __file__,
+            eurusd_features.__file__,
+            registry.__file__,
+            rolling.__file__,
+            holidays.__file__,
+            feature_store.__file__,
+        ),
+    }
+
+
+def _lookback_start(dates: pd.Series, since: pd.Timestamp, rows: int) -> pd.Timestamp:
+    """Frühestes Datum, sodass vor dem ersten Tag nach ``since`` ``rows`` Kontextzeilen liegen."""
+    before = dates[dates <= since].sort_values()
+    return before.iloc[-rows] if len(before) >= rows else dates.min()
+
+
+def experiment_price_source(exp_id: str | None = None) -> dict:
+    """``price_source``/``drop_weekends`` eines Experiments.
+
+    Gelesen aus ``data/processed/experiments/<exp_id>_config.json`` (``label_params``);
+    ohne Config gelten die Defaults von ``label_eurusd``.
+    """
+    params = {"price_source": "yahoo", "drop_weekends": False}
+    if exp_id:
+        cfg_path = DATA_PROCESSED / "experiments" / f"{exp_id.replace(' ', '_')}_config.json"
+        if cfg_path.is_file():
+            with cfg_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            label_params = data.get("label_params", data) if isinstance(data, dict) else {}
+            params.update({k: label_params[k] for k in params if label_params.get(k) is not None})
+    return params
+
+
+def _add_price_features(labels: pd.DataFrame, exp_id: str | None, use_store: bool) -> pd.DataFrame:
+    """Preis-/Kalender-Features für die Label-Tage.
+
+    Standard: Join gegen den Feature-Store der Preisquelle (einmal pro Rohdatei
+    berechnet, von allen Experimenten geteilt). Passt der Store nicht zu den Labels
+    (andere Preisquelle, fehlende Tage, Lücken), wird direkt auf den Labels gerechnet.
+    """
+    names = _group_features(*LABEL_FEATURE_GROUPS)
+    if use_store:
+        source = experiment_price_source(exp_id)
+        try:
+            store = load_price_feature_store(
+                source["price_source"], drop_weekends=bool(source["drop_weekends"])
+            )
+            return join_price_features(labels, store, names)
+        except (OSError, ValueError) as exc:
+            print(f"[info] Feature-Store nicht nutzbar ({exc}); Preis-Features werden direkt berechnet.")
+    return compute_features(labels, names)
+
+
+def _add_targets(labels: pd.DataFrame) -> pd.DataFrame:
+    """Zusätzliche Zielvariablen für das Zwei-Stufen-Modell (in-place)."""
+    # signal: 1 = Bewegung (up/down), 0 = neutral.
+    labels["signal"] = (labels["label"] != "neutral").astype(int)
+
+    # direction: nur für Tage mit Bewegung relevant.
+    # 1 = up, 0 = down, NaN = neutral (wird für das Richtungsmodell ignoriert).
+    direction_map = {"down": 0, "up": 1}
+    labels["direction"] = labels["label"].map(direction_map)
+    return labels
+
+
+def build_training_dataframe(
+    exp_id: str | None = None,
+    *,
+    use_cache: bool = True,
+    since: pd.Timestamp | None = None,
+    use_store: bool = True,
+) -> pd.DataFrame:
     """Baut den vollständigen Trainings-DataFrame für das Zwei-Stufen-Modell.
 
     Schritte:
@@ -59,231 +191,155 @@ def build_training_dataframe(exp_id: str | None = None) -> pd.DataFrame:
     exp_id:
         Optionale Experiment-ID, um eine bestimmte Label-Datei
         (``eurusd_labels__<exp_id>.csv``) zu verwenden.
+    use_cache:
+        Ergebnis über den Artefakt-Cache (data/processed/cache/training) laden
+        bzw. ablegen; bei unveränderten Eingabedateien wird nichts neu berechnet.
+    since:
+        Optional (inkrementelle Updates): nur Zeilen mit ``date > since`` zurückgeben.
+        Gerechnet wird dann nur auf dem Ende der Historie plus dem Vorlauf, den die
+        Rolling-Features brauchen (``PRICE_LOOKBACK_ROWS``/``NEWS_LOOKBACK_ROWS``).
+    use_store:
+        Preis-/Kalender-Features aus dem Feature-Store der Preisquelle joinen
+        (``src.features.store``) statt sie auf den Labels neu zu berechnen.
     """
+    if since is not None:
+        return _build_training_dataframe(exp_id, since=pd.Timestamp(since), use_store=use_store)
+    if not use_cache:
+        return _build_training_dataframe(exp_id, use_store=use_store)
+    parts = _training_cache_parts("news", [NEWS_FEATURES_PATH, labels_path(exp_id)])
+    return cached_frame("training", parts, lambda: _build_training_dataframe(exp_id, use_store=use_store))
+
+
+def _build_training_dataframe(
+    exp_id: str | None,
+    since: pd.Timestamp | None = None,
+    *,
+    use_store: bool = True,
+) -> pd.DataFrame:
     news = load_news_features()
     labels = load_labels(exp_id=exp_id)
+    if since is not None:
+        common = labels.loc[labels["date"].isin(news["date"]), "date"]
+        start = min(
+            _lookback_start(labels["date"], since, PRICE_LOOKBACK_ROWS),
+            _lookback_start(common, since, NEWS_LOOKBACK_ROWS),
+        )
+        labels = labels[labels["date"] >= start]
 
     # Wichtig: Preis-Features sollten auf der vollen Preis-Historie berechnet werden,
     # auch wenn die News erst später starten (z.B. ab 2020). Sonst verlieren Rolling-
     # Features (5d/30d) am Anfang der News-Periode den Kontext und werden unnötig NaN.
-    labels = labels.sort_values("date").copy()
-
-    # Zusätzliche Zielvariablen für das Zwei-Stufen-Modell:
-    # signal: 1 = Bewegung (up/down), 0 = neutral.
-    labels["signal"] = (labels["label"] != "neutral").astype(int)
-
-    # direction: nur für Tage mit Bewegung relevant.
-    # 1 = up, 0 = down, NaN = neutral (wird für das Richtungsmodell ignoriert).
-    direction_map = {"down": 0, "up": 1}
-    labels["direction"] = labels["label"].map(direction_map)
-
-    # Kalender-basierte Zusatzfeatures:
-    # Monat (1–12), Kalenderwoche (ISO-Standard) und Quartal (1–4).
-    labels["month"] = labels["date"].dt.month
-    iso = labels["date"].dt.isocalendar()
-    labels["week"] = iso.week.astype(int)
-    labels["quarter"] = labels["date"].dt.quarter
-
-    # Preisbasierte Tagesfeatures aus High/Low/Open/Close:
-    # 1) Intraday-Spanne in absoluten Punkten.
-    labels["intraday_range"] = labels["High"] - labels["Low"]
-    # 2) Intraday-Spanne relativ zum Schlusskurs (Volatilität eines Tages).
-    labels["intraday_range_pct"] = labels["intraday_range"] / labels["Close"]
-    # 3) Kerzenkoerper: Close minus Open (positiv = bullische Kerze).
-    labels["body"] = labels["Close"] - labels["Open"]
-    labels["body_pct"] = labels["body"] / labels["Close"]
-    # 4) Docht/Lunte: Abstand vom Kerzenkoerper zu High/Low.
-    labels["upper_shadow"] = labels["High"] - labels[["Open", "Close"]].max(axis=1)
-    labels["lower_shadow"] = labels[["Open", "Close"]].min(axis=1) - labels["Low"]
-
-    # Preis-Features (rolling etc.) auf kompletter Preis-Historie berechnen
-    # (News-Features werden später auf dem gemergten Zeitraum berechnet).
-    labels = add_price_features(labels)
-
-    # Sentiment-basierte abgeleitete Features:
-    # Anteil positiver / negativer Sentiment-Anteile (auf Basis avg_pos/avg_neg).
-    # (pos_share/neg_share + News-Rolling erst nach News-Merge, damit keine Stub-Werte.)
+    # Kalender/Holiday, Kerzenform und price_* kommen aus dem Feature-Store der Preisquelle.
+    labels = _add_price_features(labels, exp_id, use_store)
+    labels = _add_targets(labels)
 
     # News ab Startdatum mergen: automatisch nur Zeiträume behalten, wo News existieren.
     merged = labels.merge(news, on="date", how="inner")
 
-    sentiment_denom = (merged["avg_pos"] + merged["avg_neg"]).replace(0, 1e-6)
-    merged["pos_share"] = merged["avg_pos"] / sentiment_denom
-    merged["neg_share"] = merged["avg_neg"] / sentiment_denom
-
-    # Nur News-Historie + Kalender/Holiday ergänzen (Preis-Features sind bereits da).
-    merged = add_news_features(merged)
-    merged = add_calendar_features(merged)
-    merged = add_holiday_features(merged)
+    # pos_share/neg_share + News-Rolling erst nach News-Merge, damit keine Stub-Werte
+    # (Preis- und Kalender-Features sind bereits da).
+    merged = compute_features(merged, _group_features(*MERGED_FEATURE_GROUPS))
 
     # Für das spätere Modell reichen News-Features + Label + Lookahead + neue Targets.
-    cols = [
-        "date",
-        "label",
-        "signal",
-        "direction",
-        "month",
-        "week",
-        "quarter",
-        "intraday_range",
-        "intraday_range_pct",
-        "body",
-        "body_pct",
-        "upper_shadow",
-        "lower_shadow",
-        "pos_share",
-        "neg_share",
-        # Zusätzliche Preis-Features
-        "price_close_ret_1d",
-        "price_close_ret_5d",
-        "price_range_pct_5d_std",
-        "price_body_pct_5d_mean",
-        "price_close_ret_30d",
-        "price_range_pct_30d_std",
-        "price_body_pct_30d_mean",
-        "price_body_vs_range",
-        "price_body_vs_range_5d_mean",
-        "price_shadow_balance",
-        "price_shadow_balance_5d_mean",
-        # News-Historie / -Intensität
-        "news_article_count_3d_sum",
-        "news_article_count_7d_sum",
-        "news_pos_share_5d_mean",
-        "news_neg_share_5d_mean",
-        "news_article_count_lag1",
-        "news_pos_share_lag1",
-        "news_neg_share_lag1",
-        # Kalender-Features
-        "cal_dow",
-        "cal_day_of_month",
-        "cal_is_monday",
-        "cal_is_friday",
-        "cal_is_month_start",
-        "cal_is_month_end",
-        # US-Feiertags-Features
-        "hol_is_us_federal_holiday",
-        "hol_is_day_before_us_federal_holiday",
-        "hol_is_day_after_us_federal_holiday",
-        "lookahead_return",
-        "article_count",
-        "avg_polarity",
-        "avg_neg",
-        "avg_neu",
-        "avg_pos",
-    ]
-    merged = merged[cols]
+    merged = merged[TRAINING_COLUMNS]
+    if since is not None:
+        merged = merged[merged["date"] > since]
     return merged
 
 
-def build_price_only_training_dataframe_from_labels(exp_id: str | None = None) -> pd.DataFrame:
+def build_price_only_training_dataframe_from_labels(
+    exp_id: str | None = None,
+    *,
+    use_cache: bool = True,
+    since: pd.Timestamp | None = None,
+    use_store: bool = True,
+) -> pd.DataFrame:
     """Baut einen Trainings-DataFrame nur aus FX-Labels (ohne News-Merge).
 
     Die Struktur orientiert sich an ``build_training_dataframe``, damit
     das Trainings-Notebook denselben Pfad benutzen kann, aber alle
     News-abhängigen Features werden später im Price-only-Modus
     aus ``feature_cols`` herausgefiltert.
+
+    ``use_cache``/``since``/``use_store`` wie bei ``build_training_dataframe``.
     """
-    labels = load_labels(exp_id=exp_id)
-    merged = labels.copy()
+    if since is not None:
+        return _build_price_only_training_dataframe(exp_id, since=pd.Timestamp(since), use_store=use_store)
+    if not use_cache:
+        return _build_price_only_training_dataframe(exp_id, use_store=use_store)
+    parts = _training_cache_parts("price_only", [labels_path(exp_id)])
+    return cached_frame(
+        "training", parts, lambda: _build_price_only_training_dataframe(exp_id, use_store=use_store)
+    )
 
-    # Zielvariablen wie im Standard-DataFrame
-    merged["signal"] = (merged["label"] != "neutral").astype(int)
-    direction_map = {"down": 0, "up": 1}
-    merged["direction"] = merged["label"].map(direction_map)
-
-    # Kalender-Features
-    merged["month"] = merged["date"].dt.month
-    iso = merged["date"].dt.isocalendar()
-    merged["week"] = iso.week.astype(int)
-    merged["quarter"] = merged["date"].dt.quarter
-
-    # Preisbasierte Tagesfeatures
-    merged["intraday_range"] = merged["High"] - merged["Low"]
-    merged["intraday_range_pct"] = merged["intraday_range"] / merged["Close"]
-    merged["body"] = merged["Close"] - merged["Open"]
-    merged["body_pct"] = merged["body"] / merged["Close"]
-    merged["upper_shadow"] = merged["High"] - merged[["Open", "Close"]].max(axis=1)
-    merged["lower_shadow"] = merged[["Open", "Close"]].min(axis=1) - merged["Low"]
 
+def _build_price_only_training_dataframe(
+    exp_id: str | None,
+    since: pd.Timestamp | None = None,
+    *,
+    use_store: bool = True,
+) -> pd.DataFrame:
+    labels = load_labels(exp_id=exp_id)
+    if since is not None:
+        labels = labels[labels["date"] >= _lookback_start(labels["date"], since, PRICE_LOOKBACK_ROWS)]
     # Stub-News-Spalten für Price-Only-Modus:
-    # Die Funktion add_eurusd_features() erwartet News-Spalten (article_count, avg_polarity etc.),
+    # Die News-Features (pos_share, news_*) erwarten News-Spalten (article_count, avg_pos etc.),
     # auch wenn im Price-Only-Modus keine echten News-Daten vorhanden sind.
     # Durch das Setzen von Null-Werten können wir dieselbe Feature-Pipeline verwenden,
     # wobei die resultierenden news_*-Features später im Trainings-Notebook
     # aus feature_cols herausgefiltert werden.
     # Das vermeidet Code-Duplizierung und hält die Pipeline konsistent.
-    merged["article_count"] = 0.0
-    merged["avg_polarity"] = 0.0
-    merged["avg_neg"] = 0.0
-    merged["avg_neu"] = 1.0  # Neutral-Sentiment als Default (100% neutral)
-    merged["avg_pos"] = 0.0
-
-    sentiment_denom = (merged["avg_pos"] + merged["avg_neg"]).replace(0, 1e-6)
-    merged["pos_share"] = merged["avg_pos"] / sentiment_denom
-    merged["neg_share"] = merged["avg_neg"] / sentiment_denom
-
-    merged = add_eurusd_features(merged)
-
-    cols = [
-        "date",
-        "label",
-        "signal",
-        "direction",
-        "month",
-        "week",
-        "quarter",
-        "intraday_range",
-        "intraday_range_pct",
-        "body",
-        "body_pct",
-        "upper_shadow",
-        "lower_shadow",
-        "pos_share",
-        "neg_share",
-        "price_close_ret_1d",
-        "price_close_ret_5d",
-        "price_range_pct_5d_std",
-        "price_body_pct_5d_mean",
-        "price_close_ret_30d",
-        "price_range_pct_30d_std",
-        "price_body_pct_30d_mean",
-        "price_body_vs_range",
-        "price_body_vs_range_5d_mean",
-        "price_shadow_balance",
-        "price_shadow_balance_5d_mean",
-        "news_article_count_3d_sum",
-        "news_article_count_7d_sum",
-        "news_pos_share_5d_mean",
-        "news_neg_share_5d_mean",
-        "news_article_count_lag1",
-        "news_pos_share_lag1",
-        "news_neg_share_lag1",
-        "cal_dow",
-        "cal_day_of_month",
-        "cal_is_monday",
-        "cal_is_friday",
-        "cal_is_month_start",
-        "cal_is_month_end",
-        "hol_is_us_federal_holiday",
-        "hol_is_day_before_us_federal_holiday",
-        "hol_is_day_after_us_federal_holiday",
-        "lookahead_return",
-        "article_count",
-        "avg_polarity",
-        "avg_neg",
-        "avg_neu",
-        "avg_pos",
-    ]
-    merged = merged[cols]
+    merged = _add_price_features(labels, exp_id, use_store).assign(
+        article_count=0.0,
+        avg_polarity=0.0,
+        avg_neg=0.0,
+        avg_neu=1.0,  # Neutral-Sentiment als Default (100% neutral)
+        avg_pos=0.0,
+    )
+    merged = compute_features(merged, _group_features(*MERGED_FEATURE_GROUPS))
+    merged = _add_targets(merged)
+
+    merged = merged[TRAINING_COLUMNS]
+    if since is not None:
+        merged = merged[merged["date"] > since]
     return merged
 
-def save_training_dataframe(df: pd.DataFrame, path: Path | None = None) -> Path:
-    """Speichert das Training-CSV unter data/processed/datasets/."""
+
+def training_column_dtypes(df: pd.DataFrame) -> dict[str, str]:
+    """Explizite Speicher-Dtypes für den Trainingsdatensatz.
+
+    - label: Kategorie (int8-Codes), Targets/Kalender-Flags: int8
+    - lookahead_return und OHLC bleiben float64 (Trade-Simulation im Report)
+    - alle übrigen numerischen Features: float32 (XGBoost rechnet ohnehin in float32)
+    """
+    dtypes: dict[str, str] = {}
+    for col in df.columns:
+        if col == "label":
+            dtypes[col] = "category"
+        elif col in TRAINING_INT8_COLS or col.startswith(("cal_", "hol_")):
+            dtypes[col] = "int8"
+        elif col in TRAINING_FLOAT64_COLS:
+            dtypes[col] = "float64"
+        elif pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            dtypes[col] = "float32"
+    return dtypes
+
+
+def save_training_dataframe(
+    df: pd.DataFrame,
+    path: Path | None = None,
+    *,
+    fmt: str | None = None,
+    csv_export: bool = False,
+) -> Path:
+    """Speichert den Trainingsdatensatz unter data/processed/datasets/.
+
+    Standard ist Parquet mit expliziten Dtypes (siehe ``training_column_dtypes``);
+    ohne pyarrow bzw. mit ``fmt='csv'`` wird wie bisher eine CSV geschrieben.
+    """
     if path is None:
         path = DATA_PROCESSED / "datasets" / "eurusd_news_training.csv"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False)
-    return path
+    return write_table(df, path, dtypes=training_column_dtypes(df), fmt=fmt, csv_export=csv_export)
 
 
 def main() -> None:
@@ -308,23 +364,90 @@ def main() -> None:
             "und der Trainingsdatensatz zusätzlich mit dieser ID archiviert."
         ),
     )
+    parser.add_argument(
+        "--format",
+        choices=TABLE_FORMATS,
+        default=None,
+        help="Speicherformat des Datensatzes (Default: parquet, ohne pyarrow csv).",
+    )
+    parser.add_argument(
+        "--csv-export",
+        action="store_true",
+        help="Zusätzlich eine CSV-Kopie schreiben (z.B. für Excel).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Artefakt-Cache (data/processed/cache) nicht verwenden, Datensatz immer neu bauen.",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Preis-Features nicht aus dem Feature-Store (data/processed/feature_store) joinen, sondern neu rechnen.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Nur Tage nach dem letzten Datum des bestehenden Datensatzes berechnen und anhängen "
+            "(tägliches Update). Fehlt eine Datei, wird sie vollständig geschrieben."
+        ),
+    )
     args = parser.parse_args()
 
-    merged = build_training_dataframe(exp_id=args.exp_id)
-
     # 1) Standarddatei (aktuelle Version)
-    out_path = save_training_dataframe(merged)
-    print(f"[ok] Trainingsdatensatz (aktuell) gespeichert unter {out_path} ({merged.shape[0]} Zeilen)")
-
     # 2) Optionale Varianten-Datei mit Experiment-ID als Suffix
+    targets = {"aktuell": DATA_PROCESSED / "datasets" / "eurusd_news_training.csv"}
     if args.exp_id:
         safe_suffix = args.exp_id.replace(" ", "_")
-        alt_path = DATA_PROCESSED / "datasets" / f"eurusd_news_training__{safe_suffix}.csv"
-        save_training_dataframe(merged, alt_path)
-        print(
-            f"[ok] Trainingsdatensatz (Experiment) gespeichert unter "
-            f"{alt_path} ({merged.shape[0]} Zeilen)"
+        targets["Experiment"] = DATA_PROCESSED / "datasets" / f"eurusd_news_training__{safe_suffix}.csv"
+
+    # Wird mit jeder Datei gespeichert: "aktuell" kann von einem anderen Experiment stammen.
+    label_params = read_table_params(labels_path(args.exp_id))
+    table_params = {"exp_id": args.exp_id, "labels": label_params}
+
+    if not args.incremental:
+        merged = build_training_dataframe(
+            exp_id=args.exp_id, use_cache=not args.no_cache, use_store=not args.no_store
+        )
+        for name, path in targets.items():
+            out_path = save_training_dataframe(merged, path, fmt=args.format, csv_export=args.csv_export)
+            write_table_params(path, table_params)
+            print(f"[ok] Trainingsdatensatz ({name}) gespeichert unter {out_path} ({merged.shape[0]} Zeilen)")
+        return
+
+    # Inkrementell: pro Datei nur Tage nach dem letzten vorhandenen Datum anhängen –
+    # nur bei bekannten, gleichen Label-Parametern, sonst wird die Datei neu geschrieben.
+    last_dates = {}
+    for name, path in targets.items():
+        last = last_table_date(path, "date")
+        if last is not None and (label_params is None or not table_params_match(path, table_params)):
+            print(f"[info] Trainingsdatensatz ({name}): andere bzw. unbekannte Label-Parameter – wird neu geschrieben.")
+            last = None
+        last_dates[name] = last
+    known = [d for d in last_dates.values() if d is not None]
+    if len(known) < len(last_dates):
+        merged = build_training_dataframe(
+            exp_id=args.exp_id, use_cache=not args.no_cache, use_store=not args.no_store
+        )
+    else:
+        merged = build_training_dataframe(exp_id=args.exp_id, since=min(known), use_store=not args.no_store)
+    for name, path in targets.items():
+        last = last_dates[name]
+        if last is None:
+            out_path = save_training_dataframe(merged, path, fmt=args.format, csv_export=args.csv_export)
+            write_table_params(path, table_params)
+            print(f"[ok] Trainingsdatensatz ({name}) vollständig geschrieben: {out_path} ({merged.shape[0]} Zeilen)")
+            continue
+        new_rows = merged[merged["date"] > last]
+        if new_rows.empty:
+            print(f"[info] Trainingsdatensatz ({name}): keine neuen Tage nach {last.date()}.")
+            continue
+        out_path = append_table(
+            new_rows, path, dtypes=training_column_dtypes(new_rows), fmt=args.format, csv_export=args.csv_export
         )
+        write_table_params(path, table_params)
+        print(f"[ok] Trainingsdatensatz ({name}): {len(new_rows)} neue Tage angehängt an {out_path}")
 
 
 if __name__ == "__main__":
@@ -21,13 +21,346 @@ Die Ausgabe wird in data/processed/fx/eurusd_labels.csv gespeichert.
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
+from typing import Any, Final, Iterable, Mapping
 import argparse
+import hashlib
+import itertools
 import json
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 
-from src.utils.io import DATA_PROCESSED, DATA_RAW
+from src.data import path_kernels
+from src.data.path_kernels import first_crossing, first_hits
+from src.utils.cache import cached_frame, code_fingerprint, file_fingerprint
+from src.utils.io import (
+    DATA_PROCESSED,
+    DATA_RAW,
+    TABLE_FORMATS,
+    append_table,
+    last_table_date,
+    table_params_match,
+    write_table,
+    write_table_params,
+)
+
+
+def _forward_run_length(mask: np.ndarray) -> np.ndarray:
+    """Anzahl aufeinanderfolgender True-Werte ab Position i (inklusive i)."""
+    rev = mask[::-1].astype(np.int64)
+    csum = np.cumsum(rev)
+    reset = np.maximum.accumulate(np.where(rev == 0, csum, 0))
+    return (csum - reset)[::-1]
+
+
+def _validate_label_options(*, hit_source: str, intraday_tie_breaker: str) -> None:
+    if hit_source not in {"close", "hl"}:
+        raise ValueError("hit_source muss 'close' oder 'hl' sein.")
+    if intraday_tie_breaker not in {"down", "up"}:
+        raise ValueError("intraday_tie_breaker muss 'down' oder 'up' sein.")
+
+
+class _HorizonWindows:
+    """Pfad-Statistiken ueber alle Fenster [t, t+horizon_days] einer Preisreihe.
+
+    Wird einmal pro (horizon_days, hit_source) aufgebaut und kann dann fuer
+    beliebig viele Schwellen/Pfad-Filter wiederverwendet werden. Alle Arrays
+    haben Laenge ``m = n - horizon_days`` (nur Tage mit vollstaendigem Horizont).
+    """
+
+    def __init__(
+        self,
+        close: np.ndarray,
+        high: np.ndarray | None,
+        low: np.ndarray | None,
+        *,
+        horizon_days: int,
+        use_hl: bool,
+    ) -> None:
+        self.horizon_days = int(horizon_days)
+        self.use_hl = bool(use_hl and high is not None and low is not None)
+        self.m = len(close) - self.horizon_days
+        if self.m <= 0:
+            raise ValueError("Preisreihe ist kuerzer als horizon_days + 1.")
+
+        self.close = close
+        self.start = close[: self.m]
+        # Zeile i = Fenster close[i : i+horizon_days+1] (Views, keine Kopien).
+        self.segment = sliding_window_view(close, self.horizon_days + 1)
+        if self.use_hl:
+            # Intraday-Pfad: t+1..t+horizon_days (Starttag ausgeschlossen).
+            self.high_path = high
+            self.low_path = low
+            self.high_win = sliding_window_view(high[1:], self.horizon_days)
+            self.low_win = sliding_window_view(low[1:], self.horizon_days)
+        else:
+            self.high_path = close
+            self.low_path = close
+            self.high_win = self.segment[:, 1:]
+            self.low_win = self.segment[:, 1:]
+
+        self._first_up: dict[float, tuple[np.ndarray, np.ndarray]] = {}
+        self._first_down: dict[float, tuple[np.ndarray, np.ndarray]] = {}
+
+    @cached_property
+    def returns(self) -> np.ndarray:
+        """Close-to-Close Lookahead-Return C_{t+h} / C_t."""
+        return (self.close[self.horizon_days :] - self.start) / self.start
+
+    @cached_property
+    def run_up(self) -> np.ndarray:
+        """Laenge der streng steigenden Close-Serie ab Tag t (in Schritten)."""
+        return _forward_run_length(np.diff(self.close) > 0)[: self.m]
+
+    @cached_property
+    def run_down(self) -> np.ndarray:
+        """Laenge der streng fallenden Close-Serie ab Tag t (in Schritten)."""
+        return _forward_run_length(np.diff(self.close) < 0)[: self.m]
+
+    @cached_property
+    def path_max(self) -> np.ndarray:
+        if self.use_hl:
+            return np.nanmax(self.high_win, axis=1)
+        return self.segment.max(axis=1)
+
+    @cached_property
+    def path_min(self) -> np.ndarray:
+        if self.use_hl:
+            return np.nanmin(self.low_win, axis=1)
+        return self.segment.min(axis=1)
+
+    @cached_property
+    def _prefix_max(self) -> np.ndarray:
+        if self.use_hl:
+            # NaN-ignorierend wie nanmax.
+            return np.fmax.accumulate(self.high_win, axis=1)
+        return np.maximum.accumulate(self.segment, axis=1)
+
+    @cached_property
+    def _prefix_min(self) -> np.ndarray:
+        if self.use_hl:
+            return np.fmin.accumulate(self.low_win, axis=1)
+        return np.minimum.accumulate(self.segment, axis=1)
+
+    def max_until(self, offset: np.ndarray) -> np.ndarray:
+        """Pfad-Maximum von t (bzw. t+1 bei 'hl') bis einschliesslich t+offset."""
+        col = offset - 1 if self.use_hl else offset
+        return self._prefix_max[np.arange(self.m), col]
+
+    def min_until(self, offset: np.ndarray) -> np.ndarray:
+        """Pfad-Minimum von t (bzw. t+1 bei 'hl') bis einschliesslich t+offset."""
+        col = offset - 1 if self.use_hl else offset
+        return self._prefix_min[np.arange(self.m), col]
+
+    def _first_offset(self, values: np.ndarray, level: np.ndarray, *, above: bool) -> tuple[np.ndarray, np.ndarray]:
+        """(any_hit, offset) mit offset = 1-basierter Treffer-Tag t+offset (1, wenn kein Treffer)."""
+        rows = np.arange(self.m)
+        idx = first_crossing(values, rows + 1, rows + self.horizon_days + 1, level, above=above)
+        hit = idx >= 0
+        return hit, np.where(hit, idx - rows, 1)
+
+    def first_up(self, up_threshold: float) -> tuple[np.ndarray, np.ndarray]:
+        """Erster Tag, an dem die Up-Schwelle erreicht wird."""
+        key = float(up_threshold)
+        if key not in self._first_up:
+            level = self.start * (1 + up_threshold)
+            self._first_up[key] = self._first_offset(self.high_path, level, above=True)
+        return self._first_up[key]
+
+    def first_down(self, down_threshold: float) -> tuple[np.ndarray, np.ndarray]:
+        """Erster Tag, an dem die Down-Schwelle erreicht wird."""
+        key = float(down_threshold)
+        if key not in self._first_down:
+            level = self.start * (1 + down_threshold)
+            self._first_down[key] = self._first_offset(self.low_path, level, above=False)
+        return self._first_down[key]
+
+
+def _label_masks(
+    w: _HorizonWindows,
+    *,
+    up_threshold: float,
+    down_threshold: float,
+    strict_monotonic: bool,
+    max_adverse_move_pct: float | None,
+    hit_within_horizon: bool,
+    first_hit_wins: bool,
+    intraday_tie_breaker: str,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Up-/Down-Masken (Laenge ``w.m``) fuer eine Parameter-Kombination."""
+    start = w.start
+
+    if hit_within_horizon and first_hit_wins:
+        up_any, up_idx = w.first_up(up_threshold)
+        down_any, down_idx = w.first_down(down_threshold)
+
+        # Same day: with Daily OHLC we don't know order; tie-break explicitly.
+        same_day = up_any & down_any & (up_idx == down_idx)
+        winner_up = up_any & (~down_any | (up_idx < down_idx))
+        winner_down = down_any & (~up_any | (down_idx < up_idx))
+        if intraday_tie_breaker == "up":
+            winner_up = winner_up | same_day
+        else:
+            winner_down = winner_down | same_day
+        hit_idx = np.where(winner_up, up_idx, down_idx)
+
+        # Pfad-Filter nur bis zum Treffer-Tag pruefen.
+        if strict_monotonic:
+            up_ok = w.run_up >= hit_idx
+            down_ok = w.run_down >= hit_idx
+        else:
+            up_ok = True
+            down_ok = True
+        if max_adverse_move_pct is not None:
+            up_ok = up_ok & (w.min_until(hit_idx) >= start * (1 - max_adverse_move_pct))
+            down_ok = down_ok & (w.max_until(hit_idx) <= start * (1 + max_adverse_move_pct))
+        return winner_up & up_ok, winner_down & down_ok
+
+    if strict_monotonic:
+        up_ok = w.run_up >= w.horizon_days
+        down_ok = w.run_down >= w.horizon_days
+    else:
+        up_ok = np.full(w.m, True)
+        down_ok = np.full(w.m, True)
+    if max_adverse_move_pct is not None:
+        # Bei hit_source='hl' basiert der Adverse Move auf Low/High statt Close.
+        up_ok = up_ok & (w.path_min >= start * (1 - max_adverse_move_pct))
+        down_ok = down_ok & (w.path_max <= start * (1 + max_adverse_move_pct))
+
+    if hit_within_horizon:
+        up_hit = w.path_max >= start * (1 + up_threshold)
+        down_hit = w.path_min <= start * (1 + down_threshold)
+    else:
+        up_hit = w.returns >= up_threshold
+        down_hit = w.returns <= down_threshold
+    return up_hit & up_ok, down_hit & down_ok
+
+
+class _H1Sessions:
+    """H1-Bars gruppiert nach Daily-Zeile (Session), ohne Python-Schleifen.
+
+    Jede Daily-Zeile j bekommt den zusammenhaengenden Bereich
+    ``[start[j], end[j])`` im (sortierten) H1-Array. H1-Bars, deren Session-Datum
+    nicht im Daily-Index vorkommt (z.B. Wochenenden bei drop_weekends), werden
+    ignoriert.
+    """
+
+    def __init__(
+        self,
+        daily_dates_ns: np.ndarray,
+        h1_dates_ns: np.ndarray,
+        h1_high: np.ndarray,
+        h1_low: np.ndarray,
+    ) -> None:
+        n = len(daily_dates_ns)
+        pos = np.searchsorted(daily_dates_ns, h1_dates_ns)
+        in_daily = pos < n
+        in_daily[in_daily] = daily_dates_ns[pos[in_daily]] == h1_dates_ns[in_daily]
+
+        self.bar_day = pos[in_daily]
+        self.high = h1_high[in_daily]
+        self.low = h1_low[in_daily]
+
+        days = np.arange(n)
+        self.start = np.searchsorted(self.bar_day, days, side="left")
+        self.end = np.searchsorted(self.bar_day, days, side="right")
+        counts = self.end - self.start
+        self.max_bars = int(counts.max()) if n else 0
+
+        nonempty = counts > 0
+        self.day_high = np.full(n, -np.inf)
+        self.day_low = np.full(n, np.inf)
+        if self.high.size:
+            self.day_high[nonempty] = np.maximum.reduceat(self.high, self.start[nonempty])
+            self.day_low[nonempty] = np.minimum.reduceat(self.low, self.start[nonempty])
+
+    @cached_property
+    def _bar_pos(self) -> np.ndarray:
+        return np.arange(self.bar_day.size) - self.start[self.bar_day]
+
+    @cached_property
+    def cum_high(self) -> np.ndarray:
+        """Laufendes Maximum innerhalb jeder Session, als (n_days, max_bars)-Block (Rest: -inf)."""
+        out = np.full((self.day_high.size, self.max_bars), -np.inf)
+        out[self.bar_day, self._bar_pos] = self.high
+        return np.maximum.accumulate(out, axis=1)
+
+    @cached_property
+    def cum_low(self) -> np.ndarray:
+        """Laufendes Minimum innerhalb jeder Session, als (n_days, max_bars)-Block (Rest: +inf)."""
+        out = np.full((self.day_low.size, self.max_bars), np.inf)
+        out[self.bar_day, self._bar_pos] = self.low
+        return np.minimum.accumulate(out, axis=1)
+
+
+def _h1_first_hit_masks(
+    w: _HorizonWindows,
+    sessions: _H1Sessions,
+    *,
+    up_threshold: float,
+    down_threshold: float,
+    strict_monotonic: bool,
+    max_adverse_move_pct: float | None,
+    intraday_tie_breaker: str,
+) -> tuple[np.ndarray, np.ndarray]:
+    """First-hit-wins auf H1-Granularitaet.
+
+    Gescannt werden die H1-Bars der Sessions t+1..t+horizon_days (ein
+    zusammenhaengender Bereich). Beide Schwellen in derselben Stunde →
+    ``intraday_tie_breaker``. Pfad-Filter gelten bis einschliesslich dieser Stunde.
+    """
+    m = w.m
+    if sessions.max_bars == 0:
+        return np.full(m, False), np.full(m, False)
+
+    start = w.start
+    rows = np.arange(m)
+    up_k, down_k = first_hits(
+        sessions.high,
+        sessions.low,
+        sessions.start[rows + 1],
+        sessions.end[rows + w.horizon_days],
+        start * (1 + up_threshold),
+        start * (1 + down_threshold),
+    )
+    up_any = up_k >= 0
+    down_any = down_k >= 0
+    any_hit = up_any | down_any
+
+    same_hour = up_any & down_any & (up_k == down_k)
+    winner_up = up_any & (~down_any | (up_k < down_k))
+    winner_down = down_any & (~up_any | (down_k < up_k))
+    if intraday_tie_breaker == "up":
+        winner_up = winner_up | same_hour
+    else:
+        winner_down = winner_down | same_hour
+
+    hit_k = np.where(any_hit, np.where(winner_up, up_k, down_k), 0)
+    hit_row = sessions.bar_day[hit_k]
+    hit_bar = hit_k - sessions.start[hit_row]
+    hit_day = np.where(any_hit, hit_row - rows, 1)
+
+    if strict_monotonic:
+        up_ok = w.run_up >= hit_day
+        down_ok = w.run_down >= hit_day
+    else:
+        up_ok = True
+        down_ok = True
+
+    if max_adverse_move_pct is not None:
+        # Extrema ueber die vollen Sessions vor dem Treffer-Tag + Stunden bis zum Treffer.
+        before = hit_day > 1
+        low_so_far = np.where(before, w.min_until(np.maximum(hit_day - 1, 1)), np.inf)
+        high_so_far = np.where(before, w.max_until(np.maximum(hit_day - 1, 1)), -np.inf)
+        low_so_far = np.minimum(low_so_far, sessions.cum_low[hit_row, hit_bar])
+        high_so_far = np.maximum(high_so_far, sessions.cum_high[hit_row, hit_bar])
+        up_ok = up_ok & (low_so_far >= start * (1 - max_adverse_move_pct))
+        down_ok = down_ok & (high_so_far <= start * (1 + max_adverse_move_pct))
+
+    return winner_up & up_ok, winner_down & down_ok
 
 
 def _label_eurusd_core(
@@ -44,165 +377,34 @@ def _label_eurusd_core(
     intraday_tie_breaker: str = "down",  # 'down' | 'up' (only relevant when both touched same day)
 ) -> pd.DataFrame:
     """Core labeling logic on a prepared Daily-OHLC DataFrame (Index=Date)."""
-    if hit_source not in {"close", "hl"}:
-        raise ValueError("hit_source muss 'close' oder 'hl' sein.")
-    if intraday_tie_breaker not in {"down", "up"}:
-        raise ValueError("intraday_tie_breaker muss 'down' oder 'up' sein.")
+    _validate_label_options(hit_source=hit_source, intraday_tie_breaker=intraday_tie_breaker)
 
     # Lookahead-Return: Kurs in N Tagen vs. heutiger Kurs
     future_close = df["Close"].shift(-horizon_days)
     returns = (future_close - df["Close"]) / df["Close"]
-    close = df["Close"].to_numpy()
-    high = df["High"].to_numpy() if "High" in df.columns else None
-    low = df["Low"].to_numpy() if "Low" in df.columns else None
+    close = df["Close"].to_numpy(dtype="float64")
+    high = df["High"].to_numpy(dtype="float64") if "High" in df.columns else None
+    low = df["Low"].to_numpy(dtype="float64") if "Low" in df.columns else None
 
     n = len(close)
-    mono_up = np.full(n, False)
-    mono_down = np.full(n, False)
-    hit_up = np.full(n, False)
-    hit_down = np.full(n, False)
-    first_up = np.full(n, False)
-    first_down = np.full(n, False)
-
-    for i in range(n):
-        end = i + horizon_days
-        if end >= n:
-            continue
-
-        segment = close[i : end + 1]
-        start = segment[0]
-
-        if strict_monotonic:
-            diffs = np.diff(segment)
-            up_ok_monotonic = np.all(diffs > 0)
-            down_ok_monotonic = np.all(diffs < 0)
-        else:
-            up_ok_monotonic = True
-            down_ok_monotonic = True
-
-        if max_adverse_move_pct is not None:
-            if hit_source == "hl" and high is not None and low is not None:
-                # For intraday-aware labeling, adverse move should be based on Low/High, not Close.
-                # Use t+1..t+horizon_days window (exclude the start day itself).
-                low_seg = low[i + 1 : end + 1]
-                high_seg = high[i + 1 : end + 1]
-                up_ok_adverse = float(np.nanmin(low_seg)) >= start * (1 - max_adverse_move_pct)
-                down_ok_adverse = float(np.nanmax(high_seg)) <= start * (1 + max_adverse_move_pct)
-            else:
-                min_seg = segment.min()
-                max_seg = segment.max()
-                up_ok_adverse = min_seg >= start * (1 - max_adverse_move_pct)
-                down_ok_adverse = max_seg <= start * (1 + max_adverse_move_pct)
-        else:
-            up_ok_adverse = True
-            down_ok_adverse = True
-
-        mono_up[i] = up_ok_monotonic and up_ok_adverse
-        mono_down[i] = down_ok_monotonic and down_ok_adverse
-
-        if hit_source == "hl" and high is not None and low is not None:
-            high_seg = high[i + 1 : end + 1]
-            low_seg = low[i + 1 : end + 1]
-            hit_up[i] = float(np.nanmax(high_seg)) >= start * (1 + up_threshold)
-            hit_down[i] = float(np.nanmin(low_seg)) <= start * (1 + down_threshold)
-        else:
-            max_seg = segment.max()
-            min_seg = segment.min()
-            hit_up[i] = max_seg >= start * (1 + up_threshold)
-            hit_down[i] = min_seg <= start * (1 + down_threshold)
-
-        if hit_within_horizon and first_hit_wins:
-            up_level = start * (1 + up_threshold)
-            down_level = start * (1 + down_threshold)
-
-            up_idx: int | None = None
-            down_idx: int | None = None
-
-            if hit_source == "hl" and high is not None and low is not None:
-                for j in range(1, horizon_days + 1):
-                    if up_idx is None and float(high[i + j]) >= up_level:
-                        up_idx = j
-                    if down_idx is None and float(low[i + j]) <= down_level:
-                        down_idx = j
-                    if up_idx is not None and down_idx is not None:
-                        break
-            else:
-                for j, price in enumerate(segment[1:], start=1):
-                    if up_idx is None and price >= up_level:
-                        up_idx = j
-                    if down_idx is None and price <= down_level:
-                        down_idx = j
-                    if up_idx is not None and down_idx is not None:
-                        break
-
-            if up_idx is None and down_idx is None:
-                continue
-
-            if down_idx is None:
-                winner = "up"
-                hit_idx = up_idx
-            elif up_idx is None:
-                winner = "down"
-                hit_idx = down_idx
-            else:
-                if up_idx < down_idx:
-                    winner = "up"
-                    hit_idx = up_idx
-                elif down_idx < up_idx:
-                    winner = "down"
-                    hit_idx = down_idx
-                else:
-                    # Same day: with Daily OHLC we don't know order; tie-break explicitly.
-                    winner = intraday_tie_breaker
-
-            subseg = segment[: hit_idx + 1]
-            if strict_monotonic:
-                diffs = np.diff(subseg)
-                ok_monotonic = bool(np.all(diffs > 0)) if winner == "up" else bool(np.all(diffs < 0))
-            else:
-                ok_monotonic = True
-
-            if max_adverse_move_pct is not None:
-                if hit_source == "hl" and high is not None and low is not None:
-                    low_sub = low[i + 1 : i + hit_idx + 1]
-                    high_sub = high[i + 1 : i + hit_idx + 1]
-                    if winner == "up":
-                        ok_adverse = bool(float(np.nanmin(low_sub)) >= start * (1 - max_adverse_move_pct))
-                    else:
-                        ok_adverse = bool(float(np.nanmax(high_sub)) <= start * (1 + max_adverse_move_pct))
-                else:
-                    min_sub = subseg.min()
-                    max_sub = subseg.max()
-                    if winner == "up":
-                        ok_adverse = bool(min_sub >= start * (1 - max_adverse_move_pct))
-                    else:
-                        ok_adverse = bool(max_sub <= start * (1 + max_adverse_move_pct))
-            else:
-                ok_adverse = True
-
-            ok_path = ok_monotonic and ok_adverse
-            if winner == "up":
-                first_up[i] = ok_path
-            else:
-                first_down[i] = ok_path
+    up_mask = np.full(n, False)
+    down_mask = np.full(n, False)
+
+    # Nur Tage mit vollstaendigem Horizont-Fenster [t, t+horizon_days] werden gelabelt.
+    if n > horizon_days:
+        w = _HorizonWindows(close, high, low, horizon_days=horizon_days, use_hl=hit_source == "hl")
+        up_mask[: w.m], down_mask[: w.m] = _label_masks(
+            w,
+            up_threshold=up_threshold,
+            down_threshold=down_threshold,
+            strict_monotonic=strict_monotonic,
+            max_adverse_move_pct=max_adverse_move_pct,
+            hit_within_horizon=hit_within_horizon,
+            first_hit_wins=first_hit_wins,
+            intraday_tie_breaker=intraday_tie_breaker,
+        )
 
     labels = pd.Series("neutral", index=df.index)
-    mono_up_series = pd.Series(mono_up, index=df.index)
-    mono_down_series = pd.Series(mono_down, index=df.index)
-
-    if hit_within_horizon:
-        if first_hit_wins:
-            up_mask = pd.Series(first_up, index=df.index)
-            down_mask = pd.Series(first_down, index=df.index)
-        else:
-            hit_up_series = pd.Series(hit_up, index=df.index)
-            hit_down_series = pd.Series(hit_down, index=df.index)
-            up_mask = hit_up_series & mono_up_series
-            down_mask = hit_down_series & mono_down_series
-    else:
-        up_mask = (returns >= up_threshold) & mono_up_series
-        down_mask = (returns <= down_threshold) & mono_down_series
-
     labels.loc[up_mask] = "up"
     labels.loc[down_mask] = "down"
 
@@ -319,163 +521,58 @@ def label_eurusd_from_daily_and_h1(
 
     h1_session = session_date_index(h1.index, cut_hour=int(cut_hour))
     h1_dates_ns = h1_session.to_numpy(dtype="datetime64[ns]").view("int64")
+    daily_dates_ns = daily.index.to_numpy(dtype="datetime64[ns]").view("int64")
 
-    h1_high = h1["high"].to_numpy(dtype="float64")
-    h1_low = h1["low"].to_numpy(dtype="float64")
-
-    # Map session date -> slice [start, end) into H1 arrays
-    start_by_date: dict[int, int] = {}
-    end_by_date: dict[int, int] = {}
-    for idx, key in enumerate(h1_dates_ns):
-        if key not in start_by_date:
-            start_by_date[key] = idx
-        end_by_date[key] = idx + 1
+    sessions = _H1Sessions(
+        daily_dates_ns,
+        h1_dates_ns,
+        h1["high"].to_numpy(dtype="float64"),
+        h1["low"].to_numpy(dtype="float64"),
+    )
 
     close = daily["Close"].to_numpy(dtype="float64")
     future_close = daily["Close"].shift(-horizon_days)
     returns = ((future_close - daily["Close"]) / daily["Close"]).to_numpy(dtype="float64")
 
-    daily_dates_ns = daily.index.to_numpy(dtype="datetime64[ns]").view("int64")
     n = len(daily_dates_ns)
-
-    mono_up = np.full(n, False)
-    mono_down = np.full(n, False)
-    hit_up = np.full(n, False)
-    hit_down = np.full(n, False)
-    first_up = np.full(n, False)
-    first_down = np.full(n, False)
-
-    for i in range(n):
-        end_day = i + horizon_days
-        if end_day >= n:
-            continue
-
-        start_price = float(close[i])
-        up_level = start_price * (1 + up_threshold)
-        down_level = start_price * (1 + down_threshold)
-
-        # Monotonicity on daily closes (same semantics as the daily-based labels)
-        if strict_monotonic:
-            diffs = np.diff(close[i : end_day + 1])
-            up_ok_monotonic = bool(np.all(diffs > 0))
-            down_ok_monotonic = bool(np.all(diffs < 0))
-        else:
-            up_ok_monotonic = True
-            down_ok_monotonic = True
-
+    up_mask = np.full(n, False)
+    down_mask = np.full(n, False)
+
+    if n > horizon_days:
+        # Tages-Extrema der H1-Sessions als High/Low-Pfad t+1..t+horizon_days;
+        # Monotonie weiterhin auf den Daily-Closes.
+        w = _HorizonWindows(
+            close,
+            sessions.day_high,
+            sessions.day_low,
+            horizon_days=horizon_days,
+            use_hl=True,
+        )
         if hit_within_horizon and first_hit_wins:
-            min_low_so_far = float("inf")
-            max_high_so_far = float("-inf")
-            found = False
-
-            for day_offset in range(1, horizon_days + 1):
-                day_key = int(daily_dates_ns[i + day_offset])
-                s = start_by_date.get(day_key)
-                e = end_by_date.get(day_key)
-                if s is None or e is None:
-                    continue
-
-                for k in range(s, e):
-                    h = float(h1_high[k])
-                    l = float(h1_low[k])
-                    if l < min_low_so_far:
-                        min_low_so_far = l
-                    if h > max_high_so_far:
-                        max_high_so_far = h
-
-                    up_touched = h >= up_level
-                    down_touched = l <= down_level
-                    if not (up_touched or down_touched):
-                        continue
-
-                    if up_touched and down_touched:
-                        winner = intraday_tie_breaker
-                    elif up_touched:
-                        winner = "up"
-                    else:
-                        winner = "down"
-
-                    if strict_monotonic:
-                        diffs = np.diff(close[i : i + day_offset + 1])
-                        ok_monotonic = bool(np.all(diffs > 0)) if winner == "up" else bool(np.all(diffs < 0))
-                    else:
-                        ok_monotonic = True
-
-                    if max_adverse_move_pct is not None:
-                        if winner == "up":
-                            ok_adverse = min_low_so_far >= start_price * (1 - max_adverse_move_pct)
-                        else:
-                            ok_adverse = max_high_so_far <= start_price * (1 + max_adverse_move_pct)
-                    else:
-                        ok_adverse = True
-
-                    ok_path = ok_monotonic and ok_adverse
-                    if winner == "up":
-                        first_up[i] = ok_path
-                    else:
-                        first_down[i] = ok_path
-
-                    found = True
-                    break
-
-                if found:
-                    break
-
-            # Path-valid flags for completeness (used only for reporting / debugging)
-            mono_up[i] = up_ok_monotonic
-            mono_down[i] = down_ok_monotonic
+            up_mask[: w.m], down_mask[: w.m] = _h1_first_hit_masks(
+                w,
+                sessions,
+                up_threshold=up_threshold,
+                down_threshold=down_threshold,
+                strict_monotonic=strict_monotonic,
+                max_adverse_move_pct=max_adverse_move_pct,
+                intraday_tie_breaker=intraday_tie_breaker,
+            )
         else:
-            # Hit detection over the full horizon window.
-            min_low = float("inf")
-            max_high = float("-inf")
-            any_up = False
-            any_down = False
-
-            for day_offset in range(1, horizon_days + 1):
-                day_key = int(daily_dates_ns[i + day_offset])
-                s = start_by_date.get(day_key)
-                e = end_by_date.get(day_key)
-                if s is None or e is None:
-                    continue
-
-                highs = h1_high[s:e]
-                lows = h1_low[s:e]
-                if highs.size:
-                    day_max_high = float(np.nanmax(highs))
-                    max_high = max(max_high, day_max_high)
-                    if not any_up and np.isfinite(day_max_high) and day_max_high >= up_level:
-                        any_up = True
-                if lows.size:
-                    day_min_low = float(np.nanmin(lows))
-                    min_low = min(min_low, day_min_low)
-                    if not any_down and np.isfinite(day_min_low) and day_min_low <= down_level:
-                        any_down = True
-
-            hit_up[i] = any_up
-            hit_down[i] = any_down
-
-            if max_adverse_move_pct is not None and np.isfinite(min_low) and np.isfinite(max_high):
-                up_ok_adverse = min_low >= start_price * (1 - max_adverse_move_pct)
-                down_ok_adverse = max_high <= start_price * (1 + max_adverse_move_pct)
-            else:
-                up_ok_adverse = True
-                down_ok_adverse = True
-
-            mono_up[i] = up_ok_monotonic and up_ok_adverse
-            mono_down[i] = down_ok_monotonic and down_ok_adverse
+            # Sessions ohne H1-Bars liefern +/-inf und beeinflussen weder Treffer
+            # noch Adverse-Move-Filter.
+            up_mask[: w.m], down_mask[: w.m] = _label_masks(
+                w,
+                up_threshold=up_threshold,
+                down_threshold=down_threshold,
+                strict_monotonic=strict_monotonic,
+                max_adverse_move_pct=max_adverse_move_pct,
+                hit_within_horizon=hit_within_horizon,
+                first_hit_wins=False,
+                intraday_tie_breaker=intraday_tie_breaker,
+            )
 
     labels = pd.Series("neutral", index=daily.index)
-    if hit_within_horizon:
-        if first_hit_wins:
-            up_mask = pd.Series(first_up, index=daily.index)
-            down_mask = pd.Series(first_down, index=daily.index)
-        else:
-            up_mask = pd.Series(hit_up, index=daily.index) & pd.Series(mono_up, index=daily.index)
-            down_mask = pd.Series(hit_down, index=daily.index) & pd.Series(mono_down, index=daily.index)
-    else:
-        up_mask = (pd.Series(returns, index=daily.index) >= up_threshold) & pd.Series(mono_up, index=daily.index)
-        down_mask = (pd.Series(returns, index=daily.index) <= down_threshold) & pd.Series(mono_down, index=daily.index)
-
     labels.loc[up_mask] = "up"
     labels.loc[down_mask] = "down"
 
@@ -486,6 +583,48 @@ def label_eurusd_from_daily_and_h1(
     return result.dropna(subset=["lookahead_return"])
 
 
+def daily_price_path(price_source: str = "yahoo") -> Path:
+    """Pfad der Daily-Rohdaten einer Preisquelle (data/raw/fx/...)."""
+    if price_source == "yahoo":
+        csv_name = "EURUSDX.csv"
+    elif price_source == "eodhd":
+        csv_name = "EURUSDX_eodhd.csv"
+    elif price_source == "mt5":
+        csv_name = "EURUSD_mt5_D1.csv"
+    else:
+        raise ValueError(
+            f"Unbekannte price_source='{price_source}'. Erwarte 'yahoo', 'eodhd' oder 'mt5'."
+        )
+    return DATA_RAW / "fx" / csv_name
+
+
+def load_daily_prices(price_source: str = "yahoo", drop_weekends: bool = False) -> pd.DataFrame:
+    """Liest die Daily-OHLC-Rohdaten einer Preisquelle (Index=Date, chronologisch).
+
+    Gleiche Aufbereitung wie in ``label_eurusd``; praktisch, wenn dieselbe
+    Preisreihe mehrfach gelabelt wird (z.B. ``label_eurusd_sweep``).
+    """
+    # Rohdaten laden und chronologisch sortieren
+    df = pd.read_csv(daily_price_path(price_source))
+
+    # YFinance schreibt Metazeilen ("Price", "Ticker") vor die eigentlichen Daten.
+    if "Date" not in df.columns and df.columns[0] == "Price":
+        df.columns = ["Date", "Close", "High", "Low", "Open", "Volume"]
+
+    parsed_dates = pd.to_datetime(df["Date"], format="%Y-%m-%d", errors="coerce")
+    df = df[parsed_dates.notna()]
+    df["Date"] = parsed_dates
+    df = df.sort_values("Date").set_index("Date")
+
+    if drop_weekends:
+        df = df[df.index.dayofweek < 5]
+
+    # Spalten in numerische Typen umwandeln, damit Rechnungen funktionieren
+    for col in ["Close", "High", "Low", "Open", "Volume"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
 def label_eurusd(
     horizon_days: int = 4,
     up_threshold: float = 0.01,
@@ -498,6 +637,8 @@ def label_eurusd(
     intraday_tie_breaker: str = "down",
     price_source: str = "yahoo",
     drop_weekends: bool = False,
+    use_cache: bool = True,
+    since: pd.Timestamp | None = None,
 ) -> pd.DataFrame:
     """Erstellt ein DataFrame mit Lookahead-Rendite + Label fuer jede Tageskerze.
 
@@ -564,40 +705,17 @@ def label_eurusd(
         Wenn True, werden Samstage/Sonntage aus der Preiszeitreihe entfernt.
         Das ist sinnvoll, wenn eine Datenquelle (z.B. EODHD) Wochenend-Zeilen enthält,
         da unser Modell „Handelstage“ (typisch Mo–Fr) annimmt.
+    - use_cache:
+        Wenn True, wird das Ergebnis im Artefakt-Cache (data/processed/cache/labels)
+        abgelegt bzw. von dort geladen. Key: Inhalt der Rohdatei + Label-Parameter
+        + Code-Version; bei unveraenderten Eingaben wird nicht neu gelabelt.
+    - since:
+        Optional (inkrementelle Updates): nur Tage nach ``since`` labeln.
+        Labels schauen nur vorwaerts, daher reicht die Preisreihe ab ``since``;
+        Tage mit unvollstaendigem Horizont fehlen wie gewohnt. Ohne Cache.
     """
 
-    # Rohdaten laden und chronologisch sortieren
-    if price_source == "yahoo":
-        csv_name = "EURUSDX.csv"
-    elif price_source == "eodhd":
-        csv_name = "EURUSDX_eodhd.csv"
-    elif price_source == "mt5":
-        csv_name = "EURUSD_mt5_D1.csv"
-    else:
-        raise ValueError(
-            f"Unbekannte price_source='{price_source}'. Erwarte 'yahoo', 'eodhd' oder 'mt5'."
-        )
-
-    csv_path = DATA_RAW / "fx" / csv_name
-    df = pd.read_csv(csv_path)
-
-    # YFinance schreibt Metazeilen ("Price", "Ticker") vor die eigentlichen Daten.
-    if "Date" not in df.columns and df.columns[0] == "Price":
-        df.columns = ["Date", "Close", "High", "Low", "Open", "Volume"]
-
-    parsed_dates = pd.to_datetime(df["Date"], format="%Y-%m-%d", errors="coerce")
-    df = df[parsed_dates.notna()]
-    df["Date"] = parsed_dates
-    df = df.sort_values("Date").set_index("Date")
-
-    if drop_weekends:
-        df = df[df.index.dayofweek < 5]
-
-    # Spalten in numerische Typen umwandeln, damit Rechnungen funktionieren
-    for col in ["Close", "High", "Low", "Open", "Volume"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-    return _label_eurusd_core(
-        df,
+    core_params = dict(
         horizon_days=horizon_days,
         up_threshold=up_threshold,
         down_threshold=down_threshold,
@@ -609,6 +727,175 @@ def label_eurusd(
         intraday_tie_breaker=intraday_tie_breaker,
     )
 
+    def compute() -> pd.DataFrame:
+        df = load_daily_prices(price_source=price_source, drop_weekends=drop_weekends)
+        if since is not None:
+            df = df[df.index > pd.Timestamp(since)]
+        return _label_eurusd_core(df, **core_params)
+
+    if not use_cache or since is not None:
+        return compute()
+    cache_parts = {
+        "raw": file_fingerprint(daily_price_path(price_source)),
+        "params": {**_normalize_label_params(core_params), "drop_weekends": bool(drop_weekends)},
+        "code": code_fingerprint(__file__, path_kernels.__file__),
+    }
+    return cached_frame("labels", cache_parts, compute)
+
+
+# Speicher-Dtypes der Label-Datei (Label als Kategorie → int8-Codes im Parquet).
+LABEL_DTYPES: Final = {"label": "category"}
+
+# Kompakte Label-Codes fuer Sweeps (int8-Matrix statt String-Spalten).
+LABEL_CODES: Final = {"down": -1, "neutral": 0, "up": 1}
+LABEL_CODE_MISSING: Final = -128  # kein vollstaendiger Horizont / Lookahead-Return NaN
+
+# Defaults wie in ``label_eurusd`` (nur Parameter, die das Labeling selbst betreffen).
+SWEEP_PARAM_DEFAULTS: Final = {
+    "horizon_days": 4,
+    "up_threshold": 0.01,
+    "down_threshold": -0.01,
+    "strict_monotonic": True,
+    "max_adverse_move_pct": None,
+    "hit_within_horizon": False,
+    "first_hit_wins": False,
+    "hit_source": "close",
+    "intraday_tie_breaker": "down",
+}
+
+
+def label_params_hash(params: Mapping[str, Any]) -> str:
+    """Stabiler Kurz-Hash einer Label-Parameter-Kombination (Spaltenname im Sweep)."""
+    payload = json.dumps(dict(params), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def _normalize_label_params(params: Mapping[str, Any]) -> dict[str, Any]:
+    unknown = set(params) - set(SWEEP_PARAM_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unbekannte Label-Parameter im Sweep: {sorted(unknown)}")
+    out = {**SWEEP_PARAM_DEFAULTS, **params}
+    out["horizon_days"] = int(out["horizon_days"])
+    if out["horizon_days"] <= 0:
+        raise ValueError("horizon_days muss > 0 sein.")
+    out["up_threshold"] = float(out["up_threshold"])
+    out["down_threshold"] = float(out["down_threshold"])
+    if out["max_adverse_move_pct"] is not None:
+        out["max_adverse_move_pct"] = float(out["max_adverse_move_pct"])
+    for key in ("strict_monotonic", "hit_within_horizon", "first_hit_wins"):
+        out[key] = bool(out[key])
+    _validate_label_options(hit_source=out["hit_source"], intraday_tie_breaker=out["intraday_tie_breaker"])
+    return out
+
+
+def _expand_label_param_grid(
+    param_grid: Mapping[str, Any] | Iterable[Mapping[str, Any]],
+) -> list[dict[str, Any]]:
+    """Dict von Wertelisten → kartesisches Produkt; Liste von Dicts → unverändert."""
+    if isinstance(param_grid, Mapping):
+        keys = list(param_grid)
+        values = [
+            v if isinstance(v, (list, tuple)) else [v]
+            for v in (param_grid[k] for k in keys)
+        ]
+        combos = [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+    else:
+        combos = [dict(p) for p in param_grid]
+    return [_normalize_label_params(p) for p in combos]
+
+
+@dataclass(frozen=True)
+class LabelSweepResult:
+    """Ergebnis von ``label_eurusd_sweep``.
+
+    - labels: int8-Matrix (Index=Date, Spalten=Param-Hash), Codes siehe ``LABEL_CODES``;
+      ``LABEL_CODE_MISSING`` markiert Tage ohne vollstaendigen Horizont.
+    - params: Param-Hash → vollstaendige (normalisierte) Label-Parameter.
+    """
+
+    labels: pd.DataFrame
+    params: dict[str, dict[str, Any]]
+
+    def label_series(self, key: str) -> pd.Series:
+        """String-Labels (up/down/neutral) einer Spalte, ohne Tage ohne Label."""
+        codes = self.labels[key]
+        codes = codes[codes != LABEL_CODE_MISSING]
+        names = {code: name for name, code in LABEL_CODES.items()}
+        return codes.map(names).rename("label")
+
+
+def label_eurusd_sweep(
+    price_df: pd.DataFrame,
+    param_grid: Mapping[str, Any] | Iterable[Mapping[str, Any]],
+    *,
+    drop_weekends: bool = False,
+) -> LabelSweepResult:
+    """Labelt eine Preisreihe fuer viele Parameter-Kombinationen in einem Durchgang.
+
+    ``price_df`` ist ein Daily-OHLC-DataFrame (Index=Date), z.B. aus
+    ``load_daily_prices`` oder ``h1_to_daily_ohlc``. ``param_grid`` ist entweder
+    ein Dict von Wertelisten (kartesisches Produkt, wie sklearn ``ParameterGrid``)
+    oder eine Liste von ``LABEL_PARAMS``-Dicts. Erlaubte Keys: ``SWEEP_PARAM_DEFAULTS``.
+
+    Die Fenster-Statistiken (Rolling Max/Min, Monotonie-Laeufe, erste
+    Treffer pro Schwelle) werden pro ``horizon_days``/``hit_source`` nur einmal
+    berechnet. Jede Spalte entspricht exakt ``label_eurusd(...)`` mit denselben
+    Parametern auf derselben Preisreihe.
+    """
+    if not isinstance(price_df.index, pd.DatetimeIndex):
+        raise TypeError("price_df muss einen DatetimeIndex haben (Index=Date).")
+
+    df = price_df.sort_index()
+    if drop_weekends:
+        df = df[df.index.dayofweek < 5]
+
+    close = pd.to_numeric(df["Close"], errors="coerce").to_numpy(dtype="float64")
+    high = pd.to_numeric(df["High"], errors="coerce").to_numpy(dtype="float64") if "High" in df.columns else None
+    low = pd.to_numeric(df["Low"], errors="coerce").to_numpy(dtype="float64") if "Low" in df.columns else None
+    n = len(close)
+
+    windows: dict[tuple[int, bool], _HorizonWindows] = {}
+    columns: dict[str, np.ndarray] = {}
+    params_by_key: dict[str, dict[str, Any]] = {}
+
+    for params in _expand_label_param_grid(param_grid):
+        key = label_params_hash(params)
+        if key in columns:
+            continue
+
+        horizon_days = params["horizon_days"]
+        codes = np.full(n, LABEL_CODE_MISSING, dtype=np.int8)
+        if n > horizon_days:
+            use_hl = params["hit_source"] == "hl"
+            w = windows.get((horizon_days, use_hl))
+            if w is None:
+                w = _HorizonWindows(close, high, low, horizon_days=horizon_days, use_hl=use_hl)
+                windows[(horizon_days, use_hl)] = w
+
+            up_mask, down_mask = _label_masks(
+                w,
+                up_threshold=params["up_threshold"],
+                down_threshold=params["down_threshold"],
+                strict_monotonic=params["strict_monotonic"],
+                max_adverse_move_pct=params["max_adverse_move_pct"],
+                hit_within_horizon=params["hit_within_horizon"],
+                first_hit_wins=params["first_hit_wins"],
+                intraday_tie_breaker=params["intraday_tie_breaker"],
+            )
+            block = np.where(
+                down_mask,
+                LABEL_CODES["down"],
+                np.where(up_mask, LABEL_CODES["up"], LABEL_CODES["neutral"]),
+            )
+            codes[: w.m] = np.where(np.isnan(w.returns), LABEL_CODE_MISSING, block)
+
+        columns[key] = codes
+        params_by_key[key] = params
+
+    labels = pd.DataFrame(columns, index=df.index)
+    labels.index.name = "Date"
+    return LabelSweepResult(labels=labels, params=params_by_key)
+
 
 def main() -> None:
     """Berechnet Labels und schreibt sie nach data/processed/fx/.
@@ -701,6 +988,30 @@ def main() -> None:
         default=None,
         help="Wenn True, filtert Wochenenden aus der Zeitreihe (überschreibt Config/Default).",
     )
+    parser.add_argument(
+        "--format",
+        choices=TABLE_FORMATS,
+        default=None,
+        help="Speicherformat der Label-Datei (Default: parquet, ohne pyarrow csv).",
+    )
+    parser.add_argument(
+        "--csv-export",
+        action="store_true",
+        help="Zusätzlich eine CSV-Kopie schreiben (z.B. für Excel).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Artefakt-Cache (data/processed/cache) nicht verwenden, Labels immer neu berechnen.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Nur Tage nach dem letzten Datum der bestehenden Label-Datei(en) labeln und anhängen "
+            "(tägliches Update). Fehlt eine Datei, wird sie vollständig geschrieben."
+        ),
+    )
     args = parser.parse_args()
 
     def load_label_params_from_json(path: Path) -> dict:
@@ -770,23 +1081,61 @@ def main() -> None:
     if label_params:
         print(f"[info] Verwendete Label-Parameter (Overrides berücksichtigt): {label_params}")
 
-    labeled = label_eurusd(**label_params)
-
     out_dir = DATA_PROCESSED / "fx"
     out_dir.parent.mkdir(parents=True, exist_ok=True)
     out_dir.mkdir(parents=True, exist_ok=True)
 
     # 1) Aktuelle Standarddatei (für Notebook-Default und Backwards-Kompatibilität)
-    latest_path = out_dir / "eurusd_labels.csv"
-    labeled.to_csv(latest_path)
-    print(f"[ok] EURUSD-Labels (aktuell) gespeichert: {latest_path}")
-
     # 2) Optionale Varianten-Datei mit Experiment-ID als Suffix
+    targets = {"aktuell": out_dir / "eurusd_labels.csv"}
     if args.exp_id:
         safe_suffix = args.exp_id.replace(" ", "_")
-        exp_path = out_dir / f"eurusd_labels__{safe_suffix}.csv"
-        labeled.to_csv(exp_path)
-        print(f"[ok] EURUSD-Labels (Experiment) gespeichert: {exp_path}")
+        targets["Experiment"] = out_dir / f"eurusd_labels__{safe_suffix}.csv"
+
+    write_kwargs = dict(index=True, dtypes=LABEL_DTYPES, fmt=args.format, csv_export=args.csv_export)
+    # Wird mit jeder Datei gespeichert: "aktuell" kann von einem anderen Experiment stammen.
+    table_params = {
+        **_normalize_label_params({k: v for k, v in label_params.items() if k in SWEEP_PARAM_DEFAULTS}),
+        "price_source": label_params.get("price_source") or "yahoo",
+        "drop_weekends": bool(label_params.get("drop_weekends", False)),
+    }
+
+    if not args.incremental:
+        labeled = label_eurusd(**label_params, use_cache=not args.no_cache)
+        for name, path in targets.items():
+            out_path = write_table(labeled, path, **write_kwargs)
+            write_table_params(path, table_params)
+            print(f"[ok] EURUSD-Labels ({name}) gespeichert: {out_path}")
+        return
+
+    # Inkrementell: pro Datei nur Tage nach dem letzten vorhandenen Datum anhängen –
+    # nur wenn die Datei mit denselben Label-Parametern erzeugt wurde, sonst neu schreiben.
+    last_dates = {}
+    for name, path in targets.items():
+        last = last_table_date(path, "Date")
+        if last is not None and not table_params_match(path, table_params):
+            print(f"[info] EURUSD-Labels ({name}): andere bzw. unbekannte Label-Parameter – wird neu geschrieben.")
+            last = None
+        last_dates[name] = last
+    known = [d for d in last_dates.values() if d is not None]
+    if len(known) < len(last_dates):
+        labeled = label_eurusd(**label_params, use_cache=not args.no_cache)
+    else:
+        labeled = label_eurusd(**label_params, since=min(known))
+    for name, path in targets.items():
+        last = last_dates[name]
+        if last is None:
+            out_path = write_table(labeled, path, **write_kwargs)
+            write_table_params(path, table_params)
+            print(f"[ok] EURUSD-Labels ({name}) vollständig geschrieben: {out_path}")
+            continue
+        new_rows = labeled[labeled.index > last]
+        if new_rows.empty:
+            print(f"[info] EURUSD-Labels ({name}): keine neuen Tage nach {last.date()}.")
+            continue
+        out_path = append_table(new_rows, path, **write_kwargs)
+        write_table_params(path, table_params)
+        print(f"[ok] EURUSD-Labels ({name}): {len(new_rows)} neue Tage angehängt an {out_path}")
 
 
 if __name__ == "__main__":
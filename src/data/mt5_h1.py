@@ -2,10 +2,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable, Iterator
 
 import numpy as np
 import pandas as pd
 
+from src.utils.cache import cached_frame, code_fingerprint, frame_fingerprint
+from src.utils.io import PYARROW_AVAILABLE
+
 
 @dataclass(frozen=True)
 class Mt5H1DailyFeatureConfig:
@@ -13,70 +17,259 @@ class Mt5H1DailyFeatureConfig:
     drop_weekends: bool = True
 
 
-def load_mt5_export_bars(path: Path) -> pd.DataFrame:
+# Column order of the binary sidecar (see ``load_mt5_export_bars``).
+_BAR_COLUMNS = ("open", "high", "low", "close", "tick_volume", "volume", "spread")
+_BAR_COUNT_COLUMNS = ("tick_volume", "volume", "spread")
+_SIDECAR_DTYPE = np.dtype([("time", "M8[ns]")] + [(c, "f8") for c in _BAR_COLUMNS])
+
+
+def _sidecar_path(path: Path) -> Path:
+    """Sidecar next to the export; size and mtime in the name invalidate it automatically."""
+    stat = path.stat()
+    return path.with_name(f"{path.name}.bars-{stat.st_size}-{stat.st_mtime_ns}.npy")
+
+
+def _downcast_counts(bars: pd.DataFrame) -> pd.DataFrame:
+    """Volume/spread columns back to int64 when they hold whole numbers only."""
+    for col in _BAR_COUNT_COLUMNS:
+        values = bars[col].to_numpy()
+        if np.isfinite(values).all() and (values == np.round(values)).all():
+            bars[col] = values.astype(np.int64)
+    return bars
+
+
+def _bars_from_records(rec: np.ndarray) -> pd.DataFrame:
+    return _downcast_counts(pd.DataFrame({c: rec[c] for c in _BAR_COLUMNS}, index=pd.DatetimeIndex(rec["time"])))
+
+
+def _records_from_bars(bars: pd.DataFrame) -> np.ndarray:
+    rec = np.empty(len(bars), dtype=_SIDECAR_DTYPE)
+    rec["time"] = bars.index.to_numpy(dtype="datetime64[ns]")
+    for col in _BAR_COLUMNS:
+        rec[col] = bars[col].to_numpy(dtype=np.float64)
+    return rec
+
+
+def _write_sidecar(path: Path, sidecar: Path, rec: np.ndarray) -> None:
+    """Stores ``rec`` as ``sidecar``, named from the export's stat taken *before* parsing.
+
+    If the export changed while it was read, the name no longer matches its current
+    size/mtime and the sidecar is simply never used.
+    """
+    for stale in path.parent.glob(f"{path.name}.bars-*.npy"):
+        stale.unlink(missing_ok=True)
+    tmp = path.with_name(path.name + ".bars.tmp.npy")
+    np.save(tmp, rec)
+    tmp.replace(sidecar)
+
+
+def _fixed_width_number(chars: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    digits = chars[:, lo:hi].astype(np.int64) - ord("0")
+    return digits @ (10 ** np.arange(hi - lo - 1, -1, -1, dtype=np.int64))
+
+
+def _is_digit(chars: np.ndarray, cols: list[int]) -> np.ndarray:
+    block = chars[:, cols]
+    return ((block >= ord("0")) & (block <= ord("9"))).all(axis=1)
+
+
+def _slow_timestamps(dates: pd.Series, times: pd.Series | None, fmt: str | None = None) -> np.ndarray:
+    joined = (dates + " " + times).str.strip() if times is not None else dates
+    return pd.to_datetime(joined, format=fmt, errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+
+def _parse_mt5_timestamps(
+    dates: pd.Series, times: pd.Series | None, *, time_width: int | None = None
+) -> pd.DatetimeIndex:
+    """Builds timestamps from the fixed MT5 layout ``YYYY.MM.DD`` + ``HH:MM[:SS]``.
+
+    Digits are read directly from the byte columns (no string concatenation or
+    format inference). As with ``pd.to_datetime`` on the whole column, the format
+    is fixed by the first row (``time_width`` = 5 or 8, from the file's first row via
+    ``_Mt5Layout`` so chunks agree; default: first valid row). Rows that deviate from
+    it or hold an impossible date/time (``2024.02.31``, ``25:00``) go through ``pd.to_datetime(..., format, errors="coerce")``
+    instead of rolling over into the next day/month.
+    """
+    dates = dates.astype(str).str.strip()
+    times = times.astype(str).str.strip() if times is not None else None
+    if len(dates) == 0:
+        return pd.DatetimeIndex(_slow_timestamps(dates, times))
+
+    try:
+        d_chars = dates.to_numpy(dtype="S10").view(np.uint8).reshape(len(dates), 10)
+        t_chars = times.to_numpy(dtype="S8").view(np.uint8).reshape(len(times), 8) if times is not None else None
+    except UnicodeEncodeError:  # non-ASCII content: not the MT5 layout
+        return pd.DatetimeIndex(_slow_timestamps(dates, times))
+
+    ok = (dates.str.len() == 10).to_numpy() & (d_chars[:, [4, 7]] == ord(".")).all(axis=1)
+    ok &= _is_digit(d_chars, [0, 1, 2, 3, 5, 6, 8, 9])
+    year = _fixed_width_number(d_chars, 0, 4)
+    month = _fixed_width_number(d_chars, 5, 7)
+    day = _fixed_width_number(d_chars, 8, 10)
+    # datetime64[ns] covers 1678..2261; outside that pandas yields NaT.
+    ok &= (year >= 1678) & (year <= 2261) & (month >= 1) & (month <= 12) & (day >= 1)
+    month0 = np.where(ok, (year - 1970) * 12 + month - 1, 0)
+    days_in_month = (
+        (month0 + 1).astype("datetime64[M]").astype("datetime64[D]")
+        - month0.astype("datetime64[M]").astype("datetime64[D]")
+    ).astype(np.int64)
+    ok &= day <= days_in_month
+    day = np.where(ok, day, 1)
+    if t_chars is not None:
+        t_len = times.str.len().to_numpy()
+        ok &= ((t_len == 5) | (t_len == 8)) & (t_chars[:, 2] == ord(":")) & _is_digit(t_chars, [0, 1, 3, 4])
+        ok &= (t_len == 5) | ((t_chars[:, 5] == ord(":")) & _is_digit(t_chars, [6, 7]))
+        hour = _fixed_width_number(t_chars, 0, 2)
+        minute = _fixed_width_number(t_chars, 3, 5)
+        seconds = np.where(t_len == 8, _fixed_width_number(t_chars, 6, 8), 0)
+        ok &= (hour < 24) & (minute < 60) & (seconds < 60)
+    if not ok.any():
+        return pd.DatetimeIndex(_slow_timestamps(dates, times))
+    fmt = "%Y.%m.%d"
+    if t_chars is not None:
+        # Format of the first (valid) row; ``HH:MM:SS`` in an ``HH:MM`` file is NaT, as before.
+        width = time_width or t_len[np.argmax(ok)]
+        if width == 5:
+            # The pyarrow engine hands HH:MM back as HH:MM:00; other seconds are NaT, as before.
+            ok &= (t_len == 5) | (seconds == 0)
+        else:
+            ok &= t_len == 8
+        fmt += " %H:%M" if width == 5 else " %H:%M:%S"
+
+    ts = (month0.astype("datetime64[M]").astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")).astype(
+        "datetime64[ns]"
+    )
+    if t_chars is not None:
+        hour, minute, seconds = (np.where(ok, v, 0) for v in (hour, minute, seconds))
+        ts = ts + hour.astype("timedelta64[h]") + minute.astype("timedelta64[m]") + seconds.astype("timedelta64[s]")
+    if not ok.all():
+        bad = ~ok
+        ts[bad] = _slow_timestamps(dates[bad], times[bad] if times is not None else None, fmt)
+    return pd.DatetimeIndex(ts)
+
+
+@dataclass(frozen=True)
+class _Mt5Layout:
+    """Separator and column mapping of an MT5 export (detected from the header)."""
+
+    sep: str
+    date_col: str
+    time_col: str | None
+    sources: dict[str, str | None]
+    time_width: int | None = None
+
+    @classmethod
+    def detect(cls, path: Path) -> "_Mt5Layout":
+        # Many MT5 exports are TAB-separated; pandas otherwise reads the whole header as one column.
+        with path.open("r", encoding="utf-8", errors="replace") as f:
+            header_line = f.readline()
+        sep = "\t" if "\t" in header_line else ","
+        first = pd.read_csv(path, sep=sep, nrows=1, dtype=str)
+        header = first.columns
+
+        # Normalize headers (case-insensitive)
+        cols = {c.lower(): c for c in header}
+        date_col = cols.get("<date>") or cols.get("date")
+        time_col = cols.get("<time>") or cols.get("time")
+        open_col = cols.get("<open>") or cols.get("open")
+        high_col = cols.get("<high>") or cols.get("high")
+        low_col = cols.get("<low>") or cols.get("low")
+        close_col = cols.get("<close>") or cols.get("close")
+        tickvol_col = cols.get("<tickvol>") or cols.get("tick_volume") or cols.get("tick volume")
+        vol_col = cols.get("<vol>") or cols.get("volume") or cols.get("vol")
+        spread_col = cols.get("<spread>") or cols.get("spread")
+
+        if date_col is None:
+            raise ValueError("MT5 export missing date column (expected '<DATE>' or 'Date').")
+        if open_col is None or high_col is None or low_col is None or close_col is None:
+            raise ValueError("MT5 export missing one of: open/high/low/close columns.")
+
+        sources = {
+            "open": open_col,
+            "high": high_col,
+            "low": low_col,
+            "close": close_col,
+            "tick_volume": tickvol_col,
+            "volume": vol_col,
+            "spread": spread_col,
+        }
+        # Width of the time field in the first row (HH:MM vs. HH:MM:SS) fixes the format for the whole file.
+        time_width = None
+        if time_col is not None and len(first) and len(str(first[time_col].iloc[0]).strip()) in (5, 8):
+            time_width = len(str(first[time_col].iloc[0]).strip())
+        return cls(sep=sep, date_col=date_col, time_col=time_col, sources=sources, time_width=time_width)
+
+    def read_kwargs(self) -> dict:
+        text_cols = [c for c in (self.date_col, self.time_col) if c is not None]
+        num_cols = [c for c in self.sources.values() if c is not None]
+        # Numeric columns are inferred, not forced: a malformed cell must become NaN
+        # (``to_bars``), not abort the whole read.
+        return dict(sep=self.sep, usecols=text_cols + num_cols, dtype={c: str for c in text_cols})
+
+    def to_bars(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Raw export rows → bars (chronological, rows without timestamp/OHLC dropped)."""
+        dt = _parse_mt5_timestamps(
+            df[self.date_col],
+            df[self.time_col] if self.time_col is not None else None,
+            time_width=self.time_width,
+        )
+        out = pd.DataFrame(
+            {
+                name: pd.to_numeric(df[col], errors="coerce").to_numpy() if col is not None else np.nan
+                for name, col in self.sources.items()
+            },
+            index=dt,
+        )
+        out = out[out.index.notna()].sort_index()
+        return out.dropna(subset=["open", "high", "low", "close"])
+
+
+def load_mt5_export_bars(path: Path, *, use_sidecar: bool = True) -> pd.DataFrame:
     """Loads MT5 'Export Bars' files (commonly TAB-separated with <DATE>/<TIME>/... headers).
 
     Returns an H1-indexed DataFrame with columns:
         open, high, low, close, tick_volume, volume, spread
     Index is timezone-naive pandas datetime.
+
+    The first parse writes a binary sidecar (``<file>.bars-<size>-<mtime>.npy``)
+    next to the export; later loads memory-map it instead of parsing the text.
+    A changed size or mtime of the export invalidates the sidecar.
     """
     path = Path(path)
     if not path.is_file():
         raise FileNotFoundError(path)
 
-    # Many MT5 exports are TAB-separated; pandas otherwise reads the whole header as one column.
-    df = pd.read_csv(path, sep="\t", engine="python")
-    if df.shape[1] == 1 and "\t" in str(df.columns[0]):
-        df = pd.read_csv(path, sep="\t", engine="python")
-
-    # Normalize headers (case-insensitive)
-    cols = {c.lower(): c for c in df.columns}
-    date_col = cols.get("<date>") or cols.get("date")
-    time_col = cols.get("<time>") or cols.get("time")
-    open_col = cols.get("<open>") or cols.get("open")
-    high_col = cols.get("<high>") or cols.get("high")
-    low_col = cols.get("<low>") or cols.get("low")
-    close_col = cols.get("<close>") or cols.get("close")
-    tickvol_col = cols.get("<tickvol>") or cols.get("tick_volume") or cols.get("tick volume")
-    vol_col = cols.get("<vol>") or cols.get("volume") or cols.get("vol")
-    spread_col = cols.get("<spread>") or cols.get("spread")
-
-    if date_col is None:
-        raise ValueError("MT5 export missing date column (expected '<DATE>' or 'Date').")
-    if open_col is None or high_col is None or low_col is None or close_col is None:
-        raise ValueError("MT5 export missing one of: open/high/low/close columns.")
-
-    if time_col is not None:
-        dt = (df[date_col].astype(str) + " " + df[time_col].astype(str)).str.strip()
-    else:
-        dt = df[date_col].astype(str)
-    dt = pd.to_datetime(dt, errors="coerce")
-
-    out = pd.DataFrame(
-        {
-            "open": pd.to_numeric(df[open_col], errors="coerce"),
-            "high": pd.to_numeric(df[high_col], errors="coerce"),
-            "low": pd.to_numeric(df[low_col], errors="coerce"),
-            "close": pd.to_numeric(df[close_col], errors="coerce"),
-        }
-    )
-    if tickvol_col is not None:
-        out["tick_volume"] = pd.to_numeric(df[tickvol_col], errors="coerce")
-    else:
-        out["tick_volume"] = np.nan
-    if vol_col is not None:
-        out["volume"] = pd.to_numeric(df[vol_col], errors="coerce")
-    else:
-        out["volume"] = np.nan
-    if spread_col is not None:
-        out["spread"] = pd.to_numeric(df[spread_col], errors="coerce")
-    else:
-        out["spread"] = np.nan
-
-    out.index = dt
-    out = out[out.index.notna()].sort_index()
-    out = out.dropna(subset=["open", "high", "low", "close"])
-    return out
+    if use_sidecar:
+        sidecar = _sidecar_path(path)  # stat once, before parsing
+        if sidecar.is_file():
+            return _bars_from_records(np.load(sidecar, mmap_mode="r"))
+
+    layout = _Mt5Layout.detect(path)
+    df = pd.read_csv(path, engine="pyarrow" if PYARROW_AVAILABLE else "c", **layout.read_kwargs())
+    rec = _records_from_bars(layout.to_bars(df))
+    if use_sidecar:
+        try:
+            _write_sidecar(path, sidecar, rec)
+        except OSError:  # read-only data dir: keep working without the sidecar
+            pass
+    return _bars_from_records(rec)
+
+
+def iter_mt5_export_bars(path: Path, *, chunksize: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """Reads an MT5 export (M1/H1/...) chunk by chunk; yields bars like ``load_mt5_export_bars``.
+
+    Memory stays bounded by ``chunksize`` rows, so multi-year M1 exports can be
+    aggregated with ``Mt5DailyAggregator`` without loading them whole.
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(path)
+    layout = _Mt5Layout.detect(path)
+    with pd.read_csv(path, chunksize=chunksize, **layout.read_kwargs()) as reader:
+        for chunk in reader:
+            bars = layout.to_bars(chunk)
+            if not bars.empty:
+                yield _downcast_counts(bars)
 
 
 def _session_date_index(dt_index: pd.DatetimeIndex, *, cut_hour: int) -> pd.DatetimeIndex:
@@ -100,6 +293,136 @@ def session_date_index(dt_index: pd.DatetimeIndex, *, cut_hour: int) -> pd.Datet
     return shifted.normalize()
 
 
+_NS_PER_HOUR = 3_600 * 10**9
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+
+DAILY_OHLCV_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+H1_FEATURE_COLUMNS = (
+    "h1_ret_std",
+    "h1_ret_sum_abs",
+    "h1_range_pct_mean",
+    "h1_range_pct_max",
+    "h1_tick_volume_sum",
+    "h1_spread_mean",
+    "h1_bars",
+    "h1_up_hours",
+    "h1_down_hours",
+    "h1_up_hours_frac",
+    "h1_down_hours_frac",
+    "h1_close_open_pct",
+)
+
+
+def _session_days(dt_index: pd.DatetimeIndex, *, cut_hour: int) -> np.ndarray:
+    """Session date as int64 days since epoch (same mapping as ``session_date_index``)."""
+    cut_hour = int(cut_hour)
+    if cut_hour < 0 or cut_hour > 23:
+        raise ValueError("cut_hour must be between 0 and 23.")
+    times_ns = dt_index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    return (times_ns - cut_hour * _NS_PER_HOUR) // _NS_PER_DAY
+
+
+def _nan_mean(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    total = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    n = np.add.reduceat(valid, starts)
+    return np.divide(total, n, out=np.full(starts.size, np.nan), where=n > 0)
+
+
+class _SessionBars:
+    """Per-bar arrays that do not depend on the cut hour (computed once per frame).
+
+    ``aggregate`` reduces them per session with ``np.*.reduceat`` over the
+    session start offsets: daily OHLCV and every ``h1_*`` feature in one pass,
+    without per-group Python calls. Sweeping ``cut_hour`` only re-derives the
+    session boundaries.
+    """
+
+    def __init__(self, bars: pd.DataFrame) -> None:
+        if bars.index.hasnans:
+            bars = bars[bars.index.notna()]
+        if not bars.index.is_monotonic_increasing:
+            bars = bars.sort_index(kind="stable")
+        self.index = pd.DatetimeIndex(bars.index)
+        self.open = bars["open"].to_numpy(dtype=np.float64)
+        self.high = bars["high"].to_numpy(dtype=np.float64)
+        self.low = bars["low"].to_numpy(dtype=np.float64)
+        self.close = bars["close"].to_numpy(dtype=np.float64)
+        tick = bars["tick_volume"].to_numpy()
+        self.tick = np.nan_to_num(tick, nan=0.0) if tick.dtype.kind == "f" else tick
+        # Optional (like in the reader): without a spread column h1_spread_mean is NaN.
+        if "spread" in bars.columns:
+            self.spread = bars["spread"].to_numpy(dtype=np.float64)
+        else:
+            self.spread = np.full(len(bars), np.nan)
+
+        # Close-to-close returns over the whole series; session starts are masked per cut hour.
+        c = self.close
+        self.ret = np.empty(c.size)
+        if c.size:
+            self.ret[0] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.ret[1:] = c[1:] / c[:-1] - 1.0
+        self.range_pct = (self.high - self.low) / c
+        self.up = c > self.open
+        self.down = c < self.open
+
+    def session_days(self, cut_hour: int) -> np.ndarray:
+        return _session_days(self.index, cut_hour=cut_hour)
+
+    def aggregate(self, session_day: np.ndarray) -> pd.DataFrame:
+        n = self.close.size
+        starts = np.flatnonzero(np.r_[True, session_day[1:] != session_day[:-1]])
+        last = np.r_[starts[1:], n] - 1
+        bar_counts = np.diff(np.r_[starts, n])
+        o, c = self.open, self.close
+
+        # Hourly close-to-close returns within each session (first bar of a session: NaN).
+        ret = self.ret.copy()
+        ret[starts] = np.nan
+        ret_valid = ~np.isnan(ret)
+        n_ret = np.add.reduceat(ret_valid, starts)
+        ret_mean = _nan_mean(ret, starts)
+        dev = np.where(ret_valid, ret - np.repeat(ret_mean, bar_counts), 0.0)
+        ret_var = np.divide(
+            np.add.reduceat(dev * dev, starts), n_ret - 1, out=np.full(starts.size, np.nan), where=n_ret > 1
+        )
+
+        up_hours = np.add.reduceat(self.up, starts).astype(np.int64)
+        down_hours = np.add.reduceat(self.down, starts).astype(np.int64)
+        volume = np.add.reduceat(self.tick, starts)
+
+        dates = pd.DatetimeIndex(session_day[starts].astype("datetime64[D]").astype("datetime64[ns]"), name="Date")
+        return pd.DataFrame(
+            {
+                "Open": o[starts],
+                "High": np.fmax.reduceat(self.high, starts),
+                "Low": np.fmin.reduceat(self.low, starts),
+                "Close": c[last],
+                "Volume": volume,
+                "h1_ret_std": np.sqrt(ret_var),
+                "h1_ret_sum_abs": np.add.reduceat(np.where(ret_valid, np.abs(ret), 0.0), starts),
+                "h1_range_pct_mean": _nan_mean(self.range_pct, starts),
+                "h1_range_pct_max": np.fmax.reduceat(self.range_pct, starts),
+                "h1_tick_volume_sum": volume.astype(np.float64),
+                "h1_spread_mean": _nan_mean(self.spread, starts),
+                "h1_bars": bar_counts.astype(np.int64),
+                "h1_up_hours": up_hours,
+                "h1_down_hours": down_hours,
+                "h1_up_hours_frac": up_hours / bar_counts,
+                "h1_down_hours_frac": down_hours / bar_counts,
+                "h1_close_open_pct": c[last] / o[starts] - 1.0,
+            },
+            index=dates,
+        )
+
+    def daily(self, *, cut_hour: int, drop_weekends: bool) -> pd.DataFrame:
+        daily = self.aggregate(self.session_days(cut_hour))
+        if drop_weekends:
+            daily = daily[daily.index.dayofweek < 5]
+        return daily
+
+
 def h1_to_daily_ohlc(
     df_h1: pd.DataFrame,
     *,
@@ -113,36 +436,21 @@ def h1_to_daily_ohlc(
     """
     if df_h1.empty:
         raise ValueError("df_h1 is empty.")
-    session_date = _session_date_index(df_h1.index, cut_hour=cut_hour)
-
-    g = df_h1.groupby(session_date, sort=True)
-    daily = g.agg(
-        Open=("open", "first"),
-        High=("high", "max"),
-        Low=("low", "min"),
-        Close=("close", "last"),
-        Volume=("tick_volume", "sum"),
-    )
-    daily.index.name = "Date"
-    daily = daily.reset_index()
-    daily["Date"] = pd.to_datetime(daily["Date"], errors="coerce")
-    daily = daily[daily["Date"].notna()].copy()
-    daily = daily.sort_values("Date").set_index("Date")
-
-    if drop_weekends:
-        daily = daily[daily.index.dayofweek < 5]
-
-    return daily
+    daily = _SessionBars(df_h1).daily(cut_hour=cut_hour, drop_weekends=drop_weekends)
+    return daily[list(DAILY_OHLCV_COLUMNS)]
 
 
 def h1_daily_intraday_features(
     df_h1: pd.DataFrame,
     *,
     cfg: Mt5H1DailyFeatureConfig | None = None,
+    use_cache: bool = True,
 ) -> pd.DataFrame:
     """Computes per-day intraday features from H1 bars (no lookahead).
 
-    Output index is daily Date.
+    Output index is daily Date. With ``use_cache`` the result is stored in the
+    artifact cache (data/processed/cache/h1_features), keyed by the content of
+    ``df_h1``, the config (cut_hour, drop_weekends) and this module's code.
     """
     if cfg is None:
         cfg = Mt5H1DailyFeatureConfig()
@@ -150,52 +458,98 @@ def h1_daily_intraday_features(
     if df_h1.empty:
         raise ValueError("df_h1 is empty.")
 
-    session_date = _session_date_index(df_h1.index, cut_hour=cfg.cut_hour)
-    df = df_h1.copy()
-    df["_date"] = session_date
-
-    # Hourly close-to-close returns within each day (pct).
-    df["_ret"] = df.groupby("_date")["close"].pct_change()
-    df["_range_pct"] = (df["high"] - df["low"]) / df["close"]
-    df["_dir"] = np.sign(df["close"] - df["open"])
-
-    g = df.groupby("_date", sort=True)
-    feat = g.agg(
-        h1_ret_std=("_ret", "std"),
-        h1_ret_sum_abs=("_ret", lambda s: float(np.nansum(np.abs(s.to_numpy())))),
-        h1_range_pct_mean=("_range_pct", "mean"),
-        h1_range_pct_max=("_range_pct", "max"),
-        h1_tick_volume_sum=("tick_volume", "sum"),
-        h1_spread_mean=("spread", "mean"),
-        h1_bars=("close", "count"),
-        h1_up_hours=("_dir", lambda s: int((s > 0).sum())),
-        h1_down_hours=("_dir", lambda s: int((s < 0).sum())),
-    ).astype(
-        {
-            "h1_tick_volume_sum": "float64",
-            "h1_spread_mean": "float64",
-            "h1_bars": "int64",
-            "h1_up_hours": "int64",
-            "h1_down_hours": "int64",
-        }
-    )
+    if not use_cache:
+        return _h1_daily_intraday_features(df_h1, cfg)
+    parts = {
+        "h1": frame_fingerprint(df_h1),
+        "cut_hour": int(cfg.cut_hour),
+        "drop_weekends": bool(cfg.drop_weekends),
+        "code": code_fingerprint(__file__),
+    }
+    return cached_frame("h1_features", parts, lambda: _h1_daily_intraday_features(df_h1, cfg))
 
-    # Fractions
-    denom = feat["h1_bars"].replace(0, np.nan)
-    feat["h1_up_hours_frac"] = feat["h1_up_hours"] / denom
-    feat["h1_down_hours_frac"] = feat["h1_down_hours"] / denom
 
-    # Day open->close return (using first open and last close of the session)
-    first_open = g["open"].first()
-    last_close = g["close"].last()
-    feat["h1_close_open_pct"] = (last_close / first_open) - 1.0
+def _h1_daily_intraday_features(df_h1: pd.DataFrame, cfg: Mt5H1DailyFeatureConfig) -> pd.DataFrame:
+    daily = _SessionBars(df_h1).daily(cut_hour=cfg.cut_hour, drop_weekends=cfg.drop_weekends)
+    return daily[list(H1_FEATURE_COLUMNS)]
 
-    feat.index.name = "Date"
-    feat = feat.reset_index()
-    feat["Date"] = pd.to_datetime(feat["Date"], errors="coerce")
-    feat = feat[feat["Date"].notna()].copy().sort_values("Date").set_index("Date")
 
-    if cfg.drop_weekends:
-        feat = feat[feat.index.dayofweek < 5]
+def h1_daily_by_cut_hour(
+    df_h1: pd.DataFrame,
+    cut_hours: Iterable[int],
+    *,
+    drop_weekends: bool = True,
+) -> dict[int, pd.DataFrame]:
+    """Daily OHLCV + ``h1_*`` features for several ``cut_hour`` values.
+
+    The per-bar work (returns, ranges, directions) is done once; each cut hour
+    only re-derives the session boundaries and runs the reductions.
+    """
+    if df_h1.empty:
+        raise ValueError("df_h1 is empty.")
+    bars = _SessionBars(df_h1)
+    return {int(h): bars.daily(cut_hour=h, drop_weekends=drop_weekends) for h in cut_hours}
 
-    return feat
+
+class Mt5DailyAggregator:
+    """Streaming bars (M1/H1/...) → daily OHLCV + ``h1_*`` features in a single pass.
+
+    Feed chronological chunks via ``update``; each call returns the sessions
+    completed so far. Only the trailing (possibly incomplete) session is carried
+    over to the next chunk, so memory is bounded by chunk size + one session,
+    for any ``cut_hour``. Call ``finish`` after the last chunk.
+    """
+
+    def __init__(self, *, cut_hour: int = 0, drop_weekends: bool = True) -> None:
+        _session_days(pd.DatetimeIndex([]), cut_hour=cut_hour)  # validates cut_hour
+        self.cut_hour = int(cut_hour)
+        self.drop_weekends = bool(drop_weekends)
+        self._carry: pd.DataFrame | None = None
+
+    def update(self, bars: pd.DataFrame) -> pd.DataFrame:
+        if bars.index.hasnans:
+            bars = bars[bars.index.notna()]
+        if not bars.index.is_monotonic_increasing:
+            bars = bars.sort_index()
+        if self._carry is not None and not bars.empty:
+            if bars.index[0] < self._carry.index[-1]:
+                raise ValueError("Bars must arrive in chronological order across chunks.")
+            bars = pd.concat([self._carry, bars])
+        if bars.empty:
+            return self._emit(bars)
+
+        session_day = _session_days(bars.index, cut_hour=self.cut_hour)
+        split = int(np.searchsorted(session_day, session_day[-1], side="left"))
+        self._carry = bars.iloc[split:]
+        return self._emit(bars.iloc[:split], session_day[:split])
+
+    def finish(self) -> pd.DataFrame:
+        carry, self._carry = self._carry, None
+        if carry is None:
+            return self._emit(pd.DataFrame(columns=_BAR_COLUMNS, index=pd.DatetimeIndex([])))
+        return self._emit(carry, _session_days(carry.index, cut_hour=self.cut_hour))
+
+    def _emit(self, bars: pd.DataFrame, session_day: np.ndarray | None = None) -> pd.DataFrame:
+        if bars.empty:
+            return pd.DataFrame(
+                columns=[*DAILY_OHLCV_COLUMNS, *H1_FEATURE_COLUMNS],
+                index=pd.DatetimeIndex([], name="Date"),
+            )
+        daily = _SessionBars(bars).aggregate(session_day)
+        if self.drop_weekends:
+            daily = daily[daily.index.dayofweek < 5]
+        return daily
+
+
+def aggregate_mt5_export_daily(
+    path: Path,
+    *,
+    cut_hour: int = 0,
+    drop_weekends: bool = True,
+    chunksize: int = 1_000_000,
+) -> pd.DataFrame:
+    """Streams an MT5 export into daily OHLCV + ``h1_*`` features (see ``Mt5DailyAggregator``)."""
+    agg = Mt5DailyAggregator(cut_hour=cut_hour, drop_weekends=drop_weekends)
+    parts = [agg.update(bars) for bars in iter_mt5_export_bars(path, chunksize=chunksize)]
+    parts.append(agg.finish())
+    return pd.concat([p for p in parts if not p.empty] or parts[-1:])
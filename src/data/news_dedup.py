@@ -0,0 +1,133 @@
+"""Deduplizierung von News-Artikeln über 64-Bit-Hashes.
+
+Überlappende Downloads (z.B. mehrere Abrufe mit sich überschneidenden
+Zeiträumen) enthalten dieselben Artikel mehrfach. Jeder Artikel bekommt deshalb
+eine ID = 64-Bit-Hash aus
+
+- normalisiertem Titel (klein geschrieben, Whitespace zusammengefasst),
+- Link,
+- Zeitstempel (in UTC, d.h. ``+02:00`` und ``Z`` derselben Sekunde sind gleich).
+
+Der ``ArticleIndex`` hält die bereits gesehenen IDs als sortiertes ``uint64``-Array
+(8 Byte pro Artikel, 10 Mio. Artikel ≈ 80 MB) und prüft ganze Blöcke per
+``searchsorted``. Persistiert wird als ``.npy``; beim Laden wird memory-mapped
+gelesen, es werden also nur die berührten Seiten geladen.
+
+Artikel ohne Titel *und* ohne Link lassen sich nicht identifizieren; sie
+bekommen die ID 0 und werden nie als Duplikat verworfen.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+NO_ARTICLE_ID = np.uint64(0)
+
+
+def normalize_titles(titles: pd.Series) -> pd.Series:
+    """Titel für den Vergleich: Kleinbuchstaben, Whitespace zusammengefasst (None → "")."""
+    return titles.fillna("").astype(str).str.lower().str.split().str.join(" ")
+
+
+def article_ids(dates: pd.Series, titles: pd.Series, links: pd.Series) -> np.ndarray:
+    """64-Bit-ID pro Artikel aus (normalisierter Titel, Link, Zeitstempel in UTC)."""
+    stamps = pd.to_datetime(dates, utc=True, format="ISO8601", errors="coerce")
+    keys = pd.DataFrame(
+        {
+            "title": normalize_titles(pd.Series(titles)).to_numpy(),
+            "link": pd.Series(links).fillna("").astype(str).to_numpy(),
+            "ts": stamps.to_numpy(dtype="M8[ns]").view("int64"),
+        }
+    )
+    ids = pd.util.hash_pandas_object(keys, index=False).to_numpy(dtype=np.uint64)
+    unknown = (keys["title"].to_numpy() == "") & (keys["link"].to_numpy() == "")
+    ids[unknown] = NO_ARTICLE_ID
+    ids[~unknown & (ids == NO_ARTICLE_ID)] = 1  # 0 ist für "nicht identifizierbar" reserviert
+    return ids
+
+
+class ArticleIndex:
+    """Menge bereits gezählter Artikel-IDs (sortiertes ``uint64``-Array, optional auf Platte)."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = Path(path) if path is not None else None
+        if self.path is not None and self.path.is_file():
+            self._ids = np.load(self.path, mmap_mode="r")
+        else:
+            self._ids = np.empty(0, dtype=np.uint64)
+        # Neue IDs seit dem letzten save(): sortierte Segmente mit (ab)fallender Größe.
+        # Gleich große Segmente werden gemergt (binärer Zähler) → O(log n) Segmente,
+        # jede ID wird insgesamt nur O(log n)-mal umkopiert.
+        self._pending: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._ids) + sum(len(seg) for seg in self._pending)
+
+    @staticmethod
+    def _isin_sorted(sorted_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        if len(sorted_ids) == 0:
+            return np.zeros(len(ids), dtype=bool)
+        pos = np.searchsorted(sorted_ids, ids)
+        return sorted_ids[np.minimum(pos, len(sorted_ids) - 1)] == ids
+
+    def _contains_sorted(self, ids: np.ndarray) -> np.ndarray:
+        # Sortierte Anfragen → searchsorted läuft cache-freundlich durch das Array.
+        found = self._isin_sorted(self._ids, ids)
+        for seg in self._pending:
+            found |= self._isin_sorted(seg, ids)
+        return found
+
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        """True für IDs, die schon im Index stehen."""
+        ids = np.asarray(ids, dtype=np.uint64)
+        order = np.argsort(ids, kind="stable")
+        found = np.empty(len(ids), dtype=bool)
+        found[order] = self._contains_sorted(ids[order])
+        return found
+
+    def add_new(self, ids: np.ndarray) -> np.ndarray:
+        """Maske der Zeilen, die gezählt werden sollen, und Aufnahme ihrer IDs in den Index.
+
+        False für IDs, die schon im Index stehen oder im selben Block früher vorkommen;
+        ID 0 (nicht identifizierbar) ist immer True.
+        """
+        ids = np.asarray(ids, dtype=np.uint64)
+        order = np.argsort(ids, kind="stable")  # stabil → erstes Vorkommen bleibt vorne
+        sorted_ids = ids[order]
+        first = np.ones(len(sorted_ids), dtype=bool)
+        first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+        known = sorted_ids != NO_ARTICLE_ID
+        keep_sorted = (first & ~self._contains_sorted(sorted_ids)) | ~known
+
+        new = sorted_ids[keep_sorted & known]  # sortiert, eindeutig, disjunkt zum Index
+        while len(new) and self._pending and len(self._pending[-1]) <= len(new):
+            # Zwei sortierte Läufe: stabile Sortierung (Timsort) mergt linear.
+            new = np.concatenate([self._pending.pop(), new])
+            new.sort(kind="stable")
+        if len(new):
+            self._pending.append(new)
+
+        keep = np.empty(len(ids), dtype=bool)
+        keep[order] = keep_sorted
+        return keep
+
+    def save(self) -> None:
+        """Schreibt den Index (bestehende plus neue IDs) atomar nach ``path``."""
+        if self.path is None:
+            raise ValueError("ArticleIndex ohne Pfad kann nicht gespeichert werden.")
+        if not self._pending and self.path.is_file():
+            return
+        merged = np.concatenate([np.asarray(self._ids), *self._pending])
+        merged.sort(kind="stable")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("wb") as fh:
+            np.save(fh, merged)
+        self._ids = np.empty(0, dtype=np.uint64)  # Memory-Map vor dem Ersetzen freigeben
+        os.replace(tmp, self.path)
+        self._ids = np.load(self.path, mmap_mode="r")
+        self._pending = []
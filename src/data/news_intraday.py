@@ -0,0 +1,237 @@
+"""Intraday-News-Features: Stundenaggregate und Features pro Handelssession (``cut_hour``).
+
+``build_daily_features`` ordnet News dem UTC-Kalendertag zu. Die Preis-Sessions aus
+``src.data.mt5_h1`` enden aber zur ``cut_hour`` – News nach dem Cut gehören zur
+nächsten Session. Hier wird deshalb zweistufig aggregiert:
+
+1. Stunden: Zeitstempel sortieren, Stundengrenzen per ``searchsorted`` suchen und
+   Artikelzahl/Sentiment-Summen als Differenzen von Präfixsummen bilden (kein
+   ``groupby`` auf umgerechneten Datumswerten). Ergebnis sind mergebare
+   Teilsummen pro Stunde (``PARTIAL_COLUMNS`` wie bei den Tagesaggregaten).
+2. Sessions: Session ``d`` umfasst ``[d + cut_hour, d + 1 Tag + cut_hour)`` – dieselbe
+   Zuordnung wie ``mt5_h1.session_date_index``. Summen pro Session und für die
+   letzten ``w`` Stunden vor dem Cut sind wieder Präfixsummen-Differenzen über die
+   sortierten Stunden.
+
+``clock_offset_hours`` verschiebt die (UTC-)Zeitstempel der News in die Uhrzeit der
+Preisdaten (z.B. ``2`` für MT5-Serverzeit UTC+2), damit der Cut dieselbe Stunde meint.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Final, Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.data.news_dedup import ArticleIndex
+from src.data.prepare_eodhd_news import (
+    NEWS_CHUNK_ROWS,
+    PARTIAL_COLUMNS,
+    SENTIMENT_KEYS,
+    iter_news_chunks,
+)
+from src.utils.io import DATA_PROCESSED, DATA_RAW
+
+NEWS_LAST_HOURS: Final = (4,)
+
+_NS_PER_HOUR: Final = 3_600 * 10**9
+_NS_PER_DAY: Final = 24 * _NS_PER_HOUR
+_COUNT_COLUMNS: Final = tuple(col for col in PARTIAL_COLUMNS if not col.endswith("_sum"))
+
+
+def _check_cut_hour(cut_hour: int) -> int:
+    cut_hour = int(cut_hour)
+    if cut_hour < 0 or cut_hour > 23:
+        raise ValueError("cut_hour muss zwischen 0 und 23 liegen.")
+    return cut_hour
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    """Präfixsummen mit führender Null: ``out[i] = values[:i].sum()``."""
+    out = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(values, out=out[1:])
+    return out
+
+
+def _partial_values(chunk: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Pro Artikel die Summanden der Teilsummen (Titel zählt als Artikel, NaN → 0/nicht gezählt)."""
+    data = {"article_count": chunk["title"].to_numpy(dtype=np.float64)}
+    for key in SENTIMENT_KEYS:
+        values = chunk[key].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        data[f"{key}_sum"] = np.where(valid, values, 0.0)
+        data[f"{key}_n"] = valid.astype(np.float64)
+    return data
+
+
+def _empty_partials(index_name: str) -> pd.DataFrame:
+    return pd.DataFrame(
+        {col: pd.Series(dtype="int64" if col in _COUNT_COLUMNS else "float64") for col in PARTIAL_COLUMNS},
+        index=pd.DatetimeIndex([], name=index_name),
+    )
+
+
+def hourly_partials(chunk: pd.DataFrame, *, clock_offset_hours: int = 0) -> pd.DataFrame:
+    """Teilsummen pro Stunde (Index = Stundenbeginn in Preis-Uhrzeit) für einen News-Block."""
+    stamps = pd.to_datetime(chunk["date"], utc=True, format="ISO8601")
+    ns = stamps.dt.tz_localize(None).to_numpy(dtype="M8[ns]").view(np.int64)
+    valid = ~stamps.isna().to_numpy()
+    if not valid.any():
+        return _empty_partials("hour")
+
+    ns = ns[valid] + int(clock_offset_hours) * _NS_PER_HOUR
+    order = np.argsort(ns, kind="stable")
+    ns = ns[order]
+    # Stundengrenzen vom ersten bis hinter den letzten Artikel; leere Stunden fallen weg.
+    edges = np.arange(ns[0] // _NS_PER_HOUR, ns[-1] // _NS_PER_HOUR + 2, dtype=np.int64) * _NS_PER_HOUR
+    pos = np.searchsorted(ns, edges, side="left")
+    filled = np.flatnonzero(np.diff(pos) > 0)
+    lo, hi = pos[filled], pos[filled + 1]
+
+    out = {}
+    for col, values in _partial_values(chunk[valid]).items():
+        prefix = _prefix(values[order])
+        out[col] = prefix[hi] - prefix[lo]
+    parts = pd.DataFrame(out, index=pd.DatetimeIndex(edges[filled].view("M8[ns]"), name="hour"))
+    return parts.astype({col: "int64" for col in _COUNT_COLUMNS})
+
+
+class HourlyNewsAggregator:
+    """Inkrementelle Stundenaggregation (wie ``DailyNewsAggregator``, aber pro Stunde)."""
+
+    def __init__(self, *, clock_offset_hours: int = 0) -> None:
+        self.clock_offset_hours = int(clock_offset_hours)
+        self._parts: pd.DataFrame | None = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        part = hourly_partials(chunk, clock_offset_hours=self.clock_offset_hours)
+        self._parts = part if self._parts is None else self._parts.add(part, fill_value=0)
+
+    def partials(self) -> pd.DataFrame:
+        """Teilsummen pro Stunde (Index = Stundenbeginn, sortiert; Zähler als ``int64``)."""
+        if self._parts is None:
+            return _empty_partials("hour")
+        return self._parts.sort_index().astype({col: "int64" for col in _COUNT_COLUMNS})
+
+
+def _averages(sums: dict[str, np.ndarray], prefix: str) -> dict[str, np.ndarray]:
+    out = {f"{prefix}article_count": sums["article_count"].astype(np.int64)}
+    for key in SENTIMENT_KEYS:
+        n = sums[f"{key}_n"]
+        out[f"{prefix}avg_{key}"] = np.divide(
+            sums[f"{key}_sum"], n, out=np.full(len(n), np.nan), where=n > 0
+        )
+    return out
+
+
+def hourly_news_features(parts: pd.DataFrame) -> pd.DataFrame:
+    """Stündliche Artikelzahl und Durchschnittssentiment (``hour``, ``article_count``, ``avg_*``)."""
+    parts = parts.sort_index()
+    sums = {col: parts[col].to_numpy(dtype=np.float64) for col in PARTIAL_COLUMNS}
+    return pd.DataFrame({"hour": parts.index.to_numpy(), **_averages(sums, "")})
+
+
+def session_news_features(
+    parts: pd.DataFrame,
+    *,
+    cut_hour: int = 0,
+    last_hours: Iterable[int] = NEWS_LAST_HOURS,
+) -> pd.DataFrame:
+    """Features pro Session aus Stunden-Teilsummen (nur Sessions mit mindestens einer News).
+
+    Spalten (``date`` = Session-Datum wie ``mt5_h1.session_date_index``):
+    - ``news_session_article_count``, ``news_session_avg_<k>``: ganze Session,
+    - ``news_last<w>h_article_count``, ``news_last<w>h_avg_<k>``: letzte ``w`` Stunden vor dem Cut,
+    - ``news_session_active_hours``: Stunden mit mindestens einer News,
+    - ``news_session_peak_hour_count``: höchste Artikelzahl in einer Stunde.
+    """
+    cut_hour = _check_cut_hour(cut_hour)
+    last_hours = [int(w) for w in last_hours]
+    if any(w < 1 or w > 24 for w in last_hours):
+        raise ValueError("last_hours muss zwischen 1 und 24 liegen.")
+
+    parts = parts.sort_index()
+    hours = parts.index.to_numpy(dtype="M8[ns]").view(np.int64)
+    if hours.size == 0:
+        columns = ["date", "news_session_article_count", *(f"news_session_avg_{k}" for k in SENTIMENT_KEYS)]
+        for w in last_hours:
+            columns += [f"news_last{w}h_article_count", *(f"news_last{w}h_avg_{k}" for k in SENTIMENT_KEYS)]
+        return pd.DataFrame(columns=[*columns, "news_session_active_hours", "news_session_peak_hour_count"])
+
+    session_day = (hours - cut_hour * _NS_PER_HOUR) // _NS_PER_DAY
+    days = np.unique(session_day)
+    start = days * _NS_PER_DAY + cut_hour * _NS_PER_HOUR
+    end = start + _NS_PER_DAY
+    lo = np.searchsorted(hours, start, side="left")
+    hi = np.searchsorted(hours, end, side="left")
+
+    prefixes = {col: _prefix(parts[col].to_numpy(dtype=np.float64)) for col in PARTIAL_COLUMNS}
+    out: dict[str, np.ndarray] = {"date": days.astype("M8[D]").astype("M8[ns]")}
+    out.update(_averages({col: p[hi] - p[lo] for col, p in prefixes.items()}, "news_session_"))
+    for w in last_hours:
+        win = np.searchsorted(hours, end - w * _NS_PER_HOUR, side="left")
+        out.update(_averages({col: p[hi] - p[win] for col, p in prefixes.items()}, f"news_last{w}h_"))
+    out["news_session_active_hours"] = (hi - lo).astype(np.int64)
+    out["news_session_peak_hour_count"] = np.maximum.reduceat(parts["article_count"].to_numpy(), lo).astype(np.int64)
+    return pd.DataFrame(out)
+
+
+def build_hourly_partials(
+    jsonl_paths: Path | Iterable[Path] | None = None,
+    *,
+    clock_offset_hours: int = 0,
+    chunk_rows: int = NEWS_CHUNK_ROWS,
+    engine: str | None = None,
+    dedup: bool = True,
+) -> pd.DataFrame:
+    """Stunden-Teilsummen über eine oder mehrere JSONL-Dateien (streamend, optional dedupliziert)."""
+    if jsonl_paths is None:
+        jsonl_paths = [DATA_RAW / "news" / "eodhd_news.jsonl"]
+    elif isinstance(jsonl_paths, (str, Path)):
+        jsonl_paths = [jsonl_paths]
+    jsonl_paths = [Path(p) for p in jsonl_paths]
+
+    agg = HourlyNewsAggregator(clock_offset_hours=clock_offset_hours)
+    seen = ArticleIndex() if dedup else None
+    n_rows = 0
+    for path in jsonl_paths:
+        for chunk in iter_news_chunks(path, chunk_rows=chunk_rows, engine=engine, with_ids=dedup):
+            if seen is not None:
+                chunk = chunk[seen.add_new(chunk["article_id"].to_numpy())]
+            n_rows += len(chunk)
+            agg.update(chunk)
+    if n_rows == 0:
+        raise ValueError(f"Keine News gefunden in {[str(p) for p in jsonl_paths]}")
+    return agg.partials()
+
+
+def main() -> None:
+    """CLI: Stunden- und Session-Features der News berechnen und als CSV ablegen."""
+    parser = argparse.ArgumentParser(description="EODHD-News pro Stunde und pro Session (cut_hour) aggregieren.")
+    parser.add_argument("--jsonl", type=Path, nargs="+", default=None, help="JSONL-Dateien (Default: eodhd_news.jsonl).")
+    parser.add_argument("--cut-hour", type=int, default=0, help="Session-Cut wie in src.data.mt5_h1 (0–23).")
+    parser.add_argument(
+        "--clock-offset-hours",
+        type=int,
+        default=0,
+        help="Verschiebung UTC → Uhrzeit der Preisdaten (z.B. 2 für MT5-Serverzeit UTC+2).",
+    )
+    parser.add_argument("--last-hours", type=int, nargs="+", default=list(NEWS_LAST_HOURS))
+    args = parser.parse_args()
+
+    parts = build_hourly_partials(args.jsonl, clock_offset_hours=args.clock_offset_hours)
+    out_dir = DATA_PROCESSED / "news"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    hourly_path = out_dir / "eodhd_hourly_features.csv"
+    hourly_news_features(parts).to_csv(hourly_path, index=False)
+    session_path = out_dir / f"eodhd_session_features__cut{args.cut_hour}.csv"
+    session_news_features(parts, cut_hour=args.cut_hour, last_hours=args.last_hours).to_csv(session_path, index=False)
+    print(f"[ok] Stunden-Features gespeichert unter {hourly_path}")
+    print(f"[ok] Session-Features gespeichert unter {session_path}")
+
+
+if __name__ == "__main__":
+    main()
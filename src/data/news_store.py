@@ -0,0 +1,301 @@
+"""Inkrementeller Store der News-Tagesaggregate (Teilsummen, nach Monat partitioniert).
+
+Statt bei jedem Refresh alle JSONL-Dateien neu zu parsen, werden pro Tag die
+mergebaren Teilsummen (``article_count``, ``<k>_sum``, ``<k>_n`` für jeden
+Sentiment-Key) abgelegt – eine Tabelle pro Monat:
+
+    data/processed/news/daily_parts/<YYYY-MM>.parquet   (ohne pyarrow: .csv)
+    data/processed/news/daily_parts/manifest.json
+    data/processed/news/daily_parts/articles.npy        (IDs bereits gezählter Artikel)
+
+Das Manifest merkt sich pro JSONL-Datei, bis zu welchem Byte-Offset sie schon
+eingelesen wurde. Ein Refresh liest nur neue Dateien bzw. neu angehängte Zeilen,
+aggregiert sie pro Tag und schreibt ausschließlich die betroffenen Monate neu –
+Aufwand O(neue Artikel) statt O(alle Artikel). Die Tagesfeatures (``avg_*``)
+werden erst beim Lesen aus den Summen gebildet.
+
+Überlappende Dumps werden über einen persistenten Artikel-Index
+(``articles.npy``, siehe ``src.data.news_dedup``) dedupliziert: ein Artikel, der
+schon in einer früher gelesenen Datei stand, zählt nicht noch einmal.
+
+Gelesen wird nur bis zur Dateigröße beim Start des Refreshs und nur ganze Zeilen;
+genau dieser Offset landet im Manifest (eine halb geschriebene letzte Zeile folgt
+beim nächsten Refresh). Dateien werden als append-only angenommen: Anfang und Ende
+des bereits gelesenen Bereichs werden per Hash geprüft. Wurde eine Datei umgeschrieben, gibt es einen
+``ValueError`` – dann den Store mit ``--rebuild`` neu aufbauen.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Final, Iterable
+
+import pandas as pd
+
+from src.data.news_dedup import ArticleIndex
+from src.data.prepare_eodhd_news import (
+    NEWS_CHUNK_ROWS,
+    PARTIAL_COLUMNS,
+    DailyNewsAggregator,
+    daily_features_from_partials,
+    iter_news_chunks,
+    save_daily_features,
+)
+from src.utils.io import DATA_PROCESSED, DATA_RAW, TABLE_FORMATS, read_table, table_path, write_table
+
+NEWS_STORE_DIR: Final = DATA_PROCESSED / "news" / "daily_parts"
+NEWS_RAW_DIR: Final = DATA_RAW / "news"
+
+_MANIFEST_NAME = "manifest.json"
+_ARTICLES_NAME = "articles.npy"
+_SIGNATURE_BYTES = 1 << 16  # Anfang/Ende des gelesenen Bereichs für die Append-Prüfung
+_COUNT_COLUMNS = tuple(col for col in PARTIAL_COLUMNS if not col.endswith("_sum"))
+
+
+def _read_range(path: Path, start: int, end: int) -> bytes:
+    with path.open("rb") as fh:
+        fh.seek(start)
+        return fh.read(end - start)
+
+
+def _signature(path: Path, offset: int) -> dict:
+    """Hash der ersten/letzten ``_SIGNATURE_BYTES`` vor ``offset`` (O(1) statt ganzer Datei)."""
+    head = _read_range(path, 0, min(offset, _SIGNATURE_BYTES))
+    tail = _read_range(path, max(offset - _SIGNATURE_BYTES, 0), offset)
+    return {
+        "offset": int(offset),
+        "head": hashlib.sha1(head).hexdigest(),
+        "tail": hashlib.sha1(tail).hexdigest(),
+    }
+
+
+def _complete_end(path: Path, start: int, end: int) -> int:
+    """Ende der letzten vollständigen Zeile in ``[start, end)``.
+
+    Eine Zeile, die gerade noch geschrieben wird (ohne Zeilenumbruch und kein gültiges
+    JSON), bleibt für den nächsten Refresh liegen. Eine letzte Zeile ohne Zeilenumbruch,
+    die vollständig parst, zählt mit.
+    """
+    pos = end
+    while pos > start:
+        lo = max(pos - _SIGNATURE_BYTES, start)
+        cut = _read_range(path, lo, pos).rfind(b"\n")
+        if cut >= 0:
+            line_end = lo + cut + 1
+            break
+        pos = lo
+    else:
+        line_end = start
+    tail = _read_range(path, line_end, end)
+    if tail.strip():
+        try:
+            json.loads(tail)
+        except ValueError:
+            return line_end
+    return end
+
+
+def _month_key(days: pd.DatetimeIndex) -> pd.Index:
+    return pd.Index(days.strftime("%Y-%m"))
+
+
+class NewsDayStore:
+    """Monatspartitionierte Teilsummen pro Tag plus Manifest der eingelesenen Dateien."""
+
+    def __init__(self, root: Path = NEWS_STORE_DIR) -> None:
+        self.root = Path(root)
+
+    # -- Manifest ------------------------------------------------------------
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / _MANIFEST_NAME
+
+    def _load_manifest(self) -> dict[str, dict]:
+        if not self.manifest_path.is_file():
+            return {}
+        return json.loads(self.manifest_path.read_text(encoding="utf-8"))["files"]
+
+    def _save_manifest(self, files: dict[str, dict]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_name(_MANIFEST_NAME + ".tmp")
+        tmp.write_text(json.dumps({"files": files}, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    # -- Partitionen ---------------------------------------------------------
+
+    def months(self) -> list[str]:
+        """Vorhandene Monatspartitionen (``YYYY-MM``), sortiert."""
+        if not self.root.is_dir():
+            return []
+        suffixes = {f".{fmt}" for fmt in TABLE_FORMATS}
+        return sorted({p.stem for p in self.root.iterdir() if p.suffix in suffixes and not p.stem.startswith(".")})
+
+    def read_month(self, month: str) -> pd.DataFrame:
+        """Teilsummen eines Monats (Index = Tag); leer, wenn es die Partition nicht gibt."""
+        try:
+            df = read_table(self.root / month, parse_dates=["date"])
+        except FileNotFoundError:
+            return pd.DataFrame(columns=list(PARTIAL_COLUMNS), index=pd.DatetimeIndex([], name="date"))
+        df["date"] = pd.to_datetime(df["date"])
+        return df.set_index("date")[list(PARTIAL_COLUMNS)]
+
+    def _write_month(self, month: str, parts: pd.DataFrame) -> None:
+        parts = parts.sort_index().astype({col: "int64" for col in _COUNT_COLUMNS})
+        parts.index.name = "date"
+        # Erst unter temporärem Namen schreiben, dann atomar ersetzen.
+        tmp = write_table(parts, self.root / f".{month}_tmp", index=True)
+        os.replace(tmp, table_path(self.root / month, tmp.suffix.lstrip(".")))
+
+    def merge(self, parts: pd.DataFrame) -> list[str]:
+        """Addiert Teilsummen pro Tag in die betroffenen Monatspartitionen; gibt diese zurück."""
+        if parts.empty:
+            return []
+        parts = parts[list(PARTIAL_COLUMNS)]
+        months = _month_key(pd.DatetimeIndex(parts.index))
+        touched = []
+        for month, new in parts.groupby(months.to_numpy()):
+            old = self.read_month(month)
+            self._write_month(month, new if old.empty else old.add(new, fill_value=0))
+            touched.append(month)
+        return touched
+
+    def partials(self, start: str | None = None, end: str | None = None) -> pd.DataFrame:
+        """Teilsummen aller (bzw. der Monate ``start``..``end``, ``YYYY-MM``) Partitionen."""
+        months = [m for m in self.months() if (start is None or m >= start) and (end is None or m <= end)]
+        frames = [self.read_month(m) for m in months]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=list(PARTIAL_COLUMNS), index=pd.DatetimeIndex([], name="date"))
+        return pd.concat(frames).sort_index()
+
+    def daily_features(self) -> pd.DataFrame:
+        """Tagesfeatures wie ``build_daily_features`` (``date``, ``article_count``, ``avg_*``)."""
+        return daily_features_from_partials(self.partials())
+
+    # -- Ingestion -----------------------------------------------------------
+
+    def articles(self) -> ArticleIndex:
+        """Persistenter Index der bereits gezählten Artikel."""
+        return ArticleIndex(self.root / _ARTICLES_NAME)
+
+    def clear(self) -> None:
+        """Löscht Partitionen, Artikel-Index und Manifest (für ``--rebuild``)."""
+        if not self.root.is_dir():
+            return
+        for path in self.root.iterdir():
+            if path.is_file():
+                path.unlink()
+
+    def pending(self, path: Path) -> tuple[int, int]:
+        """Noch nicht eingelesener Byte-Bereich ``(start, end)`` einer JSONL-Datei.
+
+        ``ValueError``, wenn die Datei seit dem letzten Einlesen nicht nur verlängert wurde.
+        """
+        path = Path(path)
+        size = path.stat().st_size
+        entry = self._load_manifest().get(str(path.resolve()))
+        if entry is None:
+            return 0, size
+        offset = int(entry["offset"])
+        if size < offset or _signature(path, offset) != entry:
+            raise ValueError(
+                f"{path} wurde seit dem letzten Einlesen verändert (nicht nur angehängt). "
+                "News-Store mit --rebuild neu aufbauen."
+            )
+        return offset, size
+
+    def ingest(
+        self,
+        path: Path,
+        *,
+        chunk_rows: int = NEWS_CHUNK_ROWS,
+        engine: str | None = None,
+    ) -> int:
+        """Liest neue Zeilen einer JSONL-Datei ein und aktualisiert die betroffenen Monate.
+
+        Bereits gezählte Artikel (auch aus anderen Dateien) werden übersprungen.
+        Gibt die Anzahl neu gezählter Artikel zurück (0, wenn nichts Neues anlag).
+        """
+        path = Path(path)
+        start, size = self.pending(path)
+        # Nur bis zur Größe beim Start lesen (später angehängte Zeilen holt der nächste Refresh)
+        # und nur vollständige Zeilen – das Manifest merkt sich genau diesen Offset.
+        end = _complete_end(path, start, size)
+        if end <= start:
+            return 0
+
+        agg = DailyNewsAggregator()
+        seen = self.articles()
+        n_rows = 0
+        for chunk in iter_news_chunks(
+            path, chunk_rows=chunk_rows, engine=engine, start=start, end=end, with_ids=True
+        ):
+            chunk = chunk[seen.add_new(chunk["article_id"].to_numpy())]
+            n_rows += len(chunk)
+            agg.update(chunk)
+        self.merge(agg.partials())
+        seen.save()
+
+        # Manifest erst nach Partitionen und Index: Abbruch dazwischen → --rebuild.
+        files = self._load_manifest()
+        files[str(path.resolve())] = _signature(path, end)
+        self._save_manifest(files)
+        return n_rows
+
+
+def news_jsonl_files(directory: Path = NEWS_RAW_DIR) -> list[Path]:
+    """Alle JSONL-Dateien im News-Rohordner (sortiert)."""
+    return sorted(Path(directory).glob("*.jsonl"))
+
+
+def refresh_news_store(
+    paths: Iterable[Path] | None = None,
+    *,
+    store: NewsDayStore | None = None,
+    rebuild: bool = False,
+    engine: str | None = None,
+) -> pd.DataFrame:
+    """Liest neue News in den Store ein und gibt die Tagesfeatures über alle Dateien zurück."""
+    store = store or NewsDayStore()
+    paths = news_jsonl_files() if paths is None else [Path(p) for p in paths]
+    if rebuild:
+        store.clear()
+    for path in paths:
+        n_new = store.ingest(path, engine=engine)
+        if n_new:
+            print(f"[info] {path}: {n_new} neue Artikel eingelesen")
+    features = store.daily_features()
+    if features.empty:
+        raise ValueError(f"Keine News gefunden in {[str(p) for p in paths]}")
+    return features
+
+
+def main() -> None:
+    """CLI: News-Store aktualisieren und die Tagesfeatures als CSV ablegen."""
+    parser = argparse.ArgumentParser(description="EODHD-News inkrementell zu Tagesfeatures aggregieren.")
+    parser.add_argument(
+        "--jsonl",
+        type=Path,
+        nargs="+",
+        default=None,
+        help="JSONL-Dateien (Default: alle *.jsonl unter data/raw/news/).",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Store leeren und alle Dateien neu einlesen (z.B. nach umgeschriebenen Dateien).",
+    )
+    args = parser.parse_args()
+
+    features = refresh_news_store(args.jsonl, rebuild=args.rebuild)
+    out_path = save_daily_features(features)
+    print(f"[ok] Tagesfeatures gespeichert unter {out_path}")
+
+
+if __name__ == "__main__":
+    main()
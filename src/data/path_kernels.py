@@ -0,0 +1,139 @@
+"""Gemeinsame Pfad-Kernels fuer das Labeling ("walk forward until hit").
+
+Alle pfadabhaengigen Labeler (Daily-Labels, H1-First-Hit, TP/SL-Trade-Labels)
+stellen dieselbe Frage: *An welchem Index wird eine Schwelle zuerst erreicht?*
+
+``first_crossing`` beantwortet das fuer viele Startpunkte auf einmal:
+fuer jede Zeile i wird im Bereich ``[start[i], stop[i])`` des Pfad-Arrays der
+erste Index gesucht, an dem ``values >= level[i]`` (above=True) bzw.
+``values <= level[i]`` (above=False) gilt.
+
+Backends:
+- Numba (optional, nicht in requirements.txt): einfache Schleife mit ``@njit``.
+- NumPy-Fallback: Bereiche werden blockweise in eine (Zeilen, Fensterbreite)-
+  Matrix gesammelt und der erste Treffer per ``argmax`` bestimmt.
+
+Beide Backends liefern identische Ergebnisse (NaN zaehlt nie als Treffer).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+try:  # Numba ist optional; ohne Numba wird der NumPy-Pfad verwendet.
+    from numba import njit
+except ImportError:  # pragma: no cover - abhaengig von der Umgebung
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+# Obergrenze fuer die Groesse der gesammelten Matrix im NumPy-Fallback (Elemente).
+_NUMPY_BLOCK_ELEMENTS = 1 << 22
+
+
+def _first_crossing_loop(
+    values: np.ndarray,
+    start: np.ndarray,
+    stop: np.ndarray,
+    level: np.ndarray,
+    above: bool,
+) -> np.ndarray:
+    out = np.full(start.size, -1, dtype=np.int64)
+    for i in range(start.size):
+        lvl = level[i]
+        for k in range(start[i], stop[i]):
+            v = values[k]
+            if above:
+                hit = v >= lvl
+            else:
+                hit = v <= lvl
+            if hit:
+                out[i] = k
+                break
+    return out
+
+
+_first_crossing_jit = njit(cache=True)(_first_crossing_loop) if NUMBA_AVAILABLE else None
+
+
+def _first_crossing_numpy(
+    values: np.ndarray,
+    start: np.ndarray,
+    stop: np.ndarray,
+    level: np.ndarray,
+    above: bool,
+) -> np.ndarray:
+    out = np.full(start.size, -1, dtype=np.int64)
+    lengths = np.maximum(stop - start, 0)
+    width = int(lengths.max()) if lengths.size else 0
+    if width == 0:
+        return out
+
+    offsets = np.arange(width)
+    block = max(1, _NUMPY_BLOCK_ELEMENTS // width)
+    last = values.size - 1
+    for lo in range(0, start.size, block):
+        hi = min(lo + block, start.size)
+        idx = start[lo:hi, None] + offsets
+        in_range = offsets < lengths[lo:hi, None]
+        path = values[np.minimum(idx, last)]
+        lvl = level[lo:hi, None]
+        hits = (path >= lvl) if above else (path <= lvl)
+        hits &= in_range
+        first = hits.argmax(axis=1)
+        out[lo:hi] = np.where(hits.any(axis=1), start[lo:hi] + first, -1)
+    return out
+
+
+def first_crossing(
+    values: np.ndarray,
+    start: np.ndarray,
+    stop: np.ndarray,
+    level: np.ndarray | float,
+    *,
+    above: bool,
+    engine: str = "auto",
+) -> np.ndarray:
+    """Erster Index in ``[start[i], stop[i])`` mit ``values >= level[i]`` bzw. ``<=``.
+
+    Parameter:
+    - values: 1D-Pfad (z.B. Close, High oder Low), float.
+    - start/stop: absolute Indexgrenzen pro Zeile (stop exklusiv).
+    - level: Schwelle pro Zeile (oder Skalar).
+    - above: True → ``values >= level`` (Up/TP-Long), False → ``values <= level``.
+    - engine: 'auto' (Numba wenn installiert), 'numba' oder 'numpy'.
+
+    Rueckgabe: int64-Array mit dem absoluten Treffer-Index oder -1 (kein Treffer).
+    """
+    if engine not in {"auto", "numba", "numpy"}:
+        raise ValueError("engine muss 'auto', 'numba' oder 'numpy' sein.")
+    if engine == "numba" and not NUMBA_AVAILABLE:
+        raise ImportError("engine='numba' verlangt ein installiertes numba.")
+
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    start = np.ascontiguousarray(start, dtype=np.int64)
+    stop = np.ascontiguousarray(stop, dtype=np.int64)
+    level = np.ascontiguousarray(np.broadcast_to(np.asarray(level, dtype=np.float64), start.shape))
+
+    if engine == "numba" or (engine == "auto" and NUMBA_AVAILABLE):
+        return _first_crossing_jit(values, start, stop, level, bool(above))
+    return _first_crossing_numpy(values, start, stop, level, bool(above))
+
+
+def first_hits(
+    high: np.ndarray,
+    low: np.ndarray,
+    start: np.ndarray,
+    stop: np.ndarray,
+    up_level: np.ndarray | float,
+    down_level: np.ndarray | float,
+    *,
+    engine: str = "auto",
+) -> tuple[np.ndarray, np.ndarray]:
+    """Erster Up-Treffer (``high >= up_level``) und Down-Treffer (``low <= down_level``).
+
+    Beide Indizes sind absolut (-1 = kein Treffer); siehe ``first_crossing``.
+    """
+    up_idx = first_crossing(high, start, stop, up_level, above=True, engine=engine)
+    down_idx = first_crossing(low, start, stop, down_level, above=False, engine=engine)
+    return up_idx, down_idx
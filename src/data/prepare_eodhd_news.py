@@ -1,69 +1,271 @@
 """Aggregiert EODHD-News zu Tagesfeatures für EURUSD.
 
 Schrittfolge:
-1. JSONL-Datei (eine News pro Zeile) einlesen.
+1. JSONL-Datei (eine News pro Zeile) blockweise streamen; nur ``date``, ``title``
+   und ``sentiment.*`` werden übernommen (``content`` usw. wird gar nicht erst gebaut).
 2. Zeitstempel in echte Datumsobjekte umwandeln.
-3. Sentiment-Werte (Dictionary) aufspalten.
-4. Pro Tag aggregieren (Anzahl Artikel + Durchschnittssentiment).
+3. Sentiment-Werte (Dictionary) spaltenweise aufspalten.
+4. Pro Tag aggregieren (Anzahl Artikel + Durchschnittssentiment) – inkrementell über
+   Teilsummen, der Speicherbedarf hängt also nur von Blockgröße und Anzahl Tage ab.
 5. Ergebnis als CSV ablegen, damit Phase 3 damit arbeiten kann.
+
+JSON-Parser: ``pyarrow.json`` (falls installiert), sonst ``orjson`` (optional, nicht in
+requirements.txt), sonst das Standardmodul ``json``.
 """
 
 from __future__ import annotations
 
 from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+import io
 import json  # json.loads konvertiert jede Zeile (string) in ein Python-Dict.
 
+import numpy as np
 import pandas as pd
 
+from src.data.news_dedup import ArticleIndex, article_ids
 from src.utils.io import DATA_PROCESSED, DATA_RAW
 
+try:  # orjson ist optional (deutlich schneller als json.loads)
+    import orjson
+except ImportError:  # pragma: no cover - abhaengig von der Umgebung
+    orjson = None
+
+try:  # pyarrow.json liest JSONL spaltenweise in Blöcken
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.json as pa_json
+except ImportError:  # pragma: no cover - abhaengig von der Umgebung
+    pa = None
+
+ORJSON_AVAILABLE = orjson is not None
+PYARROW_JSON_AVAILABLE = pa is not None
+NEWS_ENGINES = ("pyarrow", "orjson", "json")
+
+# Keys des Sentiment-Dicts, die wir als eigene Spalten brauchen.
+SENTIMENT_KEYS = ("polarity", "neg", "neu", "pos")
+# Mergebare Teilsummen pro Tag (Summen addieren sich über Blöcke/Dateien hinweg).
+PARTIAL_COLUMNS = ("article_count", *(f"{key}_{part}" for key in SENTIMENT_KEYS for part in ("sum", "n")))
+NEWS_CHUNK_ROWS = 100_000
+_JSON_BLOCK_BYTES = 1 << 24  # pyarrow: Blockgröße (muss > längste Zeile sein)
+
+
+def _default_engine() -> str:
+    if PYARROW_JSON_AVAILABLE:
+        return "pyarrow"
+    return "orjson" if ORJSON_AVAILABLE else "json"
+
+
+class _BoundedReader(io.RawIOBase):
+    """Liest aus ``fh`` höchstens bis Byte ``end`` (danach EOF)."""
+
+    def __init__(self, fh: BinaryIO, end: int) -> None:
+        self._fh = fh
+        self._end = end
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), max(self._end - self._fh.tell(), 0))
+        return self._fh.readinto(memoryview(buffer)[:n]) if n else 0
+
+
+def _open_range(path: Path, start: int, end: int | None) -> BinaryIO:
+    fh = path.open("rb")
+    fh.seek(start)
+    return fh if end is None else io.BufferedReader(_BoundedReader(fh, end))
+
+
+def _iter_chunks_pyarrow(path: Path, start: int, end: int | None, with_ids: bool) -> Iterator[pd.DataFrame]:
+    schema = pa.schema(
+        [
+            ("date", pa.string()),
+            ("title", pa.string()),
+            ("link", pa.string()),
+            ("sentiment", pa.struct([(key, pa.float64()) for key in SENTIMENT_KEYS])),
+        ]
+    )
+    with _open_range(path, start, end) as fh:
+        try:
+            reader = pa_json.open_json(
+                fh,
+                read_options=pa_json.ReadOptions(block_size=_JSON_BLOCK_BYTES),
+                parse_options=pa_json.ParseOptions(explicit_schema=schema, unexpected_field_behavior="ignore"),
+            )
+        except pa.ArrowInvalid:
+            # Ab ``start`` nur Leerzeilen: pyarrow meldet "Empty JSON stream" statt nichts zu liefern.
+            if any(block.strip() for block in iter(lambda: fh.read(1 << 20), b"")):
+                raise
+            return
+        for batch in reader:
+            sentiment = batch.column("sentiment")
+            data = {
+                "date": batch.column("date").to_numpy(zero_copy_only=False),
+                "title": batch.column("title").is_valid().to_numpy(zero_copy_only=False),
+            }
+            for key in SENTIMENT_KEYS:
+                # struct_field berücksichtigt auch fehlende sentiment-Dicts (→ NaN)
+                data[key] = pc.struct_field(sentiment, key).to_numpy(zero_copy_only=False)
+            if with_ids:
+                data["article_id"] = article_ids(
+                    pd.Series(data["date"]),
+                    pd.Series(batch.column("title").to_numpy(zero_copy_only=False)),
+                    pd.Series(batch.column("link").to_numpy(zero_copy_only=False)),
+                )
+            yield pd.DataFrame(data)
+
+
+def _iter_chunks_lines(
+    path: Path, start: int, end: int | None, chunk_rows: int, loads: Callable[[bytes], dict], with_ids: bool
+) -> Iterator[pd.DataFrame]:
+    def frame(dates: list, titles: list, links: list, sentiments: list) -> pd.DataFrame:
+        values = np.array(sentiments, dtype="float64").reshape(-1, len(SENTIMENT_KEYS))
+        data = {"date": dates, "title": np.array([t is not None for t in titles], dtype=bool)}
+        data.update({key: values[:, j] for j, key in enumerate(SENTIMENT_KEYS)})
+        if with_ids:
+            data["article_id"] = article_ids(pd.Series(dates), pd.Series(titles), pd.Series(links))
+        return pd.DataFrame(data)
 
-def _load_jsonl(path: Path) -> pd.DataFrame:
-    """Liest die JSONL-Datei von EODHD ein und baut daraus ein DataFrame."""
-    rows = []
-    with path.open() as fh:
+    dates: list = []
+    titles: list = []
+    links: list = []
+    sentiments: list = []
+    with _open_range(path, start, end) as fh:
         for line in fh:
-            rows.append(json.loads(line))  # jede Zeile = ein JSON-Objekt (dict)
-    if not rows:  # frühe Fehlermeldung, damit Folgefunktionen nicht ins Leere laufen
-        raise ValueError(f"Keine News gefunden in {path}")
-    return pd.DataFrame(rows)  # DataFrame ist für Aggregationen praktischer
+            if not line.strip():
+                continue
+            record = loads(line)  # jede Zeile = ein JSON-Objekt (dict)
+            sentiment = record.get("sentiment") or {}
+            dates.append(record.get("date"))
+            titles.append(record.get("title"))
+            links.append(record.get("link"))
+            # None → NaN beim Umwandeln in ein float-Array
+            sentiments.append([sentiment.get(key) for key in SENTIMENT_KEYS])
+            if len(dates) >= chunk_rows:
+                yield frame(dates, titles, links, sentiments)
+                dates, titles, links, sentiments = [], [], [], []
+    if dates:
+        yield frame(dates, titles, links, sentiments)
 
 
-def build_daily_features(jsonl_path: Path | None = None) -> pd.DataFrame:
-    """Berechnet Tagesaggregationen aus den News."""
+def iter_news_chunks(
+    path: Path,
+    *,
+    chunk_rows: int = NEWS_CHUNK_ROWS,
+    engine: str | None = None,
+    start: int = 0,
+    end: int | None = None,
+    with_ids: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """Liest die JSONL-Datei von EODHD blockweise.
+
+    Jeder Block hat die Spalten ``date`` (ISO-String), ``title`` (bool: Titel vorhanden)
+    und ``polarity``/``neg``/``neu``/``pos`` (float, NaN wenn fehlend).
+    ``chunk_rows`` gilt für die zeilenbasierten Parser; pyarrow liest in Byte-Blöcken.
+    ``start``: Byte-Offset (Zeilenanfang), ab dem gelesen wird – für angehängte Zeilen.
+    ``end``: Byte-Offset (Zeilenende), bis zu dem gelesen wird (Default: Dateiende).
+    ``with_ids``: zusätzlich ``article_id`` (``uint64``, siehe ``src.data.news_dedup``).
+    """
+    engine = engine or _default_engine()
+    if engine not in NEWS_ENGINES:
+        raise ValueError(f"Unbekannte engine='{engine}'. Erwarte {NEWS_ENGINES}.")
+    if engine == "pyarrow" and not PYARROW_JSON_AVAILABLE:
+        raise ValueError("engine='pyarrow' benötigt pyarrow.")
+    if engine == "orjson" and not ORJSON_AVAILABLE:
+        raise ValueError("engine='orjson' benötigt orjson.")
+
+    path = Path(path)
+    if path.stat().st_size <= start or (end is not None and end <= start):
+        return
+    if engine == "pyarrow":
+        yield from _iter_chunks_pyarrow(path, start, end, with_ids)
+    else:
+        loads = orjson.loads if engine == "orjson" else json.loads
+        yield from _iter_chunks_lines(path, start, end, chunk_rows, loads, with_ids)
+
+
+class DailyNewsAggregator:
+    """Inkrementelle Tagesaggregation: pro Tag Artikelzahl sowie Summe/Anzahl je Sentiment-Wert.
+
+    Blöcke dürfen in beliebiger Reihenfolge kommen (Teilsummen werden addiert);
+    der Speicher wächst nur mit der Anzahl Tage, nicht mit der Anzahl Artikel.
+    """
+
+    def __init__(self) -> None:
+        self._parts: pd.DataFrame | None = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        # EODHD liefert ISO-Strings (z.B. "2025-11-12T22:24:39+00:00"); utc=True sorgt für saubere Zeitzone.
+        # Für Tagesfeatures brauchen wir nur das Datum (ohne Uhrzeit) in UTC.
+        stamps = pd.to_datetime(chunk["date"], utc=True, format="ISO8601")
+        day = stamps.dt.tz_localize(None).dt.normalize()
+
+        data = {"article_count": chunk["title"].astype("int64")}
+        for key in SENTIMENT_KEYS:
+            values = chunk[key]
+            data[f"{key}_sum"] = values.fillna(0.0)
+            data[f"{key}_n"] = values.notna().astype("int64")
+        self.add_partials(pd.DataFrame(data).groupby(day.to_numpy()).sum())  # NaT-Tage fallen weg
+
+    def add_partials(self, part: pd.DataFrame) -> None:
+        """Addiert bereits aggregierte Teilsummen (Spalten ``PARTIAL_COLUMNS``, Index = Tag)."""
+        part = part[list(PARTIAL_COLUMNS)]
+        self._parts = part if self._parts is None else self._parts.add(part, fill_value=0)
+
+    def partials(self) -> pd.DataFrame:
+        """Teilsummen pro Tag (Index = Tag, nach Datum sortiert; Zähler als ``int64``)."""
+        if self._parts is None:
+            return pd.DataFrame(columns=list(PARTIAL_COLUMNS), index=pd.DatetimeIndex([]))
+        parts = self._parts.sort_index()
+        counts = [col for col in PARTIAL_COLUMNS if not col.endswith("_sum")]
+        return parts.astype({col: "int64" for col in counts})
+
+    def finish(self) -> pd.DataFrame:
+        """Tagesfeatures (``date``, ``article_count``, ``avg_*``), nach Datum sortiert."""
+        return daily_features_from_partials(self.partials())
+
+
+def daily_features_from_partials(parts: pd.DataFrame) -> pd.DataFrame:
+    """Tagesfeatures aus Teilsummen: ``avg_<k> = <k>_sum / <k>_n`` (NaN ohne Werte)."""
+    if parts.empty:
+        return pd.DataFrame(columns=["date", "article_count", *(f"avg_{k}" for k in SENTIMENT_KEYS)])
+    parts = parts.sort_index()
+    out = {"date": parts.index.date, "article_count": parts["article_count"].astype("int64").to_numpy()}
+    for key in SENTIMENT_KEYS:
+        n = parts[f"{key}_n"].to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[f"avg_{key}"] = np.where(n > 0, parts[f"{key}_sum"].to_numpy() / n, np.nan)
+    return pd.DataFrame(out)
+
+
+def build_daily_features(
+    jsonl_path: Path | None = None,
+    *,
+    chunk_rows: int = NEWS_CHUNK_ROWS,
+    engine: str | None = None,
+    dedup: bool = True,
+) -> pd.DataFrame:
+    """Berechnet Tagesaggregationen aus den News (streamend, siehe ``iter_news_chunks``).
+
+    ``dedup``: doppelte Artikel (gleicher Titel, Link und Zeitstempel) nur einmal zählen.
+    """
     if jsonl_path is None:
         jsonl_path = DATA_RAW / "news" / "eodhd_news.jsonl"
 
-    df = _load_jsonl(jsonl_path)  # Raw-News als DataFrame
-
-    # EODHD liefert ISO-Strings (z.B. "2025-11-12T22:24:39+00:00").
-    # pd.to_datetime wandelt sie in pandas.Timestamp-Objekte um; utc=True sorgt für saubere Zeitzone.
-    df["date"] = pd.to_datetime(df["date"], utc=True)
-
-    # Für Tagesfeatures brauchen wir nur das Datum (ohne Uhrzeit). Wir bleiben in UTC, um keine Zeitzonenfehler zu riskieren.
-    df["day"] = df["date"].dt.tz_convert("UTC").dt.date  # ergibt datetime.date-Objekte
-
-    # Die Spalte "sentiment" enthält ein Dictionary mit den Keys polarity/neg/neu/pos.
-    # apply(pd.Series) macht daraus vier normale Spalten, die sich leicht aggregieren lassen.
-    sent = df["sentiment"].apply(pd.Series)
-    sent.columns = ["polarity", "neg", "neu", "pos"]
-    df = pd.concat([df.drop(columns=["sentiment"]), sent], axis=1)  # ursprüngliche Dict-Spalte fällt weg
-
-    # Pro Tag aggregieren wir, wie viele Artikel erschienen sind und wie ihr Sentiment im Mittel ausfällt.
-    agg = (
-        df.groupby("day")
-        .agg(
-            article_count=("title", "count"),  # Anzahl der Meldungen pro Tag
-            avg_polarity=("polarity", "mean"),  # Durchschnitt aller Polarity-Werte des Tages
-            avg_neg=("neg", "mean"),  # Mittelwert negativer Anteile
-            avg_neu=("neu", "mean"),  # Mittelwert neutraler Anteile
-            avg_pos=("pos", "mean"),  # Mittelwert positiver Anteile
-        )
-        .reset_index()
-        .rename(columns={"day": "date"})
-    )
+    agg = DailyNewsAggregator()
+    seen = ArticleIndex() if dedup else None
+    n_rows = 0
+    for chunk in iter_news_chunks(jsonl_path, chunk_rows=chunk_rows, engine=engine, with_ids=dedup):
+        n_rows += len(chunk)
+        if seen is not None:
+            chunk = chunk[seen.add_new(chunk["article_id"].to_numpy())]
+        agg.update(chunk)
+    if n_rows == 0:  # frühe Fehlermeldung, damit Folgefunktionen nicht ins Leere laufen
+        raise ValueError(f"Keine News gefunden in {jsonl_path}")
 
-    return agg.sort_values("date")
+    # Pro Tag: wie viele Artikel erschienen sind und wie ihr Sentiment im Mittel ausfällt.
+    return agg.finish()
 
 
 def save_daily_features(df: pd.DataFrame, out_path: Path | None = None) -> Path:
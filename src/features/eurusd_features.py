@@ -14,52 +14,177 @@ Namenskonvention:
     - ``_1d``, ``_5d``       → Horizont in Tagen (Rolling-Fenster inkl. heute).
     - ``_lag1``              → Wert vom Vortag.
     - ``_3d_sum``, ``_5d_std`` etc. → Aggregation + Fenstergröße.
+
+Alle Features werden unten einmalig im Feature-Register (``src.features.registry``)
+deklariert; Spaltenlisten und Vorlauf-Zeilen werden daraus abgeleitet.
 """
 
 from __future__ import annotations
 
 from typing import Final
 
+import numpy as np
 import pandas as pd
-from pandas.tseries.holiday import USFederalHolidayCalendar
-
-
-US_HOLIDAY_CAL: Final = USFederalHolidayCalendar()
 
-
-def _add_us_holiday_flags(df: pd.DataFrame) -> pd.DataFrame:
-    """Fügt US-Feiertags-Flags hinzu, basierend nur auf dem Datum.
-
-    Verwendet den eingebauten ``USFederalHolidayCalendar`` von pandas.
-
-    Erzeugte Features:
-    - ``hol_is_us_federal_holiday``:
-        1, wenn der Tag ein US-Feiertag ist, sonst 0.
-    - ``hol_is_day_before_us_federal_holiday``:
-        1, wenn der Folgetag ein US-Feiertag ist.
-    - ``hol_is_day_after_us_federal_holiday``:
-        1, wenn der Vortag ein US-Feiertag ist.
-    """
-    if df.empty:
-        df["hol_is_us_federal_holiday"] = pd.Series(dtype="int8")
-        df["hol_is_day_before_us_federal_holiday"] = pd.Series(dtype="int8")
-        df["hol_is_day_after_us_federal_holiday"] = pd.Series(dtype="int8")
-        return df
-
-    date_series = df["date"].dt.normalize()
-    holidays = US_HOLIDAY_CAL.holidays(start=date_series.min(), end=date_series.max())
-    # Wir arbeiten mit normalisierten Timestamps (Mitternacht), um Vergleiche zu vereinfachen.
-    holidays = holidays.normalize()
-
-    df["hol_is_us_federal_holiday"] = date_series.isin(holidays).astype("int8")
-    df["hol_is_day_before_us_federal_holiday"] = (
-        date_series.add(pd.Timedelta(days=1)).isin(holidays)
-    ).astype("int8")
-    df["hol_is_day_after_us_federal_holiday"] = (
-        date_series.add(pd.Timedelta(days=-1)).isin(holidays)
-    ).astype("int8")
-
-    return df
+from src.features.holidays import days_to_next_holiday, holiday_mask, is_bridge_day
+from src.features.registry import (
+    compute_features,
+    computable,
+    feature_names,
+    max_lookback,
+    pct_change,
+    register,
+    rolling_mean,
+    rolling_std,
+    rolling_sum,
+    shift,
+)
+
+
+EPS: Final = 1e-6
+
+
+# ---------------------------------------------------------------------------
+# Feature-Deklarationen (Reihenfolge = Spaltenreihenfolge, siehe registry.py)
+# ---------------------------------------------------------------------------
+
+# News-Tagesaggregate (aus prepare_eodhd_news, extern geliefert).
+for _name in ("article_count", "avg_polarity", "avg_neg", "avg_neu", "avg_pos"):
+    register(_name, "news_daily")
+
+
+def _sentiment_share(part: np.ndarray, other: np.ndarray) -> np.ndarray:
+    # Anteil positiver / negativer Sentiment-Anteile (auf Basis avg_pos/avg_neg).
+    denom = np.asarray(part, dtype="float64") + np.asarray(other, dtype="float64")
+    return part / np.where(denom == 0, EPS, denom)
+
+
+register("pos_share", "sentiment", ("avg_pos", "avg_neg"), _sentiment_share)
+register("neg_share", "sentiment", ("avg_neg", "avg_pos"), _sentiment_share)
+
+# Kerzen-Features aus High/Low/Open/Close.
+register("intraday_range", "candle", ("High", "Low"), np.subtract, model=False)
+register("intraday_range_pct", "candle", ("intraday_range", "Close"), np.divide)
+register("body", "candle", ("Close", "Open"), np.subtract, model=False)
+register("body_pct", "candle", ("body", "Close"), np.divide, model=False)
+register("upper_shadow", "candle", ("High", "Open", "Close"), lambda h, o, c: h - np.fmax(o, c))
+register("lower_shadow", "candle", ("Open", "Close", "Low"), lambda o, c, l: np.fmin(o, c) - l)
+
+# price_*: Returns und Rolling-Statistiken der Kerzenform.
+for _p in (1, 5):
+    register(f"price_close_ret_{_p}d", "price", ("Close",), lambda c, p=_p: pct_change(c, p), lookback=_p)
+register(
+    "price_range_pct_5d_std", "price", ("intraday_range_pct",), lambda x: rolling_std(x, 5), window=5, lookback=4
+)
+register("price_body_pct_5d_mean", "price", ("body_pct",), lambda x: rolling_mean(x, 5), window=5, lookback=4)
+register("price_close_ret_30d", "price", ("Close",), lambda c: pct_change(c, 30), lookback=30)
+register(
+    "price_range_pct_30d_std", "price", ("intraday_range_pct",), lambda x: rolling_std(x, 30), window=30, lookback=29
+)
+register(
+    "price_body_pct_30d_mean", "price", ("body_pct",), lambda x: rolling_mean(x, 30), window=30, lookback=29
+)
+register(
+    "price_body_vs_range",
+    "price",
+    ("body_pct", "intraday_range_pct"),
+    lambda b, r: np.abs(b) / (np.abs(r) + EPS),
+    model=False,
+)
+register(
+    "price_body_vs_range_5d_mean",
+    "price",
+    ("price_body_vs_range",),
+    lambda x: rolling_mean(x, 5),
+    window=5,
+    lookback=4,
+    model=False,
+)
+register(
+    "price_shadow_balance",
+    "price",
+    ("upper_shadow", "lower_shadow"),
+    lambda u, l: (u - l) / (u + l + EPS),
+    model=False,
+)
+register(
+    "price_shadow_balance_5d_mean",
+    "price",
+    ("price_shadow_balance",),
+    lambda x: rolling_mean(x, 5),
+    window=5,
+    lookback=4,
+    model=False,
+)
+
+# news_*: Historie / Intensität auf den gemergten Tagen.
+register("news_article_count_3d_sum", "news", ("article_count",), lambda x: rolling_sum(x, 3), window=3, lookback=2)
+register("news_article_count_7d_sum", "news", ("article_count",), lambda x: rolling_sum(x, 7), window=7, lookback=6)
+register("news_pos_share_5d_mean", "news", ("pos_share",), lambda x: rolling_mean(x, 5), window=5, lookback=4)
+register("news_neg_share_5d_mean", "news", ("neg_share",), lambda x: rolling_mean(x, 5), window=5, lookback=4)
+register("news_article_count_lag1", "news", ("article_count",), shift, lookback=1)
+register("news_pos_share_lag1", "news", ("pos_share",), shift, lookback=1)
+register("news_neg_share_lag1", "news", ("neg_share",), shift, lookback=1)
+
+# Saison: Monat (1–12), Kalenderwoche (ISO-Standard) und Quartal (1–4).
+register("month", "season", ("date",), lambda d: pd.DatetimeIndex(d).month.to_numpy())
+register(
+    "week",
+    "season",
+    ("date",),
+    lambda d: pd.DatetimeIndex(d).isocalendar()["week"].to_numpy().astype(int),
+    model=False,
+)
+register("quarter", "season", ("date",), lambda d: pd.DatetimeIndex(d).quarter.to_numpy())
+
+# cal_*: Wochentag (Montag=0, Sonntag=6) und Monatsanfang/-ende.
+register("cal_dow", "cal", ("date",), lambda d: pd.DatetimeIndex(d).dayofweek.to_numpy())
+register("cal_day_of_month", "cal", ("date",), lambda d: pd.DatetimeIndex(d).day.to_numpy())
+register("cal_is_monday", "cal", ("cal_dow",), lambda dow: (dow == 0).astype("int8"))
+register("cal_is_friday", "cal", ("cal_dow",), lambda dow: (dow == 4).astype("int8"))
+register("cal_is_month_start", "cal", ("date",), lambda d: pd.DatetimeIndex(d).is_month_start.astype("int8"))
+register("cal_is_month_end", "cal", ("date",), lambda d: pd.DatetimeIndex(d).is_month_end.astype("int8"))
+
+
+# hol_*: Feiertage aus dem vorberechneten Bitset (src.features.holidays), O(1) pro Zeile.
+def _holiday_flag(calendar: str, offset_days: int = 0):
+    return lambda d: holiday_mask(d, (calendar,), offset_days=offset_days).astype("int8")
+
+
+register("hol_is_us_federal_holiday", "hol", ("date",), _holiday_flag("us"))
+register("hol_is_day_before_us_federal_holiday", "hol", ("date",), _holiday_flag("us", 1))
+register("hol_is_day_after_us_federal_holiday", "hol", ("date",), _holiday_flag("us", -1))
+# EUR-/GBP-Seite (TARGET2, UK) und abgeleitete Größen: im Datensatz, (noch) nicht in FEATURE_COLS.
+register("hol_is_target2_holiday", "hol", ("date",), _holiday_flag("target2"), model=False)
+register("hol_is_uk_bank_holiday", "hol", ("date",), _holiday_flag("uk"), model=False)
+register("hol_is_bridge_day", "hol", ("date",), lambda d: is_bridge_day(d).astype("int8"), model=False)
+register(
+    "hol_days_to_next_holiday",
+    "hol",
+    ("date",),
+    lambda d: np.minimum(days_to_next_holiday(d), 127).astype("int8"),
+    model=False,
+)
+
+# h1_*: Intraday-Features aus MT5 H1 (src.data.mt5_h1, extern geliefert; optional).
+for _name in (
+    "h1_ret_std",
+    "h1_ret_sum_abs",
+    "h1_range_pct_mean",
+    "h1_range_pct_max",
+    "h1_close_open_pct",
+    "h1_up_hours_frac",
+    "h1_down_hours_frac",
+    "h1_tick_volume_sum",
+    "h1_spread_mean",
+):
+    register(_name, "h1")
+
+
+# Benötigte Vorlauf-Zeilen für inkrementelle Updates (größtes Fenster bzw. Lag inkl.
+# Abhängigkeiten): price_* auf der Preis-Historie, news_* auf den gemergten Tagen.
+PRICE_LOOKBACK_ROWS: Final = max_lookback(feature_names("candle", "price"))
+NEWS_LOOKBACK_ROWS: Final = max_lookback(feature_names("sentiment", "news"))
 
 
 def add_eurusd_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -69,22 +194,17 @@ def add_eurusd_features(df: pd.DataFrame) -> pd.DataFrame:
     das u. a. folgende Spalten enthält:
         - date (datetime64[ns])
         - Close, High, Low, Open
-        - intraday_range_pct, body_pct
-        - article_count, pos_share, neg_share
+        - article_count, avg_pos, avg_neg (bzw. pos_share, neg_share)
 
     Alle Berechnungen nutzen ausschließlich Informationen bis einschließlich
     des aktuellen Tages (kein Blick in die Zukunft).
     """
-    if df.empty:
-        return df
-
-    df = df.sort_values("date").copy()
-
-    df = add_price_features(df)
-    df = add_news_features(df)
-    df = add_calendar_features(df)
-    df = _add_us_holiday_flags(df)
-    return df
+    names = [
+        *feature_names("price"),
+        *computable(feature_names("news"), df.columns),
+        *feature_names("cal", "hol"),
+    ]
+    return compute_features(df, names)
 
 
 def add_price_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -94,32 +214,7 @@ def add_price_features(df: pd.DataFrame) -> pd.DataFrame:
     berechnet werden, auch wenn später (z.B. bei News-Merge) frühere Tage
     weggefiltert werden. Sonst verlieren Rolling-Features Kontext.
     """
-    if df.empty:
-        return df
-    df = df.sort_values("date").copy()
-
-    close = df["Close"]
-    df["price_close_ret_1d"] = close.pct_change(periods=1)
-    df["price_close_ret_5d"] = close.pct_change(periods=5)
-
-    df["price_range_pct_5d_std"] = df["intraday_range_pct"].rolling(window=5, min_periods=5).std()
-    df["price_body_pct_5d_mean"] = df["body_pct"].rolling(window=5, min_periods=5).mean()
-
-    df["price_close_ret_30d"] = close.pct_change(periods=30)
-    df["price_range_pct_30d_std"] = df["intraday_range_pct"].rolling(window=30, min_periods=30).std()
-    df["price_body_pct_30d_mean"] = df["body_pct"].rolling(window=30, min_periods=30).mean()
-
-    eps = 1e-6
-    df["price_body_vs_range"] = df["body_pct"].abs() / (df["intraday_range_pct"].abs() + eps)
-    df["price_body_vs_range_5d_mean"] = df["price_body_vs_range"].rolling(window=5, min_periods=5).mean()
-
-    if "upper_shadow" in df.columns and "lower_shadow" in df.columns:
-        df["price_shadow_balance"] = (df["upper_shadow"] - df["lower_shadow"]) / (
-            df["upper_shadow"] + df["lower_shadow"] + eps
-        )
-        df["price_shadow_balance_5d_mean"] = df["price_shadow_balance"].rolling(window=5, min_periods=5).mean()
-
-    return df
+    return compute_features(df, feature_names("price"))
 
 
 def add_news_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -128,41 +223,14 @@ def add_news_features(df: pd.DataFrame) -> pd.DataFrame:
     Erwartet Spalten:
     - article_count, pos_share, neg_share (oder sinnvolle Defaults)
     """
-    if df.empty:
-        return df
-    df = df.sort_values("date").copy()
-
-    if "article_count" in df.columns:
-        df["news_article_count_3d_sum"] = df["article_count"].rolling(window=3, min_periods=3).sum()
-        df["news_article_count_7d_sum"] = df["article_count"].rolling(window=7, min_periods=7).sum()
-        df["news_article_count_lag1"] = df["article_count"].shift(1)
-    if "pos_share" in df.columns:
-        df["news_pos_share_5d_mean"] = df["pos_share"].rolling(window=5, min_periods=5).mean()
-        df["news_pos_share_lag1"] = df["pos_share"].shift(1)
-    if "neg_share" in df.columns:
-        df["news_neg_share_5d_mean"] = df["neg_share"].rolling(window=5, min_periods=5).mean()
-        df["news_neg_share_lag1"] = df["neg_share"].shift(1)
-
-    return df
+    return compute_features(df, computable(feature_names("news"), df.columns))
 
 
 def add_calendar_features(df: pd.DataFrame) -> pd.DataFrame:
     """Fügt Kalender-Features hinzu (cal_*)."""
-    if df.empty:
-        return df
-    df = df.sort_values("date").copy()
-
-    date = df["date"]
-    dow = date.dt.dayofweek  # Montag=0, Sonntag=6
-    df["cal_dow"] = dow
-    df["cal_day_of_month"] = date.dt.day
-    df["cal_is_monday"] = (dow == 0).astype("int8")
-    df["cal_is_friday"] = (dow == 4).astype("int8")
-    df["cal_is_month_start"] = date.dt.is_month_start.astype("int8")
-    df["cal_is_month_end"] = date.dt.is_month_end.astype("int8")
-    return df
+    return compute_features(df, feature_names("cal"))
 
 
 def add_holiday_features(df: pd.DataFrame) -> pd.DataFrame:
     """Fügt Holiday-Features hinzu (hol_*)."""
-    return _add_us_holiday_flags(df)
+    return compute_features(df, feature_names("hol"))
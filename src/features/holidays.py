@@ -0,0 +1,186 @@
+"""Vorberechneter Feiertagsindex (Bitset über Tages-Ordinalzahlen, Default 1990–2040).
+
+Statt pro Aufruf ``USFederalHolidayCalendar.holidays(start, end)`` zu rechnen und
+mehrere ``isin``-Durchläufe zu machen, wird einmal pro Prozess ein ``uint8``-Array
+mit einem Eintrag pro Kalendertag aufgebaut. Jedes Bit steht für einen Kalender:
+
+- ``us``:      US Federal Holidays (``pandas.tseries.holiday.USFederalHolidayCalendar``)
+- ``target2``: TARGET2-Schliesstage der EZB (Neujahr, Karfreitag, Ostermontag,
+               1. Mai, 25./26. Dezember; Regeln ab 2000, für frühere Jahre fortgeschrieben)
+- ``uk``:      Bank Holidays England & Wales (inkl. verschobener/einmaliger Tage)
+
+Ein Lookup ist damit ein Array-Index pro Zeile (``holiday_mask``). Abgeleitete
+Größen wie Abstand zum nächsten Feiertag oder Brückentage werden ebenfalls aus
+dem Bitset bzw. vorberechneten Abstands-Arrays gelesen.
+
+Liegen Daten außerhalb 1990–2040, wird ein Bitset über den erweiterten Bereich
+(plus ein Jahr Rand) mit denselben Regeln gebaut und separat gecacht.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from functools import lru_cache
+from typing import Final, Iterable
+
+import numpy as np
+from dateutil.easter import easter
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+US_HOLIDAY_CAL: Final = USFederalHolidayCalendar()
+
+HOLIDAY_FIRST_YEAR: Final = 1990
+HOLIDAY_LAST_YEAR: Final = 2040
+CALENDAR_BITS: Final = {"us": 1, "target2": 2, "uk": 4}
+ALL_CALENDARS: Final = tuple(CALENDAR_BITS)
+
+
+# Einmalige bzw. verschobene UK Bank Holidays (gov.uk).
+_UK_EXTRA: Final = ("1999-12-31", "2002-06-03", "2011-04-29", "2012-06-05", "2022-06-03", "2022-09-19", "2023-05-08")
+_UK_EARLY_MAY_MOVED: Final = {1995: dt.date(1995, 5, 8), 2020: dt.date(2020, 5, 8)}
+_UK_SPRING_MOVED: Final = {2002: dt.date(2002, 6, 4), 2012: dt.date(2012, 6, 4), 2022: dt.date(2022, 6, 2)}
+
+
+def _first_monday(year: int, month: int) -> dt.date:
+    first = dt.date(year, month, 1)
+    return first + dt.timedelta(days=(7 - first.weekday()) % 7)
+
+
+def _last_monday(year: int, month: int) -> dt.date:
+    nxt = dt.date(year + month // 12, month % 12 + 1, 1)
+    last = nxt - dt.timedelta(days=1)
+    return last - dt.timedelta(days=last.weekday())
+
+
+def _next_weekday(day: dt.date, taken: set[dt.date] = frozenset()) -> dt.date:
+    """Ersatztag: Wochenende (bzw. bereits belegter Tag) → nächster freier Werktag."""
+    while day.weekday() >= 5 or day in taken:
+        day += dt.timedelta(days=1)
+    return day
+
+
+def _target2_days(year: int) -> list[dt.date]:
+    e = easter(year)
+    return [
+        dt.date(year, 1, 1),
+        e - dt.timedelta(days=2),
+        e + dt.timedelta(days=1),
+        dt.date(year, 5, 1),
+        dt.date(year, 12, 25),
+        dt.date(year, 12, 26),
+    ]
+
+
+def _uk_days(year: int) -> list[dt.date]:
+    e = easter(year)
+    christmas = _next_weekday(dt.date(year, 12, 25))
+    boxing = _next_weekday(dt.date(year, 12, 26), {christmas})
+    return [
+        _next_weekday(dt.date(year, 1, 1)),
+        e - dt.timedelta(days=2),
+        e + dt.timedelta(days=1),
+        _UK_EARLY_MAY_MOVED.get(year, _first_monday(year, 5)),
+        _UK_SPRING_MOVED.get(year, _last_monday(year, 5)),
+        _last_monday(year, 8),
+        christmas,
+        boxing,
+    ]
+
+
+def _year_start(year: int) -> np.datetime64:
+    return np.datetime64(f"{year:04d}-01-01", "D")
+
+
+def _day_index(days: Iterable, base: np.datetime64) -> np.ndarray:
+    return np.asarray(list(days), dtype="M8[D]").astype(np.int64) - base.astype(np.int64)
+
+
+@lru_cache(maxsize=4)
+def holiday_bitset(first_year: int = HOLIDAY_FIRST_YEAR, last_year: int = HOLIDAY_LAST_YEAR) -> np.ndarray:
+    """``uint8``-Array: Bits aller Kalender pro Tag ab ``first_year``-01-01 (schreibgeschützt)."""
+    base, end = _year_start(first_year), _year_start(last_year + 1)
+    bits = np.zeros(int((end - base).astype(np.int64)), dtype=np.uint8)
+    years = range(first_year, last_year + 1)
+
+    us = US_HOLIDAY_CAL.holidays(start=str(base), end=str(end - 1)).to_numpy(dtype="M8[D]")
+    uk = [d for y in years for d in _uk_days(y)] + [np.datetime64(d, "D") for d in _UK_EXTRA]
+    for name, days in (("us", us), ("target2", [d for y in years for d in _target2_days(y)]), ("uk", uk)):
+        idx = _day_index(days, base)
+        bits[idx[(idx >= 0) & (idx < bits.size)]] |= CALENDAR_BITS[name]
+    bits.flags.writeable = False
+    return bits
+
+
+def _calendar_mask(calendars: Iterable[str]) -> int:
+    mask = 0
+    for name in calendars:
+        if name not in CALENDAR_BITS:
+            raise ValueError(f"Unbekannter Feiertagskalender '{name}'. Erwarte {sorted(CALENDAR_BITS)}.")
+        mask |= CALENDAR_BITS[name]
+    return mask
+
+
+def _year_range(days: np.ndarray) -> tuple[int, int]:
+    """Jahre des Bitsets für ``days``: 1990–2040, bei Daten außerhalb erweitert (plus ein Jahr Rand)."""
+    if days.size == 0:
+        return HOLIDAY_FIRST_YEAR, HOLIDAY_LAST_YEAR
+    if np.isnat(days).any():
+        raise ValueError("Feiertags-Lookup mit fehlendem Datum (NaT).")
+    years = days.astype("M8[Y]").astype(np.int64) + 1970
+    first, last = int(years.min()), int(years.max())
+    return (
+        HOLIDAY_FIRST_YEAR if first > HOLIDAY_FIRST_YEAR else first - 1,
+        HOLIDAY_LAST_YEAR if last < HOLIDAY_LAST_YEAR else last + 1,
+    )
+
+
+def _ordinals(dates: np.ndarray, offset_days: int = 0) -> tuple[np.ndarray, int, int]:
+    """Index ins Bitset (``date + offset_days``) und dessen Jahresbereich (``_year_range``)."""
+    days = np.asarray(dates).astype("M8[D]") + np.timedelta64(offset_days, "D")
+    first, last = _year_range(days)
+    return days.astype(np.int64) - _year_start(first).astype(np.int64), first, last
+
+
+def holiday_mask(
+    dates: np.ndarray,
+    calendars: Iterable[str] = ("us",),
+    *,
+    offset_days: int = 0,
+) -> np.ndarray:
+    """True, wenn ``date + offset_days`` in einem der ``calendars`` ein Feiertag ist."""
+    idx, first, last = _ordinals(dates, offset_days)
+    return (holiday_bitset(first, last)[idx] & _calendar_mask(calendars)) != 0
+
+
+@lru_cache(maxsize=32)
+def _days_to_next(mask: int, first_year: int, last_year: int) -> np.ndarray:
+    """Pro Tag: Abstand (Tage) zum nächsten Feiertag ab heute; ohne weiteren Feiertag → groß."""
+    is_hol = (holiday_bitset(first_year, last_year) & mask) != 0
+    n = is_hol.size
+    pos = np.where(is_hol, np.arange(n), n + 10_000)
+    nxt = np.minimum.accumulate(pos[::-1])[::-1]
+    out = nxt - np.arange(n)
+    out.flags.writeable = False
+    return out
+
+
+def days_to_next_holiday(dates: np.ndarray, calendars: Iterable[str] = ALL_CALENDARS) -> np.ndarray:
+    """Kalendertage bis zum nächsten Feiertag (0 = heute ist Feiertag)."""
+    idx, first, last = _ordinals(dates)
+    return _days_to_next(_calendar_mask(calendars), first, last)[idx]
+
+
+def is_bridge_day(dates: np.ndarray, calendars: Iterable[str] = ALL_CALENDARS) -> np.ndarray:
+    """Brückentag: Werktag ohne Feiertag zwischen Feiertag und Wochenende.
+
+    Typisch Freitag nach einem Feiertag am Donnerstag bzw. Montag vor einem
+    Feiertag am Dienstag.
+    """
+    calendars = tuple(calendars)
+    days = np.asarray(dates).astype("M8[D]")
+    dow = (days.astype(np.int64) + 3) % 7  # 1970-01-01 war ein Donnerstag → Montag=0
+    hol = holiday_mask(days, calendars)
+    before = holiday_mask(days, calendars, offset_days=-1)
+    after = holiday_mask(days, calendars, offset_days=1)
+    workday = (dow < 5) & ~hol
+    return workday & (((dow == 4) & before) | ((dow == 0) & after))
@@ -0,0 +1,220 @@
+"""Deklaratives Feature-Register mit abhängigkeitsbewusster Berechnung.
+
+Jedes Feature wird einmal als ``FeatureSpec`` registriert: Name, Eingaben
+(Basisspalten oder andere Features), Rechenfunktion auf NumPy-Arrays, Fenster
+und benötigter Vorlauf. Daraus ergeben sich
+
+- die Spaltenlisten (Trainingsdatensatz, ``FEATURE_COLS``) in Registrierungs-
+  reihenfolge – ein neues Feature muss nur noch an einer Stelle eingetragen werden,
+- die Vorlauf-Zeilen für inkrementelle Updates (``max_lookback``),
+- ein Rechenplan (``plan_features``), der nur die angefragten Features plus deren
+  Abhängigkeiten in topologischer Reihenfolge berechnet.
+
+``compute_features`` sortiert den DataFrame genau einmal nach Datum, rechnet alle
+Features auf den sortierten Arrays und baut das Ergebnis in einem Schritt zusammen
+(keine Zwischenkopien pro Feature-Gruppe).
+
+Specs ohne Rechenfunktion (``compute=None``) beschreiben extern gelieferte Spalten
+(z.B. News-Tagesaggregate, ``h1_*`` aus ``src.data.mt5_h1``); sie tauchen in den
+Spaltenlisten auf, müssen beim Rechnen aber im DataFrame vorhanden sein.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.features.rolling import rolling_stats
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    """Beschreibung eines Features.
+
+    - ``inputs``: Namen der Eingabespalten bzw. -Features (Reihenfolge = Argumente
+      von ``compute``; ``date`` wird als ``datetime64[ns]``-Array übergeben).
+    - ``compute``: Funktion ``(*arrays) -> np.ndarray`` auf nach Datum sortierten
+      Arrays; ``None`` = extern geliefert.
+    - ``window``: Fenstergröße (nur Dokumentation/Introspektion).
+    - ``lookback``: eigene Vorlauf-Zeilen (Rolling-Fenster ``w`` → ``w - 1``, Lag/
+      pct_change ``k`` → ``k``); Abhängigkeiten werden in ``max_lookback`` addiert.
+    - ``model``: Teil der Modell-Features (``FEATURE_COLS``).
+    """
+
+    name: str
+    group: str
+    inputs: tuple[str, ...] = ()
+    compute: Callable[..., np.ndarray] | None = None
+    window: int | None = None
+    lookback: int = 0
+    model: bool = True
+
+
+# Registrierungsreihenfolge = Spaltenreihenfolge (FEATURE_COLS; im Datensatz je Gruppe).
+FEATURES: dict[str, FeatureSpec] = {}
+
+
+def register(
+    name: str,
+    group: str,
+    inputs: Iterable[str] = (),
+    compute: Callable[..., np.ndarray] | None = None,
+    *,
+    window: int | None = None,
+    lookback: int = 0,
+    model: bool = True,
+) -> FeatureSpec:
+    """Registriert ein Feature; doppelte Namen sind ein Fehler."""
+    if name in FEATURES:
+        raise ValueError(f"Feature '{name}' ist bereits registriert.")
+    spec = FeatureSpec(name, group, tuple(inputs), compute, window, int(lookback), model)
+    FEATURES[name] = spec
+    return spec
+
+
+def feature_names(*groups: str, model_only: bool = False) -> list[str]:
+    """Feature-Namen (optional nur bestimmter Gruppen) in Registrierungsreihenfolge."""
+    return [
+        spec.name
+        for spec in FEATURES.values()
+        if (not groups or spec.group in groups) and (spec.model or not model_only)
+    ]
+
+
+def max_lookback(names: Iterable[str]) -> int:
+    """Größter Vorlauf (in Zeilen) der Features inkl. ihrer Abhängigkeiten."""
+    memo: dict[str, int] = {}
+
+    def total(name: str) -> int:
+        if name not in memo:
+            spec = FEATURES.get(name)
+            if spec is None or spec.compute is None:
+                memo[name] = 0
+            else:
+                memo[name] = spec.lookback + max((total(dep) for dep in spec.inputs), default=0)
+        return memo[name]
+
+    return max((total(name) for name in names), default=0)
+
+
+def plan_features(names: Iterable[str], available: Iterable[str] = ()) -> list[FeatureSpec]:
+    """Rechenplan: angefragte Features plus fehlende Abhängigkeiten, topologisch sortiert.
+
+    Abhängigkeiten, die bereits als Spalte vorhanden sind (``available``), werden
+    übernommen statt neu berechnet; angefragte Features werden immer berechnet
+    (wie bisher bei den ``add_*``-Funktionen). Unbekannte bzw. fehlende
+    Eingaben und Zyklen ergeben einen ``ValueError``.
+    """
+    available = set(available)
+    plan: list[FeatureSpec] = []
+    state: dict[str, str] = {}
+
+    def visit(name: str, requested: bool) -> None:
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "active":
+            raise ValueError(f"Zyklische Feature-Abhängigkeit bei '{name}'.")
+        spec = FEATURES.get(name)
+        if spec is None or spec.compute is None or (not requested and name in available):
+            if name not in available:
+                raise ValueError(f"Spalte '{name}' fehlt und kann nicht berechnet werden.")
+            state[name] = "done"
+            return
+        state[name] = "active"
+        for dep in spec.inputs:
+            visit(dep, False)
+        state[name] = "done"
+        plan.append(spec)
+
+    for name in names:
+        visit(name, True)
+    return plan
+
+
+def computable(names: Iterable[str], available: Iterable[str]) -> list[str]:
+    """Filtert ``names`` auf Features, deren Eingaben vorhanden bzw. ableitbar sind."""
+    available = list(available)
+    out = []
+    for name in names:
+        try:
+            plan_features([name], available)
+        except ValueError:
+            continue
+        out.append(name)
+    return out
+
+
+def compute_features(df: pd.DataFrame, names: Iterable[str]) -> pd.DataFrame:
+    """Berechnet ``names`` auf dem nach ``date`` sortierten DataFrame.
+
+    Rückgabe: nach Datum sortiertes DataFrame (Index-Labels bleiben erhalten) mit
+    den Originalspalten plus den angefragten Features; Hilfs-Features, die nur als
+    Abhängigkeit berechnet wurden, werden nicht angehängt.
+    """
+    names = list(dict.fromkeys(names))
+    if df.empty:
+        # Leere Frames behalten ihr Schema: angefragte Spalten werden (leer) ergänzt.
+        return df.reindex(columns=[*df.columns, *(n for n in names if n not in df.columns)])
+    if not names:
+        return df
+
+    plan = plan_features(names, df.columns)
+    dates = df["date"].to_numpy()
+    order = None if pd.Index(dates).is_monotonic_increasing else np.argsort(dates, kind="stable")
+
+    arrays: dict[str, np.ndarray] = {}
+
+    def column(name: str) -> np.ndarray:
+        if name not in arrays:
+            values = df[name].to_numpy()
+            arrays[name] = values if order is None else values[order]
+        return arrays[name]
+
+    for spec in plan:
+        arrays[spec.name] = spec.compute(*(column(dep) for dep in spec.inputs))
+
+    base = df if order is None else df.iloc[order]
+    new = {name: arrays[name] for name in names if name in arrays}
+    base = base.drop(columns=[name for name in new if name in base.columns])
+    return pd.concat([base, pd.DataFrame(new, index=base.index)], axis=1)
+
+
+# ---------------------------------------------------------------------------
+# NumPy-Bausteine (Semantik wie pandas mit min_periods = Fenster; Kernels in rolling.py)
+# ---------------------------------------------------------------------------
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    return np.asarray(x, dtype="float64")
+
+
+def shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Wert von vor ``periods`` Zeilen (``Series.shift``)."""
+    x = _as_float(x)
+    out = np.full(len(x), np.nan)
+    if periods < len(x):
+        out[periods:] = x[: len(x) - periods]
+    return out
+
+
+def pct_change(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Relative Änderung gegenüber ``periods`` Zeilen zuvor (``Series.pct_change``)."""
+    x = _as_float(x)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / shift(x, periods) - 1.0
+
+
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    return rolling_stats(x, (window,), ("sum",), dtype=np.float64)[("sum", window)]
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    return rolling_stats(x, (window,), ("mean",), dtype=np.float64)[("mean", window)]
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Stichproben-Standardabweichung (ddof=1) wie ``rolling().std()``."""
+    return rolling_stats(x, (window,), ("std",), dtype=np.float64)[("std", window)]
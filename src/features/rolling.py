@@ -0,0 +1,206 @@
+"""Rolling-Window-Kernels: mehrere Fenster und Statistiken für viele Spalten auf einmal.
+
+Statt pro Spalte, Fenster und Statistik einen eigenen ``.rolling()``-Aufruf zu
+machen, arbeitet ``rolling_stats`` auf einer 2-D-Matrix ``(Zeilen, Spalten)``:
+
+- ``sum``/``mean``/``std``: Präfixsummen (einmal pro Matrix), jedes Fenster ist dann
+  nur noch eine Differenz ``C[i] - C[i - w]`` → O(n) unabhängig von der Fenstergröße.
+  Für ``std`` wird spaltenweise zentriert (weniger Auslöschung); Fenster ohne
+  Wertänderung liefern exakt 0.
+- ``min``/``max``: monotone Deque (Numba, optional) bzw. van Herk/Gil-Werman-
+  Blockpräfixe im NumPy-Fallback – beide O(n) pro Fenster und exakt.
+
+Semantik wie pandas mit ``min_periods = Fenster``: Ein Fenster mit NaN oder ±inf
+(pandas zählt beides als fehlend) bzw. die ersten ``w - 1`` Zeilen ergeben NaN;
+``std`` ist die Stichproben-Std (ddof=1). Nicht-endliche Werte gehen nie in die
+Präfixsummen ein, spätere Fenster bleiben davon unberührt.
+
+Ergebnis sind Blöcke ``(Zeilen, Spalten)`` im gewünschten Dtype (Default float32,
+wie XGBoost rechnet), gerechnet wird intern in float64.
+"""
+
+from __future__ import annotations
+
+from typing import Final, Iterable
+
+import numpy as np
+import pandas as pd
+
+try:  # Numba ist optional; ohne Numba wird der NumPy-Pfad verwendet.
+    from numba import njit
+except ImportError:  # pragma: no cover - abhaengig von der Umgebung
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+ROLLING_WINDOWS: Final = (3, 5, 7, 14, 30, 60, 120)
+ROLLING_STATS: Final = ("mean", "std", "sum", "min", "max")
+
+
+def _prefix(x: np.ndarray) -> np.ndarray:
+    """Präfixsummen mit führender Nullzeile: ``out[i] = x[:i].sum(axis=0)``."""
+    out = np.zeros((x.shape[0] + 1, x.shape[1]), dtype=np.float64)
+    np.cumsum(x, axis=0, out=out[1:])
+    return out
+
+
+def _window_diff(prefix: np.ndarray, window: int) -> np.ndarray:
+    """Fenstersummen für alle vollständigen Fenster (Zeilen ``window - 1`` … ``n - 1``)."""
+    return prefix[window:] - prefix[:-window]
+
+
+def _rolling_extreme_loop(x: np.ndarray, window: int, is_max: bool) -> np.ndarray:
+    n, k = x.shape
+    out = np.empty((max(n - window + 1, 0), k), dtype=np.float64)
+    dq = np.empty(n, dtype=np.int64)
+    for j in range(k):
+        head = 0
+        tail = 0
+        for i in range(n):
+            v = x[i, j]
+            while tail > head:
+                last = x[dq[tail - 1], j]
+                if (last <= v) if is_max else (last >= v):
+                    tail -= 1
+                else:
+                    break
+            dq[tail] = i
+            tail += 1
+            if dq[head] <= i - window:
+                head += 1
+            if i >= window - 1:
+                out[i - window + 1, j] = x[dq[head], j]
+    return out
+
+
+_rolling_extreme_jit = njit(cache=True)(_rolling_extreme_loop) if NUMBA_AVAILABLE else None
+
+
+def _rolling_extreme_numpy(x: np.ndarray, window: int, is_max: bool) -> np.ndarray:
+    """van Herk/Gil-Werman: Präfix-/Suffix-Extrema je Block der Länge ``window``."""
+    n, k = x.shape
+    ufunc = np.maximum if is_max else np.minimum
+    blocks = -(-n // window)
+    fill = -np.inf if is_max else np.inf
+    padded = np.full((blocks * window, k), fill)
+    padded[:n] = x
+    padded = padded.reshape(blocks, window, k)
+    prefix = ufunc.accumulate(padded, axis=1).reshape(-1, k)
+    suffix = ufunc.accumulate(padded[:, ::-1], axis=1)[:, ::-1].reshape(-1, k)
+    return ufunc(suffix[: n - window + 1], prefix[window - 1 : n])
+
+
+def _rolling_extreme(x: np.ndarray, window: int, is_max: bool, use_numba: bool | None) -> np.ndarray:
+    if use_numba is None:
+        use_numba = NUMBA_AVAILABLE
+    if use_numba and _rolling_extreme_jit is not None:
+        return _rolling_extreme_jit(np.ascontiguousarray(x), window, is_max)
+    return _rolling_extreme_numpy(x, window, is_max)
+
+
+def rolling_stats(
+    values: np.ndarray,
+    windows: Iterable[int] = ROLLING_WINDOWS,
+    stats: Iterable[str] = ROLLING_STATS,
+    *,
+    dtype: np.dtype | str = np.float32,
+    use_numba: bool | None = None,
+) -> dict[tuple[str, int], np.ndarray]:
+    """Rolling-Statistiken für alle Spalten von ``values`` (1-D oder ``(n, k)``).
+
+    Rückgabe: ``{(stat, window): Block}`` mit Blöcken derselben Form wie ``values``.
+    Präfixsummen und Fehlwert-Masken werden einmal gerechnet und für alle Fenster geteilt.
+    """
+    windows = [int(w) for w in windows]
+    stats = list(stats)
+    unknown = set(stats) - set(ROLLING_STATS)
+    if unknown:
+        raise ValueError(f"Unbekannte Rolling-Statistik(en): {sorted(unknown)}")
+    if any(w < 1 for w in windows):
+        raise ValueError("Fenstergrößen müssen >= 1 sein.")
+
+    arr = np.asarray(values, dtype=np.float64)
+    one_dim = arr.ndim == 1
+    if one_dim:
+        arr = arr[:, None]
+    n, k = arr.shape
+
+    # ±inf wie NaN behandeln: sonst verdirbt ein inf alle folgenden Präfix-Differenzen.
+    missing = ~np.isfinite(arr)
+    missing_prefix = _prefix(missing)
+    clean = np.where(missing, 0.0, arr)
+    need_sums = any(s in ("sum", "mean", "std") for s in stats)
+    sum_prefix = _prefix(clean) if need_sums else None
+    if "std" in stats:
+        # Zentrieren reduziert Auslöschung in (S2 - S1²/w); Änderungszähler erkennt
+        # konstante Fenster (Varianz exakt 0 wie bei pandas).
+        mu = clean.sum(axis=0) / np.maximum((~missing).sum(axis=0), 1)
+        centered = np.where(missing, 0.0, arr - mu)
+        c_prefix = _prefix(centered)
+        sq_prefix = _prefix(centered * centered)
+        change = np.zeros((n, k), dtype=np.float64)
+        change[1:] = arr[1:] != arr[:-1]
+        change_prefix = _prefix(change)
+    if "min" in stats or "max" in stats:
+        low = np.where(missing, np.inf, arr)
+        high = np.where(missing, -np.inf, arr)
+
+    out: dict[tuple[str, int], np.ndarray] = {}
+    for w in windows:
+        blocks: dict[str, np.ndarray] = {}
+        if n >= w:
+            valid = _window_diff(missing_prefix, w) == 0
+            if need_sums:
+                total = _window_diff(sum_prefix, w)
+            for stat in stats:
+                if stat == "sum":
+                    res = total
+                elif stat == "mean":
+                    res = total / w
+                elif stat == "std":
+                    if w < 2:
+                        res = np.full((n - w + 1, k), np.nan)
+                    else:
+                        s1 = _window_diff(c_prefix, w)
+                        s2 = _window_diff(sq_prefix, w)
+                        var = np.maximum((s2 - s1 * s1 / w) / (w - 1), 0.0)
+                        constant = _window_diff(change_prefix, w) - change[: n - w + 1] == 0
+                        res = np.where(constant, 0.0, np.sqrt(var))
+                else:
+                    is_max = stat == "max"
+                    res = _rolling_extreme(high if is_max else low, w, is_max, use_numba)
+                block = np.full((n, k), np.nan, dtype=dtype)
+                block[w - 1 :] = np.where(valid, res, np.nan)
+                blocks[stat] = block
+        else:
+            for stat in stats:
+                blocks[stat] = np.full((n, k), np.nan, dtype=dtype)
+        for stat in stats:
+            out[(stat, w)] = blocks[stat][:, 0] if one_dim else blocks[stat]
+    return out
+
+
+def rolling_frame(
+    df: pd.DataFrame,
+    columns: Iterable[str],
+    windows: Iterable[int] = ROLLING_WINDOWS,
+    stats: Iterable[str] = ROLLING_STATS,
+    *,
+    dtype: np.dtype | str = np.float32,
+) -> pd.DataFrame:
+    """Rolling-Statistiken als DataFrame mit Spalten ``<col>_<w>d_<stat>``.
+
+    Die Zeilen werden in der vorliegenden Reihenfolge verarbeitet (vorher nach Datum
+    sortieren); der Index von ``df`` wird übernommen.
+    """
+    columns = list(columns)
+    windows = list(windows)
+    stats = list(stats)
+    blocks = rolling_stats(df[columns].to_numpy(dtype=np.float64), windows, stats, dtype=dtype)
+    data = {
+        f"{col}_{w}d_{stat}": blocks[(stat, w)][:, j]
+        for w in windows
+        for stat in stats
+        for j, col in enumerate(columns)
+    }
+    return pd.DataFrame(data, index=df.index)
@@ -0,0 +1,133 @@
+"""Feature-Store: Preis-/Kalender-Features der vollen Preis-Historie je Preisquelle.
+
+Die Features der Gruppen ``season``, ``candle``, ``price``, ``cal`` und ``hol``
+hängen nur von der Daily-Preisreihe ab, nicht von den Label-Parametern. Statt sie
+für jedes Experiment neu zu rechnen, werden sie einmal pro Preisquelle auf der
+vollen Historie berechnet und als strukturiertes ``.npy`` abgelegt:
+
+    data/processed/feature_store/<quelle>[_wd]__<key>.npy
+
+``key`` = Hash aus Rohdatei-Inhalt, ``drop_weekends`` und Code-Version. Ändert sich
+die Rohdatei, entsteht ein neuer Snapshot (alte Versionen derselben Quelle werden
+entfernt). Experimente joinen ihre Labels per Datum (``searchsorted`` auf dem
+memory-mapped Array) – es werden nur die benötigten Zeilen gelesen.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Final, Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.data import label_eurusd
+from src.data.label_eurusd import daily_price_path, load_daily_prices
+from src.features import eurusd_features, holidays, registry, rolling
+from src.features.registry import compute_features, feature_names
+from src.utils.cache import cache_key, code_fingerprint, file_fingerprint
+from src.utils.io import DATA_PROCESSED
+
+STORE_DIR: Final = DATA_PROCESSED / "feature_store"
+STORE_GROUPS: Final = ("season", "candle", "price", "cal", "hol")
+
+
+def store_feature_names() -> list[str]:
+    """Im Store abgelegte Features (Gruppenreihenfolge wie im Trainingsdatensatz)."""
+    return [name for group in STORE_GROUPS for name in feature_names(group)]
+
+
+def price_store_path(price_source: str = "yahoo", *, drop_weekends: bool = False) -> Path:
+    """Pfad des Snapshots für den aktuellen Inhalt der Rohdatei."""
+    parts = {
+        "raw": file_fingerprint(daily_price_path(price_source)),
+        "drop_weekends": bool(drop_weekends),
+        "code": code_fingerprint(
+            __file__,
+            registry.__file__,
+            rolling.__file__,
+            holidays.__file__,
+            eurusd_features.__file__,
+            label_eurusd.__file__,
+        ),
+    }
+    suffix = "_wd" if drop_weekends else ""
+    return STORE_DIR / f"{price_source}{suffix}__{cache_key('feature_store', parts)}.npy"
+
+
+def _to_records(df: pd.DataFrame, names: list[str]) -> np.ndarray:
+    dtype = [("date", "M8[ns]")] + [(name, df[name].dtype.str) for name in names]
+    records = np.empty(len(df), dtype=dtype)
+    records["date"] = df["date"].to_numpy(dtype="M8[ns]")
+    for name in names:
+        records[name] = df[name].to_numpy()
+    return records
+
+
+def build_price_feature_store(price_source: str = "yahoo", *, drop_weekends: bool = False) -> Path:
+    """Berechnet die Store-Features auf der vollen Preis-Historie und schreibt den Snapshot."""
+    path = price_store_path(price_source, drop_weekends=drop_weekends)
+    prices = load_daily_prices(price_source=price_source, drop_weekends=drop_weekends)
+    prices = prices.reset_index().rename(columns={"Date": "date"})
+    names = store_feature_names()
+    # Close wird mitgespeichert, um beim Join die Preisquelle zu prüfen.
+    records = _to_records(compute_features(prices, names), ["Close", *names])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for stale in path.parent.glob(f"{path.name.split('__')[0]}__*.npy"):
+        stale.unlink(missing_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as fh:
+        np.save(fh, records)
+    os.replace(tmp, path)
+    return path
+
+
+def load_price_feature_store(price_source: str = "yahoo", *, drop_weekends: bool = False) -> np.ndarray:
+    """Memory-mapped Snapshot der Preisquelle (wird bei Bedarf zuerst gebaut)."""
+    path = price_store_path(price_source, drop_weekends=drop_weekends)
+    if not path.is_file():
+        path = build_price_feature_store(price_source, drop_weekends=drop_weekends)
+    return np.load(path, mmap_mode="r")
+
+
+def join_price_features(
+    df: pd.DataFrame,
+    store: np.ndarray,
+    names: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Hängt Store-Features per ``date`` an ``df`` an (Ergebnis nach Datum sortiert).
+
+    Fehlt ein Datum im Store oder weicht ``Close`` ab (Labels stammen aus einer
+    anderen Preisquelle/Version), wird ein ``ValueError`` ausgelöst. Ebenso, wenn
+    die Label-Tage im Store nicht lückenlos aufeinanderfolgen: Rolling-/Lag-Features
+    des Stores beziehen sich auf die volle Historie und wären dann andere als direkt
+    auf den Labels gerechnete (Beginn und Ende dürfen abgeschnitten sein).
+    """
+    names = store_feature_names() if names is None else list(names)
+    missing = [name for name in names if name not in store.dtype.names]
+    if missing:
+        raise ValueError(f"Feature-Store enthält {missing} nicht.")
+
+    df = df.sort_values("date", kind="stable")
+    dates = df["date"].to_numpy(dtype="M8[ns]")
+    store_dates = store["date"]
+    if len(store_dates) == 0:
+        raise ValueError("Feature-Store ist leer.")
+    pos = np.searchsorted(store_dates, dates)
+    found = (pos < len(store_dates)) & (store_dates[np.minimum(pos, len(store_dates) - 1)] == dates)
+    if not found.all():
+        raise ValueError(f"{int((~found).sum())} Datum/Daten fehlen im Feature-Store.")
+    gaps = int((np.diff(pos) != 1).sum())
+    if gaps:
+        raise ValueError(f"Label-Tage sind im Feature-Store nicht lückenlos ({gaps} Lücke(n)).")
+
+    rows = store[pos]
+    if "Close" in df.columns:
+        if not np.allclose(rows["Close"], df["Close"].to_numpy(dtype="float64"), rtol=1e-12, atol=0.0):
+            raise ValueError("Close im Feature-Store passt nicht zu den Labels (andere Preisquelle?).")
+
+    new = pd.DataFrame({name: rows[name] for name in names}, index=df.index)
+    base = df.drop(columns=[name for name in names if name in df.columns])
+    return pd.concat([base, new], axis=1)
@@ -0,0 +1,326 @@
+"""Spaltenprojizierter Loader für Trainingsdatensätze (Feature-Matrix + Targets).
+
+``load_dataset`` liest den kompletten Datensatz als DataFrame; für das Training
+werden aber nur ``date``, die Feature-Spalten und die Targets gebraucht. Hier
+werden Feature-Liste und Datumsbereich vorab übergeben:
+
+- Parquet: nur die angefragten Spalten, Datumsfilter als Predicate-Pushdown
+  (Row Groups außerhalb des Bereichs werden anhand der Statistiken übersprungen),
+- Feather: memory-mapped, nur die angefragten Spalten,
+- CSV: ``pyarrow.csv`` mit ``include_columns`` und festen Typen (ohne pyarrow:
+  ``pd.read_csv(usecols=...)``).
+
+Die Arrow-Spalten werden direkt in eine zusammenhängende ``float32``-Matrix
+kopiert – ohne Zwischen-DataFrame und ohne object-Spalten. ``label`` wird als
+``int8``-Code geliefert (Reihenfolge ``LABEL_CLASSES``).
+
+``TrainingArrays.split`` liefert Train/Val/Test als ``DatasetView``: Zeilen-Ausschnitte
+ohne Kopie (zusammenhängende Splits sind NumPy-Slices). ``DatasetView.moves`` ist
+die ``signal == 1``-Teilmenge für das Richtungsmodell; ``DatasetView.dmatrix`` baut
+daraus direkt eine (Quantile-)DMatrix für ``train_xgb_binary``. ``TrainingArrays.fingerprint``
+und ``DatasetView.row_key`` identifizieren einen View für ``src.models.dmatrix_cache``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from src.features.eurusd_features import feature_names
+from src.utils.cache import array_fingerprint
+from src.utils.io import PYARROW_AVAILABLE, resolve_table_path, table_columns, table_files
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+
+# Label-Codes: Index in LABEL_CLASSES (fehlendes/unbekanntes Label → -1).
+LABEL_CLASSES = ("neutral", "up", "down")
+TARGET_COLUMNS = ("label", "signal", "direction")
+
+
+@dataclass(frozen=True)
+class TrainingArrays:
+    """Trainingsdaten als NumPy-Arrays (nach Datum sortiert).
+
+    - ``X``: ``float32``-Matrix ``(Zeilen, Features)``, C-zusammenhängend.
+    - ``label``: ``int8``-Codes (``LABEL_CLASSES``), ``signal``: ``int8`` 0/1,
+      ``direction``: ``int8`` 0/1, -1 ohne Richtung (neutral).
+    """
+
+    dates: np.ndarray
+    X: np.ndarray
+    feature_names: tuple[str, ...]
+    label: np.ndarray
+    signal: np.ndarray
+    direction: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def label_names(self) -> np.ndarray:
+        """Labels als Strings (``neutral``/``up``/``down``), fehlende als ``None``."""
+        return _label_names(self.label)
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Content-Hash von ``X`` und den Feature-Namen (einmal pro Instanz berechnet)."""
+        return array_fingerprint(self.X, self.feature_names)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, features: Iterable[str]) -> "TrainingArrays":
+        """Kompakte Arrays aus einem bereits geladenen DataFrame (nach Datum sortiert)."""
+        df = df.sort_values("date", kind="stable")
+        features = list(features)
+        X = np.empty((len(df), len(features)), dtype=np.float32)
+        for j, name in enumerate(features):
+            X[:, j] = df[name].to_numpy(dtype=np.float32)
+        missing = np.full(len(df), -1, dtype=np.int8)
+        return cls(
+            dates=df["date"].to_numpy(dtype="M8[ns]"),
+            X=X,
+            feature_names=tuple(features),
+            label=_label_codes(df["label"].astype(str)) if "label" in df.columns else missing,
+            signal=df["signal"].to_numpy().astype(np.int8) if "signal" in df.columns else missing,
+            direction=_direction_codes(df["direction"].to_numpy()) if "direction" in df.columns else missing,
+        )
+
+    def view(self, rows: slice | np.ndarray = slice(None), name: str = "") -> "DatasetView":
+        return DatasetView(self, rows, name)
+
+    def split(self, test_start: pd.Timestamp, train_frac_within_pretest: float = 0.8) -> dict[str, "DatasetView"]:
+        """Train/Val/Test wie ``split_train_val_test`` – als Slices, ohne Kopie."""
+        n_pre = int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(test_start), "ns"), side="left"))
+        train_end = int(n_pre * train_frac_within_pretest)
+        return {
+            "train": self.view(slice(0, train_end), "train"),
+            "val": self.view(slice(train_end, n_pre), "val"),
+            "test": self.view(slice(n_pre, len(self)), "test"),
+        }
+
+
+@dataclass(frozen=True)
+class DatasetView:
+    """Zeilen-Ausschnitt von ``TrainingArrays``.
+
+    ``rows`` ist ein Slice (Arrays sind NumPy-Views, keine Kopie) oder ein
+    Index-Array (z.B. ``signal == 1``; erst der Zugriff auf ``X`` kopiert die Zeilen).
+    """
+
+    data: TrainingArrays
+    rows: slice | np.ndarray
+    name: str = ""
+
+    def __len__(self) -> int:
+        return len(self.data.dates[self.rows])
+
+    @property
+    def feature_names(self) -> tuple[str, ...]:
+        return self.data.feature_names
+
+    @property
+    def X(self) -> np.ndarray:
+        return self.data.X[self.rows]
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.data.dates[self.rows]
+
+    @property
+    def label(self) -> np.ndarray:
+        return self.data.label[self.rows]
+
+    @property
+    def signal(self) -> np.ndarray:
+        return self.data.signal[self.rows]
+
+    @property
+    def direction(self) -> np.ndarray:
+        return self.data.direction[self.rows]
+
+    def label_names(self) -> np.ndarray:
+        return _label_names(self.label)
+
+    def frame(self) -> pd.DataFrame:
+        """Features als DataFrame (für ``predict_proba`` mit Spaltennamen)."""
+        return pd.DataFrame(self.X, columns=list(self.feature_names), copy=False)
+
+    def indices(self) -> np.ndarray:
+        """Zeilennummern in ``data``."""
+        return np.arange(len(self.data))[self.rows]
+
+    def row_key(self) -> str:
+        """Stabile Kennung der Zeilenauswahl (Slice-Grenzen bzw. Hash des Index-Arrays)."""
+        if isinstance(self.rows, slice):
+            start, stop, step = self.rows.indices(len(self.data))
+            return f"slice:{start}:{stop}:{step}"
+        return "index:" + array_fingerprint(np.asarray(self.rows, dtype=np.int64))
+
+    def subset(self, mask: np.ndarray, name: str | None = None) -> "DatasetView":
+        return DatasetView(self.data, self.indices()[np.asarray(mask, dtype=bool)], self.name if name is None else name)
+
+    def moves(self) -> "DatasetView":
+        """Tage mit Bewegung und bekannter Richtung (Trainingsmenge des Richtungsmodells)."""
+        return self.subset((self.signal == 1) & (self.direction >= 0))
+
+    def dmatrix(
+        self,
+        label: np.ndarray | None = None,
+        *,
+        ref: xgb.DMatrix | None = None,
+        quantile: bool = True,
+        max_bin: int | None = None,
+        nthread: int | None = None,
+    ) -> xgb.DMatrix:
+        """(Quantile-)DMatrix der Zeilen; ``ref`` = Trainings-DMatrix für die Bin-Grenzen.
+
+        ``nthread``: Threads für den Aufbau (Default: alle Kerne).
+        """
+        if quantile:
+            return xgb.QuantileDMatrix(
+                self.X,
+                label=label,
+                ref=ref,
+                feature_names=list(self.feature_names),
+                max_bin=max_bin,
+                nthread=nthread,
+            )
+        return xgb.DMatrix(self.X, label=label, feature_names=list(self.feature_names), nthread=nthread)
+
+
+def _select_features(available: list[str], features: Iterable[str] | None) -> list[str]:
+    if features is None:
+        return [col for col in feature_names(model_only=True) if col in available]
+    features = list(features)
+    missing = [col for col in features if col not in available]
+    if missing:
+        raise ValueError(f"Feature-Spalten fehlen im Datensatz: {missing}")
+    return features
+
+
+def _label_codes(values: np.ndarray | pd.Series) -> np.ndarray:
+    return pd.Categorical(values, categories=LABEL_CLASSES).codes.astype(np.int8)
+
+
+def _label_names(codes: np.ndarray) -> np.ndarray:
+    """Codes → Strings; ``-1`` (fehlendes Label) wird ``None``, nicht ``LABEL_CLASSES[-1]``."""
+    names = np.asarray(LABEL_CLASSES, dtype=object)
+    return np.where(codes >= 0, names[np.maximum(codes, 0)], None)
+
+
+def _direction_codes(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(values), -1, values).astype(np.int8)
+
+
+def _read_arrow(path: Path, columns: list[str], start, end) -> "pa.Table":
+    suffix = path.suffix.lower()
+    files = table_files(path)  # inkl. per append_table angehängter Teile
+    if suffix == ".parquet":
+        filters = []
+        if start is not None:
+            filters.append(("date", ">=", start))
+        if end is not None:
+            filters.append(("date", "<", end))
+        source = path if len(files) == 1 else [str(f) for f in files]
+        return pa_parquet.read_table(source, columns=columns, filters=filters or None, memory_map=True)
+
+    if suffix == ".feather":
+        if len(files) == 1:
+            table = pa_feather.read_table(path, columns=columns, memory_map=True)
+        else:
+            table = pa_dataset.dataset([str(f) for f in files], format="feather").to_table(columns=columns)
+    else:
+        table = pa_csv.read_csv(
+            path,
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types={"date": pa.timestamp("ns"), "label": pa.string()},
+            ),
+        )
+    if start is not None or end is not None:
+        dates = table.column("date")
+        mask = None
+        if start is not None:
+            mask = pc.greater_equal(dates, pa.scalar(start, dates.type))
+        if end is not None:
+            upper = pc.less(dates, pa.scalar(end, dates.type))
+            mask = upper if mask is None else pc.and_(mask, upper)
+        table = table.filter(mask)
+    return table
+
+
+def load_training_arrays(
+    path: Path,
+    features: Iterable[str] | None = None,
+    *,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+) -> TrainingArrays:
+    """Lädt nur ``date``, ``features`` und die Targets für ``start <= date < end``.
+
+    ``features=None`` → alle Modell-Features (``FEATURE_COLS``), die im Datensatz
+    vorhanden sind; explizit angefragte, fehlende Spalten ergeben einen ``ValueError``.
+    """
+    resolved = resolve_table_path(path)
+    if resolved is None:
+        raise FileNotFoundError(path)
+    available = table_columns(resolved)
+    features = _select_features(available, features)
+    targets = [col for col in TARGET_COLUMNS if col in available]
+    columns = ["date", *features, *targets]
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    if PYARROW_AVAILABLE:
+        table = _read_arrow(resolved, columns, start, end)
+        dates = table.column("date").to_numpy().astype("M8[ns]")
+
+        def column(name: str) -> np.ndarray:
+            return table.column(name).to_numpy(zero_copy_only=False)
+    else:
+        df = pd.read_csv(
+            resolved,
+            usecols=columns,
+            parse_dates=["date"],
+            dtype={name: np.float32 for name in features},
+        )
+        if start is not None:
+            df = df[df["date"] >= start]
+        if end is not None:
+            df = df[df["date"] < end]
+        dates = df["date"].to_numpy(dtype="M8[ns]")
+
+        def column(name: str) -> np.ndarray:
+            return df[name].to_numpy()
+
+    order = None if pd.Index(dates).is_monotonic_increasing else np.argsort(dates, kind="stable")
+
+    def sorted_column(name: str) -> np.ndarray:
+        values = column(name)
+        return values if order is None else values[order]
+
+    n = len(dates)
+    X = np.empty((n, len(features)), dtype=np.float32)
+    for j, name in enumerate(features):
+        X[:, j] = sorted_column(name)
+
+    missing = np.full(n, -1, dtype=np.int8)
+    return TrainingArrays(
+        dates=dates if order is None else dates[order],
+        X=X,
+        feature_names=tuple(features),
+        label=_label_codes(sorted_column("label")) if "label" in targets else missing,
+        signal=sorted_column("signal").astype(np.int8) if "signal" in targets else missing,
+        direction=_direction_codes(sorted_column("direction")) if "direction" in targets else missing,
+    )
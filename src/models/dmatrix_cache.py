@@ -0,0 +1,133 @@
+"""Prozess-lokaler Cache für quantisierte DMatrizen (``QuantileDMatrix``).
+
+Jede ``QuantileDMatrix`` braucht einen Sketch über alle Feature-Spalten (bzw. mit
+``ref`` das Einsortieren in deren Bins). Bei vielen kurzen Fits auf denselben
+Splits – Stufe 1 und 2, Hyperparameter-Suche, Schwellen-Suche auf den Val-
+Wahrscheinlichkeiten, Scheduler-Jobs mit mehreren Parameter-Sätzen – ist das ein
+messbarer Teil der Trainingszeit. Hier wird pro Split genau einmal gebaut:
+
+    key = (TrainingArrays.fingerprint, Feature-Namen, DatasetView.row_key, max_bin, key(ref))
+
+- ``row_key``: Slice-Grenzen bzw. Hash des Index-Arrays. Stufe 2 nutzt die
+  ``signal == 1``-Teilmenge (``DatasetView.moves``, Index-View statt kopiertem
+  DataFrame) und bekommt einen eigenen Eintrag: eine ``QuantileDMatrix`` lässt sich
+  in XGBoost nicht zeilenweise schneiden, und das Richtungsmodell braucht ohnehin
+  eigene Bin-Grenzen.
+- ``ref``: der *View*, dessen Bin-Grenzen gelten (Val/Test mit ``ref=train``).
+  Vorhersagen auf einer ``QuantileDMatrix`` sind nur mit den Bin-Grenzen der
+  Trainingsmatrix des Modells exakt – deshalb ist ``ref`` Teil des Keys.
+- Labels sind nicht Teil des Keys: ``get(view, label)`` setzt sie bei jedem Zugriff
+  (``set_label``), die quantisierten Daten bleiben geteilt.
+- ``nthread`` (Threads beim Aufbau) ändert die Bin-Grenzen nicht und ist deshalb
+  ebenfalls nicht Teil des Keys; der Scheduler übergibt das ``n_jobs`` des Jobs.
+
+Der Cache hält höchstens ``max_entries`` Matrizen (LRU); Größe über
+``HS2025_DMATRIX_CACHE`` (Default 16, ``0`` = aus). In Worker-Prozessen des
+Schedulers hat jeder Prozess seinen eigenen Cache.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+
+import numpy as np
+import xgboost as xgb
+
+from src.models.dataset import DatasetView
+
+DMATRIX_CACHE_ENTRIES = int(os.environ.get("HS2025_DMATRIX_CACHE", "16"))
+
+DMatrixKey = tuple[str, tuple[str, ...], str, int | None, "DMatrixKey | None"]
+
+
+def dmatrix_key(view: DatasetView, *, ref: DatasetView | None = None, max_bin: int | None = None) -> DMatrixKey:
+    """Cache-Key eines Views (Datensatz, Features, Zeilen, ``max_bin``, Key von ``ref``)."""
+    ref_key = None if ref is None else dmatrix_key(ref, max_bin=max_bin)
+    return (view.data.fingerprint, view.feature_names, view.row_key(), max_bin, ref_key)
+
+
+class DMatrixCache:
+    """LRU-Cache ``DMatrixKey → QuantileDMatrix`` mit Treffer-Statistik."""
+
+    def __init__(self, max_entries: int = DMATRIX_CACHE_ENTRIES) -> None:
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[DMatrixKey, xgb.DMatrix] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        view: DatasetView,
+        label: np.ndarray | None = None,
+        *,
+        ref: DatasetView | None = None,
+        max_bin: int | None = None,
+        nthread: int | None = None,
+    ) -> xgb.DMatrix:
+        """``QuantileDMatrix`` von ``view`` (Bin-Grenzen von ``ref``), gebaut nur beim ersten Zugriff.
+
+        ``label`` wird auf die (geteilte) Matrix gesetzt; ``None`` lässt die Labels unverändert.
+        """
+        if self.max_entries <= 0:
+            dref = None if ref is None else ref.dmatrix(max_bin=max_bin, nthread=nthread)
+            return view.dmatrix(label, ref=dref, max_bin=max_bin, nthread=nthread)
+
+        key = dmatrix_key(view, ref=ref, max_bin=max_bin)
+        dmatrix = self._entries.get(key)
+        if dmatrix is None:
+            self.misses += 1
+            dref = None if ref is None else self.get(ref, max_bin=max_bin, nthread=nthread)
+            dmatrix = view.dmatrix(label, ref=dref, max_bin=max_bin, nthread=nthread)
+            self._entries[key] = dmatrix
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            if label is not None:
+                dmatrix.set_label(np.asarray(label))
+        return dmatrix
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+
+_DEFAULT_CACHE = DMatrixCache()
+
+
+def cached_dmatrix(
+    view: DatasetView,
+    label: np.ndarray | None = None,
+    *,
+    ref: DatasetView | None = None,
+    max_bin: int | None = None,
+    nthread: int | None = None,
+    cache: DMatrixCache | None = None,
+) -> xgb.DMatrix:
+    """``DMatrixCache.get`` auf dem prozessweiten Cache (oder ``cache``)."""
+    return (_DEFAULT_CACHE if cache is None else cache).get(view, label, ref=ref, max_bin=max_bin, nthread=nthread)
+
+
+def dmatrix_cache_stats() -> dict[str, int]:
+    return _DEFAULT_CACHE.stats()
+
+
+def predict_proba(model: xgb.XGBClassifier, dmatrix: xgb.DMatrix) -> np.ndarray:
+    """P(Klasse 1) wie ``model.predict_proba(...)[:, 1]``, aber auf einer (gecachten) DMatrix.
+
+    ``dmatrix`` muss die Bin-Grenzen der Trainingsmatrix des Modells haben
+    (``cached_dmatrix(view, ref=train_view)``), sonst weichen die Werte ab – das
+    gilt auch für Bäume, die per Warm-Start von einem anderen Split übernommen wurden.
+    """
+    booster = model.get_booster()
+    best = getattr(model, "best_iteration", None)
+    end = booster.num_boosted_rounds() if best is None else best + 1
+    return booster.predict(dmatrix, iteration_range=(0, end))
@@ -0,0 +1,423 @@
+"""Hyperparameter-Suche für ``train_xgb_binary`` (Successive Halving / Hyperband).
+
+``train_xgb_binary`` nutzt feste Defaults (``max_depth=3``, ``learning_rate=0.05``,
+``n_estimators=400``); ``xgb_params`` wurden bisher von Hand gesetzt. Hier werden
+viele Konfigurationen mit kleinem Budget trainiert und nur die vielversprechenden
+weitergeführt:
+
+- Budget = Anzahl Boosting-Runden, Stufen ``min_rounds · eta^i`` bis ``n_estimators``
+  (Defaults 15/400/3: 15, 45, 135, 400). Successive Halving startet ``n_configs``
+  Konfigurationen mit ``min_rounds`` Runden, behält pro Stufe das beste ``1/eta``
+  (Val-Logloss) und trainiert die Überlebenden weiter (Warm-Start auf dem
+  vorhandenen Booster, nichts wird neu trainiert), bis ``n_estimators`` erreicht ist.
+- Hyperband: mehrere Halving-Durchläufe, Durchlauf ``s`` startet auf Stufe ``s``;
+  die Anzahl Konfigurationen pro Durchlauf folgt aus ``eta`` und der Stufenzahl
+  (``n_configs`` gilt nur für Successive Halving).
+- Die letzte Stufe trainiert bis ``n_estimators`` mit Early Stopping (wie
+  ``train_xgb_binary``) und wird mit ``score`` bewertet – Default: ``-logloss``,
+  optional kostenbasiert (``cascade_pnl_score``: P&L der Kaskade über ``threshold_surface``).
+- Sampling: zufällig oder TPE-artig (Parzen-Schätzer auf den bisher besten vs.
+  übrigen Konfigurationen im Einheitswürfel, Kandidat mit maximalem l(x)/g(x)).
+
+Alles läuft lokal mit NumPy/XGBoost; Train und Val werden je einmal als
+``QuantileDMatrix`` gebaut (``cached_dmatrix``) und von allen Konfigurationen –
+und einem anschließenden ``train_xgb_binary`` auf denselben Splits – geteilt.
+
+CLI (schreibt die besten Konfigurationen als JSON-Liste, direkt nutzbar als
+``--param-grid`` von ``src.models.scheduler``):
+    python -m src.models.hyperparam_search --exp-id <EXP_ID> --stage signal [--cost-scoring]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from src.models.dataset import DatasetView, load_training_arrays
+from src.models.dmatrix_cache import cached_dmatrix, predict_proba
+from src.models.threshold_search import experiment_cost_matrix, threshold_surface
+from src.models.train_xgboost_two_stage import binary_params, dataset_path, train_xgb_binary
+
+SAMPLERS = ("random", "tpe")
+METHODS = ("hyperband", "halving")
+HPARAMS_DIR = Path("notebooks") / "results" / "final_two_stage"
+
+
+@dataclass(frozen=True)
+class ParamRange:
+    """Suchbereich eines Parameters (``log``: log-uniform, ``integer``: gerundet)."""
+
+    name: str
+    low: float
+    high: float
+    log: bool = False
+    integer: bool = False
+
+    def decode(self, u: float) -> float | int:
+        if self.log:
+            value = math.exp(math.log(self.low) + u * (math.log(self.high) - math.log(self.low)))
+        else:
+            value = self.low + u * (self.high - self.low)
+        return int(round(value)) if self.integer else float(value)
+
+
+DEFAULT_SPACE = (
+    ParamRange("max_depth", 2, 6, integer=True),
+    ParamRange("learning_rate", 0.01, 0.3, log=True),
+    ParamRange("subsample", 0.5, 1.0),
+    ParamRange("colsample_bytree", 0.5, 1.0),
+    ParamRange("min_child_weight", 1.0, 20.0, log=True),
+    ParamRange("reg_lambda", 0.1, 10.0, log=True),
+    ParamRange("gamma", 0.0, 2.0),
+)
+
+
+class ConfigSampler:
+    """Zieht Konfigurationen im Einheitswürfel ``[0, 1]^d`` (zufällig oder TPE-artig)."""
+
+    def __init__(
+        self,
+        space: tuple[ParamRange, ...] = DEFAULT_SPACE,
+        *,
+        method: str = "tpe",
+        seed: int = 0,
+        gamma: float = 0.25,
+        n_candidates: int = 64,
+    ) -> None:
+        if method not in SAMPLERS:
+            raise ValueError(f"Sampler muss einer von {SAMPLERS} sein, nicht {method!r}.")
+        self.space = space
+        self.method = method
+        self.gamma = gamma
+        self.n_candidates = n_candidates
+        self.rng = np.random.default_rng(seed)
+        # Beobachtungen pro Budget (Runden): Punkte im Einheitswürfel und Val-Logloss.
+        self._observed: dict[int, tuple[list[np.ndarray], list[float]]] = {}
+
+    def decode(self, u: np.ndarray) -> dict[str, float | int]:
+        return {p.name: p.decode(float(x)) for p, x in zip(self.space, u)}
+
+    def observe(self, u: np.ndarray, rounds: int, loss: float) -> None:
+        points, losses = self._observed.setdefault(rounds, ([], []))
+        points.append(np.asarray(u))
+        losses.append(float(loss))
+
+    def _model_data(self) -> tuple[np.ndarray, np.ndarray] | None:
+        # Wie BOHB: größtes Budget mit genügend Beobachtungen für ein Modell.
+        min_points = len(self.space) + 2
+        for rounds in sorted(self._observed, reverse=True):
+            points, losses = self._observed[rounds]
+            if len(points) >= min_points:
+                return np.asarray(points), np.asarray(losses)
+        return None
+
+    @staticmethod
+    def _density(x: np.ndarray, centers: np.ndarray, bandwidth: np.ndarray) -> np.ndarray:
+        z = (x[:, None, :] - centers[None, :, :]) / bandwidth
+        return np.exp(-0.5 * (z**2).sum(axis=2)).mean(axis=1) / np.prod(bandwidth)
+
+    def sample(self) -> np.ndarray:
+        dims = len(self.space)
+        data = self._model_data() if self.method == "tpe" else None
+        if data is None:
+            return self.rng.random(dims)
+        points, losses = data
+        order = np.argsort(losses, kind="stable")
+        n_good = max(1, int(math.ceil(self.gamma * len(points))))
+        good, bad = points[order[:n_good]], points[order[n_good:]]
+        if len(bad) == 0:
+            return self.rng.random(dims)
+        scale = len(points) ** (-1.0 / (dims + 4))
+        bw_good = np.clip(good.std(axis=0) * scale, 0.05, 0.5) if len(good) > 1 else np.full(dims, 0.2)
+        bw_bad = np.clip(bad.std(axis=0) * scale, 0.05, 0.5) if len(bad) > 1 else np.full(dims, 0.2)
+        centers = good[self.rng.integers(len(good), size=self.n_candidates)]
+        candidates = centers + self.rng.normal(size=centers.shape) * bw_good
+        candidates = 1.0 - np.abs(1.0 - np.abs(candidates))  # an den Rändern spiegeln statt abschneiden
+        # Sockel in g(x): Kandidaten fernab aller schlechten Punkte nicht unendlich bevorzugen.
+        ratio = self._density(candidates, good, bw_good) / (self._density(candidates, bad, bw_bad) + 1e-3)
+        return candidates[int(np.argmax(ratio))]
+
+
+@dataclass
+class _Trial:
+    trial_id: int
+    bracket: int
+    u: np.ndarray
+    params: dict
+    booster: xgb.Booster | None = None
+    rounds: int = 0
+    loss: float = float("inf")
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """Beste Konfiguration, ihr Score, das Modell und alle Trials (eine Zeile pro Stufe)."""
+
+    best_params: dict
+    best_score: float
+    best_iteration: int
+    model: xgb.XGBClassifier
+    trials: pd.DataFrame
+
+    def top_params(self, k: int = 5) -> list[dict]:
+        """Die ``k`` besten vollständig trainierten Konfigurationen (für ``--param-grid``)."""
+        final = self.trials.dropna(subset=["score"]).sort_values("score", ascending=False, kind="stable")
+        return [json.loads(p) for p in final["xgb_params"].head(k)]
+
+
+def _logloss(y: np.ndarray, p: np.ndarray) -> float:
+    p = np.clip(p, 1e-7, 1 - 1e-7)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def _booster_params(params: dict) -> dict:
+    return xgb.XGBClassifier(**params).get_xgb_params()
+
+
+def cascade_pnl_score(
+    stage: str,
+    other_proba: np.ndarray,
+    labels: np.ndarray,
+    costs: np.ndarray,
+) -> Callable[[np.ndarray], float]:
+    """Score = bester Kaskaden-P&L (``threshold_surface``) mit festem Modell der anderen Stufe.
+
+    ``other_proba``/``labels`` gehören zu allen Val-Zeilen (auch für die Richtungs-Stufe,
+    deren Score-Matrix dann ebenfalls alle Val-Zeilen enthalten muss).
+    """
+    if stage not in ("signal", "direction"):
+        raise ValueError(f"Unbekannte Stufe {stage!r}.")
+
+    def score(proba: np.ndarray) -> float:
+        p_signal, p_direction = (proba, other_proba) if stage == "signal" else (other_proba, proba)
+        return threshold_surface(p_signal, p_direction, labels, costs).best().pnl
+
+    return score
+
+
+def _rungs(min_rounds: int, max_rounds: int, eta: int) -> list[int]:
+    """Budgets ``min_rounds · eta^i`` (aufsteigend), letzte Stufe ``max_rounds``.
+
+    Eine Zwischenstufe, die näher als Faktor ``sqrt(eta)`` an ``max_rounds`` läge,
+    entfällt (15/50/3: 15, 50 statt 15, 45, 50).
+    """
+    rungs = [max(1, min(int(min_rounds), max_rounds))]
+    while rungs[-1] * eta * math.sqrt(eta) < max_rounds:
+        rungs.append(rungs[-1] * eta)
+    if rungs[-1] < max_rounds:
+        rungs.append(max_rounds)
+    return rungs
+
+
+def search_xgb_binary(
+    X_train: DatasetView | xgb.DMatrix,
+    y_train: np.ndarray | None,
+    X_val: DatasetView | xgb.DMatrix,
+    y_val: np.ndarray | None,
+    *,
+    scale_pos_weight: float | None = None,
+    xgb_params: dict | None = None,
+    space: tuple[ParamRange, ...] = DEFAULT_SPACE,
+    sampler: str = "tpe",
+    method: str = "hyperband",
+    n_configs: int = 27,
+    eta: int = 3,
+    min_rounds: int = 15,
+    score: Callable[[np.ndarray], float] | None = None,
+    X_score: DatasetView | xgb.DMatrix | None = None,
+    seed: int = 0,
+) -> SearchResult:
+    """Sucht ``xgb_params`` für ``train_xgb_binary`` per Successive Halving/Hyperband.
+
+    ``xgb_params`` sind feste Basisparameter (überschrieben von den gesuchten),
+    ``n_estimators`` daraus (Default 400) ist das volle Budget. ``method="halving"``:
+    ein Durchlauf mit ``n_configs`` Konfigurationen ab ``min_rounds`` (erste Stufe);
+    ``"hyperband"``: alle Durchläufe (``n_configs`` wird dann ignoriert).
+    ``score(proba) -> float`` (größer = besser) bewertet die voll trainierten
+    Konfigurationen auf ``X_score`` (Default: ``X_val``); Default-Score: ``-logloss``.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method muss einer von {METHODS} sein, nicht {method!r}.")
+    if eta < 2:
+        raise ValueError(f"eta muss >= 2 sein, nicht {eta}.")
+    max_bin = (xgb_params or {}).get("max_bin")
+    train_view = X_train if isinstance(X_train, DatasetView) else None
+
+    def matrix(X: DatasetView | xgb.DMatrix, label: np.ndarray | None, ref: xgb.DMatrix | None) -> xgb.DMatrix:
+        """Views über den Cache (Bin-Grenzen von ``X_train``), sonst direkt mit ``ref``."""
+        if isinstance(X, xgb.DMatrix):
+            return X
+        if train_view is None:
+            return X.dmatrix(label, ref=ref, max_bin=max_bin)
+        return cached_dmatrix(X, label, ref=None if ref is None else train_view, max_bin=max_bin)
+
+    dtrain = matrix(X_train, y_train, None)
+    dval = matrix(X_val, y_val, dtrain)
+    if dtrain.num_row() == 0 or dval.num_row() == 0:
+        raise ValueError("search_xgb_binary braucht nicht-leere Train- und Val-Splits.")
+    y_train = dtrain.get_label() if y_train is None else np.asarray(y_train)
+    y_val = dval.get_label()
+    if X_score is None:
+        dscore = dval
+    else:
+        dscore = matrix(X_score, None, dtrain)
+    if score is None:
+        def score(proba: np.ndarray) -> float:
+            return -_logloss(y_val, proba)
+
+    base = binary_params(y_train, scale_pos_weight, xgb_params)
+    max_rounds = int(base["n_estimators"])
+    rungs = _rungs(min_rounds, max_rounds, eta)
+    s_max = len(rungs) - 1
+    if method == "hyperband":
+        brackets = [(s, int(math.ceil((s_max + 1) / (s + 1) * eta**s))) for s in range(s_max, -1, -1)]
+    else:
+        brackets = [(s_max, n_configs)]
+
+    configs = ConfigSampler(space, method=sampler, seed=seed)
+    rows: list[dict] = []
+    best: tuple[float, _Trial, int] | None = None
+    next_id = 0
+    for s, n in brackets:
+        trials = []
+        for _ in range(n):
+            u = configs.sample()
+            trials.append(_Trial(next_id, s, u, {**base, **configs.decode(u)}))
+            next_id += 1
+        bracket_rungs = rungs[s_max - s :]
+        for level, rounds in enumerate(bracket_rungs):
+            final = rounds == max_rounds
+            for trial in trials:
+                params = _booster_params(trial.params)
+                trial.booster = xgb.train(
+                    params,
+                    dtrain,
+                    num_boost_round=rounds - trial.rounds,
+                    evals=[(dval, "validation_0")] if final else (),
+                    early_stopping_rounds=50 if final else None,
+                    verbose_eval=False,
+                    xgb_model=trial.booster,
+                )
+                trial.rounds = rounds
+                best_iteration = getattr(trial.booster, "best_iteration", rounds - 1) if final else rounds - 1
+                trial.loss = _logloss(y_val, trial.booster.predict(dval, iteration_range=(0, best_iteration + 1)))
+                configs.observe(trial.u, rounds, trial.loss)
+                row = {
+                    "trial": trial.trial_id,
+                    "bracket": s,
+                    "rounds": rounds,
+                    "val_logloss": trial.loss,
+                    "score": np.nan,
+                    "best_iteration": best_iteration,
+                    "xgb_params": json.dumps(configs.decode(trial.u), sort_keys=True),
+                }
+                if final:
+                    proba = trial.booster.predict(dscore, iteration_range=(0, best_iteration + 1))
+                    row["score"] = float(score(proba))
+                    if best is None or row["score"] > best[0]:
+                        best = (row["score"], trial, best_iteration)
+                rows.append(row)
+            if not final:
+                keep = max(1, len(trials) // eta)
+                trials = sorted(trials, key=lambda t: t.loss)[:keep]
+        print(f"[info] Hyperband-Durchlauf s={s}: {n} Konfigurationen ab {bracket_rungs[0]} Runden")
+
+    best_score, best_trial, best_iteration = best
+    model = xgb.XGBClassifier(**best_trial.params)
+    model.load_model(bytearray(best_trial.booster.save_raw(raw_format="ubj")))
+    return SearchResult(
+        best_params=configs.decode(best_trial.u),
+        best_score=best_score,
+        best_iteration=best_iteration,
+        model=model,
+        trials=pd.DataFrame(rows),
+    )
+
+
+def hparams_path(exp_id: str | None, stage: str) -> Path:
+    return HPARAMS_DIR / f"hparams__{(exp_id or 'default').replace(' ', '_')}__{stage}.json"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Hyperparameter-Suche (Successive Halving/Hyperband) für eine Stufe.")
+    parser.add_argument("--exp-id", type=str, default=None, help="Experiment-ID (Datensatz und Kosten-Config).")
+    parser.add_argument("--dataset", type=Path, default=None, help="Pfad zum Trainingsdatensatz (überschreibt --exp-id).")
+    parser.add_argument("--stage", choices=("signal", "direction"), default="signal", help="Zu tunende Stufe.")
+    parser.add_argument("--test-start", type=str, default="2025-01-01", help="Beginn des Test-Splits (wird nicht benutzt).")
+    parser.add_argument("--train-frac-pretest", type=float, default=0.8, help="Anteil Training vor test-start.")
+    parser.add_argument("--method", choices=METHODS, default="hyperband", help="Hyperband oder ein Successive-Halving-Durchlauf.")
+    parser.add_argument("--sampler", choices=SAMPLERS, default="tpe", help="Sampling der Konfigurationen.")
+    parser.add_argument("--n-configs", type=int, default=27, help="Konfigurationen für --method halving (bei hyperband ignoriert).")
+    parser.add_argument("--eta", type=int, default=3, help="Reduktionsfaktor pro Stufe.")
+    parser.add_argument("--min-rounds", type=int, default=15, help="Budget der ersten Stufe (Boosting-Runden).")
+    parser.add_argument(
+        "--cost-scoring",
+        action="store_true",
+        help="Voll trainierte Konfigurationen nach Kaskaden-P&L bewerten (braucht --exp-id).",
+    )
+    parser.add_argument("--top", type=int, default=5, help="Anzahl gespeicherter Konfigurationen.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed des Samplers.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.cost_scoring and not args.exp_id:
+        raise ValueError("--cost-scoring braucht --exp-id (Kosten aus den Label-Parametern).")
+    data = load_training_arrays(args.dataset or dataset_path(args.exp_id))
+    splits = data.split(pd.to_datetime(args.test_start), args.train_frac_pretest)
+    train, val = splits["train"], splits["val"]
+    if args.stage == "signal":
+        target, scale_pos_weight = "signal", None
+        X_train, X_val = train, val
+    else:
+        target, scale_pos_weight = "direction", 1.0
+        X_train, X_val = train.moves(), val.moves()
+
+    score = X_score = None
+    if args.cost_scoring:
+        # Andere Stufe mit Default-Parametern als feste Gegenseite der Kaskade.
+        if args.stage == "signal":
+            other_train = train.moves()
+            other = train_xgb_binary(other_train, other_train.direction, val.moves(), val.moves().direction, 1.0)
+        else:
+            other_train = train
+            other = train_xgb_binary(train, train.signal, val, val.signal)
+        other_proba = predict_proba(other, cached_dmatrix(val, ref=other_train))
+        score = cascade_pnl_score(args.stage, other_proba, val.label, experiment_cost_matrix(args.exp_id))
+        X_score = val
+
+    result = search_xgb_binary(
+        X_train,
+        getattr(X_train, target),
+        X_val,
+        getattr(X_val, target),
+        scale_pos_weight=scale_pos_weight,
+        sampler=args.sampler,
+        method=args.method,
+        n_configs=args.n_configs,
+        eta=args.eta,
+        min_rounds=args.min_rounds,
+        score=score,
+        X_score=X_score,
+        seed=args.seed,
+    )
+    print(f"[info] {len(result.trials)} Trainingsstufen, bester Score {result.best_score:.6g} (best_iteration={result.best_iteration})")
+    print(f"[info] Beste Parameter: {json.dumps(result.best_params, sort_keys=True)}")
+
+    out_path = hparams_path(args.exp_id, args.stage)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(result.top_params(args.top), indent=2), encoding="utf-8")
+    print(f"[ok] Top-{args.top}-Konfigurationen gespeichert unter {out_path}")
+
+
+if __name__ == "__main__":
+    main()
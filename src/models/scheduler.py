@@ -0,0 +1,293 @@
+"""Paralleles Training unabhängiger Jobs über einen ``ProcessPoolExecutor``.
+
+Ein Job ist (Experiment × Stufe × Fold × Hyperparameter-Satz) und trainiert genau
+ein binäres Modell (``train_xgb_binary``). Jobs hängen nicht voneinander ab –
+Warm-Start über Folds (siehe ``walk_forward``) gibt es hier deshalb nicht.
+
+Thread-Budget: Es laufen höchstens ``max_workers`` Prozesse gleichzeitig; jeder
+Job bekommt beim Start ``n_jobs`` für XGBoost (Boosting und Aufbau der
+``QuantileDMatrix``, ``nthread``) so, dass die Summe über alle laufenden Jobs die
+Kernzahl nicht übersteigt. Solange genug Jobs warten, ist das
+ein Thread pro Prozess (40 Jobs auf 32 Kernen → 32 Prozesse × 1 Thread); gegen
+Ende des Batches bekommen die letzten Jobs die frei gewordenen Kerne.
+
+Ergebnisse kommen gestreamt zurück (``run_jobs`` ist ein Generator, in der
+Reihenfolge der Fertigstellung). Fehler eines Jobs (``ValueError``, z.B. nur eine
+Klasse im Train-Split) landen im Ergebnis statt den ganzen Batch abzubrechen.
+
+Worker laden den Datensatz spaltenprojiziert (``load_training_arrays``) und
+merken ihn sich pro Prozess; geschickt werden nur Pfade und Datumsgrenzen.
+Die quantisierten DMatrizen liegen ebenfalls pro Prozess im ``dmatrix_cache``:
+Jobs mit gleichem Fold und gleicher Stufe (``build_jobs`` reiht die Parameter-Sätze
+direkt hintereinander) bauen sie im selben Prozess nur einmal.
+
+CLI:
+    python -m src.models.scheduler --exp-id A B C --test-start 2025-01-01 [--refit Q] [--param-grid grid.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import product
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, log_loss
+
+from src.models.dataset import DatasetView, TrainingArrays, load_training_arrays
+from src.models.dmatrix_cache import cached_dmatrix, predict_proba
+from src.models.train_xgboost_two_stage import dataset_path, train_xgb_binary
+from src.models.walk_forward import REFIT_FREQUENCIES, WINDOWS, FoldBounds, fold_bounds, make_fold
+
+STAGES = ("signal", "direction")
+JOBS_RESULTS_PATH = Path("notebooks") / "results" / "training_jobs.csv"
+
+
+@dataclass(frozen=True)
+class TrainingJob:
+    """Ein Modell: Datensatz, Stufe, Fold-Grenzen und XGBoost-Parameter."""
+
+    dataset: Path
+    stage: str
+    bounds: FoldBounds
+    xgb_params: dict[str, Any] = field(default_factory=dict)
+    train_frac_within_pretest: float = 0.8
+    exp_id: str = ""
+    params_id: int = 0
+
+    @property
+    def fold(self) -> str:
+        return self.bounds.test_start.strftime("%Y-%m-%d")
+
+
+@dataclass(frozen=True)
+class JobResult:
+    """Ergebnis eines Jobs; ``model_raw`` ist der Booster im UBJ-Format."""
+
+    job: TrainingJob
+    n_jobs: int
+    seconds: float
+    best_iteration: int | None = None
+    val_logloss: float | None = None
+    val_accuracy: float | None = None
+    test_dates: np.ndarray | None = None
+    test_proba: np.ndarray | None = None
+    model_raw: bytes | None = None
+    error: str | None = None
+
+    def model(self) -> xgb.XGBClassifier:
+        if self.model_raw is None:
+            raise ValueError(f"Job {self.job.exp_id}/{self.job.stage}/{self.job.fold} hat kein Modell: {self.error}")
+        model = xgb.XGBClassifier()
+        model.load_model(bytearray(self.model_raw))
+        return model
+
+    def summary(self) -> dict[str, Any]:
+        """Eine Zeile für die Job-Übersicht (ohne Modell und Predictions)."""
+        return {
+            "exp_id": self.job.exp_id,
+            "stage": self.job.stage,
+            "fold": self.job.fold,
+            "params_id": self.job.params_id,
+            "xgb_params": json.dumps(self.job.xgb_params, sort_keys=True),
+            "best_iteration": self.best_iteration,
+            "val_logloss": self.val_logloss,
+            "val_accuracy": self.val_accuracy,
+            "n_jobs": self.n_jobs,
+            "seconds": round(self.seconds, 3),
+            "error": self.error,
+        }
+
+
+@lru_cache(maxsize=8)
+def _load_arrays(path: str, mtime_ns: int) -> TrainingArrays:
+    return load_training_arrays(Path(path))
+
+
+def _stage_views(job: TrainingJob, data: TrainingArrays) -> tuple[DatasetView, DatasetView, DatasetView, str]:
+    fold = make_fold(data, job.bounds, job.train_frac_within_pretest)
+    if job.stage == "signal":
+        return fold.train, fold.val, fold.test, "signal"
+    if job.stage == "direction":
+        return fold.train.moves(), fold.val.moves(), fold.test, "direction"
+    raise ValueError(f"Unbekannte Stufe {job.stage!r} (erwartet {STAGES}).")
+
+
+def run_job(job: TrainingJob, n_jobs: int = 1) -> JobResult:
+    """Trainiert einen Job mit ``n_jobs`` XGBoost-Threads (läuft im Worker-Prozess)."""
+    started = time.perf_counter()
+    try:
+        path = Path(job.dataset)
+        data = _load_arrays(str(path.resolve()), path.stat().st_mtime_ns)
+        train, val, test, target = _stage_views(job, data)
+        model = train_xgb_binary(
+            train,
+            getattr(train, target),
+            val,
+            getattr(val, target),
+            scale_pos_weight=1.0 if job.stage == "direction" else None,
+            xgb_params={**job.xgb_params, "n_jobs": n_jobs},
+        )
+    except ValueError as exc:
+        return JobResult(job, n_jobs, time.perf_counter() - started, error=str(exc))
+
+    def proba(view: DatasetView) -> np.ndarray:
+        dmatrix = cached_dmatrix(view, ref=train, max_bin=job.xgb_params.get("max_bin"), nthread=n_jobs)
+        return predict_proba(model, dmatrix)
+
+    val_logloss = val_accuracy = None
+    y_val = getattr(val, target)
+    if len(val) and len(np.unique(y_val)) > 1:
+        p_val = proba(val)
+        val_logloss = float(log_loss(y_val, p_val, labels=[0, 1]))
+        val_accuracy = float(accuracy_score(y_val, (p_val >= 0.5).astype(int)))
+    test_proba = proba(test) if len(test) else np.empty(0)
+    return JobResult(
+        job,
+        n_jobs,
+        time.perf_counter() - started,
+        best_iteration=getattr(model, "best_iteration", None),
+        val_logloss=val_logloss,
+        val_accuracy=val_accuracy,
+        test_dates=test.dates,
+        test_proba=test_proba,
+        model_raw=bytes(model.get_booster().save_raw(raw_format="ubj")),
+    )
+
+
+def run_jobs(
+    jobs: Iterable[TrainingJob],
+    *,
+    max_workers: int | None = None,
+    cores: int | None = None,
+) -> Iterator[JobResult]:
+    """Führt Jobs parallel aus und liefert die Ergebnisse, sobald sie fertig sind.
+
+    Es werden nur so viele Jobs eingereicht, wie Prozesse frei sind; ``n_jobs``
+    eines Jobs = freie Kerne / (Jobs, die die freien Prozesse noch füllen können).
+    """
+    pending = list(jobs)
+    cores = cores or os.cpu_count() or 1
+    workers = max(1, min(max_workers or cores, cores, len(pending) or 1))
+    print(f"[info] {len(pending)} Trainings-Jobs auf bis zu {workers} Prozessen ({cores} Kerne)")
+    if workers == 1:
+        for job in pending:
+            yield run_job(job, cores)
+        return
+
+    pending.reverse()  # pop() von hinten = Reihenfolge der Eingabe
+    running: dict[Future, int] = {}
+    # spawn statt fork: XGBoost/OpenMP-Threads des Elternprozesses überleben fork nicht sauber.
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while pending or running:
+            while pending and len(running) < workers:
+                free_cores = cores - sum(running.values())
+                slots = min(len(pending), workers - len(running))
+                n_jobs = max(1, free_cores // slots)
+                running[pool.submit(run_job, pending.pop(), n_jobs)] = n_jobs
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+                yield future.result()
+
+
+def build_jobs(
+    datasets: dict[str, Path],
+    *,
+    stages: Iterable[str] = STAGES,
+    param_sets: list[dict[str, Any]] | None = None,
+    test_start: str | pd.Timestamp,
+    end: str | pd.Timestamp | None = None,
+    refit: str | None = None,
+    window: str = "expanding",
+    window_years: float | None = None,
+    train_frac_within_pretest: float = 0.8,
+) -> list[TrainingJob]:
+    """Alle Kombinationen Experiment × Stufe × Fold × Hyperparameter-Satz.
+
+    ``refit=None``: ein Fold wie ``split_train_val_test`` (Test ab ``test_start``
+    bis ``end``/Datenende); sonst Walk-Forward-Folds (``fold_bounds``).
+    """
+    param_sets = param_sets or [{}]
+    jobs = []
+    for exp_id, path in datasets.items():
+        dates = load_training_arrays(path, features=[]).dates
+        if refit is None:
+            end_ts = pd.Timestamp(end) if end is not None else pd.Timestamp(dates[-1]) + pd.Timedelta(days=1)
+            folds = [FoldBounds(None, pd.Timestamp(test_start), end_ts)]
+        else:
+            folds = fold_bounds(dates, start=test_start, end=end, refit=refit, window=window, window_years=window_years)
+        for stage, bounds, (params_id, params) in product(stages, folds, enumerate(param_sets)):
+            jobs.append(
+                TrainingJob(
+                    dataset=Path(path),
+                    stage=stage,
+                    bounds=bounds,
+                    xgb_params=dict(params),
+                    train_frac_within_pretest=train_frac_within_pretest,
+                    exp_id=exp_id,
+                    params_id=params_id,
+                )
+            )
+    return jobs
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Trainings-Jobs (Experiment × Stufe × Fold × Parameter) parallel ausführen.")
+    parser.add_argument("--exp-id", nargs="+", default=[""], help="Experiment-IDs (Datensatz eurusd_news_training__<EXP_ID>.csv).")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="Zu trainierende Stufen.")
+    parser.add_argument("--test-start", type=str, default="2025-01-01", help="Beginn des Testzeitraums.")
+    parser.add_argument("--end", type=str, default=None, help="Ende des Testzeitraums (exklusiv).")
+    parser.add_argument("--refit", choices=sorted(REFIT_FREQUENCIES), default=None, help="Walk-Forward-Folds (M/Q) statt eines Splits.")
+    parser.add_argument("--window", choices=WINDOWS, default="expanding", help="Trainingsfenster der Walk-Forward-Folds.")
+    parser.add_argument("--window-years", type=float, default=None, help="Fensterlänge für --window sliding.")
+    parser.add_argument("--train-frac-pretest", type=float, default=0.8, help="Anteil Training im Fenster (Rest: Val).")
+    parser.add_argument("--param-grid", type=Path, default=None, help="JSON-Datei mit einer Liste von XGBoost-Parameter-Dicts.")
+    parser.add_argument("--workers", type=int, default=None, help="Maximale Anzahl Prozesse (Default: Kernzahl).")
+    parser.add_argument("--out", type=Path, default=JOBS_RESULTS_PATH, help="CSV mit einer Zeile pro fertigem Job.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    param_sets = None
+    if args.param_grid is not None:
+        param_sets = json.loads(args.param_grid.read_text(encoding="utf-8"))
+        if not isinstance(param_sets, list) or not all(isinstance(p, dict) for p in param_sets):
+            raise ValueError(f"{args.param_grid} muss eine JSON-Liste von Parameter-Dicts enthalten.")
+    jobs = build_jobs(
+        {exp_id: dataset_path(exp_id) for exp_id in args.exp_id},
+        stages=args.stages,
+        param_sets=param_sets,
+        test_start=args.test_start,
+        end=args.end,
+        refit=args.refit,
+        window=args.window,
+        window_years=args.window_years,
+        train_frac_within_pretest=args.train_frac_pretest,
+    )
+
+    # Zeilen sofort anhängen: Zwischenstände bleiben auch bei Abbruch erhalten.
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    header = True
+    for i, result in enumerate(run_jobs(jobs, max_workers=args.workers), start=1):
+        row = result.summary()
+        pd.DataFrame([row]).to_csv(args.out, mode="w" if header else "a", header=header, index=False)
+        header = False
+        status = f"Fehler: {result.error}" if result.error else f"val_logloss={row['val_logloss']}"
+        print(f"[info] {i}/{len(jobs)} {row['exp_id'] or '-'} {row['stage']} {row['fold']} p{row['params_id']}: {status}")
+    print(f"[ok] Job-Übersicht gespeichert unter {args.out}")
+
+
+if __name__ == "__main__":
+    main()
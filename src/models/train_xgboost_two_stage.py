@@ -24,6 +24,12 @@ Datensatz‑Erwartung (CSV):
 Zeitliche Splits:
     - Test: alle Daten ab `test_start` (Default im CLI: 2025‑01‑01).
     - Train/Val: alle Daten davor, chronologisch z.B. 80/20 geteilt.
+
+`train_xgb_binary` nimmt neben DataFrames auch `DatasetView`s (kompakte
+float32‑Matrix, siehe `src.models.dataset`) oder fertige `xgb.DMatrix`/
+`QuantileDMatrix` an; das CLI trainiert über Views ohne DataFrame‑Kopien.
+Die quantisierten Matrizen der Views werden pro Prozess gecacht und von
+wiederholten Fits auf denselben Splits geteilt (`src.models.dmatrix_cache`).
 """
 
 from __future__ import annotations
@@ -37,6 +43,19 @@ import pandas as pd
 import xgboost as xgb
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
+from src.features.eurusd_features import feature_names
+from src.models.dataset import TARGET_COLUMNS, DatasetView, load_training_arrays
+from src.models.dmatrix_cache import cached_dmatrix
+from src.utils.cache import (
+    CACHE_ENABLED,
+    ArtifactCache,
+    array_fingerprint,
+    cache_key,
+    code_fingerprint,
+    frame_fingerprint,
+)
+from src.utils.io import read_table, table_columns
+
 DATASET_PATH = Path("data/processed/datasets/eurusd_news_training.csv")
 
 # Feature-Satz für beide Stufen (kann später erweitert/angepasst werden).
@@ -45,57 +64,17 @@ DATASET_PATH = Path("data/processed/datasets/eurusd_news_training.csv")
 # - news_*   → aggregierte News-/Sentimentfeatures.
 # - cal_*    → Kalender-/Saison-Features.
 # - hol_*    → Holiday-Features (US-Feiertage).
-FEATURE_COLS = [
-    # News-Level (Tagesaggregationen)
-    "article_count",
-    "avg_polarity",
-    "avg_neg",
-    "avg_neu",
-    "avg_pos",
-    "pos_share",
-    "neg_share",
-    # Preis-Level (Kerzenform / Volatilität / Returns)
-    "intraday_range_pct",
-    "upper_shadow",
-    "lower_shadow",
-    "price_close_ret_1d",
-    "price_close_ret_5d",
-    "price_range_pct_5d_std",
-    "price_body_pct_5d_mean",
-    "price_close_ret_30d",
-    "price_range_pct_30d_std",
-    "price_body_pct_30d_mean",
-    # News-Historie / -Intensität
-    "news_article_count_3d_sum",
-    "news_article_count_7d_sum",
-    "news_pos_share_5d_mean",
-    "news_neg_share_5d_mean",
-    "news_article_count_lag1",
-    "news_pos_share_lag1",
-    "news_neg_share_lag1",
-    # Kalender-/Holiday-Features
-    "month",
-    "quarter",
-    "cal_dow",
-    "cal_day_of_month",
-    "cal_is_monday",
-    "cal_is_friday",
-    "cal_is_month_start",
-    "cal_is_month_end",
-    "hol_is_us_federal_holiday",
-    "hol_is_day_before_us_federal_holiday",
-    "hol_is_day_after_us_federal_holiday",
-    # Intraday (MT5 H1 -> Daily) derived features (optional; used if present in CSV)
-    "h1_ret_std",
-    "h1_ret_sum_abs",
-    "h1_range_pct_mean",
-    "h1_range_pct_max",
-    "h1_close_open_pct",
-    "h1_up_hours_frac",
-    "h1_down_hours_frac",
-    "h1_tick_volume_sum",
-    "h1_spread_mean",
-]
+# - h1_*     → Intraday-Features aus MT5 H1 (optional; genutzt, falls im Datensatz vorhanden).
+# Die Liste wird aus dem Feature-Register abgeleitet (``model=True``, Registrierungsreihenfolge);
+# neue Features werden nur in src/features/eurusd_features.py deklariert.
+FEATURE_COLS = feature_names(model_only=True)
+
+
+def dataset_path(exp_id: str | None = None) -> Path:
+    """Trainingsdatensatz (``eurusd_news_training[__<exp_id>].csv``)."""
+    if not exp_id:
+        return DATASET_PATH
+    return DATASET_PATH.with_name(f"{DATASET_PATH.stem}__{exp_id.replace(' ', '_')}{DATASET_PATH.suffix}")
 
 
 def get_feature_cols(df: pd.DataFrame) -> list[str]:
@@ -103,12 +82,27 @@ def get_feature_cols(df: pd.DataFrame) -> list[str]:
     return [col for col in FEATURE_COLS if col in df.columns]
 
 
-def load_dataset(path: Path) -> pd.DataFrame:
-    """Lädt den vorbereiteten Datensatz und sortiert nach Datum."""
-    df = pd.read_csv(path, parse_dates=["date"])
+def load_dataset(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Lädt den vorbereiteten Datensatz und sortiert nach Datum.
+
+    ``path`` darf auf die CSV zeigen; eine aktuellere Parquet/Feather-Variante
+    desselben Namens wird bevorzugt (siehe ``src.utils.io.read_table``).
+    ``columns``: nur diese Spalten lesen (``date`` wird immer mitgelesen).
+    Für reine NumPy-Matrizen siehe ``src.models.dataset.load_training_arrays``.
+    """
+    if columns is not None:
+        columns = ["date", *(col for col in columns if col != "date")]
+    df = read_table(path, columns=columns, parse_dates=["date"])
     return df.sort_values("date").reset_index(drop=True)
 
 
+def training_columns(path: Path) -> list[str]:
+    """Spalten, die das Training braucht (``date``, Targets, vorhandene ``FEATURE_COLS``)."""
+    available = table_columns(path)
+    wanted = ["date", *TARGET_COLUMNS, *FEATURE_COLS]
+    return [col for col in wanted if col in available]
+
+
 def split_train_val_test(
     df: pd.DataFrame,
     test_start: pd.Timestamp,
@@ -131,42 +125,82 @@ def split_train_val_test(
     return {"train": train, "val": val, "test": df_test}
 
 
-def train_xgb_binary(
-    X_train: pd.DataFrame,
+TrainInput = pd.DataFrame | DatasetView | xgb.DMatrix
+
+
+def _n_rows(X: TrainInput | None) -> int:
+    if X is None:
+        return 0
+    return X.num_row() if isinstance(X, xgb.DMatrix) else len(X)
+
+
+def _n_cols(X: TrainInput) -> int:
+    if isinstance(X, xgb.DMatrix):
+        return X.num_col()
+    if isinstance(X, DatasetView):
+        return len(X.feature_names)
+    return X.shape[1] if hasattr(X, "shape") else 1
+
+
+def _dmatrix_labels(X: TrainInput | None, y: np.ndarray | None) -> np.ndarray | None:
+    """Labels aus ``y`` bzw. – wenn ``None`` – aus einer übergebenen DMatrix."""
+    if y is not None:
+        return np.asarray(y)
+    if isinstance(X, xgb.DMatrix) and X.num_row() > 0:
+        return X.get_label().astype(int)
+    return None
+
+
+def _fit_native(
+    params: dict,
+    X_train: DatasetView | xgb.DMatrix,
     y_train: np.ndarray,
-    X_val: pd.DataFrame,
-    y_val: np.ndarray,
-    scale_pos_weight: float | None = None,
-    xgb_params: dict | None = None,
+    X_val: DatasetView | xgb.DMatrix | None,
+    y_val: np.ndarray | None,
+    xgb_model: xgb.Booster | None = None,
 ) -> xgb.XGBClassifier:
-    """Trainiert ein binäres XGBoost-Modell mit einfachen Defaults.
+    """``xgb.train`` auf (Quantile-)DMatrix; Ergebnis identisch zu ``XGBClassifier.fit``.
 
-    scale_pos_weight hilft bei stark unausgeglichenen Klassen:
-        typischer Wert ≈ N_negative / N_positive.
+    Views werden ohne Umweg über einen DataFrame in eine ``QuantileDMatrix``
+    überführt (Val mit den Bin-Grenzen von Train) – über ``cached_dmatrix``, d.h.
+    wiederholte Fits auf denselben Splits bauen sie nur einmal.
     """
-    # Guardrails: XGBoost/Sklearn geben sonst sehr kryptische Fehler/Warnungen aus.
-    if X_train is None or len(X_train) == 0:
-        raise ValueError(
-            "train_xgb_binary: X_train ist leer (0 Zeilen). "
-            "Ursache ist meist ein Split ohne Samples oder ein Filter (z.B. signal==1) "
-            "der alle Zeilen entfernt."
-        )
-    if hasattr(X_train, "shape") and X_train.shape[1] == 0:
-        raise ValueError(
-            "train_xgb_binary: X_train hat 0 Feature-Spalten. "
-            "Prüfe feature_cols / get_feature_cols() und ob die erwarteten Spalten im CSV existieren."
-        )
-    unique, counts = np.unique(y_train, return_counts=True)
-    if len(unique) < 2:
-        details = ", ".join(f"{int(u)}: {int(c)}" for u, c in zip(unique, counts))
-        raise ValueError(
-            "train_xgb_binary: y_train enthält nur eine Klasse "
-            f"(unique={unique.tolist()}, counts={{{details}}}). "
-            "Für ein binäres Modell (neutral/move oder down/up) braucht es beide Klassen. "
-            "Ursachen: zu strenges Labeling (Thresholds), falsches test_start/Splitting, "
-            "oder bei Stufe 2: im Train-Split fehlen z.B. alle 'down' oder alle 'up'."
-        )
+    model = xgb.XGBClassifier(**params)
+    # Gleiches Thread-Budget für den Aufbau der Matrizen wie für das Boosting.
+    max_bin, nthread = params.get("max_bin"), params.get("n_jobs")
+    if isinstance(X_train, xgb.DMatrix):
+        dtrain = X_train
+    else:
+        dtrain = cached_dmatrix(X_train, y_train, max_bin=max_bin, nthread=nthread)
+    evals = []
+    if X_val is not None:
+        if isinstance(X_val, xgb.DMatrix):
+            dval = X_val
+        elif isinstance(X_train, DatasetView):
+            dval = cached_dmatrix(X_val, y_val, ref=X_train, max_bin=max_bin, nthread=nthread)
+        else:
+            dval = X_val.dmatrix(y_val, ref=dtrain, max_bin=max_bin, nthread=nthread)
+        evals = [(dval, "validation_0")]
+    booster = xgb.train(
+        model.get_xgb_params(),
+        dtrain,
+        num_boost_round=model.n_estimators,
+        evals=evals,
+        early_stopping_rounds=50 if evals else None,
+        verbose_eval=False,
+        xgb_model=xgb_model,
+    )
+    model.load_model(bytearray(booster.save_raw(raw_format="ubj")))
+    return model
 
+
+def binary_params(
+    y_train: np.ndarray,
+    scale_pos_weight: float | None = None,
+    xgb_params: dict | None = None,
+) -> dict:
+    """XGBoost-Parameter von ``train_xgb_binary``: Defaults, ``xgb_params``, geclampter ``scale_pos_weight``."""
+    y_train = np.asarray(y_train)
     if scale_pos_weight is None:
         # automatischer Vorschlag bei Binary Labels 0/1
         n_pos = (y_train == 1).sum()
@@ -207,10 +241,62 @@ def train_xgb_binary(
         params.update(xgb_params)
     # scale_pos_weight should always match the computed/explicit value
     params["scale_pos_weight"] = scale_pos_weight
+    return params
 
-    model = xgb.XGBClassifier(**params)
 
-    use_eval = X_val is not None and len(X_val) > 0 and y_val is not None and len(y_val) > 0
+def train_xgb_binary(
+    X_train: TrainInput,
+    y_train: np.ndarray | None,
+    X_val: TrainInput | None,
+    y_val: np.ndarray | None,
+    scale_pos_weight: float | None = None,
+    xgb_params: dict | None = None,
+    *,
+    xgb_model: xgb.Booster | None = None,
+) -> xgb.XGBClassifier:
+    """Trainiert ein binäres XGBoost-Modell mit einfachen Defaults.
+
+    scale_pos_weight hilft bei stark unausgeglichenen Klassen:
+        typischer Wert ≈ N_negative / N_positive.
+
+    ``X_train``/``X_val`` dürfen DataFrames, ``DatasetView``s oder DMatrizen sein;
+    bei DMatrizen mit Labels kann ``y_*`` ``None`` sein.
+    ``xgb_model``: Booster, auf dem weitertrainiert wird (Warm-Start, z.B. Walk-Forward).
+    """
+    y_train = _dmatrix_labels(X_train, y_train)
+    y_val = _dmatrix_labels(X_val, y_val)
+    # Guardrails: XGBoost/Sklearn geben sonst sehr kryptische Fehler/Warnungen aus.
+    if _n_rows(X_train) == 0:
+        raise ValueError(
+            "train_xgb_binary: X_train ist leer (0 Zeilen). "
+            "Ursache ist meist ein Split ohne Samples oder ein Filter (z.B. signal==1) "
+            "der alle Zeilen entfernt."
+        )
+    if y_train is None:
+        raise ValueError("train_xgb_binary: y_train fehlt (nur bei DMatrix mit Labels optional).")
+    if _n_cols(X_train) == 0:
+        raise ValueError(
+            "train_xgb_binary: X_train hat 0 Feature-Spalten. "
+            "Prüfe feature_cols / get_feature_cols() und ob die erwarteten Spalten im CSV existieren."
+        )
+    unique, counts = np.unique(y_train, return_counts=True)
+    if len(unique) < 2:
+        details = ", ".join(f"{int(u)}: {int(c)}" for u, c in zip(unique, counts))
+        raise ValueError(
+            "train_xgb_binary: y_train enthält nur eine Klasse "
+            f"(unique={unique.tolist()}, counts={{{details}}}). "
+            "Für ein binäres Modell (neutral/move oder down/up) braucht es beide Klassen. "
+            "Ursachen: zu strenges Labeling (Thresholds), falsches test_start/Splitting, "
+            "oder bei Stufe 2: im Train-Split fehlen z.B. alle 'down' oder alle 'up'."
+        )
+
+    params = binary_params(y_train, scale_pos_weight, xgb_params)
+
+    use_eval = _n_rows(X_val) > 0 and y_val is not None and len(y_val) > 0
+    if isinstance(X_train, (DatasetView, xgb.DMatrix)):
+        return _fit_native(params, X_train, y_train, X_val if use_eval else None, y_val, xgb_model)
+
+    model = xgb.XGBClassifier(**params)
     if use_eval:
         model.fit(
             X_train,
@@ -218,21 +304,75 @@ def train_xgb_binary(
             eval_set=[(X_val, y_val)],
             early_stopping_rounds=50,
             verbose=False,
+            xgb_model=xgb_model,
         )
     else:
         # Kein Val-Split verfügbar (z.B. wenn im Val-Zeitraum keine signal==1 Fälle existieren).
         # Dann ohne Early-Stopping trainieren.
-        model.fit(X_train, y_train, verbose=False)
+        model.fit(X_train, y_train, verbose=False, xgb_model=xgb_model)
+    return model
+
+
+def train_xgb_binary_cached(
+    X_train: TrainInput,
+    y_train: np.ndarray | None,
+    X_val: TrainInput | None,
+    y_val: np.ndarray | None,
+    scale_pos_weight: float | None = None,
+    xgb_params: dict | None = None,
+    *,
+    use_cache: bool = True,
+) -> xgb.XGBClassifier:
+    """Wie ``train_xgb_binary``, aber mit Artefakt-Cache (data/processed/cache/xgb_binary).
+
+    Key: Inhalt von X/y (Train und Val), Hyperparameter, xgboost-Version und
+    Code-Version dieses Moduls. Bei einem Treffer wird das gespeicherte Modell
+    geladen statt neu trainiert. DMatrix-Eingaben werden nicht gecacht.
+    """
+    dmatrix_input = isinstance(X_train, xgb.DMatrix) or isinstance(X_val, xgb.DMatrix)
+    if not (use_cache and CACHE_ENABLED) or dmatrix_input:
+        return train_xgb_binary(X_train, y_train, X_val, y_val, scale_pos_weight, xgb_params)
+
+    def _fingerprint(X: pd.DataFrame | DatasetView | None, y: np.ndarray | None) -> str | None:
+        if X is None or y is None:
+            return None
+        y_hash = frame_fingerprint(pd.DataFrame({"y": np.asarray(y)}))
+        if isinstance(X, DatasetView):
+            return f"{array_fingerprint(X.X, X.feature_names)}:{y_hash}"
+        return f"{frame_fingerprint(X)}:{y_hash}"
+
+    parts = {
+        "train": _fingerprint(X_train, y_train),
+        "val": _fingerprint(X_val, y_val),
+        "scale_pos_weight": scale_pos_weight,
+        "xgb_params": xgb_params or {},
+        "xgboost": xgb.__version__,
+        "code": code_fingerprint(__file__),
+    }
+    cache = ArtifactCache()
+    key = cache_key("xgb_binary", parts)
+    if cache.has("xgb_binary", key):
+        model = xgb.XGBClassifier()
+        model.load_model(cache.entry_dir("xgb_binary", key) / "model.json")
+        cache.touch("xgb_binary", key)
+        return model
+
+    model = train_xgb_binary(X_train, y_train, X_val, y_val, scale_pos_weight, xgb_params)
+    entry = cache.begin("xgb_binary", key)
+    model.save_model(entry / "model.json")
+    cache.commit("xgb_binary", key, parts)
     return model
 
 
 def evaluate_binary(
-    name: str, model: xgb.XGBClassifier, X: pd.DataFrame, y_true: np.ndarray
+    name: str, model: xgb.XGBClassifier, X: pd.DataFrame | DatasetView, y_true: np.ndarray
 ) -> None:
     """Gibt Accuracy, Confusion-Matrix und Classification Report aus."""
     if len(X) == 0:
         print(f"[warn] Split {name} ist leer – keine Auswertung.")
         return
+    if isinstance(X, DatasetView):
+        X = X.frame()
 
     y_pred = (model.predict_proba(X)[:, 1] >= 0.5).astype(int)
     acc = accuracy_score(y_true, y_pred)
@@ -258,10 +398,10 @@ def build_direction_targets(
     if "direction" not in df.columns or "signal" not in df.columns:
         raise KeyError("Spalten 'signal' oder 'direction' fehlen im Datensatz.")
 
-    df_move = df[df["signal"] == 1].copy()
-    df_move = df_move[df_move["direction"].notna()].copy()
-    y = df_move["direction"].astype(int).to_numpy()
-    X = df_move[feature_cols]
+    # Eine Maske statt zweier gefilterter Kopien des ganzen Splits.
+    move = (df["signal"] == 1) & df["direction"].notna()
+    y = df.loc[move, "direction"].astype(int).to_numpy()
+    X = df.loc[move, feature_cols]
     return X, y
 
 
@@ -285,70 +425,55 @@ def parse_args() -> argparse.Namespace:
         default=0.8,
         help="Anteil Training innerhalb des Zeitraums vor test-start.",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Artefakt-Cache (data/processed/cache) nicht verwenden, Modelle immer neu trainieren.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    df = load_dataset(args.dataset)
-
-    feature_cols = get_feature_cols(df)
-    print(f"[info] Verwende {len(feature_cols)} Feature-Spalten.")
+    data = load_training_arrays(args.dataset)
+    print(f"[info] Verwende {len(data.feature_names)} Feature-Spalten.")
 
-    # Splits vorbereiten
-    splits = split_train_val_test(
-        df, pd.to_datetime(args.test_start), args.train_frac_pretest
-    )
+    # Splits als Views auf die float32-Matrix (keine Kopien)
+    splits = data.split(pd.to_datetime(args.test_start), args.train_frac_pretest)
 
     # ---------- Stufe 1: Signal (neutral vs move) ----------
     print("\n===== STUFE 1: SIGNAL (neutral vs move) =====")
 
-    y_train_signal = build_signal_targets(splits["train"])
-    y_val_signal = build_signal_targets(splits["val"])
-    y_test_signal = build_signal_targets(splits["test"])
-
-    X_train_signal = splits["train"][feature_cols]
-    X_val_signal = splits["val"][feature_cols]
-    X_test_signal = splits["test"][feature_cols]
-
-    model_signal = train_xgb_binary(
-        X_train_signal, y_train_signal, X_val_signal, y_val_signal
+    model_signal = train_xgb_binary_cached(
+        splits["train"],
+        splits["train"].signal,
+        splits["val"],
+        splits["val"].signal,
+        use_cache=not args.no_cache,
     )
 
-    for split_name, X, y in [
-        ("train", X_train_signal, y_train_signal),
-        ("val", X_val_signal, y_val_signal),
-        ("test", X_test_signal, y_test_signal),
-    ]:
-        evaluate_binary(split_name, model_signal, X, y)
+    for split_name, view in splits.items():
+        evaluate_binary(split_name, model_signal, view, view.signal)
 
     # ---------- Stufe 2: Richtung (up vs down, nur wenn Bewegung) ----------
     print("\n===== STUFE 2: RICHTUNG (up vs down, nur signal==1) =====")
 
-    X_train_dir, y_train_dir = build_direction_targets(
-        splits["train"], feature_cols=feature_cols
-    )
-    X_val_dir, y_val_dir = build_direction_targets(
-        splits["val"], feature_cols=feature_cols
-    )
-    X_test_dir, y_test_dir = build_direction_targets(
-        splits["test"], feature_cols=feature_cols
-    )
-
-    model_dir = train_xgb_binary(
-        X_train_dir, y_train_dir, X_val_dir, y_val_dir, scale_pos_weight=1.0
+    moves = {name: view.moves() for name, view in splits.items()}
+    model_dir = train_xgb_binary_cached(
+        moves["train"],
+        moves["train"].direction,
+        moves["val"],
+        moves["val"].direction,
+        scale_pos_weight=1.0,
+        use_cache=not args.no_cache,
     )
 
-    for split_name, X, y in [
-        ("train", X_train_dir, y_train_dir),
-        ("val", X_val_dir, y_val_dir),
-        ("test", X_test_dir, y_test_dir),
-    ]:
-        evaluate_binary(split_name, model_dir, X, y)
+    for split_name, view in moves.items():
+        evaluate_binary(split_name, model_dir, view, view.direction)
 
     # ---------- kombinierte Auswertung: 3-Klassen-Label auf Test ----------
     print("\n===== KOMBINIERTE TEST-AUSWERTUNG (neutral/up/down) =====")
-    X_test_all = splits["test"][feature_cols]
+    X_test_all = splits["test"].frame()
 
     # Zwei-Stufen-Vorhersage-Logik:
     # 1) Signal-Modell entscheidet zuerst: "Gibt es eine signifikante Bewegung?" (0=nein, 1=ja)
@@ -368,7 +493,7 @@ def main() -> None:
         "neutral",
         np.where(dir_pred == 1, "up", "down"),
     )
-    combined_true = splits["test"]["label"].to_numpy()
+    combined_true = splits["test"].label_names()
 
     print("Confusion Matrix (rows=true, cols=pred):")
     print(confusion_matrix(combined_true, combined_pred, labels=["neutral", "up", "down"]))
@@ -0,0 +1,322 @@
+"""Walk-Forward-Training (rolling origin) für das Zwei-Stufen-Modell.
+
+``split_train_val_test`` trainiert einmal vor ``test_start`` und bewertet den
+ganzen Testzeitraum mit diesem Modell. Produktiv wird aber periodisch neu
+trainiert. Hier wird der Testzeitraum in Perioden (monatlich ``M`` oder
+quartalsweise ``Q``) zerlegt; pro Periode (Fold):
+
+- Trainingsfenster: alle Zeilen vor Periodenbeginn (``expanding``) bzw. nur die
+  letzten ``window_years`` Jahre (``sliding``), darin chronologisch Train/Val
+  (``train_frac_within_pretest``, wie ``split_train_val_test``),
+- beide Stufen trainieren (``train_xgb_binary`` auf ``DatasetView``s),
+- die Periode out-of-sample vorhersagen.
+
+Warm-Start: Jede Stufe trainiert auf dem Booster des vorherigen Folds weiter
+(gekürzt auf dessen beste Iteration); Early Stopping auf dem Val-Teil des neuen
+Fensters entscheidet, wie viele Bäume dazukommen.
+
+Trainings- und (ohne Warm-Start) Vorhersagematrizen kommen aus ``cached_dmatrix``:
+die Schwellen-Suche auf dem Val-Teil nutzt dieselbe ``QuantileDMatrix`` wie das
+Early Stopping der Signal-Stufe.
+
+Die Vorhersagen aller Folds werden zu einer CSV zusammengesetzt – im Format der
+Notebook-Predictions (``date``, ``label_true``, ``signal_prob``, ``signal_pred``,
+``direction_prob_up``, ``direction_pred_up``, ``combined_pred``, plus ``fold``
+und die verwendeten Schwellen), lesbar mit ``generate_two_stage_report.load_predictions``:
+
+    notebooks/results/final_two_stage/two_stage_final__<EXP_ID>__wf_<M|Q>_predictions.csv
+
+CLI:
+    python -m src.models.walk_forward --exp-id <EXP_ID> --start 2025-01-01 --refit M
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from src.models.dataset import DatasetView, TrainingArrays, load_training_arrays
+from src.models.dmatrix_cache import cached_dmatrix, predict_proba
+from src.models.threshold_search import experiment_cost_matrix, threshold_surface
+from src.models.train_xgboost_two_stage import dataset_path, train_xgb_binary
+
+REFIT_FREQUENCIES = {"M": "MS", "Q": "QS"}
+WINDOWS = ("expanding", "sliding")
+PREDICTIONS_DIR = Path("notebooks") / "results" / "final_two_stage"
+
+
+@dataclass(frozen=True)
+class WalkForwardFold:
+    """Ein Refit: Train/Val-Fenster vor ``test_start`` und die Periode ``[test_start, test_end)``."""
+
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+    train: DatasetView
+    val: DatasetView
+    test: DatasetView
+
+    @property
+    def name(self) -> str:
+        return self.test_start.strftime("%Y-%m-%d")
+
+
+@dataclass(frozen=True)
+class FoldBounds:
+    """Datumsgrenzen eines Folds: Fenster ab ``window_start`` (``None`` = Datenbeginn), Test ``[test_start, test_end)``."""
+
+    window_start: pd.Timestamp | None
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+
+
+def fold_bounds(
+    dates: np.ndarray,
+    *,
+    start: str | pd.Timestamp,
+    end: str | pd.Timestamp | None = None,
+    refit: str = "M",
+    window: str = "expanding",
+    window_years: float | None = None,
+) -> list[FoldBounds]:
+    """Fold-Grenzen ab ``start`` bis ``end`` (exklusiv; Default: Ende der Daten).
+
+    Perioden beginnen bei ``start`` und danach an jedem Monats- bzw.
+    Quartalsanfang; Perioden ohne Zeilen in ``dates`` werden übersprungen.
+    """
+    if refit not in REFIT_FREQUENCIES:
+        raise ValueError(f"refit muss einer von {sorted(REFIT_FREQUENCIES)} sein, nicht {refit!r}.")
+    if window not in WINDOWS:
+        raise ValueError(f"window muss einer von {WINDOWS} sein, nicht {window!r}.")
+    if window == "sliding" and not window_years:
+        raise ValueError("window='sliding' braucht window_years > 0.")
+    if len(dates) == 0:
+        return []
+
+    start = pd.Timestamp(start)
+    last = pd.Timestamp(dates[-1]) + pd.Timedelta(days=1)
+    end = min(pd.Timestamp(end), last) if end is not None else last
+    edges = [start, *(b for b in pd.date_range(start, end, freq=REFIT_FREQUENCIES[refit]) if start < b < end), end]
+    rows = np.searchsorted(dates, np.asarray(edges, dtype="M8[ns]"), side="left")
+
+    bounds = []
+    for i, (test_start, test_end) in enumerate(zip(edges[:-1], edges[1:])):
+        if rows[i + 1] <= rows[i]:
+            continue
+        window_start = None
+        if window == "sliding":
+            window_start = test_start - pd.DateOffset(months=int(round(12 * window_years)))
+        bounds.append(FoldBounds(window_start, test_start, test_end))
+    return bounds
+
+
+def make_fold(data: TrainingArrays, bounds: FoldBounds, train_frac_within_pretest: float = 0.8) -> WalkForwardFold:
+    """Views eines Folds; Train/Val chronologisch innerhalb des Fensters (wie ``split_train_val_test``)."""
+
+    def row(ts: pd.Timestamp) -> int:
+        return int(np.searchsorted(data.dates, np.datetime64(ts, "ns"), side="left"))
+
+    first = 0 if bounds.window_start is None else row(bounds.window_start)
+    lo, hi = row(bounds.test_start), row(bounds.test_end)
+    train_end = first + int((lo - first) * train_frac_within_pretest)
+    return WalkForwardFold(
+        test_start=bounds.test_start,
+        test_end=bounds.test_end,
+        train=data.view(slice(first, train_end), "train"),
+        val=data.view(slice(train_end, lo), "val"),
+        test=data.view(slice(lo, hi), "test"),
+    )
+
+
+def walk_forward_folds(
+    data: TrainingArrays,
+    *,
+    start: str | pd.Timestamp,
+    end: str | pd.Timestamp | None = None,
+    refit: str = "M",
+    window: str = "expanding",
+    window_years: float | None = None,
+    train_frac_within_pretest: float = 0.8,
+) -> list[WalkForwardFold]:
+    """Folds ab ``start`` (siehe ``fold_bounds``) als Views auf ``data``."""
+    bounds = fold_bounds(data.dates, start=start, end=end, refit=refit, window=window, window_years=window_years)
+    return [make_fold(data, b, train_frac_within_pretest) for b in bounds]
+
+
+def _warm_start_booster(model: xgb.XGBClassifier | None) -> xgb.Booster | None:
+    """Booster des Vorgänger-Modells, gekürzt auf die beste Iteration (Early Stopping)."""
+    if model is None:
+        return None
+    booster = model.get_booster()
+    best = getattr(model, "best_iteration", None)
+    if best is not None and best + 1 < booster.num_boosted_rounds():
+        booster = booster[: best + 1]
+    return booster
+
+
+def _proba(
+    model: xgb.XGBClassifier,
+    view: DatasetView,
+    train: DatasetView,
+    params: dict | None,
+    warm: bool,
+) -> np.ndarray:
+    """P(1) auf ``view`` über die gecachte DMatrix mit den Bin-Grenzen von ``train``.
+
+    Warm gestartete Modelle enthalten Bäume mit Splits auf den Bin-Grenzen früherer
+    Folds – die wären auf der quantisierten Matrix nicht exakt, also Rohwerte.
+    """
+    if len(view) == 0:
+        return np.empty(0)
+    if warm:
+        return model.predict_proba(view.frame())[:, 1]
+    return predict_proba(model, cached_dmatrix(view, ref=train, max_bin=(params or {}).get("max_bin")))
+
+
+def run_walk_forward(
+    folds: list[WalkForwardFold],
+    *,
+    warm_start: bool = True,
+    signal_threshold: float = 0.5,
+    dir_threshold_down: float = 0.5,
+    dir_threshold_up: float = 0.5,
+    costs: np.ndarray | None = None,
+    signal_params: dict | None = None,
+    direction_params: dict | None = None,
+) -> pd.DataFrame:
+    """Trainiert beide Stufen pro Fold und liefert die zusammengesetzten Test-Predictions.
+
+    Mit ``costs`` (3×3, siehe ``cost_matrix``) werden die Schwellen pro Fold
+    kostenbasiert auf dessen Val-Teil gewählt (``threshold_surface``), sonst
+    gelten die festen Schwellen.
+    """
+    frames = []
+    model_signal = model_dir = None
+    for fold in folds:
+        moves_train, moves_val = fold.train.moves(), fold.val.moves()
+        warm = warm_start and model_signal is not None
+        print(
+            f"[info] Fold {fold.name}: train={len(fold.train)}, val={len(fold.val)}, "
+            f"test={len(fold.test)}, warm_start={warm}"
+        )
+        model_signal = train_xgb_binary(
+            fold.train,
+            fold.train.signal,
+            fold.val,
+            fold.val.signal,
+            xgb_params=signal_params,
+            xgb_model=_warm_start_booster(model_signal) if warm else None,
+        )
+        model_dir = train_xgb_binary(
+            moves_train,
+            moves_train.direction,
+            moves_val,
+            moves_val.direction,
+            scale_pos_weight=1.0,
+            xgb_params=direction_params,
+            xgb_model=_warm_start_booster(model_dir) if warm else None,
+        )
+
+        thr_signal, thr_down, thr_up = signal_threshold, dir_threshold_down, dir_threshold_up
+        if costs is not None and len(fold.val):
+            choice = threshold_surface(
+                _proba(model_signal, fold.val, fold.train, signal_params, warm),
+                _proba(model_dir, fold.val, moves_train, direction_params, warm),
+                fold.val.label,
+                costs,
+            ).best()
+            thr_signal, thr_down, thr_up = choice.signal, choice.down, choice.up
+
+        p_signal = _proba(model_signal, fold.test, fold.train, signal_params, warm)
+        p_up = _proba(model_dir, fold.test, moves_train, direction_params, warm)
+        trade = p_signal >= thr_signal
+        combined = np.full(len(fold.test), "neutral", dtype=object)
+        combined[trade & (p_up <= thr_down)] = "down"
+        combined[trade & (p_up >= thr_up)] = "up"
+        frames.append(
+            pd.DataFrame(
+                {
+                    "date": fold.test.dates,
+                    "label_true": fold.test.label_names(),
+                    "signal_prob": p_signal,
+                    "signal_pred": trade.astype(int),
+                    "direction_prob_up": p_up,
+                    "direction_pred_up": np.select([combined == "up", combined == "down"], [1, 0], -1),
+                    "combined_pred": combined,
+                    "fold": fold.name,
+                    "signal_threshold": thr_signal,
+                    "direction_threshold_down": thr_down,
+                    "direction_threshold_up": thr_up,
+                }
+            )
+        )
+    if not frames:
+        raise ValueError("Walk-Forward ohne Folds (start/end außerhalb der Daten?).")
+    return pd.concat(frames, ignore_index=True)
+
+
+def predictions_path(run_id: str) -> Path:
+    """Pfad im Format von ``generate_two_stage_report.load_predictions``."""
+    return PREDICTIONS_DIR / f"two_stage_final__{run_id.replace(' ', '_')}_predictions.csv"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Walk-Forward-Retraining des Zwei-Stufen-Modells.")
+    parser.add_argument(
+        "--exp-id",
+        type=str,
+        default=None,
+        help="Experiment-ID (Datensatz eurusd_news_training__<EXP_ID>.csv, Name der Predictions-CSV).",
+    )
+    parser.add_argument("--dataset", type=Path, default=None, help="Pfad zum Trainingsdatensatz (überschreibt --exp-id).")
+    parser.add_argument("--start", type=str, default="2025-01-01", help="Beginn des Out-of-Sample-Zeitraums.")
+    parser.add_argument("--end", type=str, default=None, help="Ende (exklusiv); Default: Ende der Daten.")
+    parser.add_argument("--refit", choices=sorted(REFIT_FREQUENCIES), default="M", help="Refit monatlich (M) oder quartalsweise (Q).")
+    parser.add_argument("--window", choices=WINDOWS, default="expanding", help="Trainingsfenster.")
+    parser.add_argument("--window-years", type=float, default=None, help="Fensterlänge für --window sliding.")
+    parser.add_argument("--train-frac-pretest", type=float, default=0.8, help="Anteil Training im Fenster (Rest: Val).")
+    parser.add_argument("--no-warm-start", action="store_true", help="Jeden Fold von Grund auf trainieren.")
+    parser.add_argument(
+        "--tune-thresholds",
+        action="store_true",
+        help="Schwellen pro Fold kostenbasiert auf Val wählen (braucht die Experiment-Config).",
+    )
+    parser.add_argument("--out", type=Path, default=None, help="Ziel-CSV (Default: Predictions-Ordner der Notebooks).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    dataset = args.dataset or dataset_path(args.exp_id)
+    if args.tune_thresholds and not args.exp_id:
+        raise ValueError("--tune-thresholds braucht --exp-id (Kosten aus den Label-Parametern).")
+
+    data = load_training_arrays(dataset)
+    folds = walk_forward_folds(
+        data,
+        start=args.start,
+        end=args.end,
+        refit=args.refit,
+        window=args.window,
+        window_years=args.window_years,
+        train_frac_within_pretest=args.train_frac_pretest,
+    )
+    print(f"[info] {len(folds)} Folds ({args.refit}, {args.window}) aus {dataset}")
+    preds = run_walk_forward(
+        folds,
+        warm_start=not args.no_warm_start,
+        costs=experiment_cost_matrix(args.exp_id) if args.tune_thresholds else None,
+    )
+
+    out_path = args.out or predictions_path(f"{args.exp_id or dataset.stem}__wf_{args.refit}")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    preds.to_csv(out_path, index=False)
+    print(f"[ok] Walk-Forward-Predictions ({len(preds)} Zeilen) gespeichert unter {out_path}")
+
+
+if __name__ == "__main__":
+    main()
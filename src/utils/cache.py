@@ -0,0 +1,249 @@
+"""Inhaltsadressierter Artefakt-Cache für Pipeline-Stufen.
+
+Jede Stufe (Labels, Trainingsdatensatz, H1-Features, Training) wird über einen
+Hash ihrer Eingaben identifiziert:
+
+    key = hash(Stufe, Rohdaten-Fingerprint, Parameter, Code-Version)
+
+Ist ein Eintrag mit diesem Key vorhanden, wird die Stufe übersprungen und das
+Artefakt geladen – unabhängig von der ``EXP_ID``. Identische Configs unter
+verschiedenen IDs rechnen also nur einmal.
+
+Layout: ``data/processed/cache/<stage>/<key>/`` mit ``meta.json`` plus den
+Artefakt-Dateien. Einträge werden in einem prozesseigenen Verzeichnis unter
+``cache/.staging/`` aufgebaut und erst vollständig per ``os.replace`` an ihren Platz
+verschoben – parallele Prozesse sehen nie halbe Einträge und löschen sich keine
+gegenseitig weg. Der Cache wird nach Größe begrenzt (LRU über den letzten
+Zugriff auf ``meta.json``).
+
+Steuerung über Umgebungsvariablen:
+- ``HS2025_CACHE=0``: Cache komplett deaktivieren.
+- ``HS2025_CACHE_MAX_MB``: Obergrenze in MB (Default 2048).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from src.utils.io import DATA_PROCESSED, read_table, write_table
+
+CACHE_DIR = DATA_PROCESSED / "cache"
+CACHE_ENABLED = os.environ.get("HS2025_CACHE", "1") != "0"
+CACHE_MAX_BYTES = int(float(os.environ.get("HS2025_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+
+_META_NAME = "meta.json"
+_STAGING_NAME = ".staging"
+_STAGING_MAX_AGE_S = 24 * 3600  # Reste abgebrochener Prozesse
+_FRAME_NAME = "frame.csv"  # write_table/read_table wählen Parquet, wenn pyarrow installiert ist
+
+# (Pfad, Größe, mtime_ns) → Content-Hash; vermeidet erneutes Hashen unveränderter Dateien.
+_FILE_HASHES: dict[tuple[str, int, int], str] = {}
+
+
+def _sha1(payload: bytes) -> str:
+    return hashlib.sha1(payload).hexdigest()
+
+
+def file_fingerprint(path: Path) -> str:
+    """Content-Hash einer Datei (pro Prozess nach Größe/mtime gemerkt)."""
+    path = Path(path)
+    stat = path.stat()
+    memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    digest = _FILE_HASHES.get(memo_key)
+    if digest is None:
+        h = hashlib.sha1()
+        with path.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _FILE_HASHES[memo_key] = digest
+    return digest
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Content-Hash eines DataFrames (Werte, Index und Spaltennamen)."""
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return _sha1(row_hashes.tobytes() + json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+
+
+def array_fingerprint(values: np.ndarray, names: Iterable[str] = ()) -> str:
+    """Content-Hash eines NumPy-Arrays (Bytes, dtype, Shape und optionale Spaltennamen)."""
+    values = np.ascontiguousarray(values)
+    header = json.dumps([values.dtype.str, list(values.shape), [str(n) for n in names]])
+    return _sha1(header.encode("utf-8") + values.tobytes())
+
+
+def code_fingerprint(*files: str | Path) -> str:
+    """'Code-Version' einer Stufe: Hash der beteiligten Quelldateien."""
+    return _sha1("".join(file_fingerprint(Path(f)) for f in files).encode("utf-8"))
+
+
+def cache_key(stage: str, parts: Mapping[str, Any]) -> str:
+    """Stabiler Key aus Stufenname und Eingabe-Bestandteilen."""
+    payload = json.dumps({"stage": stage, **parts}, sort_keys=True, default=str)
+    return _sha1(payload.encode("utf-8"))[:20]
+
+
+class ArtifactCache:
+    """Verzeichnis-basierter Cache mit Größenlimit (LRU)."""
+
+    def __init__(self, root: Path = CACHE_DIR, *, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self._staging: dict[tuple[str, str], Path] = {}
+
+    def entry_dir(self, stage: str, key: str) -> Path:
+        return self.root / stage / key
+
+    def has(self, stage: str, key: str) -> bool:
+        return (self.entry_dir(stage, key) / _META_NAME).is_file()
+
+    def touch(self, stage: str, key: str) -> None:
+        """Markiert einen Eintrag als zuletzt benutzt (für LRU)."""
+        meta = self.entry_dir(stage, key) / _META_NAME
+        if meta.is_file():
+            os.utime(meta)
+
+    def begin(self, stage: str, key: str) -> Path:
+        """Legt ein leeres, prozesseigenes Staging-Verzeichnis für den Eintrag an.
+
+        Die Artefakte werden dorthin geschrieben; ``commit`` verschiebt es an den Platz
+        des Eintrags. Ein bestehender Eintrag wird dabei nicht angefasst.
+        """
+        staging_root = self.root / _STAGING_NAME
+        staging_root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f"{stage}-{key}-", dir=staging_root))
+        self._staging[(stage, key)] = staging
+        return staging
+
+    def commit(self, stage: str, key: str, parts: Mapping[str, Any], **extra: Any) -> None:
+        """Schliesst einen mit ``begin`` angelegten Eintrag ab (meta.json, dann ``os.replace``).
+
+        Hat ein paralleler Prozess denselben Eintrag schon abgeschlossen, wird der eigene
+        verworfen (gleicher Key = gleicher Inhalt).
+        """
+        staging = self._staging.pop((stage, key))
+        meta = {"stage": stage, "key": key, "created": time.time(), "parts": parts, **extra}
+        with (staging / _META_NAME).open("w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, default=str)
+        entry = self.entry_dir(stage, key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(staging, entry)
+        except OSError:
+            if (entry / _META_NAME).is_file():
+                self._discard(staging)
+            else:
+                # Reste ohne meta.json (abgebrochener Lauf einer älteren Version) beiseite legen.
+                self._discard(entry)
+                try:
+                    os.replace(staging, entry)
+                except OSError:
+                    self._discard(staging)
+        self.evict()
+
+    def _discard(self, path: Path) -> None:
+        """Erst umbenennen, dann löschen: ``path`` verschwindet atomar aus dem Cache."""
+        trash = self.root / _STAGING_NAME / f"trash-{uuid.uuid4().hex}"
+        try:
+            trash.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, trash)
+        except OSError:
+            return
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def read_meta(self, stage: str, key: str) -> dict[str, Any]:
+        with (self.entry_dir(stage, key) / _META_NAME).open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        out = []
+        if not self.root.is_dir():
+            return out
+        for meta in self.root.glob(f"*/*/{_META_NAME}"):
+            entry = meta.parent
+            if entry.parent.name == _STAGING_NAME:
+                continue
+            try:
+                size = sum(p.stat().st_size for p in entry.rglob("*") if p.is_file())
+                out.append((meta.stat().st_mtime, size, entry))
+            except FileNotFoundError:  # parallel verdrängt
+                continue
+        return out
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_bytes: int | None = None) -> list[Path]:
+        """Entfernt die am längsten nicht benutzten Einträge, bis das Limit passt."""
+        limit = self.max_bytes if max_bytes is None else int(max_bytes)
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed: list[Path] = []
+        for _, size, entry in entries:
+            if total <= limit:
+                break
+            self._discard(entry)
+            total -= size
+            removed.append(entry)
+        staging_root = self.root / _STAGING_NAME
+        if staging_root.is_dir():
+            cutoff = time.time() - _STAGING_MAX_AGE_S
+            for stale in staging_root.iterdir():
+                try:
+                    if stale.stat().st_mtime < cutoff:
+                        shutil.rmtree(stale, ignore_errors=True)
+                except FileNotFoundError:
+                    continue
+        return removed
+
+    def clear(self) -> None:
+        if self.root.exists():
+            shutil.rmtree(self.root)
+
+
+def cached_frame(
+    stage: str,
+    parts: Mapping[str, Any],
+    compute: Callable[[], pd.DataFrame],
+    *,
+    enabled: bool = True,
+    dtypes: Mapping[str, str] | None = None,
+    cache: ArtifactCache | None = None,
+) -> pd.DataFrame:
+    """Lädt ein DataFrame aus dem Cache oder berechnet und speichert es.
+
+    Ein benannter Index (z.B. ``Date``) wird mitgespeichert und wiederhergestellt.
+    """
+    if not (enabled and CACHE_ENABLED):
+        return compute()
+
+    cache = cache or ArtifactCache()
+    key = cache_key(stage, parts)
+    if cache.has(stage, key):
+        meta = cache.read_meta(stage, key)
+        index_cols = meta.get("index") or []
+        df = read_table(cache.entry_dir(stage, key) / _FRAME_NAME, parse_dates=meta.get("date_cols") or None)
+        cache.touch(stage, key)
+        return df.set_index(index_cols) if index_cols else df
+
+    df = compute()
+    index_cols = [name for name in df.index.names if name is not None]
+    stored = df.reset_index() if index_cols else df
+    date_cols = [c for c in stored.columns if pd.api.types.is_datetime64_any_dtype(stored[c])]
+
+    entry = cache.begin(stage, key)
+    write_table(stored, entry / _FRAME_NAME, dtypes=dtypes)
+    cache.commit(stage, key, parts, index=index_cols, date_cols=date_cols)
+    return df
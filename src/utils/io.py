@@ -1,4 +1,17 @@
+import json
+import shutil
 from pathlib import Path  # Path sorgt für OS-neutrale Pfad-Operationen.
+from typing import Any, Iterable, Mapping
+
+import pandas as pd
+
+try:  # pyarrow ist optional: ohne pyarrow wird alles als CSV geschrieben/gelesen.
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # pragma: no cover - abhängig von der Umgebung
+    pa = None
 
 DATA_DIR = Path("data")  # Wurzel für alle Projektdaten.
 DATA_RAW = DATA_DIR / "raw"
@@ -7,3 +20,280 @@ DATA_PROCESSED = DATA_DIR / "processed"
 # Verzeichnisse anlegen, falls sie fehlen – verhindert Laufzeitfehler bei Downloads.
 for path in (DATA_RAW, DATA_PROCESSED):
     path.mkdir(parents=True, exist_ok=True)
+
+PYARROW_AVAILABLE = pa is not None
+
+# Speicherformat für Zwischenstufen (Labels, Trainingsdatensätze).
+# CSV bleibt als Export-Format und als Fallback ohne pyarrow erhalten.
+TABLE_FORMATS = ("parquet", "feather", "csv")
+DEFAULT_TABLE_FORMAT = "parquet" if PYARROW_AVAILABLE else "csv"
+
+# Angehängte Zeilen (append_table) liegen bei Parquet/Feather als Teil-Dateien neben
+# der Primärdatei (``x.parquet.parts/part-00001.parquet``, ...); ab so vielen Teilen
+# werden sie beim nächsten Anhängen in die Primärdatei zusammengeführt.
+TABLE_MAX_PARTS = 32
+
+
+def table_path(path: Path, fmt: str) -> Path:
+    """Pfad mit der Dateiendung des Formats (``x.csv`` → ``x.parquet``)."""
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"Unbekanntes Tabellenformat '{fmt}'. Erwarte eines von {TABLE_FORMATS}.")
+    return Path(path).with_suffix(f".{fmt}")
+
+
+def _parts_dir(primary: Path) -> Path:
+    return primary.with_name(primary.name + ".parts")
+
+
+def table_files(resolved: Path) -> list[Path]:
+    """Dateien einer Tabelle (``resolved`` aus ``resolve_table_path``): Primärdatei plus angehängte Teile."""
+    resolved = Path(resolved)
+    if resolved.suffix.lower() not in (".parquet", ".feather"):
+        return [resolved]
+    return [resolved, *sorted(_parts_dir(resolved).glob(f"part-*{resolved.suffix}"))]
+
+
+def _table_mtime(resolved: Path) -> float:
+    """Letzte Änderung der Tabelle inkl. angehängter Teile."""
+    mtime = resolved.stat().st_mtime
+    parts = _parts_dir(resolved)
+    return max(mtime, parts.stat().st_mtime) if parts.is_dir() else mtime
+
+
+def resolve_table_path(path: Path) -> Path | None:
+    """Findet die aktuellste gespeicherte Variante einer Tabelle.
+
+    ``path`` darf mit beliebiger Endung angegeben werden (typisch ``.csv`` wie in
+    den Notebooks). Parquet/Feather-Geschwister werden bevorzugt, solange sie
+    nicht älter sind als die CSV (z.B. wenn ein Notebook die CSV neu schreibt).
+    """
+    path = Path(path)
+    csv_path = table_path(path, "csv")
+    csv_mtime = csv_path.stat().st_mtime if csv_path.is_file() else None
+
+    if PYARROW_AVAILABLE:
+        for fmt in ("parquet", "feather"):
+            cand = table_path(path, fmt)
+            if cand.is_file() and (csv_mtime is None or _table_mtime(cand) >= csv_mtime):
+                return cand
+    if csv_mtime is not None:
+        return csv_path
+    return path if path.is_file() else None
+
+
+def write_table(
+    df: pd.DataFrame,
+    path: Path,
+    *,
+    dtypes: Mapping[str, str] | None = None,
+    index: bool = False,
+    fmt: str | None = None,
+    csv_export: bool = False,
+) -> Path:
+    """Schreibt ein DataFrame spaltenbasiert (Parquet/Feather) oder als CSV.
+
+    - dtypes: explizite Speicher-Dtypes (z.B. ``{"label": "category", "signal": "int8"}``);
+      Spalten, die im DataFrame fehlen, werden ignoriert.
+    - index: Index als normale Spalte mitschreiben (wie ``to_csv(index=True)``).
+    - fmt: 'parquet' | 'feather' | 'csv'; Default: Parquet, wenn pyarrow installiert ist.
+    - csv_export: zusätzlich eine CSV unter demselben Namen schreiben.
+
+    Gibt den Pfad der geschriebenen Primärdatei zurück.
+    """
+    fmt = fmt or DEFAULT_TABLE_FORMAT
+    out_path = table_path(path, fmt)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    # Angehängte Teile gehören zur alten Version (vor dem Schreiben entfernen: ein
+    # Abbruch hinterlässt dann höchstens zu wenige, nie doppelte Zeilen).
+    shutil.rmtree(_parts_dir(out_path), ignore_errors=True)
+
+    if dtypes:
+        df = df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+    if index:
+        df = df.reset_index()
+
+    if fmt == "csv":
+        df.to_csv(out_path, index=False)
+        return out_path
+
+    if not PYARROW_AVAILABLE:
+        raise ImportError(f"fmt='{fmt}' verlangt pyarrow (pip install pyarrow).")
+    # CSV-Export zuerst schreiben, damit die Spaltendatei beim Lesen die neuere bleibt.
+    if csv_export:
+        df.to_csv(table_path(path, "csv"), index=False)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        pa_parquet.write_table(table, out_path)
+    else:
+        pa_feather.write_feather(table, out_path)
+    return out_path
+
+
+def read_table(
+    path: Path,
+    *,
+    columns: Iterable[str] | None = None,
+    parse_dates: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Liest eine mit ``write_table`` (oder als CSV) gespeicherte Tabelle.
+
+    Parquet/Feather werden über Arrow gelesen (Feather memory-mapped, ohne
+    Block-Konsolidierung), Datums- und Zahlentypen bleiben erhalten; angehängte
+    Teile (``append_table``) werden als Arrow-Dataset mitgelesen.
+    Für CSV werden ``parse_dates`` wie bei ``pd.read_csv`` angewendet.
+    """
+    resolved = resolve_table_path(path)
+    if resolved is None:
+        raise FileNotFoundError(path)
+    columns = list(columns) if columns is not None else None
+
+    suffix = resolved.suffix.lower()
+    files = table_files(resolved)
+    if len(files) > 1:
+        dataset = pa_dataset.dataset([str(f) for f in files], format=suffix.lstrip("."))
+        table = dataset.to_table(columns=columns)
+    elif suffix == ".parquet":
+        table = pa_parquet.read_table(resolved, columns=columns, memory_map=True)
+    elif suffix == ".feather":
+        table = pa_feather.read_table(resolved, columns=columns, memory_map=True)
+    else:
+        parse_dates = list(parse_dates) if parse_dates else None
+        if parse_dates and columns is not None:
+            parse_dates = [c for c in parse_dates if c in columns]
+        return pd.read_csv(resolved, usecols=columns, parse_dates=parse_dates or False)
+
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def append_table(
+    df: pd.DataFrame,
+    path: Path,
+    *,
+    dtypes: Mapping[str, str] | None = None,
+    index: bool = False,
+    fmt: str | None = None,
+    csv_export: bool = False,
+) -> Path:
+    """Hängt Zeilen an eine bestehende Tabelle an (inkrementelle Updates).
+
+    - CSV: echtes Anhängen (``mode="a"``, ohne Header), Spaltenreihenfolge wie in der Datei.
+    - Parquet/Feather: neue Zeilen als Teil-Datei im Schema der Primärdatei schreiben
+      (Aufwand unabhängig von der Dateigröße); erst ab ``TABLE_MAX_PARTS`` Teilen wird
+      alles in die Primärdatei zusammengeführt und diese atomar ersetzt.
+    Existiert noch keine Datei, verhält sich die Funktion wie ``write_table``.
+    Gibt den Pfad der Primärdatei zurück.
+    """
+    existing = resolve_table_path(path)
+    if existing is None:
+        return write_table(df, path, dtypes=dtypes, index=index, fmt=fmt, csv_export=csv_export)
+
+    if index:
+        df = df.reset_index()
+    if dtypes:
+        df = df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+
+    def _append_csv(csv_path: Path) -> None:
+        header = pd.read_csv(csv_path, nrows=0).columns
+        missing = set(header) - set(df.columns)
+        if missing:
+            raise ValueError(f"append_table: Spalten fehlen für {csv_path}: {sorted(missing)}")
+        df[list(header)].to_csv(csv_path, mode="a", header=False, index=False)
+
+    if existing.suffix.lower() == ".csv":
+        _append_csv(existing)
+        return existing
+
+    # CSV-Export zuerst, damit die Spaltendatei beim Lesen die neuere bleibt.
+    csv_path = table_path(path, "csv")
+    if csv_export and csv_path.is_file():
+        _append_csv(csv_path)
+    parts = _parts_dir(existing)
+    n_parts = len(table_files(existing)) - 1
+    if n_parts < TABLE_MAX_PARTS:
+        parts.mkdir(exist_ok=True)
+        part = parts / f"part-{n_parts + 1:05d}{existing.suffix}"
+        schema = _table_schema(existing)
+        missing = set(schema.names) - set(df.columns)
+        if missing:
+            raise ValueError(f"append_table: Spalten fehlen für {existing}: {sorted(missing)}")
+        table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+        tmp = part.with_name(part.name + ".tmp")
+        if existing.suffix.lower() == ".parquet":
+            pa_parquet.write_table(table, tmp)
+        else:
+            pa_feather.write_feather(table, tmp)
+        tmp.replace(part)
+        return existing
+
+    old = read_table(existing)
+    combined = pd.concat([old, df[list(old.columns)]], ignore_index=True)
+    if dtypes:
+        combined = combined.astype({col: dtype for col, dtype in dtypes.items() if col in combined.columns})
+    tmp = existing.with_name(existing.name + ".tmp")
+    table = pa.Table.from_pandas(combined, preserve_index=False)
+    if existing.suffix.lower() == ".parquet":
+        pa_parquet.write_table(table, tmp)
+    else:
+        pa_feather.write_feather(table, tmp)
+    # Teile erst beiseite legen, dann ersetzen: Leser sehen nie Zeilen doppelt.
+    stale = parts.with_name(parts.name + ".old")
+    shutil.rmtree(stale, ignore_errors=True)
+    if parts.is_dir():
+        parts.rename(stale)
+    tmp.replace(existing)
+    shutil.rmtree(stale, ignore_errors=True)
+    return existing
+
+
+def _table_schema(resolved: Path) -> "pa.Schema":
+    if resolved.suffix.lower() == ".parquet":
+        return pa_parquet.read_schema(resolved)
+    return pa_feather.read_table(resolved, memory_map=True).schema
+
+
+def table_columns(path: Path) -> list[str]:
+    """Spaltennamen einer gespeicherten Tabelle (nur Schema bzw. CSV-Header wird gelesen)."""
+    resolved = resolve_table_path(path)
+    if resolved is None:
+        raise FileNotFoundError(path)
+    if resolved.suffix.lower() in (".parquet", ".feather"):
+        return list(_table_schema(resolved).names)
+    return list(pd.read_csv(resolved, nrows=0).columns)
+
+
+def last_table_date(path: Path, column: str) -> pd.Timestamp | None:
+    """Letztes Datum in ``column`` einer gespeicherten Tabelle (None, wenn es keine Datei gibt)."""
+    if resolve_table_path(path) is None:
+        return None
+    dates = read_table(path, columns=[column], parse_dates=[column])[column]
+    return pd.Timestamp(dates.max()) if len(dates) else None
+
+
+def table_params_path(path: Path) -> Path:
+    """Sidecar mit den Erzeugungs-Parametern einer Tabelle (``x.csv`` → ``x.params.json``)."""
+    return Path(path).with_suffix(".params.json")
+
+
+def write_table_params(path: Path, params: Mapping[str, Any]) -> None:
+    """Speichert ``params`` zur Tabelle (nach jedem Schreiben bzw. Anhängen aufrufen)."""
+    payload = json.dumps(dict(params), indent=2, sort_keys=True, default=str)
+    table_params_path(path).write_text(payload + "\n", encoding="utf-8")
+
+
+def read_table_params(path: Path) -> dict | None:
+    """Gespeicherte Parameter der Tabelle.
+
+    None ohne Sidecar oder wenn die Tabelle nach dem Sidecar anderweitig (z.B. von
+    einem Notebook) neu geschrieben wurde – die Parameter sind dann unbekannt.
+    """
+    meta = table_params_path(path)
+    resolved = resolve_table_path(path)
+    if resolved is None or not meta.is_file() or _table_mtime(resolved) > meta.stat().st_mtime:
+        return None
+    return json.loads(meta.read_text(encoding="utf-8"))
+
+
+def table_params_match(path: Path, params: Mapping[str, Any]) -> bool:
+    """True, wenn die Tabelle nachweislich mit ``params`` erzeugt wurde (Anhängen erlaubt)."""
+    stored = read_table_params(path)
+    return stored is not None and stored == json.loads(json.dumps(dict(params), sort_keys=True, default=str))
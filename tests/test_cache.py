@@ -0,0 +1,77 @@
+"""``ArtifactCache``: Einträge werden im Staging aufgebaut und atomar veröffentlicht."""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from src.utils.cache import ArtifactCache, cache_key, cached_frame
+
+
+def test_entry_is_invisible_until_commit(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    staging = cache.begin("stage", "k1")
+    (staging / "artifact.txt").write_text("a")
+    assert not cache.entry_dir("stage", "k1").exists()
+    assert cache.size_bytes() == 0
+
+    cache.commit("stage", "k1", {"x": 1})
+    assert cache.has("stage", "k1")
+    assert (cache.entry_dir("stage", "k1") / "artifact.txt").read_text() == "a"
+    assert not staging.exists()
+
+
+def test_commit_keeps_existing_complete_entry(tmp_path):
+    first, second = ArtifactCache(tmp_path), ArtifactCache(tmp_path)
+    a = first.begin("stage", "k")
+    b = second.begin("stage", "k")
+    (a / "artifact.txt").write_text("first")
+    (b / "artifact.txt").write_text("second")
+    first.commit("stage", "k", {})
+    second.commit("stage", "k", {})
+    assert (first.entry_dir("stage", "k") / "artifact.txt").read_text() == "first"
+    assert list((tmp_path / ".staging").iterdir()) == []
+
+
+def test_commit_replaces_incomplete_leftover(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    leftover = cache.entry_dir("stage", "k")
+    leftover.mkdir(parents=True)
+    (leftover / "half.txt").write_text("x")
+    staging = cache.begin("stage", "k")
+    (staging / "artifact.txt").write_text("new")
+    cache.commit("stage", "k", {})
+    assert sorted(p.name for p in leftover.iterdir()) == ["artifact.txt", "meta.json"]
+
+
+def test_evict_skips_staging(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=0)
+    staging = cache.begin("stage", "k")
+    (staging / "meta.json").write_text("{}")
+    assert cache.evict() == []
+    assert staging.exists()
+
+
+def _cached_worker(root: str, n: int) -> int:
+    parts = {"n": n}
+
+    def compute() -> pd.DataFrame:
+        time.sleep(0.05)
+        return pd.DataFrame({"a": range(n)})
+
+    df = cached_frame("frames", parts, compute, cache=ArtifactCache(root))
+    return len(df)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="fork start method")
+def test_parallel_writers_same_key(tmp_path):
+    with mp.get_context("fork").Pool(4) as pool:
+        sizes = pool.starmap(_cached_worker, [(str(tmp_path), 100)] * 8)
+    assert sizes == [100] * 8
+    cache = ArtifactCache(tmp_path)
+    assert cache.has("frames", cache_key("frames", {"n": 100}))
+    assert list((tmp_path / ".staging").iterdir()) == []
@@ -0,0 +1,29 @@
+"""``TrainingArrays``/``DatasetView``: Label-Codes und -Namen."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.models.dataset import LABEL_CLASSES, TrainingArrays
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2024-01-01", periods=5),
+            "f": np.arange(5, dtype=float),
+            "label": ["up", None, "down", "sideways", "neutral"],
+        }
+    )
+
+
+def test_missing_labels_are_not_named_down():
+    data = TrainingArrays.from_frame(_frame(), ["f"])
+    np.testing.assert_array_equal(data.label, [1, -1, 2, -1, 0])
+
+    expected = np.array(["up", None, "down", None, "neutral"], dtype=object)
+    np.testing.assert_array_equal(data.label_names(), expected)
+    np.testing.assert_array_equal(data.view(slice(1, 4)).label_names(), expected[1:4])
+    np.testing.assert_array_equal(data.view(np.array([0, 3])).label_names(), expected[[0, 3]])
+    assert set(data.label_names()) - {None} <= set(LABEL_CLASSES)
@@ -0,0 +1,115 @@
+"""DMatrix-Cache: Key (inkl. ``ref``/``max_bin``), Labels bei Treffern, LRU und ``predict_proba``."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.dataset import TrainingArrays
+from src.models.dmatrix_cache import DMatrixCache, cached_dmatrix, dmatrix_key, predict_proba
+from src.models.train_xgboost_two_stage import train_xgb_binary
+
+
+def _data(seed: int = 0, n: int = 600) -> TrainingArrays:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 3))
+    signal = (np.abs(X[:, 0] + 0.5 * rng.normal(size=n)) > 0.7).astype(int)
+    up = X[:, 1] + 0.5 * rng.normal(size=n) > 0
+    df = pd.DataFrame({"date": pd.bdate_range("2020-01-01", periods=n), "a": X[:, 0], "b": X[:, 1], "c": X[:, 2]})
+    df["label"] = np.where(signal == 0, "neutral", np.where(up, "up", "down"))
+    df["signal"] = signal
+    df["direction"] = np.where(signal == 1, up.astype(float), np.nan)
+    return TrainingArrays.from_frame(df, ["a", "b", "c"])
+
+
+@pytest.fixture(scope="module")
+def splits() -> dict:
+    return _data().split(pd.bdate_range("2020-01-01", periods=600)[480], 0.75)
+
+
+def test_ref_and_max_bin_are_part_of_the_key(splits):
+    train, val, test = splits["train"], splits["val"], splits["test"]
+    keys = {
+        dmatrix_key(test),
+        dmatrix_key(test, ref=train),
+        dmatrix_key(test, ref=val),
+        dmatrix_key(test, ref=train, max_bin=16),
+        dmatrix_key(test, ref=train.moves()),
+    }
+    assert len(keys) == 5
+    assert dmatrix_key(test, ref=train) == dmatrix_key(test, ref=splits["train"])
+
+    cache = DMatrixCache(max_entries=8)
+    with_train = cache.get(test, ref=train)
+    with_val = cache.get(test, ref=val)
+    assert with_train is not with_val
+    assert cache.get(test, ref=train) is with_train
+    # train und val als Referenzen wurden einmal gebaut (und sind selbst Einträge).
+    assert cache.stats() == {"entries": 4, "hits": 1, "misses": 4}
+
+
+def test_labels_are_reset_on_hit(splits):
+    cache = DMatrixCache(max_entries=4)
+    train = splits["train"]
+    first = cache.get(train, train.signal)
+    np.testing.assert_array_equal(first.get_label(), train.signal)
+
+    flipped = 1 - train.signal
+    again = cache.get(train, flipped)
+    assert again is first
+    np.testing.assert_array_equal(again.get_label(), flipped)
+    # Ohne label bleiben die zuletzt gesetzten Labels stehen.
+    np.testing.assert_array_equal(cache.get(train).get_label(), flipped)
+
+    moves = train.moves()
+    dmoves = cache.get(moves, moves.direction)
+    assert dmoves.num_row() == len(moves)
+    np.testing.assert_array_equal(dmoves.get_label(), moves.direction)
+
+
+def test_lru_eviction_and_disabled_cache(splits):
+    train, val, test = splits["train"], splits["val"], splits["test"]
+    cache = DMatrixCache(max_entries=2)
+    d_train = cache.get(train)
+    cache.get(val)
+    cache.get(train)  # train wird zuletzt benutzt
+    cache.get(test)  # verdrängt val
+    assert len(cache) == 2
+    assert cache.get(train) is d_train
+    misses = cache.misses
+    cache.get(val)
+    assert cache.misses == misses + 1
+
+    off = DMatrixCache(max_entries=0)
+    assert off.get(train) is not off.get(train)
+    assert len(off) == 0
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"n_estimators": 40, "max_depth": 3, "n_jobs": 1},
+        {"n_estimators": 40, "max_depth": 4, "max_bin": 16, "n_jobs": 1},
+        {"n_estimators": 300, "max_depth": 3, "learning_rate": 0.5, "n_jobs": 1},  # mit Early Stopping
+    ],
+)
+def test_predict_proba_matches_model_on_cached_matrix(splits, params):
+    train, val, test = splits["train"], splits["val"], splits["test"]
+    cache = DMatrixCache()
+    model = train_xgb_binary(train, train.signal, val, val.signal, xgb_params=params)
+    if params["n_estimators"] == 300:
+        assert model.best_iteration + 1 < model.get_booster().num_boosted_rounds()
+
+    for view in (val, test):
+        expected = model.predict_proba(view.frame())[:, 1]
+        got = predict_proba(model, cached_dmatrix(view, ref=train, max_bin=params.get("max_bin"), cache=cache))
+        np.testing.assert_allclose(got, expected, rtol=1e-6, atol=1e-7)
+
+    moves_train, moves_test = train.moves(), test.moves()
+    direction = train_xgb_binary(
+        moves_train, moves_train.direction, None, None, scale_pos_weight=1.0, xgb_params=params
+    )
+    expected = direction.predict_proba(moves_test.frame())[:, 1]
+    got = predict_proba(direction, cached_dmatrix(moves_test, ref=moves_train, max_bin=params.get("max_bin"), cache=cache))
+    np.testing.assert_allclose(got, expected, rtol=1e-6, atol=1e-7)
@@ -0,0 +1,29 @@
+"""Feiertagsindex außerhalb des Default-Bereichs 1990–2040."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.features.holidays import ALL_CALENDARS, US_HOLIDAY_CAL, days_to_next_holiday, holiday_mask, is_bridge_day
+
+
+def test_dates_outside_default_range_use_rules():
+    days = pd.date_range("1980-01-01", "2050-12-31")
+    us = US_HOLIDAY_CAL.holidays(start=days[0], end=days[-1])
+    np.testing.assert_array_equal(holiday_mask(days.to_numpy()), days.isin(us))
+
+    inside = days[(days.year >= 1991) & (days.year <= 2039)]
+    wide = pd.Series(holiday_mask(days.to_numpy(), ALL_CALENDARS), index=days)
+    np.testing.assert_array_equal(holiday_mask(inside.to_numpy(), ALL_CALENDARS), wide[inside].to_numpy())
+    np.testing.assert_array_equal(
+        days_to_next_holiday(inside.to_numpy()),
+        pd.Series(days_to_next_holiday(days.to_numpy()), index=days)[inside].to_numpy(),
+    )
+
+
+def test_lookups_across_range_edges():
+    days = np.array(["1989-12-29", "1990-01-01", "2040-12-31", "2041-01-01"], dtype="M8[D]")
+    assert holiday_mask(days, ALL_CALENDARS, offset_days=1).tolist() == [False, False, True, False]
+    np.testing.assert_array_equal(days_to_next_holiday(days), [3, 0, 1, 0])
+    assert is_bridge_day(days).shape == days.shape
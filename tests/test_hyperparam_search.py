@@ -0,0 +1,40 @@
+"""Budget-Stufen der Hyperparameter-Suche."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from src.models.hyperparam_search import _rungs, search_xgb_binary
+
+
+@pytest.mark.parametrize(
+    ("min_rounds", "max_rounds", "eta", "expected"),
+    [
+        (15, 400, 3, [15, 45, 135, 400]),
+        (15, 405, 3, [15, 45, 135, 405]),
+        (15, 50, 3, [15, 50]),
+        (400, 400, 3, [400]),
+        (10, 1000, 4, [10, 40, 160, 1000]),
+    ],
+)
+def test_rungs_start_at_min_rounds(min_rounds, max_rounds, eta, expected):
+    assert _rungs(min_rounds, max_rounds, eta) == expected
+
+
+@pytest.mark.parametrize("method", ["halving", "hyperband"])
+def test_search_first_rung_is_min_rounds(method):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    y = (X[:, 0] + 0.5 * rng.normal(size=300) > 0).astype(np.float64)
+    dtrain = xgb.QuantileDMatrix(X[:200], y[:200])
+    dval = xgb.QuantileDMatrix(X[200:], y[200:], ref=dtrain)
+
+    result = search_xgb_binary(
+        dtrain, None, dval, None,
+        xgb_params={"n_estimators": 40}, method=method, sampler="random", n_configs=6, min_rounds=4,
+    )
+    assert sorted(result.trials["rounds"].unique()) == [4, 12, 40]
+    if method == "halving":
+        assert (result.trials["rounds"] == 4).sum() == 6
@@ -0,0 +1,108 @@
+"""Tabellen-Store: Anhängen als Teil-Dateien, Zusammenführen und Parameter-Sidecar."""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.dataset import load_training_arrays
+from src.utils import io
+from src.utils.io import (
+    append_table,
+    last_table_date,
+    read_table,
+    resolve_table_path,
+    table_files,
+    table_params_match,
+    write_table,
+    write_table_params,
+)
+
+
+def _labels(start: str, periods: int) -> pd.DataFrame:
+    dates = pd.date_range(start, periods=periods, name="Date")
+    labels = np.array(["up", "down", "neutral"])[np.arange(periods) % 3]
+    return pd.DataFrame({"Close": 1.1 + np.arange(periods) / 100, "label": labels}, index=dates)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "csv"])
+def test_append_reads_back_all_rows(tmp_path, fmt):
+    path = tmp_path / "labels.csv"
+    kwargs = dict(index=True, dtypes={"label": "category"}, fmt=fmt)
+    write_table(_labels("2024-01-01", 10), path, **kwargs)
+    append_table(_labels("2024-01-11", 3), path, **kwargs)
+    append_table(_labels("2024-01-14", 2), path, **kwargs)
+
+    resolved = resolve_table_path(path)
+    assert resolved.suffix == f".{fmt}"
+    if fmt != "csv":
+        assert [f.name for f in table_files(resolved)[1:]] == [f"part-00001.{fmt}", f"part-00002.{fmt}"]
+    out = read_table(path, parse_dates=["Date"])
+    expected = pd.concat([_labels("2024-01-01", 10), _labels("2024-01-11", 3), _labels("2024-01-14", 2)])
+    np.testing.assert_array_equal(out["Date"], expected.index)
+    np.testing.assert_array_equal(out["label"].astype(str), expected["label"])
+    assert last_table_date(path, "Date") == pd.Timestamp("2024-01-15")
+
+    write_table(_labels("2024-01-01", 4), path, **kwargs)
+    assert len(read_table(path)) == 4
+    assert table_files(resolve_table_path(path)) == [resolve_table_path(path)]
+
+
+def test_parts_are_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(io, "TABLE_MAX_PARTS", 2)
+    path = tmp_path / "labels.csv"
+    write_table(_labels("2024-01-01", 5), path, index=True, fmt="parquet")
+    for k in range(3):
+        append_table(_labels(f"2024-02-0{k + 1}", 1), path, index=True, fmt="parquet")
+    resolved = resolve_table_path(path)
+    assert table_files(resolved) == [resolved]
+    assert len(read_table(path)) == 8
+
+
+def test_csv_export_append_keeps_parquet_primary(tmp_path):
+    path = tmp_path / "labels.csv"
+    kwargs = dict(index=True, fmt="parquet", csv_export=True)
+    write_table(_labels("2024-01-01", 5), path, **kwargs)
+    append_table(_labels("2024-01-06", 2), path, **kwargs)
+    assert resolve_table_path(path).suffix == ".parquet"
+    assert len(pd.read_csv(path)) == len(read_table(path)) == 7
+
+
+def test_training_loader_reads_parts(tmp_path):
+    rng = np.random.default_rng(0)
+
+    def frame(start: str, n: int) -> pd.DataFrame:
+        return pd.DataFrame({
+            "date": pd.date_range(start, periods=n),
+            "f1": rng.normal(size=n).astype(np.float32),
+            "label": np.array(["up", "down", "neutral"])[np.arange(n) % 3],
+            "signal": (np.arange(n) % 3 != 2).astype(np.int8),
+            "direction": np.where(np.arange(n) % 3 == 2, np.nan, (np.arange(n) % 3 == 0).astype(float)),
+        })
+
+    path = tmp_path / "train.csv"
+    first, second = frame("2024-01-01", 20), frame("2024-01-21", 5)
+    write_table(first, path, fmt="parquet")
+    append_table(second, path, fmt="parquet")
+    data = load_training_arrays(path, ["f1"], start="2024-01-10")
+    both = pd.concat([first, second], ignore_index=True)
+    both = both[both["date"] >= "2024-01-10"]
+    np.testing.assert_array_equal(data.X[:, 0], both["f1"].to_numpy())
+
+
+def test_table_params_match(tmp_path):
+    path = tmp_path / "labels.csv"
+    write_table(_labels("2024-01-01", 5), path, index=True, fmt="parquet")
+    assert not table_params_match(path, {"up_threshold": 0.01})
+    write_table_params(path, {"up_threshold": 0.01, "horizon_days": 4})
+    assert table_params_match(path, {"horizon_days": 4, "up_threshold": 0.01})
+    assert not table_params_match(path, {"horizon_days": 4, "up_threshold": 0.02})
+
+    # Später von anderer Stelle neu geschrieben → Parameter unbekannt.
+    append_table(_labels("2024-01-06", 1), path, index=True, fmt="parquet")
+    meta = io.table_params_path(path)
+    os.utime(meta, (meta.stat().st_mtime - 10, meta.stat().st_mtime - 10))
+    assert not table_params_match(path, {"horizon_days": 4, "up_threshold": 0.01})
@@ -0,0 +1,137 @@
+"""MT5-Export-Loader (gegen die Baseline) und H1-Features auf Frames ohne ``spread``."""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import mt5_h1
+from src.data.mt5_h1 import h1_daily_intraday_features, h1_to_daily_ohlc, iter_mt5_export_bars, load_mt5_export_bars
+
+EXPORT_HEADER = "<DATE>\t<TIME>\t<OPEN>\t<HIGH>\t<LOW>\t<CLOSE>\t<TICKVOL>\t<VOL>\t<SPREAD>\n"
+
+
+def _baseline_load(path) -> pd.DataFrame:
+    """Loader vor dem Umbau (python-Engine, ``to_datetime``/``to_numeric`` mit ``coerce``)."""
+    df = pd.read_csv(path, sep="\t", engine="python")
+    dt = pd.to_datetime((df["<DATE>"].astype(str) + " " + df["<TIME>"].astype(str)).str.strip(), errors="coerce")
+    names = {"open": "<OPEN>", "high": "<HIGH>", "low": "<LOW>", "close": "<CLOSE>",
+             "tick_volume": "<TICKVOL>", "volume": "<VOL>", "spread": "<SPREAD>"}
+    out = pd.DataFrame({name: pd.to_numeric(df[col], errors="coerce") for name, col in names.items()})
+    out.index = dt
+    out = out[out.index.notna()].sort_index()
+    return out.dropna(subset=["open", "high", "low", "close"])
+
+
+def _write_export(path, rows: list[str]) -> None:
+    path.write_text(EXPORT_HEADER + "".join(r + "\n" for r in rows), encoding="utf-8")
+
+
+def _regular_rows(n: int) -> list[str]:
+    idx = pd.date_range("2024-01-30", periods=n, freq="h")
+    return [
+        f"{t:%Y.%m.%d}\t{t:%H:%M}\t1.1{k % 10}\t1.12\t1.09\t1.11\t{100 + k}\t0\t{k % 4}"
+        for k, t in enumerate(idx)
+    ]
+
+
+def test_loader_matches_baseline_on_irregular_rows(tmp_path):
+    rows = _regular_rows(60) + [
+        "2024.02.31\t10:00\t1.1\t1.2\t1.0\t1.1\t1\t0\t1",  # Tag existiert nicht
+        "2024.02.29\t25:00\t1.1\t1.2\t1.0\t1.1\t1\t0\t1",  # Stunde > 23
+        "2023.02.29\t10:00\t1.1\t1.2\t1.0\t1.1\t1\t0\t1",  # kein Schaltjahr
+        "2024.03.05\t10:61\t1.1\t1.2\t1.0\t1.1\t1\t0\t1",  # Minute > 59
+        "2024.03.05\t11:00:30\t1.1\t1.2\t1.0\t1.1\t1\t0\t1",  # Sekunden in einer HH:MM-Datei
+        "2024.03.05\t12:00\tn/a\t1.2\t1.0\t1.1\t1\t0\t1",  # kaputte Zahl → NaN → Zeile fällt weg
+        "2024.03.05\t13:00\t1.1\t1.2\t1.0\t1.1\tx\t0\t1",  # kaputtes Volumen → NaN
+        "2024-03-05\t14:00\t1.1\t1.2\t1.0\t1.1\t1\t0\t1",  # anderes Datumsformat
+        "2024.3.5\t15:00\t1.1\t1.2\t1.0\t1.1\t1\t0\t1",
+    ]
+    path = tmp_path / "EURUSD_H1.csv"
+    _write_export(path, rows)
+
+    expected = _baseline_load(path)
+    got = load_mt5_export_bars(path, use_sidecar=False)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False, check_freq=False)
+    assert pd.Timestamp("2024-03-02 10:00") not in got.index  # kein Überlauf von 2024.02.31
+    assert pd.Timestamp("2024-03-05 15:00") in got.index
+
+    chunked = pd.concat(list(iter_mt5_export_bars(path, chunksize=7))).sort_index()
+    pd.testing.assert_frame_equal(chunked, expected, check_dtype=False, check_freq=False)
+
+
+@pytest.mark.parametrize("engine_pyarrow", [True, False])
+def test_malformed_numeric_cell_does_not_abort(tmp_path, monkeypatch, engine_pyarrow):
+    monkeypatch.setattr(mt5_h1, "PYARROW_AVAILABLE", engine_pyarrow and mt5_h1.PYARROW_AVAILABLE)
+    rows = _regular_rows(10)
+    rows[3] = rows[3].replace("\t1.12\t", "\t1,12\t")
+    path = tmp_path / "EURUSD_H1.csv"
+    _write_export(path, rows)
+    got = load_mt5_export_bars(path, use_sidecar=False)
+    assert len(got) == 9
+    pd.testing.assert_frame_equal(got, _baseline_load(path), check_dtype=False, check_freq=False)
+
+
+def test_sidecar_named_from_stat_before_parse(tmp_path, monkeypatch):
+    path = tmp_path / "EURUSD_H1.csv"
+    _write_export(path, _regular_rows(10))
+    before = os.stat(path)
+    read_csv = pd.read_csv
+
+    def read_then_modify(*args, **kwargs):
+        df = read_csv(*args, **kwargs)
+        if kwargs.get("nrows") is not None:  # Header-Erkennung
+            return df
+        _write_export(path, _regular_rows(12))  # Export ändert sich während des Lesens
+        os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns + 10**9))
+        return df
+
+    monkeypatch.setattr(mt5_h1.pd, "read_csv", read_then_modify)
+    assert len(load_mt5_export_bars(path)) == 10
+    sidecars = list(tmp_path.glob("*.bars-*.npy"))
+    assert [p.name for p in sidecars] == [f"{path.name}.bars-{before.st_size}-{before.st_mtime_ns}.npy"]
+
+    monkeypatch.setattr(mt5_h1.pd, "read_csv", read_csv)
+    assert len(load_mt5_export_bars(path)) == 12
+
+
+def _h1_frame(with_spread: bool) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    idx = pd.date_range("2024-01-01", periods=24 * 20, freq="h")
+    close = 1.1 + np.cumsum(rng.normal(0.0, 0.001, idx.size))
+    df = pd.DataFrame(
+        {
+            "open": close - 0.0002,
+            "high": close + 0.0005,
+            "low": close - 0.0007,
+            "close": close,
+            "tick_volume": rng.integers(100, 1000, idx.size),
+        },
+        index=idx,
+    )
+    if with_spread:
+        df["spread"] = rng.integers(1, 5, idx.size).astype(float)
+    return df
+
+
+def test_h1_to_daily_ohlc_without_spread():
+    daily = h1_to_daily_ohlc(_h1_frame(with_spread=False))
+    expected = h1_to_daily_ohlc(_h1_frame(with_spread=True))
+    pd.testing.assert_frame_equal(daily, expected)
+
+    h1 = _h1_frame(with_spread=False)
+    sessions = h1.groupby(h1.index.normalize())
+    reference = sessions.agg(
+        Open=("open", "first"), High=("high", "max"), Low=("low", "min"), Close=("close", "last"), Volume=("tick_volume", "sum")
+    )
+    reference = reference[reference.index.dayofweek < 5]
+    np.testing.assert_allclose(daily.to_numpy(dtype=float), reference.to_numpy(dtype=float))
+
+
+def test_h1_features_without_spread_are_nan():
+    features = h1_daily_intraday_features(_h1_frame(with_spread=False), use_cache=False)
+    assert features["h1_spread_mean"].isna().all()
+    assert features.drop(columns="h1_spread_mean").notna().all().all()
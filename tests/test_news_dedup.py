@@ -0,0 +1,128 @@
+"""``ArticleIndex``: Segment-Merge, Persistenz und erstes Vorkommen bei ``add_new``."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.news_dedup import NO_ARTICLE_ID, ArticleIndex, article_ids
+from src.data.news_store import NewsDayStore
+from src.data.prepare_eodhd_news import build_daily_features
+
+
+def _reference_keep(history: list[np.ndarray]) -> list[np.ndarray]:
+    """Erstes Vorkommen über alle Blöcke per Python-Set (ID 0 immer behalten)."""
+    seen: set[int] = set()
+    out = []
+    for ids in history:
+        keep = np.zeros(len(ids), dtype=bool)
+        for i, value in enumerate(ids.tolist()):
+            if value == NO_ARTICLE_ID or value not in seen:
+                keep[i] = True
+                if value != NO_ARTICLE_ID:
+                    seen.add(value)
+        out.append(keep)
+    return out
+
+
+def test_add_new_matches_set_reference_across_segment_merges():
+    rng = np.random.default_rng(3)
+    index = ArticleIndex()
+    blocks = [rng.integers(0, 400, size=n, dtype=np.uint64) for n in (1, 1, 2, 5, 3, 40, 1, 17, 64, 9, 128, 2)]
+    expected = _reference_keep(blocks)
+    for ids, keep in zip(blocks, expected):
+        np.testing.assert_array_equal(index.add_new(ids), keep)
+        # Segmente: sortiert, eindeutig, disjunkt; Größen fallen (binärer Zähler).
+        segments = index._pending
+        assert all((np.diff(seg.astype(np.int64)) > 0).all() for seg in segments)
+        assert all(len(a) > len(b) for a, b in zip(segments, segments[1:]))
+        merged = np.concatenate(segments)
+        assert len(np.unique(merged)) == len(merged) == len(index)
+
+    unique = {int(v) for ids in blocks for v in ids.tolist()} - {0}
+    assert len(index) == len(unique)
+    np.testing.assert_array_equal(index.contains(np.array(sorted(unique), dtype=np.uint64)), True)
+    assert not index.contains(np.array([401, 10_000], dtype=np.uint64)).any()
+
+
+def test_add_new_keeps_first_occurrence_within_block():
+    index = ArticleIndex()
+    ids = np.array([7, 3, 7, 0, 3, 0, 9, 7], dtype=np.uint64)
+    np.testing.assert_array_equal(index.add_new(ids), [True, True, False, True, False, True, True, False])
+    np.testing.assert_array_equal(index.add_new(np.array([9, 0, 11, 11], dtype=np.uint64)), [False, True, True, False])
+    assert len(index) == 4  # 3, 7, 9, 11 – ID 0 wird nie aufgenommen
+
+
+def test_persistence_round_trip(tmp_path):
+    path = tmp_path / "articles.npy"
+    index = ArticleIndex(path)
+    index.add_new(np.array([5, 1, 9], dtype=np.uint64))
+    index.add_new(np.array([2, 5], dtype=np.uint64))
+    index.save()
+
+    stored = np.load(path)
+    np.testing.assert_array_equal(stored, [1, 2, 5, 9])
+    assert stored.dtype == np.uint64
+
+    reloaded = ArticleIndex(path)
+    assert len(reloaded) == 4
+    np.testing.assert_array_equal(reloaded.add_new(np.array([9, 3, 1, 3], dtype=np.uint64)), [False, True, False, False])
+    reloaded.save()
+    np.testing.assert_array_equal(np.load(path), [1, 2, 3, 5, 9])
+
+    mtime = path.stat().st_mtime_ns
+    ArticleIndex(path).save()  # nichts Neues → Datei bleibt unangetastet
+    assert path.stat().st_mtime_ns == mtime
+
+    with pytest.raises(ValueError):
+        ArticleIndex().save()
+
+
+def test_article_ids_normalize_title_and_timezone():
+    ids = article_ids(
+        pd.Series(["2024-01-01T10:00:00+02:00", "2024-01-01T08:00:00Z", "2024-01-01T08:00:00Z", None]),
+        pd.Series(["  Euro  RISES ", "euro rises", "euro falls", None]),
+        pd.Series(["l", "l", "l", None]),
+    )
+    assert ids[0] == ids[1] != ids[2]
+    assert ids[3] == NO_ARTICLE_ID
+
+
+def _dump(path, days: list[str], hours: range) -> None:
+    records = [
+        {
+            "date": f"{day}T{h:02d}:00:00+00:00",
+            "title": f"EUR news {day} {h}",
+            "link": f"https://example.com/{day}/{h}",
+            "sentiment": {"polarity": h / 24, "neg": 0.1, "neu": 0.8, "pos": 0.1},
+        }
+        for day in days
+        for h in hours
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+
+
+def test_overlapping_dumps_and_same_file_twice(tmp_path):
+    first, second, copy = tmp_path / "a.jsonl", tmp_path / "b.jsonl", tmp_path / "a_copy.jsonl"
+    _dump(first, ["2024-02-01", "2024-02-02"], range(0, 12))
+    _dump(second, ["2024-02-02", "2024-02-03"], range(6, 18))  # überlappt am 2024-02-02 06–11 Uhr
+    copy.write_bytes(first.read_bytes())
+
+    store = NewsDayStore(tmp_path / "store")
+    store.ingest(first)
+    store.ingest(second)
+    before = store.daily_features()
+
+    union = tmp_path / "union.jsonl"
+    union.write_text(first.read_text(encoding="utf-8") + second.read_text(encoding="utf-8"), encoding="utf-8")
+    expected = build_daily_features(union, dedup=True)
+    pd.testing.assert_frame_equal(before, expected)
+    assert list(before["article_count"]) == [12, 18, 12]
+
+    # Derselbe Inhalt noch einmal (andere Datei) – Zähler und avg_* bleiben gleich.
+    assert store.ingest(copy) == 0
+    pd.testing.assert_frame_equal(NewsDayStore(tmp_path / "store").daily_features(), before)
+    assert len(store.articles()) == 42
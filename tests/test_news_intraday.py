@@ -0,0 +1,146 @@
+"""Stunden-/Session-News-Features gegen eine ``groupby``-Referenz."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.mt5_h1 import session_date_index
+from src.data.news_intraday import (
+    HourlyNewsAggregator,
+    build_hourly_partials,
+    hourly_news_features,
+    session_news_features,
+)
+from src.data.prepare_eodhd_news import SENTIMENT_KEYS, build_daily_features, iter_news_chunks
+
+LAST_HOURS = (1, 4, 24)
+
+
+def _articles(n: int = 400, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # Über ~3 Wochen, gehäuft um einzelne Stunden, mit Lücken von mehreren Tagen.
+    base = pd.Timestamp("2024-02-26")
+    offsets = np.concatenate([rng.integers(0, 8 * 24 * 60, n // 2), rng.integers(13 * 24 * 60, 21 * 24 * 60, n - n // 2)])
+    stamps = base + pd.to_timedelta(np.sort(offsets), unit="min")
+    df = pd.DataFrame({"ts": stamps, "title": [f"t{k}" for k in range(n)]})
+    df.loc[rng.random(n) < 0.1, "title"] = None
+    for key in SENTIMENT_KEYS:
+        values = rng.normal(0.0, 0.5, n)
+        values[rng.random(n) < 0.15] = np.nan
+        df[key] = values
+    return df
+
+
+def _write_jsonl(df: pd.DataFrame, path) -> None:
+    zones = ["+00:00", "+02:00", "-05:00"]
+    with path.open("w", encoding="utf-8") as fh:
+        for k, row in enumerate(df.itertuples(index=False)):
+            tz = zones[k % len(zones)]
+            local = row.ts + pd.Timedelta(tz[:3] + " hours")
+            record = {"date": local.strftime("%Y-%m-%dT%H:%M:%S") + tz, "link": f"l{k}"}
+            if row.title is not None:
+                record["title"] = row.title
+            sentiment = {key: getattr(row, key) for key in SENTIMENT_KEYS if not np.isnan(getattr(row, key))}
+            if sentiment:
+                record["sentiment"] = sentiment
+            fh.write(json.dumps(record) + "\n")
+
+
+def _reference_sessions(df: pd.DataFrame, cut_hour: int, clock_offset: int) -> pd.DataFrame:
+    ts = df["ts"] + pd.Timedelta(hours=clock_offset)
+    df = df.assign(
+        ts=ts,
+        session=session_date_index(pd.DatetimeIndex(ts), cut_hour=cut_hour),
+        hour=ts.dt.floor("h"),
+    )
+
+    def features(group: pd.DataFrame, prefix: str) -> pd.DataFrame:
+        agg = group.groupby("session").agg(
+            article_count=("title", "count"), **{f"avg_{k}": (k, "mean") for k in SENTIMENT_KEYS}
+        )
+        return agg.add_prefix(prefix)
+
+    out = features(df, "news_session_")
+    session_end = df["session"] + pd.Timedelta(days=1, hours=cut_hour)
+    for w in LAST_HOURS:
+        recent = df[df["ts"] >= session_end - pd.Timedelta(hours=w)]
+        last = features(recent, f"news_last{w}h_").reindex(out.index)
+        last[f"news_last{w}h_article_count"] = last[f"news_last{w}h_article_count"].fillna(0)
+        out = out.join(last)
+    out["news_session_active_hours"] = df.groupby("session")["hour"].nunique()
+    per_hour = df.groupby(["session", "hour"])["title"].count()
+    out["news_session_peak_hour_count"] = per_hour.groupby(level="session").max()
+    return out.rename_axis("date").reset_index()
+
+
+def _assert_frames(got: pd.DataFrame, expected: pd.DataFrame) -> None:
+    assert list(got.columns) == list(expected.columns)
+    np.testing.assert_array_equal(got["date"].to_numpy(dtype="M8[ns]"), expected["date"].to_numpy(dtype="M8[ns]"))
+    for col in got.columns.drop("date"):
+        np.testing.assert_allclose(
+            got[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float), rtol=1e-9, atol=1e-12, err_msg=col
+        )
+
+
+@pytest.fixture(scope="module")
+def articles() -> pd.DataFrame:
+    return _articles()
+
+
+@pytest.fixture
+def news_file(tmp_path, articles):
+    path = tmp_path / "news.jsonl"
+    _write_jsonl(articles, path)
+    return path
+
+
+@pytest.mark.parametrize("cut_hour", [0, 1, 7, 17, 22, 23])
+@pytest.mark.parametrize("clock_offset", [-5, 0, 2, 3])
+def test_session_features_match_groupby_reference(news_file, articles, cut_hour, clock_offset):
+    parts = build_hourly_partials(news_file, clock_offset_hours=clock_offset, dedup=False)
+    got = session_news_features(parts, cut_hour=cut_hour, last_hours=LAST_HOURS)
+    _assert_frames(got, _reference_sessions(articles, cut_hour, clock_offset))
+
+
+@pytest.mark.parametrize("clock_offset", [0, 2])
+def test_hourly_partials_merge_across_chunks(news_file, articles, clock_offset):
+    agg = HourlyNewsAggregator(clock_offset_hours=clock_offset)
+    for chunk in iter_news_chunks(news_file, engine="json", chunk_rows=37):
+        agg.update(chunk)
+    hourly = hourly_news_features(agg.partials())
+
+    ts = articles["ts"] + pd.Timedelta(hours=clock_offset)
+    expected = (
+        articles.assign(hour=ts.dt.floor("h"))
+        .groupby("hour")
+        .agg(article_count=("title", "count"), **{f"avg_{k}": (k, "mean") for k in SENTIMENT_KEYS})
+        .reset_index()
+    )
+    expected = expected.rename(columns={"hour": "date"})
+    _assert_frames(hourly.rename(columns={"hour": "date"}), expected)
+    pd.testing.assert_frame_equal(agg.partials(), build_hourly_partials(news_file, clock_offset_hours=clock_offset, dedup=False))
+
+
+def test_cut_hour_zero_matches_daily_features(news_file):
+    daily = build_daily_features(news_file, dedup=False)
+    sessions = session_news_features(build_hourly_partials(news_file, dedup=False), cut_hour=0)
+    np.testing.assert_array_equal(
+        sessions["date"].to_numpy(dtype="M8[ns]"), pd.to_datetime(daily["date"]).to_numpy(dtype="M8[ns]")
+    )
+    np.testing.assert_array_equal(sessions["news_session_article_count"], daily["article_count"])
+    for key in SENTIMENT_KEYS:
+        np.testing.assert_allclose(sessions[f"news_session_avg_{key}"], daily[f"avg_{key}"], rtol=1e-9, atol=1e-12)
+
+
+def test_invalid_arguments(news_file):
+    parts = build_hourly_partials(news_file, dedup=False)
+    with pytest.raises(ValueError):
+        session_news_features(parts, cut_hour=24)
+    with pytest.raises(ValueError):
+        session_news_features(parts, last_hours=[0])
+    empty = session_news_features(parts.iloc[:0], cut_hour=5, last_hours=LAST_HOURS)
+    assert empty.empty and "news_last24h_article_count" in empty.columns
@@ -0,0 +1,146 @@
+"""News-Store: Manifest/Offsets, Erkennung umgeschriebener Dateien und Monats-Merge."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import news_store
+from src.data.news_store import NewsDayStore, refresh_news_store
+from src.data.prepare_eodhd_news import NEWS_ENGINES, ORJSON_AVAILABLE, PYARROW_JSON_AVAILABLE, build_daily_features
+
+ENGINES = [
+    pytest.param(engine, marks=pytest.mark.skipif(not available, reason=f"{engine} fehlt"))
+    for engine, available in zip(NEWS_ENGINES, (PYARROW_JSON_AVAILABLE, ORJSON_AVAILABLE, True))
+]
+
+
+def _line(day: str, k: int, polarity: float = 0.1) -> str:
+    record = {
+        "date": f"{day}T{k % 24:02d}:00:00+00:00",
+        "title": f"news {day} {k}",
+        "link": f"https://example.com/{day}/{k}",
+        "sentiment": {"polarity": polarity, "neg": 0.1, "neu": 0.8, "pos": 0.1},
+    }
+    return json.dumps(record) + "\n"
+
+
+def _lines(days: list[str], per_day: int = 3) -> list[str]:
+    return [_line(day, k, polarity=(k + 1) / 10) for day in days for k in range(per_day)]
+
+
+def _assert_same(got: pd.DataFrame, expected: pd.DataFrame) -> None:
+    assert list(got["date"]) == list(expected["date"])
+    np.testing.assert_array_equal(got["article_count"], expected["article_count"])
+    cols = [c for c in expected.columns if c.startswith("avg_")]
+    np.testing.assert_allclose(got[cols].to_numpy(dtype=float), expected[cols].to_numpy(dtype=float), rtol=1e-12)
+
+
+def _manifest(store: NewsDayStore) -> dict:
+    return json.loads(store.manifest_path.read_text(encoding="utf-8"))["files"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_incremental_ingest_matches_full_build(tmp_path, engine):
+    path = tmp_path / "news.jsonl"
+    store = NewsDayStore(tmp_path / "store")
+    lines = _lines(["2024-01-30", "2024-01-31", "2024-02-01", "2024-02-02"])
+
+    path.write_text("".join(lines[:5]), encoding="utf-8")
+    assert store.ingest(path, engine=engine) == 5
+    entry = _manifest(store)[str(path.resolve())]
+    assert entry["offset"] == path.stat().st_size
+    assert store.ingest(path, engine=engine) == 0  # nichts Neues
+
+    with path.open("a", encoding="utf-8") as fh:
+        fh.writelines(lines[5:])
+    assert store.pending(path) == (entry["offset"], path.stat().st_size)
+    assert store.ingest(path, engine=engine) == len(lines) - 5
+    assert _manifest(store)[str(path.resolve())]["offset"] == path.stat().st_size
+
+    # Tag 2024-01-31 steckt in beiden Durchläufen → Monat 2024-01 wurde addiert, 2024-02 neu angelegt.
+    assert store.months() == ["2024-01", "2024-02"]
+    _assert_same(store.daily_features(), build_daily_features(path, engine=engine))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_half_written_line_is_left_for_next_refresh(tmp_path, engine):
+    path = tmp_path / "news.jsonl"
+    store = NewsDayStore(tmp_path / "store")
+    lines = _lines(["2024-03-01", "2024-03-02"])
+    complete = "".join(lines[:-1])
+    path.write_text(complete + lines[-1][:25], encoding="utf-8")
+
+    assert store.ingest(path, engine=engine) == len(lines) - 1
+    assert _manifest(store)[str(path.resolve())]["offset"] == len(complete.encode("utf-8"))
+
+    path.write_text(complete + lines[-1], encoding="utf-8")  # Zeile fertig geschrieben
+    assert store.ingest(path, engine=engine) == 1
+    _assert_same(store.daily_features(), build_daily_features(path, engine=engine))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_lines_appended_during_ingest_are_read_next_time(tmp_path, monkeypatch, engine):
+    path = tmp_path / "news.jsonl"
+    store = NewsDayStore(tmp_path / "store")
+    lines = _lines(["2024-03-01", "2024-03-02", "2024-03-03"])
+    path.write_text("".join(lines[:4]), encoding="utf-8")
+    size_before = path.stat().st_size
+
+    iter_chunks = news_store.iter_news_chunks
+
+    def append_then_read(*args, **kwargs):
+        with path.open("a", encoding="utf-8") as fh:  # Downloader schreibt parallel weiter
+            fh.writelines(lines[4:])
+        yield from iter_chunks(*args, **kwargs)
+
+    monkeypatch.setattr(news_store, "iter_news_chunks", append_then_read)
+    assert store.ingest(path, engine=engine) == 4
+    assert _manifest(store)[str(path.resolve())]["offset"] == size_before
+
+    monkeypatch.setattr(news_store, "iter_news_chunks", iter_chunks)
+    assert store.ingest(path, engine=engine) == len(lines) - 4
+    _assert_same(store.daily_features(), build_daily_features(path, engine=engine))
+
+
+def test_rewritten_file_is_detected(tmp_path):
+    path = tmp_path / "news.jsonl"
+    store = NewsDayStore(tmp_path / "store")
+    lines = _lines(["2024-04-01", "2024-04-02"])
+    path.write_text("".join(lines), encoding="utf-8")
+    store.ingest(path)
+
+    path.write_text("".join(lines).replace("news 2024-04-01 0", "NEWS 2024-04-01 0"), encoding="utf-8")
+    with pytest.raises(ValueError, match="--rebuild"):
+        store.pending(path)
+
+    path.write_text("".join(lines[:-1]), encoding="utf-8")  # gekürzt
+    with pytest.raises(ValueError, match="--rebuild"):
+        store.ingest(path)
+
+    features = refresh_news_store([path], store=store, rebuild=True)
+    _assert_same(features, build_daily_features(path))
+
+
+def test_overlapping_files_and_month_merge(tmp_path):
+    store = NewsDayStore(tmp_path / "store")
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    first.write_text("".join(_lines(["2024-05-30", "2024-05-31"])), encoding="utf-8")
+    # Überlappender Dump: 2024-05-31 doppelt, dazu Juni.
+    second.write_text("".join(_lines(["2024-05-31", "2024-06-01"], per_day=4)), encoding="utf-8")
+
+    features = refresh_news_store([first, second], store=store)
+    combined = tmp_path / "combined.jsonl"
+    combined.write_text(first.read_text(encoding="utf-8") + second.read_text(encoding="utf-8"), encoding="utf-8")
+    _assert_same(features, build_daily_features(combined))
+    assert features.set_index("date").loc[pd.Timestamp("2024-05-31").date(), "article_count"] == 4
+
+    may = store.read_month("2024-05")
+    assert list(may.index) == [pd.Timestamp("2024-05-30"), pd.Timestamp("2024-05-31")]
+    assert may["article_count"].dtype == np.int64
+    assert store.read_month("2024-07").empty
+    _assert_same(store.daily_features(), features)
+    assert len(store.partials(start="2024-06")) == 1
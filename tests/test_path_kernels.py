@@ -0,0 +1,370 @@
+"""Paritaet der Labeler auf dem gemeinsamen First-Crossing-Kernel.
+
+Die Referenzen ``_ref_*`` sind die Zeilen-Schleifen von vor dem Refactoring
+(``_label_eurusd_core``, ``label_eurusd_from_daily_and_h1``, ``label_eurusd_trade``),
+auf das Label-Ergebnis reduziert. Jede Kombination laeuft mit Numba und mit dem
+NumPy-Fallback von ``src.data.path_kernels``.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import path_kernels
+from src.data.label_eurusd import label_eurusd_from_daily_and_h1, label_eurusd_from_daily_prices
+from src.data.mt5_h1 import session_date_index
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# (hit_within_horizon, first_hit_wins)
+HIT_MODES = [(False, False), (True, False), (True, True)]
+
+
+@pytest.fixture(params=["numba", "numpy"])
+def engine(request, monkeypatch):
+    if request.param == "numba":
+        if not path_kernels.NUMBA_AVAILABLE:
+            pytest.skip("numba nicht installiert")
+    else:
+        monkeypatch.setattr(path_kernels, "NUMBA_AVAILABLE", False)
+    return request.param
+
+
+def _h1_bars(n_days: int = 160, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2020-01-06", periods=n_days * 24, freq="h")
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0.0, 0.0012, idx.size)))
+    open_ = np.r_[1.1, close[:-1]]
+    spread = np.abs(rng.normal(0.0, 0.0008, idx.size))
+    # Einzelne Spike-Stunden, in denen beide Schwellen in derselben Bar fallen (Tie-Breaker).
+    spread[rng.random(idx.size) < 0.02] *= 12.0
+    h1 = pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) + spread,
+            "low": np.minimum(open_, close) - spread,
+            "close": close,
+        },
+        index=idx,
+    )
+    # Luecken: einzelne Stunden und ein ganzer Tag ohne Bars.
+    drop = rng.random(idx.size) < 0.03
+    drop |= (idx >= "2020-02-12") & (idx < "2020-02-13")
+    return h1[~drop]
+
+
+def _daily_from_h1(h1: pd.DataFrame, cut_hour: int = 0) -> pd.DataFrame:
+    session = session_date_index(h1.index, cut_hour=cut_hour)
+    daily = h1.groupby(session).agg(Open=("open", "first"), High=("high", "max"), Low=("low", "min"), Close=("close", "last"))
+    daily.index.name = "Date"
+    return daily[daily.index.dayofweek < 5]
+
+
+def _ref_daily_labels(
+    df: pd.DataFrame,
+    *,
+    horizon_days: int,
+    up_threshold: float,
+    down_threshold: float,
+    strict_monotonic: bool,
+    max_adverse_move_pct: float | None,
+    hit_within_horizon: bool,
+    first_hit_wins: bool,
+    hit_source: str,
+    intraday_tie_breaker: str,
+) -> np.ndarray:
+    close = df["Close"].to_numpy()
+    high = df["High"].to_numpy()
+    low = df["Low"].to_numpy()
+    hl = hit_source == "hl"
+    n = len(close)
+    labels = np.full(n, "neutral", dtype=object)
+    for i in range(n - horizon_days):
+        end = i + horizon_days
+        segment = close[i : end + 1]
+        start = segment[0]
+        diffs = np.diff(segment)
+        up_mono = not strict_monotonic or bool(np.all(diffs > 0))
+        down_mono = not strict_monotonic or bool(np.all(diffs < 0))
+        lo = low[i + 1 : end + 1].min() if hl else segment.min()
+        hi = high[i + 1 : end + 1].max() if hl else segment.max()
+        if max_adverse_move_pct is not None:
+            up_mono &= lo >= start * (1 - max_adverse_move_pct)
+            down_mono &= hi <= start * (1 + max_adverse_move_pct)
+
+        if not hit_within_horizon:
+            ret = (close[end] - start) / start
+            up, down = ret >= up_threshold and up_mono, ret <= down_threshold and down_mono
+        elif not first_hit_wins:
+            up = hi >= start * (1 + up_threshold) and up_mono
+            down = lo <= start * (1 + down_threshold) and down_mono
+        else:
+            up = down = False
+            up_idx = down_idx = None
+            for j in range(1, horizon_days + 1):
+                h_j, l_j = (high[i + j], low[i + j]) if hl else (segment[j], segment[j])
+                if up_idx is None and h_j >= start * (1 + up_threshold):
+                    up_idx = j
+                if down_idx is None and l_j <= start * (1 + down_threshold):
+                    down_idx = j
+            if up_idx is not None or down_idx is not None:
+                if down_idx is None or (up_idx is not None and up_idx < down_idx):
+                    winner, hit = "up", up_idx
+                elif up_idx is None or down_idx < up_idx:
+                    winner, hit = "down", down_idx
+                else:
+                    winner, hit = intraday_tie_breaker, up_idx
+                sub = segment[: hit + 1]
+                ok = not strict_monotonic or bool(np.all(np.diff(sub) > 0 if winner == "up" else np.diff(sub) < 0))
+                if max_adverse_move_pct is not None:
+                    if winner == "up":
+                        ok &= (low[i + 1 : i + hit + 1].min() if hl else sub.min()) >= start * (1 - max_adverse_move_pct)
+                    else:
+                        ok &= (high[i + 1 : i + hit + 1].max() if hl else sub.max()) <= start * (1 + max_adverse_move_pct)
+                up, down = winner == "up" and ok, winner == "down" and ok
+        if up:
+            labels[i] = "up"
+        if down:
+            labels[i] = "down"
+    return labels[: n - horizon_days]
+
+
+def _ref_h1_labels(
+    daily: pd.DataFrame,
+    h1: pd.DataFrame,
+    *,
+    cut_hour: int,
+    horizon_days: int,
+    up_threshold: float,
+    down_threshold: float,
+    strict_monotonic: bool,
+    max_adverse_move_pct: float | None,
+    hit_within_horizon: bool,
+    first_hit_wins: bool,
+    intraday_tie_breaker: str,
+) -> np.ndarray:
+    h1_days = session_date_index(h1.index, cut_hour=cut_hour).to_numpy(dtype="datetime64[ns]").view("int64")
+    h1_high = h1["high"].to_numpy()
+    h1_low = h1["low"].to_numpy()
+    bounds: dict[int, list[int]] = {}
+    for k, key in enumerate(h1_days):
+        bounds.setdefault(int(key), [k, k])[1] = k + 1
+    close = daily["Close"].to_numpy()
+    days = daily.index.to_numpy(dtype="datetime64[ns]").view("int64")
+    n = len(close)
+    labels = np.full(n, "neutral", dtype=object)
+    for i in range(n - horizon_days):
+        end = i + horizon_days
+        start = close[i]
+        up_level, down_level = start * (1 + up_threshold), start * (1 + down_threshold)
+        diffs = np.diff(close[i : end + 1])
+        up_mono = not strict_monotonic or bool(np.all(diffs > 0))
+        down_mono = not strict_monotonic or bool(np.all(diffs < 0))
+        sessions = [bounds[int(days[i + d])] for d in range(1, horizon_days + 1) if int(days[i + d]) in bounds]
+        up = down = False
+        if hit_within_horizon and first_hit_wins:
+            lo_so_far, hi_so_far = np.inf, -np.inf
+            for d in range(1, horizon_days + 1):
+                if int(days[i + d]) not in bounds:
+                    continue
+                s, e = bounds[int(days[i + d])]
+                hit_found = False
+                for k in range(s, e):
+                    lo_so_far, hi_so_far = min(lo_so_far, h1_low[k]), max(hi_so_far, h1_high[k])
+                    up_t, down_t = h1_high[k] >= up_level, h1_low[k] <= down_level
+                    if not (up_t or down_t):
+                        continue
+                    winner = intraday_tie_breaker if (up_t and down_t) else ("up" if up_t else "down")
+                    sub = np.diff(close[i : i + d + 1])
+                    ok = not strict_monotonic or bool(np.all(sub > 0 if winner == "up" else sub < 0))
+                    if max_adverse_move_pct is not None:
+                        if winner == "up":
+                            ok &= lo_so_far >= start * (1 - max_adverse_move_pct)
+                        else:
+                            ok &= hi_so_far <= start * (1 + max_adverse_move_pct)
+                    up, down = winner == "up" and ok, winner == "down" and ok
+                    hit_found = True
+                    break
+                if hit_found:
+                    break
+        else:
+            lo = min((h1_low[s:e].min() for s, e in sessions), default=np.inf)
+            hi = max((h1_high[s:e].max() for s, e in sessions), default=-np.inf)
+            if max_adverse_move_pct is not None and np.isfinite(lo) and np.isfinite(hi):
+                up_mono &= lo >= start * (1 - max_adverse_move_pct)
+                down_mono &= hi <= start * (1 + max_adverse_move_pct)
+            if hit_within_horizon:
+                up, down = hi >= up_level and up_mono, lo <= down_level and down_mono
+            else:
+                ret = (close[end] - start) / start
+                up, down = ret >= up_threshold and up_mono, ret <= down_threshold and down_mono
+        if up:
+            labels[i] = "up"
+        if down:
+            labels[i] = "down"
+    return labels[: n - horizon_days]
+
+
+@pytest.mark.parametrize(
+    "horizon_days,strict_monotonic,max_adverse_move_pct,hit_mode,hit_source,tie",
+    list(product([2, 4], [True, False], [None, 0.004], HIT_MODES, ["close", "hl"], ["down", "up"])),
+)
+def test_daily_labels_match_reference(engine, horizon_days, strict_monotonic, max_adverse_move_pct, hit_mode, hit_source, tie):
+    daily = _daily_from_h1(_h1_bars())
+    opts = dict(
+        horizon_days=horizon_days,
+        up_threshold=0.006,
+        down_threshold=-0.006,
+        strict_monotonic=strict_monotonic,
+        max_adverse_move_pct=max_adverse_move_pct,
+        hit_within_horizon=hit_mode[0],
+        first_hit_wins=hit_mode[1],
+        hit_source=hit_source,
+        intraday_tie_breaker=tie,
+    )
+    out = label_eurusd_from_daily_prices(daily, **opts)
+    expected = _ref_daily_labels(daily, **opts)
+    assert (out["label"].to_numpy() == expected).all()
+
+
+@pytest.mark.parametrize(
+    "cut_hour,horizon_days,strict_monotonic,max_adverse_move_pct,hit_mode,tie",
+    list(product([0, 22], [2, 4], [True, False], [None, 0.004], HIT_MODES, ["down", "up"])),
+)
+def test_h1_labels_match_reference(engine, cut_hour, horizon_days, strict_monotonic, max_adverse_move_pct, hit_mode, tie):
+    h1 = _h1_bars(seed=1)
+    daily = _daily_from_h1(h1, cut_hour)
+    opts = dict(
+        horizon_days=horizon_days,
+        up_threshold=0.005,
+        down_threshold=-0.005,
+        strict_monotonic=strict_monotonic,
+        max_adverse_move_pct=max_adverse_move_pct,
+        hit_within_horizon=hit_mode[0],
+        first_hit_wins=hit_mode[1],
+        intraday_tie_breaker=tie,
+    )
+    out = label_eurusd_from_daily_and_h1(daily, h1, cut_hour=cut_hour, **opts)
+    expected = _ref_h1_labels(daily, h1, cut_hour=cut_hour, **opts)
+    assert (out["label"].to_numpy() == expected).all()
+
+
+def _trade_module():
+    # archive/ ist kein Paket; Modul direkt aus der Datei laden (einmal pro Lauf).
+    name = "archive_label_eurusd_trade"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, ROOT / "archive" / "src" / "data" / "label_eurusd_trade.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+def _ref_trade_labels(df: pd.DataFrame, params, atr: pd.Series | None) -> tuple[np.ndarray, np.ndarray]:
+    o, h, l, c = (df[col].to_numpy() for col in ("Open", "High", "Low", "Close"))
+    n = len(df)
+    labels = np.full(n, "neutral", dtype=object)
+    offsets = np.full(n, -1)
+
+    def first_outcome(tp_hit: bool, sl_hit: bool) -> str | None:
+        if tp_hit and sl_hit:
+            return "tp" if params.intraday_tie_breaker == "tp" else "sl"
+        return "tp" if tp_hit else ("sl" if sl_hit else None)
+
+    for i in range(n):
+        entry_idx = i if params.entry == "close" else i + 1
+        end_idx = i + params.horizon_days
+        if entry_idx >= n or end_idx >= n:
+            continue
+        ent = c[entry_idx] if params.entry == "close" else o[entry_idx]
+        if not np.isfinite(ent) or ent <= 0:
+            continue
+        if params.sl_mode == "fixed_pct":
+            sl_pct = params.sl_pct
+        elif params.sl_mode == "atr":
+            if not np.isfinite(atr.iloc[entry_idx]):
+                continue
+            sl_pct = params.atr_mult * atr.iloc[entry_idx] / ent
+        else:
+            sl_pct = None
+        tp_long, tp_short = ent * (1 + params.tp_pct), ent * (1 - params.tp_pct)
+        sl_long = ent * (1 - sl_pct) if sl_pct is not None else -np.inf
+        sl_short = ent * (1 + sl_pct) if sl_pct is not None else np.inf
+        long_hit = short_hit = None
+        for j in range(i + 1, end_idx + 1):
+            out = first_outcome(h[j] >= tp_long, l[j] <= sl_long)
+            if long_hit is None and out is not None:
+                long_hit = (j, out)
+            out = first_outcome(l[j] <= tp_short, h[j] >= sl_short)
+            if short_hit is None and out is not None:
+                short_hit = (j, out)
+        cand = []
+        if long_hit is not None and long_hit[1] == "tp":
+            cand.append(("up", long_hit[0]))
+        if short_hit is not None and short_hit[1] == "tp":
+            cand.append(("down", short_hit[0]))
+        chosen = None
+        if len(cand) == 1:
+            chosen = cand[0]
+        elif len(cand) == 2:
+            cand.sort(key=lambda x: x[1])
+            if cand[0][1] < cand[1][1]:
+                chosen = cand[0]
+            elif params.conflict_policy != "neutral":
+                chosen = next(x for x in cand if x[0] == "down")
+        if chosen is not None:
+            labels[i], offsets[i] = chosen[0], chosen[1] - i
+    return labels, offsets
+
+
+@pytest.mark.parametrize(
+    "horizon_days,entry,sl_mode,tie,conflict",
+    list(product([3, 10], ["close", "next_open"], ["fixed_pct", "atr", "none"], ["stop", "tp"], ["first", "neutral", "prefer_down"])),
+)
+def test_trade_labels_match_reference(engine, monkeypatch, horizon_days, entry, sl_mode, tie, conflict):
+    module = _trade_module()
+    daily = _daily_from_h1(_h1_bars(seed=2))
+    daily["Volume"] = 0.0
+    monkeypatch.setattr(module, "_load_prices", lambda **_: daily.copy())
+    params = module.TradeLabelParams(
+        horizon_days=horizon_days,
+        entry=entry,
+        tp_pct=0.008,
+        sl_mode=sl_mode,
+        sl_pct=0.005,
+        atr_window=5,
+        intraday_tie_breaker=tie,
+        conflict_policy=conflict,
+    )
+    out = module.label_eurusd_trade(params=params)
+    atr = module._atr_sma(daily, params.atr_window) if sl_mode == "atr" else None
+    labels, offsets = _ref_trade_labels(daily, params, atr)
+    labels, offsets = labels[: len(out)], offsets[: len(out)]  # ohne Zeilen am Ende (kein Lookahead)
+    assert (out["label"].to_numpy() == labels).all()
+    assert (out["hit_offset"].to_numpy() == offsets).all()
+
+
+@pytest.mark.parametrize("above", [True, False])
+def test_first_crossing_backends_agree(above):
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=500)
+    values[rng.random(500) < 0.05] = np.nan
+    start = rng.integers(0, 500, 300)
+    stop = start + rng.integers(0, 20, 300)
+    stop[:10] = start[:10]  # leere Bereiche
+    stop = np.minimum(stop, 500)
+    level = rng.normal(size=300)
+    expected = path_kernels.first_crossing(values, start, stop, level, above=above, engine="numpy")
+    for i in range(300):
+        window = values[start[i] : stop[i]]
+        hits = np.nonzero(window >= level[i] if above else window <= level[i])[0]
+        assert expected[i] == (start[i] + hits[0] if hits.size else -1)
+    if path_kernels.NUMBA_AVAILABLE:
+        np.testing.assert_array_equal(path_kernels.first_crossing(values, start, stop, level, above=above, engine="numba"), expected)
@@ -0,0 +1,133 @@
+"""Streaming-Tagesaggregation der EODHD-News gegen die alte ``apply(pd.Series)``-Aggregation."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.prepare_eodhd_news import (
+    NEWS_ENGINES,
+    ORJSON_AVAILABLE,
+    PYARROW_JSON_AVAILABLE,
+    SENTIMENT_KEYS,
+    DailyNewsAggregator,
+    build_daily_features,
+    iter_news_chunks,
+)
+
+# Fehlendes/leeres/teilweises Sentiment, fehlender Titel, Zeitzonen über Mitternacht,
+# Leerzeilen (auch am Ende) und ein Tag ganz ohne Sentiment-Werte.
+NEWS_JSONL = "\n".join(
+    [
+        '{"date": "2024-03-01T08:00:00+00:00", "title": "a", "link": "l1", "content": "x", '
+        '"sentiment": {"polarity": 0.5, "neg": 0.1, "neu": 0.7, "pos": 0.2}}',
+        '{"date": "2024-03-01T23:30:00-02:00", "title": "b", "link": "l2", '
+        '"sentiment": {"polarity": -0.25, "neg": 0.4, "neu": 0.5, "pos": 0.1}}',
+        "",
+        '{"date": "2024-03-02T00:10:00+02:00", "title": "c", "link": "l3", "sentiment": null}',
+        '{"date": "2024-03-02T09:00:00+00:00", "link": "l4", "sentiment": {"polarity": 0.1}}',
+        "   ",
+        '{"date": "2024-03-03T10:00:00+00:00", "title": "d", "link": "l5", "sentiment": {}}',
+        '{"date": "2024-03-03T11:00:00+00:00", "title": "e", "link": "l6"}',
+        '{"date": "2024-03-04T12:00:00Z", "title": "f", "link": "l7", '
+        '"sentiment": {"polarity": 0.9, "neg": 0.0, "neu": 0.1, "pos": 0.9}}',
+        '{"date": "2024-03-04T13:00:00Z", "title": "g", "link": "l8", '
+        '"sentiment": {"polarity": 0.3, "neg": 0.2, "neu": 0.6, "pos": 0.2}}',
+        "",
+        "",
+    ]
+)
+
+
+def _engines() -> list[str]:
+    available = {"pyarrow": PYARROW_JSON_AVAILABLE, "orjson": ORJSON_AVAILABLE, "json": True}
+    return [
+        pytest.param(engine, marks=pytest.mark.skipif(not available[engine], reason=f"{engine} fehlt"))
+        for engine in NEWS_ENGINES
+    ]
+
+
+def _reference(text: str) -> pd.DataFrame:
+    """Bisherige Aggregation (``json.loads`` je Zeile, ``apply(pd.Series)``, ``groupby(day)``)."""
+    rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    df = pd.DataFrame(rows)
+    df["date"] = pd.to_datetime(df["date"], utc=True, format="ISO8601")
+    df["day"] = df["date"].dt.tz_convert("UTC").dt.date
+    # Fehlende Sentiment-Dicts als leeres Dict, damit apply(pd.Series) immer dieselben vier Spalten liefert.
+    sent = df["sentiment"].apply(lambda s: s if isinstance(s, dict) else {}).apply(pd.Series)
+    sent = sent.reindex(columns=list(SENTIMENT_KEYS)).astype("float64")
+    df = pd.concat([df.drop(columns=["sentiment"]), sent], axis=1)
+    agg = (
+        df.groupby("day")
+        .agg(
+            article_count=("title", "count"),
+            avg_polarity=("polarity", "mean"),
+            avg_neg=("neg", "mean"),
+            avg_neu=("neu", "mean"),
+            avg_pos=("pos", "mean"),
+        )
+        .reset_index()
+        .rename(columns={"day": "date"})
+    )
+    return agg.sort_values("date").reset_index(drop=True)
+
+
+def _assert_same(got: pd.DataFrame, expected: pd.DataFrame) -> None:
+    assert list(got.columns) == list(expected.columns)
+    assert list(got["date"]) == list(expected["date"])
+    np.testing.assert_array_equal(got["article_count"].to_numpy(), expected["article_count"].to_numpy())
+    cols = [f"avg_{key}" for key in SENTIMENT_KEYS]
+    np.testing.assert_allclose(got[cols].to_numpy(dtype=float), expected[cols].to_numpy(dtype=float), rtol=1e-12)
+
+
+@pytest.fixture
+def news_file(tmp_path):
+    path = tmp_path / "eodhd_news.jsonl"
+    path.write_text(NEWS_JSONL, encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("engine", _engines())
+@pytest.mark.parametrize("dedup", [True, False])
+def test_engines_match_apply_series_reference(news_file, engine, dedup):
+    got = build_daily_features(news_file, engine=engine, chunk_rows=3, dedup=dedup)
+    expected = _reference(NEWS_JSONL)
+    _assert_same(got, expected)
+    # Tag ohne Sentiment-Werte: Artikel zählen, Mittelwerte NaN.
+    day3 = got[got["date"] == pd.Timestamp("2024-03-03").date()].iloc[0]
+    assert day3["article_count"] == 2 and np.isnan(day3["avg_polarity"])
+
+
+@pytest.mark.parametrize("engine", _engines())
+def test_start_offset_reads_only_appended_lines(news_file, engine):
+    raw = NEWS_JSONL.encode("utf-8")
+    lines = raw.split(b"\n")
+    for k in range(len(lines)):
+        start = sum(len(line) + 1 for line in lines[:k])
+        agg = DailyNewsAggregator()
+        for chunk in iter_news_chunks(news_file, engine=engine, chunk_rows=2, start=start):
+            agg.update(chunk)
+        rest = raw[start:].decode("utf-8")
+        if not rest.strip():
+            assert agg.partials().empty
+            continue
+        _assert_same(agg.finish(), _reference(rest))
+
+
+@pytest.mark.parametrize("engine", _engines())
+def test_partials_merge_across_split_files(tmp_path, engine):
+    lines = NEWS_JSONL.split("\n")
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    first.write_text("\n".join(lines[:5]) + "\n", encoding="utf-8")
+    second.write_text("\n".join(lines[5:]), encoding="utf-8")
+
+    merged = DailyNewsAggregator()
+    for path in (second, first):  # Reihenfolge egal
+        part = DailyNewsAggregator()
+        for chunk in iter_news_chunks(path, engine=engine):
+            part.update(chunk)
+        merged.add_partials(part.partials())
+    _assert_same(merged.finish(), _reference(NEWS_JSONL))
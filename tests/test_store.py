@@ -0,0 +1,40 @@
+"""``join_price_features``: Prüfungen beim Join der Labels gegen den Feature-Store."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.store import _to_records, join_price_features
+
+
+@pytest.fixture
+def store() -> np.ndarray:
+    dates = pd.date_range("2024-01-01", periods=30)
+    close = 1.1 + 0.001 * np.arange(30)
+    df = pd.DataFrame({"date": dates, "Close": close, "ret_lag1": pd.Series(close).pct_change()})
+    return _to_records(df, ["Close", "ret_lag1"])
+
+
+def _labels(store: np.ndarray, rows: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({"date": store["date"][rows], "Close": store["Close"][rows], "label": "neutral"})
+
+
+def test_join_contiguous_subrange(store):
+    labels = _labels(store, np.arange(5, 25))
+    out = join_price_features(labels, store, ["ret_lag1"])
+    np.testing.assert_array_equal(out["ret_lag1"].to_numpy(), store["ret_lag1"][5:25])
+
+
+def test_join_refuses_label_gaps(store):
+    labels = _labels(store, np.r_[5:12, 14:25])
+    with pytest.raises(ValueError, match="nicht lückenlos"):
+        join_price_features(labels, store, ["ret_lag1"])
+
+
+def test_join_refuses_other_close(store):
+    labels = _labels(store, np.arange(5, 25))
+    labels["Close"] *= 1.01
+    with pytest.raises(ValueError, match="Close"):
+        join_price_features(labels, store, ["ret_lag1"])
@@ -0,0 +1,48 @@
+"""``ThresholdSurface.best`` gegen eine Schleife wie in den Trainings-Notebooks."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.models.threshold_search import DEFAULT_THRESHOLD_GRID, LABEL_CLASSES, cost_matrix, threshold_surface
+
+GRID = DEFAULT_THRESHOLD_GRID
+
+
+def _loop_best(p_signal, p_direction, labels, costs):
+    """Erste Kombination mit strikt größerem (gerundetem) P&L, Reihenfolge signal, down, up."""
+    code = {name: i for i, name in enumerate(LABEL_CLASSES)}
+    best = None
+    for s in GRID:
+        for d in GRID:
+            for u in GRID:
+                if d >= u:
+                    continue
+                pnl = 0.0
+                for p1, p2, y in zip(p_signal, p_direction, labels):
+                    pred = "neutral"
+                    if p1 >= s:
+                        pred = "up" if p2 >= u else ("down" if p2 <= d else "neutral")
+                    pnl += costs[code[y], code[pred]]
+                pnl = round(pnl, 9)
+                if best is None or pnl > best[0]:
+                    best = (pnl, s, d, u)
+    return best
+
+
+@pytest.mark.parametrize("seed", [*range(40), 104, 110, 179])
+def test_best_matches_loop_including_ties(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(20, 200))
+    # Auf 2 Stellen gerundete Wahrscheinlichkeiten und 0.1er-Kosten erzeugen viele Gleichstände.
+    p_signal, p_direction = rng.random(n).round(2), rng.random(n).round(2)
+    labels = rng.choice(np.array(LABEL_CLASSES), n)
+    costs = cost_matrix(0.004, -0.004, 0.003)
+
+    choice = threshold_surface(
+        p_signal, p_direction, labels, costs, signal_grid=GRID, down_grid=GRID, up_grid=GRID
+    ).best()
+    pnl, s, d, u = _loop_best(p_signal, p_direction, labels, costs)
+    assert (choice.signal, choice.down, choice.up) == (s, d, u)
+    assert choice.pnl == pytest.approx(pnl)
@@ -0,0 +1,196 @@
+"""Walk-Forward: Fold-Grenzen, Fold-Views, Warm-Start-Kürzung und ein kleiner End-to-End-Lauf."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from src.models.dataset import TrainingArrays
+from src.models.threshold_search import cost_matrix
+from src.models.train_xgboost_two_stage import train_xgb_binary
+from src.models.walk_forward import (
+    FoldBounds,
+    _warm_start_booster,
+    fold_bounds,
+    make_fold,
+    run_walk_forward,
+    walk_forward_folds,
+)
+
+XGB_PARAMS = {"n_estimators": 30, "max_depth": 2, "learning_rate": 0.3, "n_jobs": 1}
+
+
+def _dates(*ranges: tuple[str, str]) -> np.ndarray:
+    return np.concatenate([pd.bdate_range(a, b).to_numpy(dtype="M8[ns]") for a, b in ranges])
+
+
+def _ts(value: str) -> pd.Timestamp:
+    return pd.Timestamp(value)
+
+
+def test_fold_bounds_monthly_from_mid_month():
+    dates = _dates(("2023-01-02", "2024-04-17"))
+    bounds = fold_bounds(dates, start="2024-01-15")
+    assert [(b.test_start, b.test_end) for b in bounds] == [
+        (_ts("2024-01-15"), _ts("2024-02-01")),
+        (_ts("2024-02-01"), _ts("2024-03-01")),
+        (_ts("2024-03-01"), _ts("2024-04-01")),
+        (_ts("2024-04-01"), _ts("2024-04-18")),  # Datenende + 1 Tag
+    ]
+    assert all(b.window_start is None for b in bounds)
+
+
+def test_fold_bounds_skip_empty_periods_and_clip_end():
+    # Keine Daten im Februar und April 2024.
+    dates = _dates(("2023-06-01", "2024-01-31"), ("2024-03-04", "2024-03-29"), ("2024-05-01", "2024-07-31"))
+    bounds = fold_bounds(dates, start="2024-01-01", end="2024-06-10")
+    assert [(b.test_start, b.test_end) for b in bounds] == [
+        (_ts("2024-01-01"), _ts("2024-02-01")),
+        (_ts("2024-03-01"), _ts("2024-04-01")),
+        (_ts("2024-05-01"), _ts("2024-06-01")),
+        (_ts("2024-06-01"), _ts("2024-06-10")),
+    ]
+
+    quarterly = fold_bounds(dates, start="2024-01-01", end="2030-01-01", refit="Q")
+    assert [(b.test_start, b.test_end) for b in quarterly] == [
+        (_ts("2024-01-01"), _ts("2024-04-01")),
+        (_ts("2024-04-01"), _ts("2024-07-01")),
+        (_ts("2024-07-01"), _ts("2024-08-01")),  # end hinter den Daten → Datenende + 1 Tag
+    ]
+    assert fold_bounds(dates, start="2024-08-01") == []
+    assert fold_bounds(dates, start="2024-03-01", end="2024-03-01") == []
+    assert fold_bounds(dates[:0], start="2024-01-01") == []
+
+
+def test_fold_bounds_sliding_window_and_validation():
+    dates = _dates(("2020-01-01", "2024-03-29"))
+    bounds = fold_bounds(dates, start="2024-02-01", window="sliding", window_years=1.5)
+    assert [b.window_start for b in bounds] == [_ts("2022-08-01"), _ts("2022-09-01")]
+
+    with pytest.raises(ValueError):
+        fold_bounds(dates, start="2024-01-01", refit="W")
+    with pytest.raises(ValueError):
+        fold_bounds(dates, start="2024-01-01", window="rolling")
+    with pytest.raises(ValueError):
+        fold_bounds(dates, start="2024-01-01", window="sliding")
+
+
+def _frame(seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2021-01-04", "2024-04-30")
+    n = len(dates)
+    X = rng.normal(size=(n, 4))
+    signal = (np.abs(X[:, 0] + 0.3 * rng.normal(size=n)) > 0.6).astype(int)
+    up = (X[:, 1] + 0.3 * rng.normal(size=n)) > 0
+    label = np.where(signal == 0, "neutral", np.where(up, "up", "down")).astype(object)
+    direction = np.where(signal == 1, up.astype(float), np.nan)
+    df = pd.DataFrame({"date": dates, **{f"f{j}": X[:, j] for j in range(4)}})
+    df["label"], df["signal"], df["direction"] = label, signal, direction
+    return df
+
+
+@pytest.fixture(scope="module")
+def data() -> TrainingArrays:
+    return TrainingArrays.from_frame(_frame(), [f"f{j}" for j in range(4)])
+
+
+def test_make_fold_expanding_and_sliding(data):
+    bounds = FoldBounds(None, _ts("2024-02-01"), _ts("2024-03-01"))
+    fold = make_fold(data, bounds, train_frac_within_pretest=0.75)
+    n_pre = int(np.searchsorted(data.dates, np.datetime64("2024-02-01", "ns")))
+    assert len(fold.train) == int(n_pre * 0.75) and len(fold.val) == n_pre - int(n_pre * 0.75)
+    assert fold.train.dates[0] == data.dates[0]
+    assert fold.val.dates[-1] < np.datetime64("2024-02-01") <= fold.test.dates[0]
+    assert fold.test.dates[-1] < np.datetime64("2024-03-01")
+    assert len(fold.test) == 21 and fold.name == "2024-02-01"
+
+    sliding = make_fold(data, FoldBounds(_ts("2023-02-01"), _ts("2024-02-01"), _ts("2024-03-01")), 0.5)
+    first = int(np.searchsorted(data.dates, np.datetime64("2023-02-01", "ns")))
+    assert sliding.train.dates[0] == data.dates[first]
+    assert len(sliding.train) == int((n_pre - first) * 0.5)
+    assert len(sliding.train) + len(sliding.val) == n_pre - first
+    np.testing.assert_array_equal(sliding.test.X, fold.test.X)
+    # Views, keine Kopien
+    assert np.shares_memory(sliding.train.X, data.X)
+
+
+def test_warm_start_booster_is_cut_to_best_iteration(data):
+    fold = make_fold(data, FoldBounds(None, _ts("2024-01-01"), _ts("2024-02-01")))
+    noise = (np.arange(len(fold.val)) % 2).astype(int)  # Val-Labels ohne Bezug zu X → frühes Stoppen
+    model = train_xgb_binary(
+        fold.train, fold.train.signal, fold.val, noise, xgb_params={**XGB_PARAMS, "n_estimators": 200}
+    )
+    best = model.best_iteration
+    assert best + 1 < model.get_booster().num_boosted_rounds()
+
+    booster = _warm_start_booster(model)
+    assert booster.num_boosted_rounds() == best + 1
+    X = xgb.DMatrix(fold.test.X, feature_names=list(fold.test.feature_names))
+    np.testing.assert_allclose(booster.predict(X), model.predict_proba(fold.test.frame())[:, 1], rtol=1e-6)
+
+    full = train_xgb_binary(fold.train, fold.train.signal, None, None, xgb_params=XGB_PARAMS)
+    assert _warm_start_booster(full).num_boosted_rounds() == XGB_PARAMS["n_estimators"]
+    assert _warm_start_booster(None) is None
+
+
+def _check_predictions(preds: pd.DataFrame, folds) -> None:
+    test_dates = np.concatenate([fold.test.dates for fold in folds])
+    np.testing.assert_array_equal(preds["date"].to_numpy(dtype="M8[ns]"), test_dates)
+    assert list(preds["fold"].unique()) == [fold.name for fold in folds]
+    trade = preds["signal_prob"] >= preds["signal_threshold"]
+    assert (preds["signal_pred"] == trade.astype(int)).all()
+    down = trade & (preds["direction_prob_up"] <= preds["direction_threshold_down"])
+    up = trade & (preds["direction_prob_up"] >= preds["direction_threshold_up"])
+    expected = np.where(up, "up", np.where(down, "down", "neutral"))
+    np.testing.assert_array_equal(preds["combined_pred"], expected)
+    np.testing.assert_array_equal(preds["direction_pred_up"], np.select([up, down], [1, 0], -1))
+
+
+def test_run_walk_forward_end_to_end(data):
+    folds = walk_forward_folds(data, start="2024-01-15", end="2024-04-10", refit="M")
+    assert [fold.name for fold in folds] == ["2024-01-15", "2024-02-01", "2024-03-01", "2024-04-01"]
+    assert folds[-1].test.dates[-1] < np.datetime64("2024-04-10")
+
+    params = dict(signal_params=XGB_PARAMS, direction_params=XGB_PARAMS)
+    cold = run_walk_forward(folds, warm_start=False, **params)
+    warm = run_walk_forward(folds, warm_start=True, **params)
+    for preds in (cold, warm):
+        _check_predictions(preds, folds)
+        np.testing.assert_array_equal(preds["label_true"], np.concatenate([f.test.label_names() for f in folds]))
+        assert (preds["signal_threshold"] == 0.5).all()
+
+    # Erster Fold ohne Vorgänger: warm == kalt; danach unterscheiden sich die Modelle.
+    first = cold["fold"] == folds[0].name
+    np.testing.assert_allclose(warm.loc[first, "signal_prob"], cold.loc[first, "signal_prob"], rtol=1e-6)
+    assert not np.allclose(warm.loc[~first, "signal_prob"], cold.loc[~first, "signal_prob"])
+
+    # Kalter Fold = eigenständiges Training auf denselben Views.
+    fold = folds[2]
+    model = train_xgb_binary(fold.train, fold.train.signal, fold.val, fold.val.signal, xgb_params=XGB_PARAMS)
+    np.testing.assert_allclose(
+        cold.loc[cold["fold"] == fold.name, "signal_prob"],
+        model.predict_proba(fold.test.frame())[:, 1],
+        rtol=1e-5,
+        atol=1e-6,
+    )
+
+    # Signal sollte auf den synthetischen Daten deutlich besser als Zufall sein.
+    truth = cold["label_true"] != "neutral"
+    assert (cold["signal_pred"].astype(bool) == truth).mean() > 0.7
+
+    tuned = run_walk_forward(folds, warm_start=True, costs=cost_matrix(0.005, 0.005, 0.003), **params)
+    _check_predictions(tuned, folds)
+    assert tuned.groupby("fold")["signal_threshold"].nunique().eq(1).all()
+
+
+def test_missing_test_labels_are_written_as_none():
+    df = _frame(1)
+    test_rows = df.index[df["date"] >= "2024-03-01"][:3]
+    df.loc[test_rows, "label"] = None
+    data = TrainingArrays.from_frame(df, [f"f{j}" for j in range(4)])
+    folds = walk_forward_folds(data, start="2024-03-01", end="2024-04-01")
+    preds = run_walk_forward(folds, signal_params=XGB_PARAMS, direction_params=XGB_PARAMS)
+    assert preds["label_true"].iloc[:3].isna().all()
+    assert preds["label_true"].iloc[3:].isin(["neutral", "up", "down"]).all()